@@ -83,6 +83,7 @@ def get_costs_info(request: HttpRequest) -> Response:
 
         total_nb_tokens_input = 0
         total_nb_tokens_output = 0
+        total_nb_tokens_cache_read = 0
         user_count = User.objects.filter(is_superuser=False).count()
 
         if user_count == 0:
@@ -97,6 +98,7 @@ def get_costs_info(request: HttpRequest) -> Response:
         for statistic in Statistics.objects.all():
             total_nb_tokens_input += statistic.nb_tokens_input
             total_nb_tokens_output += statistic.nb_tokens_output
+            total_nb_tokens_cache_read += statistic.nb_tokens_cache_read
 
             if statistic.nb_tokens_input > max_nb_tokens_input:
                 max_nb_tokens_input = statistic.nb_tokens_input
@@ -108,8 +110,10 @@ def get_costs_info(request: HttpRequest) -> Response:
             if statistic.nb_tokens_output < min_nb_tokens_output:
                 min_nb_tokens_output = statistic.nb_tokens_output
 
-        # Estimate costs
-        estimated_cost_input = total_nb_tokens_input / 1_000_000 * 0.075
+        # Estimate costs, tokens read from the prompt cache are billed 25% of the input price
+        estimated_cost_input = (
+            total_nb_tokens_input - total_nb_tokens_cache_read
+        ) / 1_000_000 * 0.075 + total_nb_tokens_cache_read / 1_000_000 * 0.01875
         estimated_cost_output = total_nb_tokens_output / 1_000_000 * 0.30
         total_estimated_cost = estimated_cost_input + estimated_cost_output
 
@@ -118,7 +122,7 @@ def get_costs_info(request: HttpRequest) -> Response:
         avg_tokens_output_per_user = total_nb_tokens_output / user_count
 
         # Costs per user
-        avg_cost_input_per_user = avg_tokens_input_per_user / 1_000_000 * 0.075
+        avg_cost_input_per_user = estimated_cost_input / user_count
         avg_cost_output_per_user = avg_tokens_output_per_user / 1_000_000 * 0.30
         avg_total_cost_per_user = avg_cost_input_per_user + avg_cost_output_per_user
 
@@ -134,6 +138,7 @@ def get_costs_info(request: HttpRequest) -> Response:
                     "maxTokensInput": max_nb_tokens_input,
                     "totalTokensInput": total_nb_tokens_input,
                     "totalTokensOutput": total_nb_tokens_output,
+                    "totalTokensCacheRead": total_nb_tokens_cache_read,
                     "totalEstimatedCostInput": estimated_cost_input,
                     "totalEstimatedCostOutput": estimated_cost_output,
                     "totalEstimatedCost": total_estimated_cost,
@@ -279,7 +284,10 @@ def search_user_info(request: HttpRequest) -> Response:
 
         nb_tokens_input = statistics.nb_tokens_input
         nb_tokens_output = statistics.nb_tokens_output
-        price_tokens_input = nb_tokens_input / 1_000_000 * 0.075
+        nb_tokens_cache_read = statistics.nb_tokens_cache_read
+        price_tokens_input = (
+            nb_tokens_input - nb_tokens_cache_read
+        ) / 1_000_000 * 0.075 + nb_tokens_cache_read / 1_000_000 * 0.01875
         price_tokens_output = nb_tokens_output / 1_000_000 * 0.30
         computed_stats = compute_statistics(statistics, email_stats_param)
 
@@ -317,6 +325,7 @@ def search_user_info(request: HttpRequest) -> Response:
                 "nbCreatedCategories": nb_created_categories,
                 "nbTokensInput": nb_tokens_input,
                 "nbTokensOutput": nb_tokens_output,
+                "nbTokensCacheRead": nb_tokens_cache_read,
                 "estimatedCostUser": {
                     "priceTokensInput": price_tokens_input,
                     "priceTokensOutput": price_tokens_output,
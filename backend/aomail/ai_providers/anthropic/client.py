@@ -10,6 +10,7 @@ Features:
 - ✅ generate_email_response: Crafts responses based on input type.
 - ✅ search_emails: Searches and structures email data.
 - ✅ categorize_and_summarize_email: Categorizes and summarizes an email.
+- ✅ categorize_and_summarize_emails: Categorizes and summarizes several emails in one request.
 - ✅ review_user_description: Reviews a user-provided description and provides validation and feedback.
 - ✅ generate_categories_scratch: Generates categories based on user topics for email classification.
 - ✅ determine_action_scenario: Determines the scenario based on input flags and user request.
@@ -24,28 +25,39 @@ Features:
 import json
 import logging
 import os
-import re
 import anthropic
-from datetime import datetime
-from aomail.ai_providers.utils import count_corrections
-from aomail.ai_providers.prompts import (
-    CHAT_HISTORY_TEXT,
-    CORRECT_MAIL_LANGUAGE_MISTAKES_PROMPT,
-    DETERMINE_ACTION_SCENARIO_PROMPT,
-    EXTRACT_CONTACTS_RECIPIENTS_PROMPT,
-    GENERATE_CATEGORIES_SCRATCH_PROMPT,
-    GENERATE_PRIORITIZATION_SCRATCH_PROMPT,
-    GET_ANSWER_PROMPT,
-    IMPROVE_EMAIL_COPYWRITING_PROMPT,
-    RELEVANCE_LIST,
-    RESPONSE_LIST,
-    REVIEW_USER_DESCRIPTION_PROMPT,
-    SEARCH_EMAILS_PROMPT,
-    SELECT_CATEGORIES_PROMPT,
-    SIGNATURE_INSTRUCTION_WITH_CONTENT,
-    SIGNATURE_INSTRUCTION_WITHOUT_CONTENT,
-    SUMMARIZE_CONVERSATION_PROMPT,
-    SUMMARIZE_EMAIL_PROMPT,
+from typing import AsyncIterator
+from aomail.ai_providers.clients import (
+    get_async_client,
+    get_client,
+    get_http_limits,
+)
+from aomail.ai_providers import rate_limiter
+from aomail.ai_providers.utils import (
+    count_corrections,
+    estimate_tokens,
+)
+from aomail.ai_providers.prompt_formatters import (
+    format_categorize_and_summarize_email_prompt,
+    format_categorize_and_summarize_emails_prompt,
+    format_correct_mail_language_mistakes_prompt,
+    format_determine_action_scenario_prompt,
+    format_enrich_email_prompt,
+    format_extract_contacts_recipients_prompt,
+    format_generate_categories_scratch_prompt,
+    format_generate_email_prompt,
+    format_generate_email_response_prompt,
+    format_generate_prioritization_scratch_prompt,
+    format_generate_response_keywords_prompt,
+    format_get_answer_prompt,
+    format_improve_draft_prompt,
+    format_improve_email_copywriting_prompt,
+    format_improve_email_response_prompt,
+    format_review_user_description_prompt,
+    format_search_emails_prompt,
+    format_select_categories_prompt,
+    format_summarize_conversation_prompt,
+    format_summarize_email_prompt,
 )
 
 
@@ -54,35 +66,164 @@ ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 
 
 ######################## TEXT PROCESSING UTILITIES ########################
+def get_anthropic_client() -> anthropic.Anthropic:
+    """Returns the Anthropic client shared by the process"""
+    return get_client(
+        "anthropic",
+        None,
+        lambda: anthropic.Anthropic(
+            api_key=ANTHROPIC_API_KEY,
+            http_client=anthropic.DefaultHttpxClient(limits=get_http_limits()),
+            max_retries=0,
+        ),
+    )
+
+
+def get_messages(formatted_prompt: str, cached_prefix: str = "") -> list[dict]:
+    """Returns the messages of a prompt, with a cache breakpoint after its cached prefix"""
+    if not cached_prefix:
+        return [{"role": "user", "content": formatted_prompt}]
+
+    content = [
+        {
+            "type": "text",
+            "text": cached_prefix,
+            "cache_control": {"type": "ephemeral"},
+        }
+    ]
+    if formatted_prompt[len(cached_prefix) :]:
+        content.append({"type": "text", "text": formatted_prompt[len(cached_prefix) :]})
+    return [{"role": "user", "content": content}]
+
+
+def get_input_tokens(usage: anthropic.types.Usage) -> int:
+    """Returns the input tokens of a response, including the tokens read from and written to the prompt cache"""
+    return (
+        usage.input_tokens
+        + (usage.cache_read_input_tokens or 0)
+        + (usage.cache_creation_input_tokens or 0)
+    )
+
+
 def get_prompt_response(
-    formatted_prompt: str, model: str = "claude-3-5-haiku-latest"
+    formatted_prompt: str,
+    model: str = "claude-3-5-haiku-latest",
+    cached_prefix: str = "",
 ) -> anthropic.types.message.Message:
-    """Returns the prompt response"""
+    """Returns the prompt response, caching the cached prefix of the prompt for the next requests"""
     if not model:
         model = "claude-3-5-haiku-latest"
-    client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
-    response = client.messages.create(
-        model=model,
-        max_tokens=4096,
-        temperature=0.0,
-        messages=[{"role": "user", "content": formatted_prompt}],
+    client = get_anthropic_client()
+    response = rate_limiter.call(
+        "anthropic",
+        model,
+        estimate_tokens(formatted_prompt),
+        lambda: client.messages.create(
+            model=model,
+            max_tokens=4096,
+            temperature=0.0,
+            messages=get_messages(formatted_prompt, cached_prefix),
+        ),
+        lambda response: response.usage.input_tokens + response.usage.output_tokens,
     )
     return response
 
 
 def get_prompt_response_with_tokens(
-    formatted_prompt: str, model: str = "claude-3-5-haiku-latest"
+    formatted_prompt: str,
+    model: str = "claude-3-5-haiku-latest",
+    cached_prefix: str = "",
 ) -> dict:
-    response = get_prompt_response(formatted_prompt, model)
+    response = get_prompt_response(formatted_prompt, model, cached_prefix)
     result_json = json.loads(response.content[0].text)
-    result_json["tokens_input"] = response.usage.input_tokens
+    result_json["tokens_input"] = get_input_tokens(response.usage)
     result_json["tokens_output"] = response.usage.output_tokens
+    if cached_prefix:
+        result_json["tokens_cache_read"] = response.usage.cache_read_input_tokens or 0
 
     return result_json
 
 
+def get_async_anthropic_client() -> anthropic.AsyncAnthropic:
+    """Returns the async Anthropic client of the running event loop"""
+    return get_async_client(
+        "anthropic",
+        None,
+        lambda: anthropic.AsyncAnthropic(
+            api_key=ANTHROPIC_API_KEY,
+            http_client=anthropic.DefaultAsyncHttpxClient(limits=get_http_limits()),
+            max_retries=0,
+        ),
+    )
+
+
+async def async_get_prompt_text(
+    formatted_prompt: str,
+    model: str = "claude-3-5-haiku-latest",
+    cached_prefix: str = "",
+) -> dict:
+    """Returns the text and the tokens of the prompt response without blocking the event loop"""
+    if not model:
+        model = "claude-3-5-haiku-latest"
+    client = get_async_anthropic_client()
+    response = await rate_limiter.async_call(
+        "anthropic",
+        model,
+        estimate_tokens(formatted_prompt),
+        lambda: client.messages.create(
+            model=model,
+            max_tokens=4096,
+            temperature=0.0,
+            messages=get_messages(formatted_prompt, cached_prefix),
+        ),
+        lambda response: response.usage.input_tokens + response.usage.output_tokens,
+    )
+    result = {
+        "text": response.content[0].text,
+        "tokens_input": get_input_tokens(response.usage),
+        "tokens_output": response.usage.output_tokens,
+    }
+    if cached_prefix:
+        result["tokens_cache_read"] = response.usage.cache_read_input_tokens or 0
+    return result
+
+
+async def async_stream_prompt_text(
+    formatted_prompt: str, model: str = "claude-3-5-haiku-latest"
+) -> AsyncIterator[dict]:
+    """Yields the text deltas of the prompt response as they are generated, then its tokens"""
+    if not model:
+        model = "claude-3-5-haiku-latest"
+    client = get_async_anthropic_client()
+    stream = await rate_limiter.async_call(
+        "anthropic",
+        model,
+        estimate_tokens(formatted_prompt),
+        lambda: client.messages.create(
+            model=model,
+            max_tokens=4096,
+            temperature=0.0,
+            messages=[{"role": "user", "content": formatted_prompt}],
+            stream=True,
+        ),
+        lambda stream: estimate_tokens(formatted_prompt),
+    )
+    tokens_input = 0
+    async for event in stream:
+        if event.type == "message_start":
+            tokens_input = event.message.usage.input_tokens
+        elif event.type == "content_block_delta" and event.delta.type == "text_delta":
+            yield {"text": event.delta.text, "tokens_input": 0, "tokens_output": 0}
+        elif event.type == "message_delta":
+            yield {
+                "text": "",
+                "tokens_input": tokens_input,
+                "tokens_output": event.usage.output_tokens,
+            }
+
+
 def extract_contacts_recipients(query: str, llm_model: str = None) -> dict:
-    formatted_prompt = EXTRACT_CONTACTS_RECIPIENTS_PROMPT.format(query=query)
+    formatted_prompt = format_extract_contacts_recipients_prompt(query)
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
@@ -93,8 +234,8 @@ def generate_response_keywords(
     input_subject: str,
     llm_model: str = None,
 ) -> dict:
-    formatted_prompt = base_prompt.format(
-        input_subject=input_subject, input_email=input_email
+    formatted_prompt = format_generate_response_keywords_prompt(
+        base_prompt, input_email, input_subject
     )
 
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
@@ -111,21 +252,8 @@ def generate_email(
     signature: str = "",
     llm_model: str = None,
 ) -> dict:
-    has_content = bool(signature) and bool(re.sub(r"<[^>]+>", "", signature).strip())
-    if has_content:
-        signature_instruction = SIGNATURE_INSTRUCTION_WITH_CONTENT.format(
-            signature=signature
-        )
-    else:
-        signature_instruction = SIGNATURE_INSTRUCTION_WITHOUT_CONTENT
-
-    formatted_prompt = base_prompt.format(
-        agent_settings=json.dumps(agent_settings),
-        length=length,
-        formality=formality,
-        language=language,
-        input_data=input_data,
-        signature_instruction=signature_instruction,
+    formatted_prompt = format_generate_email_prompt(
+        base_prompt, input_data, length, formality, language, agent_settings, signature
     )
 
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
@@ -136,9 +264,7 @@ def correct_mail_language_mistakes(
     subject: str,
     llm_model: str = None,
 ) -> dict:
-    formatted_prompt = CORRECT_MAIL_LANGUAGE_MISTAKES_PROMPT.format(
-        subject=subject, body=body
-    )
+    formatted_prompt = format_correct_mail_language_mistakes_prompt(body, subject)
     response = get_prompt_response(formatted_prompt, llm_model)
     clear_text = response.content[0].text.strip()
     result_json = json.loads(clear_text)
@@ -162,8 +288,8 @@ def correct_mail_language_mistakes(
 def improve_email_copywriting(
     email_subject: str, email_body: str, llm_model: str = None
 ) -> dict:
-    formatted_prompt = IMPROVE_EMAIL_COPYWRITING_PROMPT.format(
-        email_subject=email_subject, email_body=email_body
+    formatted_prompt = format_improve_email_copywriting_prompt(
+        email_subject, email_body
     )
     response = get_prompt_response(formatted_prompt, llm_model)
     feedback_ai = response.content[0].text.strip()
@@ -184,20 +310,13 @@ def generate_email_response(
     signature: str = "",
     llm_model: str = None,
 ) -> dict:
-    has_content = bool(signature) and bool(re.sub(r"<[^>]+>", "", signature).strip())
-    if has_content:
-        signature_instruction = SIGNATURE_INSTRUCTION_WITH_CONTENT.format(
-            signature=signature
-        )
-    else:
-        signature_instruction = SIGNATURE_INSTRUCTION_WITHOUT_CONTENT
-
-    formatted_prompt = base_prompt.format(
-        agent_settings=json.dumps(agent_settings),
-        input_subject=input_subject,
-        input_body=input_body,
-        user_instruction=user_instruction,
-        signature_instruction=signature_instruction,
+    formatted_prompt = format_generate_email_response_prompt(
+        base_prompt,
+        input_subject,
+        input_body,
+        user_instruction,
+        agent_settings,
+        signature,
     )
     response = get_prompt_response(formatted_prompt, llm_model)
     body = response.content[0].text.strip()
@@ -221,45 +340,91 @@ def categorize_and_summarize_email(
     useless_guidelines: str,
     llm_model: str = None,
 ) -> dict:
-    formatted_prompt = base_prompt.format(
-        sender=sender,
-        subject=subject,
-        decoded_data=decoded_data,
-        user_description=user_description,
-        category_dict=category_dict,
-        response_list=RESPONSE_LIST,
-        relevance_list=RELEVANCE_LIST,
-        important_guidelines=important_guidelines,
-        informative_guidelines=informative_guidelines,
-        useless_guidelines=useless_guidelines,
+    cached_prefix, email_prompt = format_categorize_and_summarize_email_prompt(
+        base_prompt,
+        subject,
+        decoded_data,
+        category_dict,
+        user_description,
+        sender,
+        important_guidelines,
+        informative_guidelines,
+        useless_guidelines,
+    )
+    return get_prompt_response_with_tokens(
+        cached_prefix + email_prompt, llm_model, cached_prefix=cached_prefix
     )
-    return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
-def search_emails(query: str, language: str, llm_model: str = None) -> dict:
-    today = datetime.now().strftime("%m-%d-%Y")
-    formatted_prompt = SEARCH_EMAILS_PROMPT.format(
-        query=query, today=today, language=language
+def categorize_and_summarize_emails(
+    emails: list[dict],
+    category_dict: dict,
+    user_description: str,
+    important_guidelines: str,
+    informative_guidelines: str,
+    useless_guidelines: str,
+    llm_model: str = None,
+) -> dict:
+    cached_prefix, email_prompt = format_categorize_and_summarize_emails_prompt(
+        emails,
+        category_dict,
+        user_description,
+        important_guidelines,
+        informative_guidelines,
+        useless_guidelines,
     )
+    return get_prompt_response_with_tokens(
+        cached_prefix + email_prompt, llm_model, cached_prefix=cached_prefix
+    )
+
+
+def enrich_email(
+    subject: str,
+    decoded_data: str,
+    sender: str,
+    category_dict: dict,
+    user_description: str,
+    important_guidelines: str,
+    informative_guidelines: str,
+    useless_guidelines: str,
+    categories: dict,
+    language: str,
+    is_reply: bool,
+    llm_model: str = None,
+) -> dict:
+    cached_prefix, email_prompt = format_enrich_email_prompt(
+        subject,
+        decoded_data,
+        sender,
+        category_dict,
+        user_description,
+        important_guidelines,
+        informative_guidelines,
+        useless_guidelines,
+        categories,
+        language,
+        is_reply,
+    )
+    return get_prompt_response_with_tokens(
+        cached_prefix + email_prompt, llm_model, cached_prefix=cached_prefix
+    )
+
+
+def search_emails(query: str, language: str, llm_model: str = None) -> dict:
+    formatted_prompt = format_search_emails_prompt(query, language)
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
 def review_user_description(user_description: str, llm_model: str = None) -> dict:
-    formatted_prompt = REVIEW_USER_DESCRIPTION_PROMPT.format(
-        user_description=user_description
-    )
+    formatted_prompt = format_review_user_description_prompt(user_description)
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
 def generate_categories_scratch(
     user_topics: list | str, chat_history: list = None, llm_model: str = None
 ) -> dict:
-    chat_history_text = (
-        CHAT_HISTORY_TEXT.format(chat_history=chat_history) if chat_history else ""
-    )
-    formatted_prompt = GENERATE_CATEGORIES_SCRATCH_PROMPT.format(
-        user_topics=user_topics,
-        chat_history_text=chat_history_text,
+    formatted_prompt = format_generate_categories_scratch_prompt(
+        user_topics, chat_history
     )
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
@@ -267,9 +432,7 @@ def generate_categories_scratch(
 def generate_prioritization_scratch(
     user_input: dict | str, llm_model: str = None
 ) -> dict:
-    formatted_prompt = GENERATE_PRIORITIZATION_SCRATCH_PROMPT.format(
-        user_input=user_input
-    )
+    formatted_prompt = format_generate_prioritization_scratch_prompt(user_input)
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
@@ -283,9 +446,7 @@ def determine_action_scenario(
 ) -> dict:
     result_json = {"tokens_input": 0, "tokens_output": 0, "scenario": 5}
     if not destinary and not subject and (not email_content or is_only_signature):
-        formatted_prompt = DETERMINE_ACTION_SCENARIO_PROMPT.format(
-            user_request=user_request
-        )
+        formatted_prompt = format_determine_action_scenario_prompt(user_request)
         response = get_prompt_response_with_tokens(formatted_prompt, llm_model)
         try:
             scenario = response.get("scenario", 5)
@@ -326,13 +487,8 @@ def improve_email_response(
     agent_settings: dict,
     llm_model: str = None,
 ) -> dict:
-    formatted_prompt = base_prompt.format(
-        importance=importance,
-        subject=subject,
-        body=body,
-        history=history,
-        user_input=user_input,
-        agent_settings=agent_settings,
+    formatted_prompt = format_improve_email_response_prompt(
+        base_prompt, importance, subject, body, history, user_input, agent_settings
     )
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
@@ -349,32 +505,29 @@ def improve_draft(
     formality: str,
     llm_model: str = None,
 ) -> dict:
-    formatted_prompt = base_prompt.format(
-        language=language,
-        agent_settings=agent_settings,
-        subject=subject,
-        body=body,
-        history=history,
-        user_input=user_input,
-        length=length,
-        formality=formality,
+    formatted_prompt = format_improve_draft_prompt(
+        base_prompt,
+        language,
+        agent_settings,
+        subject,
+        body,
+        history,
+        user_input,
+        length,
+        formality,
     )
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
 def select_categories(categories: str, question: str, llm_model: str = None) -> dict:
-    formatted_prompt = SELECT_CATEGORIES_PROMPT.format(
-        categories=categories, question=question
-    )
+    formatted_prompt = format_select_categories_prompt(categories, question)
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
 def get_answer(
     keypoints: dict, question: str, language: str, llm_model: str = None
 ) -> dict:
-    formatted_prompt = GET_ANSWER_PROMPT.format(
-        keypoints=keypoints, question=question, language=language
-    )
+    formatted_prompt = format_get_answer_prompt(keypoints, question, language)
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
@@ -386,12 +539,8 @@ def summarize_conversation(
     language: str,
     llm_model: str = None,
 ) -> dict:
-    formatted_prompt = SUMMARIZE_CONVERSATION_PROMPT.format(
-        subject=subject,
-        body=body,
-        categories=categories,
-        user_description=user_description,
-        language=language,
+    formatted_prompt = format_summarize_conversation_prompt(
+        subject, body, user_description, categories, language
     )
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
@@ -404,11 +553,7 @@ def summarize_email(
     language: str,
     llm_model: str = None,
 ) -> dict:
-    formatted_prompt = SUMMARIZE_EMAIL_PROMPT.format(
-        subject=subject,
-        body=body,
-        categories=categories,
-        user_description=user_description,
-        language=language,
+    formatted_prompt = format_summarize_email_prompt(
+        subject, body, user_description, categories, language
     )
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
@@ -0,0 +1,599 @@
+"""
+Async counterparts of the `llm_functions` entry points, built on the async SDKs of the providers.
+
+Each function takes the same arguments and returns the same result as its `llm_functions`
+counterpart, without blocking the event loop, so ingestion and the ASGI views can run many LLM
+calls concurrently from one event loop (e.g. with `asyncio.gather`) instead of one thread per call.
+
+Prompts are built by `prompt_formatters`, like in the synchronous provider clients; each provider module
+only exposes the async transports `async_get_prompt_text` and `async_stream_prompt_text` (see `streaming`).
+Every function accepts `allow_fallback=True` to fail over to the fallback provider (see `router`).
+
+Features:
+- ✅ extract_contacts_recipients: Categorizes email recipients.
+- ✅ generate_response_keywords: Suggests keywords for email responses.
+- ✅ generate_email: Creates emails per user guidelines.
+- ✅ correct_mail_language_mistakes: Fixes spelling and grammar errors.
+- ✅ improve_email_copywriting: Suggests improvements for email copywriting.
+- ✅ generate_email_response: Crafts responses based on input type.
+- ✅ search_emails: Searches and structures email data.
+- ✅ categorize_and_summarize_email: Categorizes and summarizes an email.
+- ✅ categorize_and_summarize_emails: Categorizes and summarizes several emails in one request.
+- ✅ enrich_email: Categorizes, summarizes and extracts the keypoints of an email in one request.
+- ✅ review_user_description: Reviews a user-provided description and provides validation and feedback.
+- ✅ generate_categories_scratch: Generates categories based on user topics for email classification.
+- ✅ generate_prioritization_scratch: Generates prioritization guidelines based on user input.
+- ✅ determine_action_scenario: Determines the scenario based on input flags and user request.
+- ✅ improve_email_response: Improves an email response based on user feedback.
+- ✅ improve_draft: Improves a draft email based on user feedback.
+- ✅ select_categories: Selects categories based on user input.
+- ✅ get_answer: Gets an answer based on user input.
+- ✅ summarize_conversation: Summarizes a conversation.
+- ✅ summarize_email: Summarizes an email.
+"""
+
+import logging
+from types import ModuleType
+from aomail.ai_providers.anthropic import client as claude
+from aomail.ai_providers.google import client as gemini
+from aomail.ai_providers.mistral import client as mistral_client
+from aomail.ai_providers.openai import client as openai_client
+from aomail.ai_providers.groq import client as groq_client
+from aomail.ai_providers.deepseek import client as deepseek_client
+from aomail.ai_providers.mock import client as mock_client
+from aomail.ai_providers.router import routed_llm_call
+from aomail.ai_providers.utils import (
+    count_corrections,
+    ensure_proper_spacing,
+    extract_json_from_response,
+)
+from aomail.ai_providers.prompt_formatters import (
+    format_categorize_and_summarize_email_prompt,
+    format_categorize_and_summarize_emails_prompt,
+    format_correct_mail_language_mistakes_prompt,
+    format_determine_action_scenario_prompt,
+    format_enrich_email_prompt,
+    format_extract_contacts_recipients_prompt,
+    format_generate_categories_scratch_prompt,
+    format_generate_email_prompt,
+    format_generate_email_response_prompt,
+    format_generate_prioritization_scratch_prompt,
+    format_generate_response_keywords_prompt,
+    format_get_answer_prompt,
+    format_improve_draft_prompt,
+    format_improve_email_copywriting_prompt,
+    format_improve_email_response_prompt,
+    format_review_user_description_prompt,
+    format_search_emails_prompt,
+    format_select_categories_prompt,
+    format_summarize_conversation_prompt,
+    format_summarize_email_prompt,
+)
+
+
+LOGGER = logging.getLogger(__name__)
+# providers receiving the cached prefix of the categorization prompts (see `utils.format_cacheable_prompt`)
+PROMPT_CACHING_PROVIDERS = ("anthropic", "google", "openai", "deepseek")
+
+
+######################## TEXT PROCESSING UTILITIES ########################
+def get_provider_client(llm_provider: str) -> ModuleType:
+    """
+    Returns the client module of an LLM provider.
+
+    Args:
+        llm_provider (str): The LLM provider.
+
+    Returns:
+        ModuleType: The client module, exposing `async_get_prompt_text` and `async_stream_prompt_text`.
+    """
+    if llm_provider == "anthropic":
+        return claude
+    elif llm_provider == "google":
+        return gemini
+    elif llm_provider == "mistral":
+        return mistral_client
+    elif llm_provider == "openai":
+        return openai_client
+    elif llm_provider == "groq":
+        return groq_client
+    elif llm_provider == "deepseek":
+        return deepseek_client
+    elif llm_provider == "mock":
+        return mock_client
+    else:
+        raise ValueError(f"Unsupported LLM provider: {llm_provider}")
+
+
+async def get_prompt_text(
+    formatted_prompt: str, llm_provider: str, llm_model: str = None, **kwargs
+) -> dict:
+    """
+    Sends a prompt to an LLM provider.
+
+    Args:
+        formatted_prompt (str): The prompt.
+        llm_provider (str): The LLM provider.
+        llm_model (str): The model, None for the default model of the provider.
+        **kwargs: Provider-specific options, such as max_output_tokens for Gemini.
+
+    Returns:
+        dict: The response 'text', 'tokens_input' and 'tokens_output'.
+    """
+    client = get_provider_client(llm_provider)
+    return await client.async_get_prompt_text(formatted_prompt, llm_model, **kwargs)
+
+
+async def get_prompt_response_with_tokens(
+    formatted_prompt: str, llm_provider: str, llm_model: str = None, **kwargs
+) -> dict:
+    """
+    Sends a prompt to an LLM provider and parses the JSON response.
+
+    Args:
+        formatted_prompt (str): The prompt.
+        llm_provider (str): The LLM provider.
+        llm_model (str): The model, None for the default model of the provider.
+        **kwargs: Provider-specific options, such as max_output_tokens for Gemini.
+
+    Returns:
+        dict: The parsed JSON response with 'tokens_input' and 'tokens_output', and 'tokens_cache_read'
+              if the prompt has a cached prefix.
+    """
+    response = await get_prompt_text(
+        formatted_prompt, llm_provider, llm_model, **kwargs
+    )
+    result_json = extract_json_from_response(response["text"])
+    result_json["tokens_input"] = response["tokens_input"]
+    result_json["tokens_output"] = response["tokens_output"]
+    if "tokens_cache_read" in response:
+        result_json["tokens_cache_read"] = response["tokens_cache_read"]
+    return result_json
+
+
+@routed_llm_call
+async def extract_contacts_recipients(
+    query: str, llm_provider: str = "google", llm_model: str = None
+) -> dict[str, list]:
+    """Async counterpart of `llm_functions.extract_contacts_recipients`."""
+    formatted_prompt = format_extract_contacts_recipients_prompt(query)
+    return await get_prompt_response_with_tokens(
+        formatted_prompt, llm_provider, llm_model
+    )
+
+
+# ----------------------- PREPROCESSING REPLY EMAIL -----------------------#
+@routed_llm_call
+async def generate_response_keywords(
+    base_prompt: str,
+    input_email: str,
+    input_subject: str,
+    llm_provider: str = "google",
+    llm_model: str = None,
+) -> dict:
+    """Async counterpart of `llm_functions.generate_response_keywords`."""
+    formatted_prompt = format_generate_response_keywords_prompt(
+        base_prompt, input_email, input_subject
+    )
+    return await get_prompt_response_with_tokens(
+        formatted_prompt, llm_provider, llm_model
+    )
+
+
+######################## WRITING ########################
+@routed_llm_call
+async def generate_email(
+    base_prompt: str,
+    input_data: str,
+    length: str,
+    formality: str,
+    language: str,
+    agent_settings: dict,
+    signature: str = "",
+    llm_provider: str = "google",
+    llm_model: str = None,
+) -> dict:
+    """Async counterpart of `llm_functions.generate_email`."""
+    formatted_prompt = format_generate_email_prompt(
+        base_prompt, input_data, length, formality, language, agent_settings, signature
+    )
+    result_json = await get_prompt_response_with_tokens(
+        formatted_prompt, llm_provider, llm_model
+    )
+
+    if llm_provider == "google" and "body" in result_json:
+        result_json["body"] = ensure_proper_spacing(result_json["body"], signature)
+
+    return result_json
+
+
+@routed_llm_call
+async def correct_mail_language_mistakes(
+    body: str, subject: str, llm_provider: str = "google", llm_model: str = None
+) -> dict:
+    """Async counterpart of `llm_functions.correct_mail_language_mistakes`."""
+    formatted_prompt = format_correct_mail_language_mistakes_prompt(body, subject)
+    result_json = await get_prompt_response_with_tokens(
+        formatted_prompt, llm_provider, llm_model
+    )
+
+    corrected_subject = result_json["subject"]
+    corrected_body = result_json["body"]
+
+    num_corrections = count_corrections(
+        subject, body, corrected_subject, corrected_body
+    )
+
+    return {
+        "correctedSubject": corrected_subject,
+        "correctedBody": corrected_body,
+        "numCorrections": num_corrections,
+        "tokens_input": result_json["tokens_input"],
+        "tokens_output": result_json["tokens_output"],
+    }
+
+
+@routed_llm_call
+async def improve_email_copywriting(
+    email_subject: str,
+    email_body: str,
+    llm_provider: str = "google",
+    llm_model: str = None,
+) -> dict:
+    """Async counterpart of `llm_functions.improve_email_copywriting`."""
+    formatted_prompt = format_improve_email_copywriting_prompt(
+        email_subject, email_body
+    )
+    response = await get_prompt_text(formatted_prompt, llm_provider, llm_model)
+
+    return {
+        "feedback_ai": response["text"].strip(),
+        "tokens_input": response["tokens_input"],
+        "tokens_output": response["tokens_output"],
+    }
+
+
+@routed_llm_call
+async def generate_email_response(
+    base_prompt: str,
+    input_subject: str,
+    input_body: str,
+    user_instruction: str,
+    agent_settings: dict,
+    signature: str = "",
+    llm_provider: str = "google",
+    llm_model: str = None,
+) -> dict:
+    """Async counterpart of `llm_functions.generate_email_response`."""
+    formatted_prompt = format_generate_email_response_prompt(
+        base_prompt,
+        input_subject,
+        input_body,
+        user_instruction,
+        agent_settings,
+        signature,
+    )
+
+    if llm_provider == "google":
+        result_json = await get_prompt_response_with_tokens(
+            formatted_prompt, llm_provider, llm_model
+        )
+        result_json["body"] = ensure_proper_spacing(
+            result_json.get("body", ""), signature
+        )
+        return result_json
+
+    response = await get_prompt_text(formatted_prompt, llm_provider, llm_model)
+    return {
+        "body": response["text"].strip(),
+        "tokens_input": response["tokens_input"],
+        "tokens_output": response["tokens_output"],
+    }
+
+
+@routed_llm_call
+async def categorize_and_summarize_email(
+    base_prompt: str,
+    subject: str,
+    decoded_data: str,
+    category_dict: dict,
+    user_description: str,
+    sender: str,
+    important_guidelines: str,
+    informative_guidelines: str,
+    useless_guidelines: str,
+    llm_provider: str = "google",
+    llm_model: str = None,
+) -> dict:
+    """Async counterpart of `llm_functions.categorize_and_summarize_email`."""
+    cached_prefix, email_prompt = format_categorize_and_summarize_email_prompt(
+        base_prompt,
+        subject,
+        decoded_data,
+        category_dict,
+        user_description,
+        sender,
+        important_guidelines,
+        informative_guidelines,
+        useless_guidelines,
+    )
+    kwargs = (
+        {"cached_prefix": cached_prefix}
+        if llm_provider in PROMPT_CACHING_PROVIDERS
+        else {}
+    )
+    return await get_prompt_response_with_tokens(
+        cached_prefix + email_prompt, llm_provider, llm_model, **kwargs
+    )
+
+
+@routed_llm_call
+async def categorize_and_summarize_emails(
+    emails: list[dict],
+    category_dict: dict,
+    user_description: str,
+    important_guidelines: str,
+    informative_guidelines: str,
+    useless_guidelines: str,
+    llm_provider: str = "google",
+    llm_model: str = None,
+) -> dict:
+    """Async counterpart of `llm_functions.categorize_and_summarize_emails`."""
+    cached_prefix, email_prompt = format_categorize_and_summarize_emails_prompt(
+        emails,
+        category_dict,
+        user_description,
+        important_guidelines,
+        informative_guidelines,
+        useless_guidelines,
+    )
+    kwargs = (
+        {"max_output_tokens": 1000 * len(emails)} if llm_provider == "google" else {}
+    )
+    if llm_provider in PROMPT_CACHING_PROVIDERS:
+        kwargs["cached_prefix"] = cached_prefix
+    return await get_prompt_response_with_tokens(
+        cached_prefix + email_prompt, llm_provider, llm_model, **kwargs
+    )
+
+
+@routed_llm_call
+async def enrich_email(
+    subject: str,
+    decoded_data: str,
+    sender: str,
+    category_dict: dict,
+    user_description: str,
+    important_guidelines: str,
+    informative_guidelines: str,
+    useless_guidelines: str,
+    categories: dict,
+    language: str,
+    is_reply: bool,
+    llm_provider: str = "google",
+    llm_model: str = None,
+) -> dict:
+    """Async counterpart of `llm_functions.enrich_email`."""
+    cached_prefix, email_prompt = format_enrich_email_prompt(
+        subject,
+        decoded_data,
+        sender,
+        category_dict,
+        user_description,
+        important_guidelines,
+        informative_guidelines,
+        useless_guidelines,
+        categories,
+        language,
+        is_reply,
+    )
+    kwargs = {"max_output_tokens": 2000} if llm_provider == "google" else {}
+    if llm_provider in PROMPT_CACHING_PROVIDERS:
+        kwargs["cached_prefix"] = cached_prefix
+    return await get_prompt_response_with_tokens(
+        cached_prefix + email_prompt, llm_provider, llm_model, **kwargs
+    )
+
+
+@routed_llm_call
+async def search_emails(
+    query: str, language: str, llm_provider: str = "google", llm_model: str = None
+) -> dict:
+    """Async counterpart of `llm_functions.search_emails`."""
+    formatted_prompt = format_search_emails_prompt(query, language)
+    return await get_prompt_response_with_tokens(
+        formatted_prompt, llm_provider, llm_model
+    )
+
+
+@routed_llm_call
+async def review_user_description(
+    user_description: str, llm_provider: str = "google", llm_model: str = None
+) -> dict:
+    """Async counterpart of `llm_functions.review_user_description`."""
+    formatted_prompt = format_review_user_description_prompt(user_description)
+    return await get_prompt_response_with_tokens(
+        formatted_prompt, llm_provider, llm_model
+    )
+
+
+@routed_llm_call
+async def generate_categories_scratch(
+    user_topics: list | str,
+    chat_history: list = None,
+    llm_provider: str = "google",
+    llm_model: str = None,
+) -> dict:
+    """Async counterpart of `llm_functions.generate_categories_scratch`."""
+    formatted_prompt = format_generate_categories_scratch_prompt(
+        user_topics, chat_history
+    )
+    return await get_prompt_response_with_tokens(
+        formatted_prompt, llm_provider, llm_model
+    )
+
+
+@routed_llm_call
+async def generate_prioritization_scratch(
+    user_input: dict | str, llm_provider: str = "google", llm_model: str = None
+) -> dict:
+    """Async counterpart of `llm_functions.generate_prioritization_scratch`."""
+    formatted_prompt = format_generate_prioritization_scratch_prompt(user_input)
+    return await get_prompt_response_with_tokens(
+        formatted_prompt, llm_provider, llm_model
+    )
+
+
+@routed_llm_call
+async def determine_action_scenario(
+    destinary: bool,
+    subject: bool,
+    email_content: bool,
+    user_request: str,
+    is_only_signature: bool,
+    llm_provider: str = "google",
+    llm_model: str = None,
+) -> dict:
+    """Async counterpart of `llm_functions.determine_action_scenario`."""
+    result_json = {"tokens_input": 0, "tokens_output": 0, "scenario": 5}
+    if not destinary and not subject and (not email_content or is_only_signature):
+        formatted_prompt = format_determine_action_scenario_prompt(user_request)
+        response = await get_prompt_response_with_tokens(
+            formatted_prompt, llm_provider, llm_model
+        )
+        try:
+            scenario = response.get("scenario", 5)
+            if scenario in [1, 2, 3]:
+                return result_json
+            else:
+                LOGGER.error(f"Invalid scenario number received from AI: {scenario}")
+                return result_json
+        except (ValueError, AttributeError) as e:
+            LOGGER.error(f"Error parsing AI response: {e}")
+            return result_json
+
+    if destinary and (not email_content or is_only_signature):
+        result_json["scenario"] = 3
+        return result_json
+
+    if email_content and not is_only_signature:
+        result_json["scenario"] = 4
+        return result_json
+
+    return result_json
+
+
+@routed_llm_call
+async def improve_email_response(
+    base_prompt: str,
+    importance: str,
+    subject: str,
+    body: str,
+    history: dict,
+    user_input: str,
+    agent_settings: dict,
+    llm_provider: str = "google",
+    llm_model: str = None,
+) -> dict:
+    """Async counterpart of `llm_functions.improve_email_response`."""
+    formatted_prompt = format_improve_email_response_prompt(
+        base_prompt, importance, subject, body, history, user_input, agent_settings
+    )
+    return await get_prompt_response_with_tokens(
+        formatted_prompt, llm_provider, llm_model
+    )
+
+
+@routed_llm_call
+async def improve_draft(
+    base_prompt: str,
+    language: str,
+    agent_settings: dict,
+    subject: str,
+    body: str,
+    history: dict,
+    user_input: str,
+    length: str,
+    formality: str,
+    llm_provider: str = "google",
+    llm_model: str = None,
+) -> dict:
+    """Async counterpart of `llm_functions.improve_draft`."""
+    formatted_prompt = format_improve_draft_prompt(
+        base_prompt,
+        language,
+        agent_settings,
+        subject,
+        body,
+        history,
+        user_input,
+        length,
+        formality,
+    )
+    return await get_prompt_response_with_tokens(
+        formatted_prompt, llm_provider, llm_model
+    )
+
+
+@routed_llm_call
+async def select_categories(
+    categories: str, question: str, llm_provider: str = "google", llm_model: str = None
+) -> dict:
+    """Async counterpart of `llm_functions.select_categories`."""
+    formatted_prompt = format_select_categories_prompt(categories, question)
+    return await get_prompt_response_with_tokens(
+        formatted_prompt, llm_provider, llm_model
+    )
+
+
+@routed_llm_call
+async def get_answer(
+    keypoints: dict,
+    question: str,
+    language: str,
+    llm_provider: str = "google",
+    llm_model: str = None,
+) -> dict:
+    """Async counterpart of `llm_functions.get_answer`."""
+    formatted_prompt = format_get_answer_prompt(keypoints, question, language)
+    return await get_prompt_response_with_tokens(
+        formatted_prompt, llm_provider, llm_model
+    )
+
+
+@routed_llm_call
+async def summarize_conversation(
+    subject: str,
+    body: str,
+    user_description: str,
+    categories: dict,
+    language: str,
+    llm_provider: str = "google",
+    llm_model: str = None,
+) -> dict:
+    """Async counterpart of `llm_functions.summarize_conversation`."""
+    formatted_prompt = format_summarize_conversation_prompt(
+        subject, body, user_description, categories, language
+    )
+    return await get_prompt_response_with_tokens(
+        formatted_prompt, llm_provider, llm_model
+    )
+
+
+@routed_llm_call
+async def summarize_email(
+    subject: str,
+    body: str,
+    user_description: str,
+    categories: dict,
+    language: str,
+    llm_provider: str = "google",
+    llm_model: str = None,
+) -> dict:
+    """Async counterpart of `llm_functions.summarize_email`."""
+    formatted_prompt = format_summarize_email_prompt(
+        subject, body, user_description, categories, language
+    )
+    return await get_prompt_response_with_tokens(
+        formatted_prompt, llm_provider, llm_model
+    )
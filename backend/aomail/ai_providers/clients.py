@@ -0,0 +1,112 @@
+"""
+Process-wide registry of the LLM provider clients.
+
+Creating a provider client for every request opens a new connection, and pays a new TLS handshake,
+for each LLM call. Clients are created once per (provider, model) and shared by every thread: the
+provider SDKs are thread-safe and their httpx connection pools keep connections alive between calls.
+SDK clients serving every model of a provider are registered with `model=None`.
+
+Async clients are bound to the event loop that created their connections, so they are registered per
+running event loop and dropped with it.
+
+Features:
+- ✅ get_client: Return the shared client of a provider, creating it on first use.
+- ✅ get_async_client: Return the async client of a provider shared by the running event loop.
+- ✅ get_http_limits: Connection pool limits of the LLM HTTP clients.
+- ✅ close_clients: Close the shared clients and their connection pools.
+"""
+
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Any, Callable
+import httpx
+from aomail.constants import LLM_HTTP_KEEPALIVE_EXPIRY, LLM_HTTP_POOL_SIZE
+
+
+LOGGER = logging.getLogger(__name__)
+
+_clients: dict[tuple[str, str | None], Any] = {}
+_async_clients: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[tuple[str, str | None], Any]
+] = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def get_http_limits() -> httpx.Limits:
+    """
+    Returns the connection pool limits of the LLM HTTP clients.
+
+    Returns:
+        httpx.Limits: Limits allowing LLM_HTTP_POOL_SIZE keep-alive connections per provider.
+    """
+    return httpx.Limits(
+        max_connections=LLM_HTTP_POOL_SIZE,
+        max_keepalive_connections=LLM_HTTP_POOL_SIZE,
+        keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def get_client(provider: str, model: str | None, factory: Callable[[], Any]) -> Any:
+    """
+    Return the shared client of a provider, creating it on first use.
+
+    Args:
+        provider (str): The LLM provider, such as "anthropic".
+        model (str | None): The model served by the client, None if the client serves every model.
+        factory (Callable[[], Any]): Creates the client.
+
+    Returns:
+        Any: The shared client.
+    """
+    key = (provider, model)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            LOGGER.info(f"Creating the shared {provider} client for model {model}")
+            client = _clients[key] = factory()
+        return client
+
+
+def get_async_client(
+    provider: str, model: str | None, factory: Callable[[], Any]
+) -> Any:
+    """
+    Return the async client of a provider shared by the running event loop.
+
+    Args:
+        provider (str): The LLM provider, such as "anthropic".
+        model (str | None): The model served by the client, None if the client serves every model.
+        factory (Callable[[], Any]): Creates the client.
+
+    Returns:
+        Any: The async client of the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get((provider, model))
+        if client is None:
+            LOGGER.info(f"Creating the async {provider} client for model {model}")
+            client = clients[(provider, model)] = factory()
+        return client
+
+
+def close_clients():
+    """Close the shared clients and their connection pools."""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+
+    for client in clients:
+        close = getattr(client, "close", None)
+        if close is not None:
+            try:
+                close()
+            except Exception as e:
+                LOGGER.error(f"Error closing an LLM client: {str(e)}")
@@ -10,6 +10,7 @@ Features:
 - ✅ generate_email_response: Crafts responses based on input type.
 - ✅ search_emails: Searches and structures email data.
 - ✅ categorize_and_summarize_email: Categorizes and summarizes an email.
+- ✅ categorize_and_summarize_emails: Categorizes and summarizes several emails in one request.
 - ✅ review_user_description: Reviews a user-provided description and provides validation and feedback.
 - ✅ generate_categories_scratch: Generates categories based on user topics for email classification.
 - ✅ determine_action_scenario: Determines the scenario based on input flags and user request.
@@ -21,73 +22,266 @@ Features:
 - ✅ summarize_email: Summarizes an email.
 """
 
+import asyncio
+import hashlib
 import os
-import re
-import json
 import logging
+import threading
+import time
 import google.generativeai as genai
-from datetime import datetime
+from datetime import timedelta
+from typing import AsyncIterator
+from aomail.ai_providers.clients import get_client
+from aomail.ai_providers import rate_limiter
 from aomail.ai_providers.utils import (
     count_corrections,
+    estimate_tokens,
     extract_json_from_response,
     ensure_proper_spacing,
 )
-from aomail.ai_providers.prompts import (
-    CHAT_HISTORY_TEXT,
-    CORRECT_MAIL_LANGUAGE_MISTAKES_PROMPT,
-    DETERMINE_ACTION_SCENARIO_PROMPT,
-    EXTRACT_CONTACTS_RECIPIENTS_PROMPT,
-    GENERATE_CATEGORIES_SCRATCH_PROMPT,
-    GENERATE_PRIORITIZATION_SCRATCH_PROMPT,
-    GET_ANSWER_PROMPT,
-    IMPROVE_EMAIL_COPYWRITING_PROMPT,
-    RELEVANCE_LIST,
-    RESPONSE_LIST,
-    REVIEW_USER_DESCRIPTION_PROMPT,
-    SEARCH_EMAILS_PROMPT,
-    SELECT_CATEGORIES_PROMPT,
-    SIGNATURE_INSTRUCTION_WITH_CONTENT,
-    SIGNATURE_INSTRUCTION_WITHOUT_CONTENT,
-    SUMMARIZE_CONVERSATION_PROMPT,
-    SUMMARIZE_EMAIL_PROMPT,
+from aomail.ai_providers.prompt_formatters import (
+    format_categorize_and_summarize_email_prompt,
+    format_categorize_and_summarize_emails_prompt,
+    format_correct_mail_language_mistakes_prompt,
+    format_determine_action_scenario_prompt,
+    format_enrich_email_prompt,
+    format_extract_contacts_recipients_prompt,
+    format_generate_categories_scratch_prompt,
+    format_generate_email_prompt,
+    format_generate_email_response_prompt,
+    format_generate_prioritization_scratch_prompt,
+    format_generate_response_keywords_prompt,
+    format_get_answer_prompt,
+    format_improve_draft_prompt,
+    format_improve_email_copywriting_prompt,
+    format_improve_email_response_prompt,
+    format_review_user_description_prompt,
+    format_search_emails_prompt,
+    format_select_categories_prompt,
+    format_summarize_conversation_prompt,
+    format_summarize_email_prompt,
 )
+from aomail.constants import GEMINI_CONTEXT_CACHE_MIN_TOKENS, LLM_PROMPT_CACHE_TTL
 
 
 LOGGER = logging.getLogger(__name__)
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+# (model, prefix hash) -> (model of the context cache of the prefix or None if not cached, expiry)
+_context_caches: dict[tuple[str, str], tuple[genai.GenerativeModel | None, float]] = {}
+_context_caches_lock = threading.Lock()
+# (model, prefix hash) -> lock held while the context cache of the prefix is created
+_context_cache_creation_locks: dict[tuple[str, str], threading.Lock] = {}
+
 
 ######################## TEXT PROCESSING UTILITIES ########################
+def get_gemini_model(model: str) -> genai.GenerativeModel:
+    """Returns the Gemini model shared by the process"""
+
+    def create_model() -> genai.GenerativeModel:
+        genai.configure(api_key=GEMINI_API_KEY)
+        return genai.GenerativeModel(model)
+
+    return get_client("google", model, create_model)
+
+
+def get_context_cache_model(
+    model: str, cached_prefix: str
+) -> genai.GenerativeModel | None:
+    """
+    Returns the model reading a prompt prefix from a Gemini context cache, creating the cache on first use.
+
+    Prefixes shorter than GEMINI_CONTEXT_CACHE_MIN_TOKENS are rejected by context caching: they are
+    only cached by the models with implicit caching.
+
+    Args:
+        model (str): The Gemini model.
+        cached_prefix (str): The prefix shared by the prompts.
+
+    Returns:
+        genai.GenerativeModel | None: The model of the context cache, None if the prefix is not cached.
+    """
+    if estimate_tokens(cached_prefix) < GEMINI_CONTEXT_CACHE_MIN_TOKENS:
+        return None
+
+    key = (model, hashlib.sha256(cached_prefix.encode("utf-8")).hexdigest())
+    with _context_caches_lock:
+        cached_model, expiry = _context_caches.get(key, (None, 0.0))
+        creation_lock = _context_cache_creation_locks.setdefault(key, threading.Lock())
+    if expiry > time.monotonic():
+        return cached_model
+
+    # concurrent requests for the same prefix wait for the cache created by the first one
+    with creation_lock:
+        now = time.monotonic()
+        with _context_caches_lock:
+            cached_model, expiry = _context_caches.get(key, (None, 0.0))
+        if expiry > now:
+            return cached_model
+
+        try:
+            genai.configure(api_key=GEMINI_API_KEY)
+            cached_content = genai.caching.CachedContent.create(
+                model=model,
+                contents=[cached_prefix],
+                ttl=timedelta(seconds=LLM_PROMPT_CACHE_TTL),
+            )
+            cached_model = genai.GenerativeModel.from_cached_content(cached_content)
+        except Exception as e:
+            LOGGER.warning(
+                f"Failed to create a context cache for model {model}: {str(e)}"
+            )
+            cached_model = None
+
+        with _context_caches_lock:
+            for expired_key in [
+                cache_key
+                for cache_key, (_, cache_expiry) in _context_caches.items()
+                if cache_expiry <= now
+            ]:
+                del _context_caches[expired_key]
+                if expired_key != key:
+                    _context_cache_creation_locks.pop(expired_key, None)
+            # stop using the cache shortly before Gemini deletes it
+            _context_caches[key] = (cached_model, now + LLM_PROMPT_CACHE_TTL * 0.9)
+        return cached_model
+
+
+def get_model_and_contents(
+    formatted_prompt: str, model: str, cached_prefix: str = ""
+) -> tuple[genai.GenerativeModel, str]:
+    """Returns the model to send a prompt to and the part of the prompt it does not read from a context cache"""
+    email_prompt = formatted_prompt[len(cached_prefix) :]
+    if cached_prefix and email_prompt:
+        cached_model = get_context_cache_model(model, cached_prefix)
+        if cached_model:
+            return cached_model, email_prompt
+    return get_gemini_model(model), formatted_prompt
+
+
 def get_prompt_response(
-    formatted_prompt: str, model: str = "gemini-1.5-flash"
+    formatted_prompt: str,
+    model: str = "gemini-1.5-flash",
+    max_output_tokens: int = 1000,
+    cached_prefix: str = "",
 ) -> genai.types.GenerateContentResponse:
     """Returns the prompt response using Gemini 1.5 Flash model"""
     if not model:
         model = "gemini-1.5-flash"
-    genai.configure(api_key=GEMINI_API_KEY)
-    gemini_model = genai.GenerativeModel(model)
-    response = gemini_model.generate_content(
-        formatted_prompt,
-        generation_config=genai.types.GenerationConfig(
-            max_output_tokens=1000, temperature=0.0
+    gemini_model, contents = get_model_and_contents(
+        formatted_prompt, model, cached_prefix
+    )
+    response = rate_limiter.call(
+        "google",
+        model,
+        estimate_tokens(formatted_prompt),
+        lambda: gemini_model.generate_content(
+            contents,
+            generation_config=genai.types.GenerationConfig(
+                max_output_tokens=max_output_tokens, temperature=0.0
+            ),
         ),
+        lambda response: response.usage_metadata.total_token_count,
     )
     return response
 
 
 def get_prompt_response_with_tokens(
-    formatted_prompt: str, model: str = "gemini-1.5-flash"
+    formatted_prompt: str,
+    model: str = "gemini-1.5-flash",
+    max_output_tokens: int = 1000,
+    cached_prefix: str = "",
 ) -> dict:
-    response = get_prompt_response(formatted_prompt, model)
+    response = get_prompt_response(
+        formatted_prompt, model, max_output_tokens, cached_prefix
+    )
     result_json = extract_json_from_response(response.text)
     result_json["tokens_input"] = response.usage_metadata.prompt_token_count
     result_json["tokens_output"] = response.usage_metadata.candidates_token_count
+    if cached_prefix:
+        result_json["tokens_cache_read"] = (
+            response.usage_metadata.cached_content_token_count
+        )
 
     return result_json
 
 
+async def async_get_prompt_text(
+    formatted_prompt: str,
+    model: str = "gemini-1.5-flash",
+    max_output_tokens: int = 1000,
+    cached_prefix: str = "",
+) -> dict:
+    """Returns the text and the tokens of the prompt response without blocking the event loop"""
+    if not model:
+        model = "gemini-1.5-flash"
+    if cached_prefix:
+        # creating a context cache is a blocking request
+        gemini_model, contents = await asyncio.to_thread(
+            get_model_and_contents, formatted_prompt, model, cached_prefix
+        )
+    else:
+        gemini_model, contents = get_gemini_model(model), formatted_prompt
+    response = await rate_limiter.async_call(
+        "google",
+        model,
+        estimate_tokens(formatted_prompt),
+        lambda: gemini_model.generate_content_async(
+            contents,
+            generation_config=genai.types.GenerationConfig(
+                max_output_tokens=max_output_tokens, temperature=0.0
+            ),
+        ),
+        lambda response: response.usage_metadata.total_token_count,
+    )
+    result = {
+        "text": response.text,
+        "tokens_input": response.usage_metadata.prompt_token_count,
+        "tokens_output": response.usage_metadata.candidates_token_count,
+    }
+    if cached_prefix:
+        result["tokens_cache_read"] = response.usage_metadata.cached_content_token_count
+    return result
+
+
+async def async_stream_prompt_text(
+    formatted_prompt: str,
+    model: str = "gemini-1.5-flash",
+    max_output_tokens: int = 1000,
+) -> AsyncIterator[dict]:
+    """Yields the text deltas of the prompt response as they are generated, then its tokens"""
+    if not model:
+        model = "gemini-1.5-flash"
+    gemini_model = get_gemini_model(model)
+    stream = await rate_limiter.async_call(
+        "google",
+        model,
+        estimate_tokens(formatted_prompt),
+        lambda: gemini_model.generate_content_async(
+            formatted_prompt,
+            generation_config=genai.types.GenerationConfig(
+                max_output_tokens=max_output_tokens, temperature=0.0
+            ),
+            stream=True,
+        ),
+        lambda stream: estimate_tokens(formatted_prompt),
+    )
+    usage_metadata = None
+    async for chunk in stream:
+        if chunk.candidates and chunk.candidates[0].content.parts:
+            yield {"text": chunk.text, "tokens_input": 0, "tokens_output": 0}
+        # every chunk carries the cumulated usage, the last one is the total
+        usage_metadata = chunk.usage_metadata or usage_metadata
+    if usage_metadata:
+        yield {
+            "text": "",
+            "tokens_input": usage_metadata.prompt_token_count,
+            "tokens_output": usage_metadata.candidates_token_count,
+        }
+
+
 def extract_contacts_recipients(query: str, llm_model: str = None) -> dict:
-    formatted_prompt = EXTRACT_CONTACTS_RECIPIENTS_PROMPT.format(query=query)
+    formatted_prompt = format_extract_contacts_recipients_prompt(query)
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
@@ -98,8 +292,8 @@ def generate_response_keywords(
     input_subject: str,
     llm_model: str = "gemini-2.0-flash-exp",
 ) -> dict:
-    formatted_prompt = base_prompt.format(
-        input_subject=input_subject, input_email=input_email
+    formatted_prompt = format_generate_response_keywords_prompt(
+        base_prompt, input_email, input_subject
     )
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
@@ -115,21 +309,8 @@ def generate_email(
     signature: str = "",
     llm_model: str = "gemini-2.0-flash-exp",
 ) -> dict:
-    has_content = bool(signature) and bool(re.sub(r"<[^>]+>", "", signature).strip())
-    if has_content:
-        signature_instruction = SIGNATURE_INSTRUCTION_WITH_CONTENT.format(
-            signature=signature
-        )
-    else:
-        signature_instruction = SIGNATURE_INSTRUCTION_WITHOUT_CONTENT
-
-    formatted_prompt = base_prompt.format(
-        agent_settings=json.dumps(agent_settings),
-        length=length,
-        formality=formality,
-        language=language,
-        input_data=input_data,
-        signature_instruction=signature_instruction,
+    formatted_prompt = format_generate_email_prompt(
+        base_prompt, input_data, length, formality, language, agent_settings, signature
     )
 
     result_json = get_prompt_response_with_tokens(formatted_prompt, llm_model)
@@ -143,9 +324,7 @@ def generate_email(
 def correct_mail_language_mistakes(
     body: str, subject: str, llm_model: str = None
 ) -> dict:
-    formatted_prompt = CORRECT_MAIL_LANGUAGE_MISTAKES_PROMPT.format(
-        subject=subject, body=body
-    )
+    formatted_prompt = format_correct_mail_language_mistakes_prompt(body, subject)
     response = get_prompt_response(formatted_prompt, llm_model)
     result_json: dict = extract_json_from_response(response.text)
 
@@ -168,8 +347,8 @@ def correct_mail_language_mistakes(
 def improve_email_copywriting(
     email_subject: str, email_body: str, llm_model: str = None
 ) -> dict:
-    formatted_prompt = IMPROVE_EMAIL_COPYWRITING_PROMPT.format(
-        email_subject=email_subject, email_body=email_body
+    formatted_prompt = format_improve_email_copywriting_prompt(
+        email_subject, email_body
     )
     response = get_prompt_response(formatted_prompt, llm_model)
     feedback_ai = response.text
@@ -190,20 +369,13 @@ def generate_email_response(
     signature: str = "",
     llm_model: str = "gemini-2.0-flash-exp",
 ) -> dict:
-    has_content = bool(signature) and bool(re.sub(r"<[^>]+>", "", signature).strip())
-    if has_content:
-        signature_instruction = SIGNATURE_INSTRUCTION_WITH_CONTENT.format(
-            signature=signature
-        )
-    else:
-        signature_instruction = SIGNATURE_INSTRUCTION_WITHOUT_CONTENT
-
-    formatted_prompt = base_prompt.format(
-        agent_settings=json.dumps(agent_settings),
-        input_subject=input_subject,
-        input_body=input_body,
-        user_instruction=user_instruction,
-        signature_instruction=signature_instruction,
+    formatted_prompt = format_generate_email_response_prompt(
+        base_prompt,
+        input_subject,
+        input_body,
+        user_instruction,
+        agent_settings,
+        signature,
     )
 
     result_json = get_prompt_response_with_tokens(formatted_prompt, llm_model)
@@ -226,45 +398,97 @@ def categorize_and_summarize_email(
     useless_guidelines: str,
     llm_model: str = None,
 ) -> dict:
-    formatted_prompt = base_prompt.format(
-        sender=sender,
-        subject=subject,
-        decoded_data=decoded_data,
-        user_description=user_description,
-        category_dict=category_dict,
-        response_list=RESPONSE_LIST,
-        relevance_list=RELEVANCE_LIST,
-        important_guidelines=important_guidelines,
-        informative_guidelines=informative_guidelines,
-        useless_guidelines=useless_guidelines,
+    cached_prefix, email_prompt = format_categorize_and_summarize_email_prompt(
+        base_prompt,
+        subject,
+        decoded_data,
+        category_dict,
+        user_description,
+        sender,
+        important_guidelines,
+        informative_guidelines,
+        useless_guidelines,
+    )
+    return get_prompt_response_with_tokens(
+        cached_prefix + email_prompt, llm_model, cached_prefix=cached_prefix
     )
-    return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
-def search_emails(query: str, language: str, llm_model: str = None) -> dict:
-    today = datetime.now().strftime("%m-%d-%Y")
-    formatted_prompt = SEARCH_EMAILS_PROMPT.format(
-        query=query, today=today, language=language
+def categorize_and_summarize_emails(
+    emails: list[dict],
+    category_dict: dict,
+    user_description: str,
+    important_guidelines: str,
+    informative_guidelines: str,
+    useless_guidelines: str,
+    llm_model: str = None,
+) -> dict:
+    cached_prefix, email_prompt = format_categorize_and_summarize_emails_prompt(
+        emails,
+        category_dict,
+        user_description,
+        important_guidelines,
+        informative_guidelines,
+        useless_guidelines,
     )
+    return get_prompt_response_with_tokens(
+        cached_prefix + email_prompt,
+        llm_model,
+        max_output_tokens=1000 * len(emails),
+        cached_prefix=cached_prefix,
+    )
+
+
+def enrich_email(
+    subject: str,
+    decoded_data: str,
+    sender: str,
+    category_dict: dict,
+    user_description: str,
+    important_guidelines: str,
+    informative_guidelines: str,
+    useless_guidelines: str,
+    categories: dict,
+    language: str,
+    is_reply: bool,
+    llm_model: str = None,
+) -> dict:
+    cached_prefix, email_prompt = format_enrich_email_prompt(
+        subject,
+        decoded_data,
+        sender,
+        category_dict,
+        user_description,
+        important_guidelines,
+        informative_guidelines,
+        useless_guidelines,
+        categories,
+        language,
+        is_reply,
+    )
+    return get_prompt_response_with_tokens(
+        cached_prefix + email_prompt,
+        llm_model,
+        max_output_tokens=2000,
+        cached_prefix=cached_prefix,
+    )
+
+
+def search_emails(query: str, language: str, llm_model: str = None) -> dict:
+    formatted_prompt = format_search_emails_prompt(query, language)
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
 def review_user_description(user_description: str, llm_model: str = None) -> dict:
-    formatted_prompt = REVIEW_USER_DESCRIPTION_PROMPT.format(
-        user_description=user_description
-    )
+    formatted_prompt = format_review_user_description_prompt(user_description)
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
 def generate_categories_scratch(
     user_topics: list | str, chat_history: list = None, llm_model: str = None
 ) -> dict:
-    chat_history_text = (
-        CHAT_HISTORY_TEXT.format(chat_history=chat_history) if chat_history else ""
-    )
-    formatted_prompt = GENERATE_CATEGORIES_SCRATCH_PROMPT.format(
-        user_topics=user_topics,
-        chat_history_text=chat_history_text,
+    formatted_prompt = format_generate_categories_scratch_prompt(
+        user_topics, chat_history
     )
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
@@ -272,9 +496,7 @@ def generate_categories_scratch(
 def generate_prioritization_scratch(
     user_input: dict | str, llm_model: str = None
 ) -> dict:
-    formatted_prompt = GENERATE_PRIORITIZATION_SCRATCH_PROMPT.format(
-        user_input=user_input
-    )
+    formatted_prompt = format_generate_prioritization_scratch_prompt(user_input)
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
@@ -288,9 +510,7 @@ def determine_action_scenario(
 ) -> dict:
     result_json = {"tokens_input": 0, "tokens_output": 0, "scenario": 5}
     if not destinary and not subject and (not email_content or is_only_signature):
-        formatted_prompt = DETERMINE_ACTION_SCENARIO_PROMPT.format(
-            user_request=user_request
-        )
+        formatted_prompt = format_determine_action_scenario_prompt(user_request)
         result_json = get_prompt_response_with_tokens(formatted_prompt, llm_model)
         try:
             scenario = result_json.get("scenario", 5)
@@ -330,13 +550,8 @@ def improve_email_response(
     agent_settings: dict,
     llm_model: str = "gemini-2.0-flash-exp",
 ) -> dict:
-    formatted_prompt = base_prompt.format(
-        importance=importance,
-        subject=subject,
-        body=body,
-        history=history,
-        user_input=user_input,
-        agent_settings=agent_settings,
+    formatted_prompt = format_improve_email_response_prompt(
+        base_prompt, importance, subject, body, history, user_input, agent_settings
     )
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
@@ -353,32 +568,29 @@ def improve_draft(
     formality: str,
     llm_model: str = None,
 ) -> dict:
-    formatted_prompt = base_prompt.format(
-        language=language,
-        agent_settings=agent_settings,
-        subject=subject,
-        body=body,
-        history=history,
-        user_input=user_input,
-        length=length,
-        formality=formality,
+    formatted_prompt = format_improve_draft_prompt(
+        base_prompt,
+        language,
+        agent_settings,
+        subject,
+        body,
+        history,
+        user_input,
+        length,
+        formality,
     )
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
 def select_categories(categories: str, question: str, llm_model: str = None) -> dict:
-    formatted_prompt = SELECT_CATEGORIES_PROMPT.format(
-        categories=categories, question=question
-    )
+    formatted_prompt = format_select_categories_prompt(categories, question)
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
 def get_answer(
     keypoints: dict, question: str, language: str, llm_model: str = None
 ) -> dict:
-    formatted_prompt = GET_ANSWER_PROMPT.format(
-        keypoints=keypoints, question=question, language=language
-    )
+    formatted_prompt = format_get_answer_prompt(keypoints, question, language)
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
@@ -390,12 +602,8 @@ def summarize_conversation(
     language: str,
     llm_model: str = None,
 ) -> dict:
-    formatted_prompt = SUMMARIZE_CONVERSATION_PROMPT.format(
-        subject=subject,
-        body=body,
-        categories=categories,
-        user_description=user_description,
-        language=language,
+    formatted_prompt = format_summarize_conversation_prompt(
+        subject, body, user_description, categories, language
     )
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
@@ -408,11 +616,7 @@ def summarize_email(
     language: str,
     llm_model: str = None,
 ) -> dict:
-    formatted_prompt = SUMMARIZE_EMAIL_PROMPT.format(
-        subject=subject,
-        body=body,
-        categories=categories,
-        user_description=user_description,
-        language=language,
+    formatted_prompt = format_summarize_email_prompt(
+        subject, body, user_description, categories, language
     )
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
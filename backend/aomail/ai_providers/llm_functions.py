@@ -1,5 +1,6 @@
 """
-Dispatches LLM requests to different providers (currently Anthropic Claude and Google Gemini).
+Dispatches LLM requests to different providers (Anthropic Claude, Google Gemini, Mistral, OpenAI, Groq,
+DeepSeek, and the local `mock` provider used for load testing).
 
 Features:
 - ✅ extract_contacts_recipients: Categorizes email recipients.
@@ -10,6 +11,8 @@ Features:
 - ✅ generate_email_response: Crafts responses based on input type.
 - ✅ search_emails: Searches and structures email data.
 - ✅ categorize_and_summarize_email: Categorizes and summarizes an email.
+- ✅ categorize_and_summarize_emails: Categorizes and summarizes several emails in one request.
+- ✅ enrich_email: Categorizes, summarizes and extracts the keypoints of an email in one request.
 - ✅ review_user_description: Reviews a user-provided description and provides validation and feedback.
 - ✅ generate_categories_scratch: Generates categories based on user topics for email classification.
 - ✅ determine_action_scenario: Determines the scenario based on input flags and user request.
@@ -19,6 +22,11 @@ Features:
 - ✅ get_answer: Gets an answer based on user input.
 - ✅ summarize_conversation: Summarizes a conversation.
 - ✅ summarize_email: Summarizes an email.
+
+Idempotent functions decorated with `cached_llm_call` are served from the LLM response cache.
+The categorization functions send the part of their prompt shared by the emails of a user through the
+prompt cache of the providers supporting it (see `utils.format_cacheable_prompt`).
+Every function accepts `allow_fallback=True` to fail over to the fallback provider (see `router`).
 """
 
 from aomail.ai_providers.anthropic import client as claude
@@ -27,8 +35,13 @@ from aomail.ai_providers.mistral import client as mistral_client
 from aomail.ai_providers.openai import client as openai_client
 from aomail.ai_providers.groq import client as groq_client
 from aomail.ai_providers.deepseek import client as deepseek_client
+from aomail.ai_providers.mock import client as mock_client
+from aomail.ai_providers.response_cache import cached_llm_call
+from aomail.ai_providers.router import routed_llm_call
 
 
+@routed_llm_call
+@cached_llm_call()
 def extract_contacts_recipients(
     query: str, llm_provider: str = "google", llm_model: str = None
 ) -> dict[str, list]:
@@ -58,8 +71,11 @@ def extract_contacts_recipients(
         return groq_client.extract_contacts_recipients(query, llm_model)
     elif llm_provider == "deepseek":
         return deepseek_client.extract_contacts_recipients(query, llm_model)
+    elif llm_provider == "mock":
+        return mock_client.extract_contacts_recipients(query, llm_model)
 
 
+@routed_llm_call
 def generate_response_keywords(
     base_prompt: str,
     input_email: str,
@@ -107,8 +123,13 @@ def generate_response_keywords(
         return deepseek_client.generate_response_keywords(
             base_prompt, input_email, input_subject, llm_model
         )
+    elif llm_provider == "mock":
+        return mock_client.generate_response_keywords(
+            base_prompt, input_email, input_subject, llm_model
+        )
 
 
+@routed_llm_call
 def generate_email(
     base_prompt: str,
     input_data: str,
@@ -207,8 +228,21 @@ def generate_email(
             signature,
             llm_model,
         )
+    elif llm_provider == "mock":
+        return mock_client.generate_email(
+            base_prompt,
+            input_data,
+            length,
+            formality,
+            language,
+            agent_settings,
+            signature,
+            llm_model,
+        )
 
 
+@routed_llm_call
+@cached_llm_call()
 def correct_mail_language_mistakes(
     body: str, subject: str, llm_provider: str = "google", llm_model: str = None
 ) -> dict:
@@ -241,8 +275,11 @@ def correct_mail_language_mistakes(
         return groq_client.correct_mail_language_mistakes(body, subject, llm_model)
     elif llm_provider == "deepseek":
         return deepseek_client.correct_mail_language_mistakes(body, subject, llm_model)
+    elif llm_provider == "mock":
+        return mock_client.correct_mail_language_mistakes(body, subject, llm_model)
 
 
+@routed_llm_call
 def improve_email_copywriting(
     email_subject: str,
     email_body: str,
@@ -284,8 +321,13 @@ def improve_email_copywriting(
         return deepseek_client.improve_email_copywriting(
             email_subject, email_body, llm_model
         )
+    elif llm_provider == "mock":
+        return mock_client.improve_email_copywriting(
+            email_subject, email_body, llm_model
+        )
 
 
+@routed_llm_call
 def generate_email_response(
     base_prompt: str,
     input_subject: str,
@@ -375,8 +417,19 @@ def generate_email_response(
             signature,
             llm_model,
         )
+    elif llm_provider == "mock":
+        return mock_client.generate_email_response(
+            base_prompt,
+            input_subject,
+            input_body,
+            user_instruction,
+            agent_settings,
+            signature,
+            llm_model,
+        )
 
 
+@routed_llm_call
 def categorize_and_summarize_email(
     base_prompt: str,
     subject: str,
@@ -407,7 +460,8 @@ def categorize_and_summarize_email(
         llm_model (str): The language model to use for the email categorization and summarization.
 
     Returns:
-        dict: Structured JSON response with categorized and summarized email details.
+        dict: Structured JSON response with categorized and summarized email details, 'tokens_input',
+              'tokens_output', and 'tokens_cache_read' for the providers with prompt caching.
     """
     if llm_provider == "anthropic":
         return claude.categorize_and_summarize_email(
@@ -487,8 +541,273 @@ def categorize_and_summarize_email(
             useless_guidelines,
             llm_model,
         )
+    elif llm_provider == "mock":
+        return mock_client.categorize_and_summarize_email(
+            base_prompt,
+            subject,
+            decoded_data,
+            category_dict,
+            user_description,
+            sender,
+            important_guidelines,
+            informative_guidelines,
+            useless_guidelines,
+            llm_model,
+        )
+
+
+@routed_llm_call
+def categorize_and_summarize_emails(
+    emails: list[dict],
+    category_dict: dict,
+    user_description: str,
+    important_guidelines: str,
+    informative_guidelines: str,
+    useless_guidelines: str,
+    llm_provider: str = "google",
+    llm_model: str = None,
+) -> dict:
+    """
+    Categorizes and summarizes several emails in a single request, sharing the categories
+    and guidelines between all emails.
+
+    Args:
+        emails (list[dict]): The emails, each containing 'sender', 'subject' and 'decoded_data' keys.
+        category_dict (dict): A dictionary of topic categories to be used for classification.
+        user_description (str): A description provided by the user to assist with categorization.
+        important_guidelines (str): Guidelines for important emails.
+        informative_guidelines (str): Guidelines for informative emails.
+        useless_guidelines (str): Guidelines for useless emails.
+        llm_provider (str): The language model to use for the email categorization and summarization.
+        llm_model (str): The language model to use for the email categorization and summarization.
+
+    Returns:
+        dict: Structured JSON response whose 'emails' key lists the details of each email with its 'index',
+              'tokens_input', 'tokens_output', and 'tokens_cache_read' for the providers with prompt caching.
+    """
+    if llm_provider == "anthropic":
+        return claude.categorize_and_summarize_emails(
+            emails,
+            category_dict,
+            user_description,
+            important_guidelines,
+            informative_guidelines,
+            useless_guidelines,
+            llm_model,
+        )
+    elif llm_provider == "google":
+        return gemini.categorize_and_summarize_emails(
+            emails,
+            category_dict,
+            user_description,
+            important_guidelines,
+            informative_guidelines,
+            useless_guidelines,
+            llm_model,
+        )
+    elif llm_provider == "mistral":
+        return mistral_client.categorize_and_summarize_emails(
+            emails,
+            category_dict,
+            user_description,
+            important_guidelines,
+            informative_guidelines,
+            useless_guidelines,
+            llm_model,
+        )
+    elif llm_provider == "openai":
+        return openai_client.categorize_and_summarize_emails(
+            emails,
+            category_dict,
+            user_description,
+            important_guidelines,
+            informative_guidelines,
+            useless_guidelines,
+            llm_model,
+        )
+    elif llm_provider == "groq":
+        return groq_client.categorize_and_summarize_emails(
+            emails,
+            category_dict,
+            user_description,
+            important_guidelines,
+            informative_guidelines,
+            useless_guidelines,
+            llm_model,
+        )
+    elif llm_provider == "deepseek":
+        return deepseek_client.categorize_and_summarize_emails(
+            emails,
+            category_dict,
+            user_description,
+            important_guidelines,
+            informative_guidelines,
+            useless_guidelines,
+            llm_model,
+        )
+    elif llm_provider == "mock":
+        return mock_client.categorize_and_summarize_emails(
+            emails,
+            category_dict,
+            user_description,
+            important_guidelines,
+            informative_guidelines,
+            useless_guidelines,
+            llm_model,
+        )
+
+
+@routed_llm_call
+def enrich_email(
+    subject: str,
+    decoded_data: str,
+    sender: str,
+    category_dict: dict,
+    user_description: str,
+    important_guidelines: str,
+    informative_guidelines: str,
+    useless_guidelines: str,
+    categories: dict,
+    language: str,
+    is_reply: bool,
+    llm_provider: str = "google",
+    llm_model: str = None,
+) -> dict:
+    """
+    Categorizes, summarizes and extracts the knowledge tree keypoints of an email in a single request.
+
+    Replaces `categorize_and_summarize_email` followed by `summarize_email` or `summarize_conversation`,
+    sending the email body once instead of twice. Split the result with `split_enriched_email`.
+
+    Args:
+        subject (str): The subject of the email.
+        decoded_data (str): The decoded content of the email.
+        sender (str): The sender of the email.
+        category_dict (dict): A dictionary of topic categories to be used for classification.
+        user_description (str): A description provided by the user to assist with categorization.
+        important_guidelines (str): Guidelines for important emails.
+        informative_guidelines (str): Guidelines for informative emails.
+        useless_guidelines (str): Guidelines for useless emails.
+        categories (dict): The existing categories and organizations of the knowledge tree.
+        language (str): The language of the keypoints.
+        is_reply (bool): Whether the email is part of a conversation, with keypoints per email.
+        llm_provider (str): The language model to use for the email enrichment.
+        llm_model (str): The language model to use for the email enrichment.
+
+    Returns:
+        dict: The categorization with a 'knowledge' key holding the category, organization, topic
+              and keypoints of the email, 'tokens_input', 'tokens_output', and 'tokens_cache_read'
+              for the providers with prompt caching.
+    """
+    if llm_provider == "anthropic":
+        return claude.enrich_email(
+            subject,
+            decoded_data,
+            sender,
+            category_dict,
+            user_description,
+            important_guidelines,
+            informative_guidelines,
+            useless_guidelines,
+            categories,
+            language,
+            is_reply,
+            llm_model,
+        )
+    elif llm_provider == "google":
+        return gemini.enrich_email(
+            subject,
+            decoded_data,
+            sender,
+            category_dict,
+            user_description,
+            important_guidelines,
+            informative_guidelines,
+            useless_guidelines,
+            categories,
+            language,
+            is_reply,
+            llm_model,
+        )
+    elif llm_provider == "mistral":
+        return mistral_client.enrich_email(
+            subject,
+            decoded_data,
+            sender,
+            category_dict,
+            user_description,
+            important_guidelines,
+            informative_guidelines,
+            useless_guidelines,
+            categories,
+            language,
+            is_reply,
+            llm_model,
+        )
+    elif llm_provider == "openai":
+        return openai_client.enrich_email(
+            subject,
+            decoded_data,
+            sender,
+            category_dict,
+            user_description,
+            important_guidelines,
+            informative_guidelines,
+            useless_guidelines,
+            categories,
+            language,
+            is_reply,
+            llm_model,
+        )
+    elif llm_provider == "groq":
+        return groq_client.enrich_email(
+            subject,
+            decoded_data,
+            sender,
+            category_dict,
+            user_description,
+            important_guidelines,
+            informative_guidelines,
+            useless_guidelines,
+            categories,
+            language,
+            is_reply,
+            llm_model,
+        )
+    elif llm_provider == "deepseek":
+        return deepseek_client.enrich_email(
+            subject,
+            decoded_data,
+            sender,
+            category_dict,
+            user_description,
+            important_guidelines,
+            informative_guidelines,
+            useless_guidelines,
+            categories,
+            language,
+            is_reply,
+            llm_model,
+        )
+    elif llm_provider == "mock":
+        return mock_client.enrich_email(
+            subject,
+            decoded_data,
+            sender,
+            category_dict,
+            user_description,
+            important_guidelines,
+            informative_guidelines,
+            useless_guidelines,
+            categories,
+            language,
+            is_reply,
+            llm_model,
+        )
 
 
+@routed_llm_call
+@cached_llm_call(vary_on_day=True)
 def search_emails(
     query: str, language: str, llm_provider: str = "google", llm_model: str = None
 ) -> dict:
@@ -516,8 +835,12 @@ def search_emails(
         return groq_client.search_emails(query, language, llm_model)
     elif llm_provider == "deepseek":
         return deepseek_client.search_emails(query, language, llm_model)
+    elif llm_provider == "mock":
+        return mock_client.search_emails(query, language, llm_model)
 
 
+@routed_llm_call
+@cached_llm_call()
 def review_user_description(
     user_description: str, llm_provider: str = "google", llm_model: str = None
 ) -> dict:
@@ -544,8 +867,12 @@ def review_user_description(
         return groq_client.review_user_description(user_description, llm_model)
     elif llm_provider == "deepseek":
         return deepseek_client.review_user_description(user_description, llm_model)
+    elif llm_provider == "mock":
+        return mock_client.review_user_description(user_description, llm_model)
 
 
+@routed_llm_call
+@cached_llm_call()
 def generate_categories_scratch(
     user_topics: list | str,
     chat_history: list = None,
@@ -584,8 +911,14 @@ def generate_categories_scratch(
         return deepseek_client.generate_categories_scratch(
             user_topics, chat_history, llm_model
         )
+    elif llm_provider == "mock":
+        return mock_client.generate_categories_scratch(
+            user_topics, chat_history, llm_model
+        )
 
 
+@routed_llm_call
+@cached_llm_call()
 def generate_prioritization_scratch(
     user_input: dict | str, llm_provider: str = "google", llm_model: str = None
 ) -> dict:
@@ -615,8 +948,11 @@ def generate_prioritization_scratch(
         return groq_client.generate_prioritization_scratch(user_input, llm_model)
     elif llm_provider == "deepseek":
         return deepseek_client.generate_prioritization_scratch(user_input, llm_model)
+    elif llm_provider == "mock":
+        return mock_client.generate_prioritization_scratch(user_input, llm_model)
 
 
+@routed_llm_call
 def determine_action_scenario(
     destinary: bool,
     subject: bool,
@@ -703,9 +1039,19 @@ def determine_action_scenario(
             is_only_signature,
             llm_model,
         )
+    elif llm_provider == "mock":
+        return mock_client.determine_action_scenario(
+            destinary,
+            subject,
+            email_content,
+            user_request,
+            is_only_signature,
+            llm_model,
+        )
 
 
 # -----------------------  AI MEMORY PROMPTS (ai_memory.py) -----------------------#
+@routed_llm_call
 def improve_email_response(
     base_prompt: str,
     importance: str,
@@ -783,8 +1129,20 @@ def improve_email_response(
             agent_settings,
             llm_model,
         )
+    elif llm_provider == "mock":
+        return mock_client.improve_email_response(
+            base_prompt,
+            importance,
+            subject,
+            body,
+            history,
+            user_input,
+            agent_settings,
+            llm_model,
+        )
 
 
+@routed_llm_call
 def improve_draft(
     base_prompt: str,
     language: str,
@@ -876,9 +1234,23 @@ def improve_draft(
             formality,
             llm_model,
         )
+    elif llm_provider == "mock":
+        return mock_client.improve_draft(
+            base_prompt,
+            language,
+            agent_settings,
+            subject,
+            body,
+            history,
+            user_input,
+            length,
+            formality,
+            llm_model,
+        )
 
 
 # -----------------------  TREE KNOWLEDGE PROMPTS (tree_knowledge.py) -----------------------#
+@routed_llm_call
 def select_categories(
     categories: str, question: str, llm_provider: str = "google", llm_model: str = None
 ) -> dict:
@@ -894,8 +1266,11 @@ def select_categories(
         return groq_client.select_categories(categories, question, llm_model)
     elif llm_provider == "deepseek":
         return deepseek_client.select_categories(categories, question, llm_model)
+    elif llm_provider == "mock":
+        return mock_client.select_categories(categories, question, llm_model)
 
 
+@routed_llm_call
 def get_answer(
     keypoints: dict,
     question: str,
@@ -915,8 +1290,11 @@ def get_answer(
         return groq_client.get_answer(keypoints, question, language, llm_model)
     elif llm_provider == "deepseek":
         return deepseek_client.get_answer(keypoints, question, language, llm_model)
+    elif llm_provider == "mock":
+        return mock_client.get_answer(keypoints, question, language, llm_model)
 
 
+@routed_llm_call
 def summarize_conversation(
     subject: str,
     body: str,
@@ -950,8 +1328,13 @@ def summarize_conversation(
         return deepseek_client.summarize_conversation(
             subject, body, user_description, categories, language, llm_model
         )
+    elif llm_provider == "mock":
+        return mock_client.summarize_conversation(
+            subject, body, user_description, categories, language, llm_model
+        )
 
 
+@routed_llm_call
 def summarize_email(
     subject: str,
     body: str,
@@ -985,3 +1368,7 @@ def summarize_email(
         return deepseek_client.summarize_email(
             subject, body, user_description, categories, language, llm_model
         )
+    elif llm_provider == "mock":
+        return mock_client.summarize_email(
+            subject, body, user_description, categories, language, llm_model
+        )
@@ -5,30 +5,43 @@ Handles prompt engineering requests for Mistral API.
 """
 
 import os
-import re
 import json
 import logging
+import httpx
 from mistralai import ChatCompletionResponse, Mistral
-from datetime import datetime
-from aomail.ai_providers.utils import count_corrections, extract_json_from_response
-from aomail.ai_providers.prompts import (
-    CHAT_HISTORY_TEXT,
-    CORRECT_MAIL_LANGUAGE_MISTAKES_PROMPT,
-    DETERMINE_ACTION_SCENARIO_PROMPT,
-    EXTRACT_CONTACTS_RECIPIENTS_PROMPT,
-    GENERATE_CATEGORIES_SCRATCH_PROMPT,
-    GENERATE_PRIORITIZATION_SCRATCH_PROMPT,
-    GET_ANSWER_PROMPT,
-    IMPROVE_EMAIL_COPYWRITING_PROMPT,
-    RELEVANCE_LIST,
-    RESPONSE_LIST,
-    REVIEW_USER_DESCRIPTION_PROMPT,
-    SEARCH_EMAILS_PROMPT,
-    SELECT_CATEGORIES_PROMPT,
-    SIGNATURE_INSTRUCTION_WITH_CONTENT,
-    SIGNATURE_INSTRUCTION_WITHOUT_CONTENT,
-    SUMMARIZE_CONVERSATION_PROMPT,
-    SUMMARIZE_EMAIL_PROMPT,
+from typing import AsyncIterator
+from aomail.ai_providers.clients import (
+    get_async_client,
+    get_client,
+    get_http_limits,
+)
+from aomail.ai_providers import rate_limiter
+from aomail.ai_providers.utils import (
+    count_corrections,
+    estimate_tokens,
+    extract_json_from_response,
+)
+from aomail.ai_providers.prompt_formatters import (
+    format_categorize_and_summarize_email_prompt,
+    format_categorize_and_summarize_emails_prompt,
+    format_correct_mail_language_mistakes_prompt,
+    format_determine_action_scenario_prompt,
+    format_enrich_email_prompt,
+    format_extract_contacts_recipients_prompt,
+    format_generate_categories_scratch_prompt,
+    format_generate_email_prompt,
+    format_generate_email_response_prompt,
+    format_generate_prioritization_scratch_prompt,
+    format_generate_response_keywords_prompt,
+    format_get_answer_prompt,
+    format_improve_draft_prompt,
+    format_improve_email_copywriting_prompt,
+    format_improve_email_response_prompt,
+    format_review_user_description_prompt,
+    format_search_emails_prompt,
+    format_select_categories_prompt,
+    format_summarize_conversation_prompt,
+    format_summarize_email_prompt,
 )
 
 
@@ -37,21 +50,39 @@ MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
 
 
 ######################## TEXT PROCESSING UTILITIES ########################
+def get_mistral_client() -> Mistral:
+    """Returns the Mistral client shared by the process"""
+    return get_client(
+        "mistral",
+        None,
+        lambda: Mistral(
+            api_key=MISTRAL_API_KEY,
+            client=httpx.Client(limits=get_http_limits(), follow_redirects=True),
+        ),
+    )
+
+
 def get_prompt_response(
     formatted_prompt: str, model: str = "mistral-small-latest"
 ) -> ChatCompletionResponse:
     """Returns the prompt response"""
     if not model:
         model = "mistral-small-latest"
-    client = Mistral(api_key=MISTRAL_API_KEY)
-    response = client.chat.complete(
-        model=model,
-        messages=[
-            {
-                "role": "user",
-                "content": formatted_prompt,
-            },
-        ],
+    client = get_mistral_client()
+    response = rate_limiter.call(
+        "mistral",
+        model,
+        estimate_tokens(formatted_prompt),
+        lambda: client.chat.complete(
+            model=model,
+            messages=[
+                {
+                    "role": "user",
+                    "content": formatted_prompt,
+                },
+            ],
+        ),
+        lambda response: response.usage.total_tokens,
     )
     return response
 
@@ -67,8 +98,89 @@ def get_prompt_response_with_tokens(
     return result_json
 
 
+def get_async_mistral_client() -> Mistral:
+    """Returns the Mistral client of the running event loop, for async requests"""
+    return get_async_client(
+        "mistral",
+        None,
+        lambda: Mistral(
+            api_key=MISTRAL_API_KEY,
+            async_client=httpx.AsyncClient(
+                limits=get_http_limits(), follow_redirects=True
+            ),
+        ),
+    )
+
+
+async def async_get_prompt_text(
+    formatted_prompt: str, model: str = "mistral-small-latest"
+) -> dict:
+    """Returns the text and the tokens of the prompt response without blocking the event loop"""
+    if not model:
+        model = "mistral-small-latest"
+    client = get_async_mistral_client()
+    response = await rate_limiter.async_call(
+        "mistral",
+        model,
+        estimate_tokens(formatted_prompt),
+        lambda: client.chat.complete_async(
+            model=model,
+            messages=[
+                {
+                    "role": "user",
+                    "content": formatted_prompt,
+                },
+            ],
+        ),
+        lambda response: response.usage.total_tokens,
+    )
+    return {
+        "text": response.choices[0].message.content,
+        "tokens_input": response.usage.prompt_tokens,
+        "tokens_output": response.usage.completion_tokens,
+    }
+
+
+async def async_stream_prompt_text(
+    formatted_prompt: str, model: str = "mistral-small-latest"
+) -> AsyncIterator[dict]:
+    """Yields the text deltas of the prompt response as they are generated, then its tokens"""
+    if not model:
+        model = "mistral-small-latest"
+    client = get_async_mistral_client()
+    stream = await rate_limiter.async_call(
+        "mistral",
+        model,
+        estimate_tokens(formatted_prompt),
+        lambda: client.chat.stream_async(
+            model=model,
+            messages=[
+                {
+                    "role": "user",
+                    "content": formatted_prompt,
+                },
+            ],
+        ),
+        lambda stream: estimate_tokens(formatted_prompt),
+    )
+    async for event in stream:
+        chunk = event.data
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield {
+                "text": chunk.choices[0].delta.content,
+                "tokens_input": 0,
+                "tokens_output": 0,
+            }
+        if chunk.usage:
+            yield {
+                "text": "",
+                "tokens_input": chunk.usage.prompt_tokens,
+                "tokens_output": chunk.usage.completion_tokens,
+            }
+
+
 def extract_contacts_recipients(query: str, llm_model: str = None) -> dict:
-    formatted_prompt = EXTRACT_CONTACTS_RECIPIENTS_PROMPT.format(query=query)
+    formatted_prompt = format_extract_contacts_recipients_prompt(query)
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
@@ -79,8 +191,8 @@ def generate_response_keywords(
     input_subject: str,
     llm_model: str = None,
 ) -> dict:
-    formatted_prompt = base_prompt.format(
-        input_subject=input_subject, input_email=input_email
+    formatted_prompt = format_generate_response_keywords_prompt(
+        base_prompt, input_email, input_subject
     )
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
@@ -96,21 +208,8 @@ def generate_email(
     signature: str = "",
     llm_model: str = None,
 ) -> dict:
-    has_content = bool(signature) and bool(re.sub(r"<[^>]+>", "", signature).strip())
-    if has_content:
-        signature_instruction = SIGNATURE_INSTRUCTION_WITH_CONTENT.format(
-            signature=signature
-        )
-    else:
-        signature_instruction = SIGNATURE_INSTRUCTION_WITHOUT_CONTENT
-
-    formatted_prompt = base_prompt.format(
-        agent_settings=json.dumps(agent_settings),
-        length=length,
-        formality=formality,
-        language=language,
-        input_data=input_data,
-        signature_instruction=signature_instruction,
+    formatted_prompt = format_generate_email_prompt(
+        base_prompt, input_data, length, formality, language, agent_settings, signature
     )
 
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
@@ -121,9 +220,7 @@ def correct_mail_language_mistakes(
     subject: str,
     llm_model: str = None,
 ) -> dict:
-    formatted_prompt = CORRECT_MAIL_LANGUAGE_MISTAKES_PROMPT.format(
-        subject=subject, body=body
-    )
+    formatted_prompt = format_correct_mail_language_mistakes_prompt(body, subject)
     response = get_prompt_response(formatted_prompt, llm_model)
     clear_text = response.content[0].text.strip()
     result_json = json.loads(clear_text)
@@ -147,8 +244,8 @@ def correct_mail_language_mistakes(
 def improve_email_copywriting(
     email_subject: str, email_body: str, llm_model: str = None
 ) -> dict:
-    formatted_prompt = IMPROVE_EMAIL_COPYWRITING_PROMPT.format(
-        email_subject=email_subject, email_body=email_body
+    formatted_prompt = format_improve_email_copywriting_prompt(
+        email_subject, email_body
     )
     response = get_prompt_response(formatted_prompt, llm_model)
     feedback_ai = response.content[0].text.strip()
@@ -169,20 +266,13 @@ def generate_email_response(
     signature: str = "",
     llm_model: str = None,
 ) -> dict:
-    has_content = bool(signature) and bool(re.sub(r"<[^>]+>", "", signature).strip())
-    if has_content:
-        signature_instruction = SIGNATURE_INSTRUCTION_WITH_CONTENT.format(
-            signature=signature
-        )
-    else:
-        signature_instruction = SIGNATURE_INSTRUCTION_WITHOUT_CONTENT
-
-    formatted_prompt = base_prompt.format(
-        agent_settings=json.dumps(agent_settings),
-        input_subject=input_subject,
-        input_body=input_body,
-        user_instruction=user_instruction,
-        signature_instruction=signature_instruction,
+    formatted_prompt = format_generate_email_response_prompt(
+        base_prompt,
+        input_subject,
+        input_body,
+        user_instruction,
+        agent_settings,
+        signature,
     )
     response = get_prompt_response(formatted_prompt, llm_model)
     body = response.content[0].text.strip()
@@ -206,45 +296,91 @@ def categorize_and_summarize_email(
     useless_guidelines: str,
     llm_model: str = None,
 ) -> dict:
-    formatted_prompt = base_prompt.format(
-        sender=sender,
-        subject=subject,
-        decoded_data=decoded_data,
-        user_description=user_description,
-        category_dict=category_dict,
-        response_list=RESPONSE_LIST,
-        relevance_list=RELEVANCE_LIST,
-        important_guidelines=important_guidelines,
-        informative_guidelines=informative_guidelines,
-        useless_guidelines=useless_guidelines,
+    formatted_prompt = "".join(
+        format_categorize_and_summarize_email_prompt(
+            base_prompt,
+            subject,
+            decoded_data,
+            category_dict,
+            user_description,
+            sender,
+            important_guidelines,
+            informative_guidelines,
+            useless_guidelines,
+        )
     )
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
-def search_emails(query: str, language: str, llm_model: str = None) -> dict:
-    today = datetime.now().strftime("%m-%d-%Y")
-    formatted_prompt = SEARCH_EMAILS_PROMPT.format(
-        query=query, today=today, language=language
+def categorize_and_summarize_emails(
+    emails: list[dict],
+    category_dict: dict,
+    user_description: str,
+    important_guidelines: str,
+    informative_guidelines: str,
+    useless_guidelines: str,
+    llm_model: str = None,
+) -> dict:
+    formatted_prompt = "".join(
+        format_categorize_and_summarize_emails_prompt(
+            emails,
+            category_dict,
+            user_description,
+            important_guidelines,
+            informative_guidelines,
+            useless_guidelines,
+        )
     )
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
-def review_user_description(user_description: str, llm_model: str = None) -> dict:
-    formatted_prompt = REVIEW_USER_DESCRIPTION_PROMPT.format(
-        user_description=user_description
+def enrich_email(
+    subject: str,
+    decoded_data: str,
+    sender: str,
+    category_dict: dict,
+    user_description: str,
+    important_guidelines: str,
+    informative_guidelines: str,
+    useless_guidelines: str,
+    categories: dict,
+    language: str,
+    is_reply: bool,
+    llm_model: str = None,
+) -> dict:
+    formatted_prompt = "".join(
+        format_enrich_email_prompt(
+            subject,
+            decoded_data,
+            sender,
+            category_dict,
+            user_description,
+            important_guidelines,
+            informative_guidelines,
+            useless_guidelines,
+            categories,
+            language,
+            is_reply,
+        )
     )
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
+def search_emails(query: str, language: str, llm_model: str = None) -> dict:
+    formatted_prompt = format_search_emails_prompt(query, language)
+    return get_prompt_response_with_tokens(formatted_prompt, llm_model)
+
+
+def review_user_description(user_description: str, llm_model: str = None) -> dict:
+    formatted_prompt = format_review_user_description_prompt(user_description)
+    return get_prompt_response_with_tokens(formatted_prompt, llm_model)
+
+
 def generate_categories_scratch(
     user_topics: list | str, chat_history: list = None, llm_model: str = None
 ) -> dict:
-    chat_history_text = (
-        CHAT_HISTORY_TEXT.format(chat_history=chat_history) if chat_history else ""
-    )
-    formatted_prompt = GENERATE_CATEGORIES_SCRATCH_PROMPT.format(
-        user_topics=user_topics,
-        chat_history_text=chat_history_text,
+    formatted_prompt = format_generate_categories_scratch_prompt(
+        user_topics, chat_history
     )
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
@@ -252,9 +388,7 @@ def generate_categories_scratch(
 def generate_prioritization_scratch(
     user_input: dict | str, llm_model: str = None
 ) -> dict:
-    formatted_prompt = GENERATE_PRIORITIZATION_SCRATCH_PROMPT.format(
-        user_input=user_input
-    )
+    formatted_prompt = format_generate_prioritization_scratch_prompt(user_input)
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
@@ -268,9 +402,7 @@ def determine_action_scenario(
 ) -> dict:
     result_json = {"tokens_input": 0, "tokens_output": 0, "scenario": 5}
     if not destinary and not subject and (not email_content or is_only_signature):
-        formatted_prompt = DETERMINE_ACTION_SCENARIO_PROMPT.format(
-            user_request=user_request
-        )
+        formatted_prompt = format_determine_action_scenario_prompt(user_request)
         response = get_prompt_response_with_tokens(formatted_prompt, llm_model)
         try:
             scenario = response.get("scenario", 5)
@@ -311,13 +443,8 @@ def improve_email_response(
     agent_settings: dict,
     llm_model: str = None,
 ) -> dict:
-    formatted_prompt = base_prompt.format(
-        importance=importance,
-        subject=subject,
-        body=body,
-        history=history,
-        user_input=user_input,
-        agent_settings=agent_settings,
+    formatted_prompt = format_improve_email_response_prompt(
+        base_prompt, importance, subject, body, history, user_input, agent_settings
     )
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
@@ -334,32 +461,29 @@ def improve_draft(
     formality: str,
     llm_model: str = None,
 ) -> dict:
-    formatted_prompt = base_prompt.format(
-        language=language,
-        agent_settings=agent_settings,
-        subject=subject,
-        body=body,
-        history=history,
-        user_input=user_input,
-        length=length,
-        formality=formality,
+    formatted_prompt = format_improve_draft_prompt(
+        base_prompt,
+        language,
+        agent_settings,
+        subject,
+        body,
+        history,
+        user_input,
+        length,
+        formality,
     )
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
 def select_categories(categories: str, question: str, llm_model: str = None) -> dict:
-    formatted_prompt = SELECT_CATEGORIES_PROMPT.format(
-        categories=categories, question=question
-    )
+    formatted_prompt = format_select_categories_prompt(categories, question)
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
 def get_answer(
     keypoints: dict, question: str, language: str, llm_model: str = None
 ) -> dict:
-    formatted_prompt = GET_ANSWER_PROMPT.format(
-        keypoints=keypoints, question=question, language=language
-    )
+    formatted_prompt = format_get_answer_prompt(keypoints, question, language)
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
@@ -371,12 +495,8 @@ def summarize_conversation(
     language: str,
     llm_model: str = None,
 ) -> dict:
-    formatted_prompt = SUMMARIZE_CONVERSATION_PROMPT.format(
-        subject=subject,
-        body=body,
-        categories=categories,
-        user_description=user_description,
-        language=language,
+    formatted_prompt = format_summarize_conversation_prompt(
+        subject, body, user_description, categories, language
     )
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
@@ -389,11 +509,7 @@ def summarize_email(
     language: str,
     llm_model: str = None,
 ) -> dict:
-    formatted_prompt = SUMMARIZE_EMAIL_PROMPT.format(
-        subject=subject,
-        body=body,
-        categories=categories,
-        user_description=user_description,
-        language=language,
+    formatted_prompt = format_summarize_email_prompt(
+        subject, body, user_description, categories, language
     )
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
@@ -0,0 +1,907 @@
+"""
+Deterministic local LLM provider for load testing and offline benchmarks, selected with the "mock"
+LLM provider of a user.
+
+Implements every function of the other providers without any network request or API key. Prompts
+are formatted like the real providers, so the input tokens are realistic, and each function returns
+a schema-valid JSON response derived from its prompt after a simulated latency: a log-normal time to
+first token, then LLM_MOCK_TOKENS_PER_SECOND. Output token counts follow a normal distribution, and
+errors are injected at configurable rates: 429 and 503 go through the rate limiter and the circuit
+breaker like real provider errors, truncated JSON fails the parsing of the response. All draws come
+from a generator seeded with LLM_MOCK_SEED, so a benchmark replays the same sequence.
+
+Features:
+- ✅ extract_contacts_recipients: Categorizes email recipients.
+- ✅ generate_response_keywords: Suggests keywords for email responses.
+- ✅ generate_email: Creates emails per user guidelines.
+- ✅ correct_mail_language_mistakes: Fixes spelling and grammar errors.
+- ✅ improve_email_copywriting: Suggests improvements for email copywriting.
+- ✅ generate_email_response: Crafts responses based on input type.
+- ✅ search_emails: Searches and structures email data.
+- ✅ categorize_and_summarize_email: Categorizes and summarizes an email.
+- ✅ categorize_and_summarize_emails: Categorizes and summarizes several emails in one request.
+- ✅ enrich_email: Categorizes, summarizes and extracts the keypoints of an email in one request.
+- ✅ review_user_description: Reviews a user-provided description and provides validation and feedback.
+- ✅ generate_categories_scratch: Generates categories based on user topics for email classification.
+- ✅ generate_prioritization_scratch: Generates prioritization guidelines based on user input.
+- ✅ determine_action_scenario: Determines the scenario based on input flags and user request.
+- ✅ improve_email_response: Improves an email response based on user feedback.
+- ✅ improve_draft: Improves a draft email based on user feedback.
+- ✅ select_categories: Selects categories based on user input.
+- ✅ get_answer: Gets an answer based on user input.
+- ✅ summarize_conversation: Summarizes a conversation.
+- ✅ summarize_email: Summarizes an email.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+from typing import AsyncIterator
+import httpx
+from aomail.ai_providers import rate_limiter
+from aomail.ai_providers.utils import (
+    count_corrections,
+    estimate_tokens,
+    extract_json_from_response,
+)
+from aomail.ai_providers.prompts import (
+    CATEGORIZE_AND_SUMMARIZE_EMAIL_PROMPT,
+    CATEGORIZE_AND_SUMMARIZE_EMAILS_PROMPT,
+    CORRECT_MAIL_LANGUAGE_MISTAKES_PROMPT,
+    DETERMINE_ACTION_SCENARIO_PROMPT,
+    ENRICH_EMAIL_KEYPOINTS,
+    ENRICH_EMAIL_PROMPT,
+    EXTRACT_CONTACTS_RECIPIENTS_PROMPT,
+    GENERATE_CATEGORIES_SCRATCH_PROMPT,
+    GENERATE_EMAIL_PROMPT,
+    GENERATE_EMAIL_RESPONSE_PROMPT,
+    GENERATE_PRIORITIZATION_SCRATCH_PROMPT,
+    GENERATE_RESPONSE_KEYWORDS_PROMPT,
+    GET_ANSWER_PROMPT,
+    IMPROVE_EMAIL_COPYWRITING_PROMPT,
+    IMPROVE_EMAIL_DRAFT_PROMPT,
+    IMPROVE_EMAIL_RESPONSE_PROMPT,
+    RELEVANCE_LIST,
+    RESPONSE_LIST,
+    REVIEW_USER_DESCRIPTION_PROMPT,
+    SEARCH_EMAILS_PROMPT,
+    SELECT_CATEGORIES_PROMPT,
+    SUMMARIZE_CONVERSATION_PROMPT,
+    SUMMARIZE_EMAIL_PROMPT,
+)
+from aomail.ai_providers.prompt_formatters import (
+    format_categorize_and_summarize_email_prompt,
+    format_categorize_and_summarize_emails_prompt,
+    format_correct_mail_language_mistakes_prompt,
+    format_determine_action_scenario_prompt,
+    format_enrich_email_prompt,
+    format_extract_contacts_recipients_prompt,
+    format_generate_categories_scratch_prompt,
+    format_generate_email_prompt,
+    format_generate_email_response_prompt,
+    format_generate_prioritization_scratch_prompt,
+    format_generate_response_keywords_prompt,
+    format_get_answer_prompt,
+    format_improve_draft_prompt,
+    format_improve_email_copywriting_prompt,
+    format_improve_email_response_prompt,
+    format_review_user_description_prompt,
+    format_search_emails_prompt,
+    format_select_categories_prompt,
+    format_summarize_conversation_prompt,
+    format_summarize_email_prompt,
+)
+from aomail.constants import (
+    DEFAULT_CATEGORY,
+    LLM_MOCK_LATENCY_MEDIAN,
+    LLM_MOCK_LATENCY_SIGMA,
+    LLM_MOCK_MALFORMED_JSON_RATE,
+    LLM_MOCK_OUTPUT_TOKENS_MEAN,
+    LLM_MOCK_OUTPUT_TOKENS_STDDEV,
+    LLM_MOCK_RATE_LIMIT_ERROR_RATE,
+    LLM_MOCK_SEED,
+    LLM_MOCK_SERVER_ERROR_RATE,
+    LLM_MOCK_TOKENS_PER_SECOND,
+)
+
+
+LOGGER = logging.getLogger(__name__)
+
+WORDS = (
+    "project meeting budget deadline review update client proposal schedule report "
+    "team invoice contract planning agenda delivery feedback quarter roadmap launch"
+).split()
+IMPORTANCES = ["important", "informative", "useless"]
+
+# default prompt of each function, to recognize the function of a prompt sent to the transports
+PROMPT_FUNCTIONS = {
+    "extract_contacts_recipients": EXTRACT_CONTACTS_RECIPIENTS_PROMPT,
+    "generate_response_keywords": GENERATE_RESPONSE_KEYWORDS_PROMPT,
+    "generate_email": GENERATE_EMAIL_PROMPT,
+    "correct_mail_language_mistakes": CORRECT_MAIL_LANGUAGE_MISTAKES_PROMPT,
+    "improve_email_copywriting": IMPROVE_EMAIL_COPYWRITING_PROMPT,
+    "generate_email_response": GENERATE_EMAIL_RESPONSE_PROMPT,
+    "categorize_and_summarize_email": CATEGORIZE_AND_SUMMARIZE_EMAIL_PROMPT,
+    "categorize_and_summarize_emails": CATEGORIZE_AND_SUMMARIZE_EMAILS_PROMPT,
+    "enrich_email": ENRICH_EMAIL_PROMPT,
+    "search_emails": SEARCH_EMAILS_PROMPT,
+    "review_user_description": REVIEW_USER_DESCRIPTION_PROMPT,
+    "generate_categories_scratch": GENERATE_CATEGORIES_SCRATCH_PROMPT,
+    "generate_prioritization_scratch": GENERATE_PRIORITIZATION_SCRATCH_PROMPT,
+    "determine_action_scenario": DETERMINE_ACTION_SCENARIO_PROMPT,
+    "improve_email_response": IMPROVE_EMAIL_RESPONSE_PROMPT,
+    "improve_draft": IMPROVE_EMAIL_DRAFT_PROMPT,
+    "select_categories": SELECT_CATEGORIES_PROMPT,
+    "get_answer": GET_ANSWER_PROMPT,
+    "summarize_conversation": SUMMARIZE_CONVERSATION_PROMPT,
+    "summarize_email": SUMMARIZE_EMAIL_PROMPT,
+}
+
+_random = random.Random(LLM_MOCK_SEED)
+_lock = threading.Lock()
+
+
+class MockProviderError(Exception):
+    """Error injected by the mock provider, shaped like the status errors of the provider SDKs"""
+
+    def __init__(self, status_code: int, retry_after: int = 1):
+        super().__init__(f"Mock provider error {status_code}")
+        self.status_code = status_code
+        self.response = httpx.Response(
+            status_code, headers={"retry-after": str(retry_after)}
+        )
+
+
+######################## SIMULATION ########################
+def reset_mock(seed: int = LLM_MOCK_SEED):
+    """Reseeds the random generator of the simulated latencies, token counts and errors"""
+    with _lock:
+        _random.seed(seed)
+
+
+def draw_request() -> tuple[float, int, str | None]:
+    """
+    Draws the simulated behavior of a request.
+
+    Returns:
+        tuple[float, int, str | None]: The time to first token in seconds, the output tokens, and the
+                                       injected error: "rate_limit", "server_error", "malformed_json" or None.
+    """
+    with _lock:
+        time_to_first_token = LLM_MOCK_LATENCY_MEDIAN * math.exp(
+            _random.gauss(0, LLM_MOCK_LATENCY_SIGMA)
+        )
+        tokens_output = max(
+            1,
+            round(
+                _random.gauss(
+                    LLM_MOCK_OUTPUT_TOKENS_MEAN, LLM_MOCK_OUTPUT_TOKENS_STDDEV
+                )
+            ),
+        )
+        error_draw = _random.random()
+
+    error = None
+    if error_draw < LLM_MOCK_RATE_LIMIT_ERROR_RATE:
+        error = "rate_limit"
+    elif error_draw < LLM_MOCK_RATE_LIMIT_ERROR_RATE + LLM_MOCK_SERVER_ERROR_RATE:
+        error = "server_error"
+    elif (
+        error_draw
+        < LLM_MOCK_RATE_LIMIT_ERROR_RATE
+        + LLM_MOCK_SERVER_ERROR_RATE
+        + LLM_MOCK_MALFORMED_JSON_RATE
+    ):
+        error = "malformed_json"
+    return time_to_first_token, tokens_output, error
+
+
+def get_generation_time(tokens_output: int) -> float:
+    """Returns the seconds taken to generate the output tokens after the first one"""
+    if LLM_MOCK_TOKENS_PER_SECOND <= 0:
+        return 0.0
+    return tokens_output / LLM_MOCK_TOKENS_PER_SECOND
+
+
+def identify_function(formatted_prompt: str) -> str:
+    """
+    Returns the LLM function whose default prompt produced a formatted prompt.
+
+    Args:
+        formatted_prompt (str): The prompt sent to the transport.
+
+    Returns:
+        str: The function with the longest matching prompt prefix, "generate_email" for the
+             custom prompts of the users.
+    """
+    matches = []
+    for function_name, prompt in PROMPT_FUNCTIONS.items():
+        prefix = prompt.split("{")[0]
+        if formatted_prompt.startswith(prefix):
+            matches.append((len(prefix), function_name))
+    return max(matches)[1] if matches else "generate_email"
+
+
+def create_response(
+    formatted_prompt: str, function_name: str
+) -> tuple[float, dict | MockProviderError]:
+    """
+    Draws a simulated response.
+
+    Args:
+        formatted_prompt (str): The prompt.
+        function_name (str): The LLM function, key of RESPONSE_BUILDERS.
+
+    Returns:
+        tuple[float, dict | MockProviderError]: The time to first token, and the response 'text',
+                                                'tokens_input' and 'tokens_output' or the injected error.
+    """
+    time_to_first_token, tokens_output, error = draw_request()
+    if error == "rate_limit":
+        return time_to_first_token, MockProviderError(429)
+    if error == "server_error":
+        return time_to_first_token, MockProviderError(503)
+
+    # the content only depends on the prompt, so a prompt always gets the same answer
+    content = RESPONSE_BUILDERS[function_name](
+        formatted_prompt, tokens_output, random.Random(formatted_prompt)
+    )
+    text = content if isinstance(content, str) else json.dumps(content)
+    if error == "malformed_json":
+        text = text[: len(text) // 2]
+
+    return time_to_first_token, {
+        "text": text,
+        "tokens_input": estimate_tokens(formatted_prompt),
+        "tokens_output": tokens_output,
+    }
+
+
+######################## RESPONSES ########################
+def make_sentence(rng: random.Random, words: int = 6) -> str:
+    """Returns a sentence of random words"""
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def make_html_body(rng: random.Random, tokens: int) -> str:
+    """Returns an HTML email body of about the given number of tokens"""
+    paragraphs = []
+    length = 0
+    while length < tokens * 4:
+        paragraph = " ".join(make_sentence(rng, 8) for _ in range(3))
+        paragraphs.append(f"<p>{paragraph}</p>")
+        length += len(paragraph) + 7
+    return "".join(paragraphs)
+
+
+def make_keypoints(rng: random.Random) -> list[str]:
+    """Returns up to three keypoints"""
+    return [make_sentence(rng, 5) for _ in range(rng.randint(1, 3))]
+
+
+def make_categorization(rng: random.Random) -> dict:
+    """Returns the categorization of an email"""
+    return {
+        "topic": DEFAULT_CATEGORY,
+        "response": rng.choice(list(RESPONSE_LIST)),
+        "relevance": rng.choice(list(RELEVANCE_LIST)),
+        "importance": rng.choice(IMPORTANCES),
+        "flags": {
+            "spam": False,
+            "scam": False,
+            "newsletter": rng.random() < 0.2,
+            "notification": rng.random() < 0.2,
+            "meeting": rng.random() < 0.2,
+        },
+        "summary": {
+            "one_line": make_sentence(rng, 7),
+            "short": " ".join(make_sentence(rng, 10) for _ in range(3)),
+        },
+    }
+
+
+def make_knowledge(rng: random.Random, conversation: bool) -> dict:
+    """Returns the category, organization, topic and keypoints of an email or conversation"""
+    return {
+        "category": "Unknown",
+        "organization": "Unknown",
+        "topic": rng.choice(WORDS).capitalize(),
+        "keypoints": (
+            {"1": make_keypoints(rng)} if conversation else make_keypoints(rng)
+        ),
+    }
+
+
+def build_writing(prompt: str, tokens: int, rng: random.Random) -> dict:
+    return {"subject": make_sentence(rng, 4)[:-1], "body": make_html_body(rng, tokens)}
+
+
+def build_body(prompt: str, tokens: int, rng: random.Random) -> dict:
+    return {"body": make_html_body(rng, tokens)}
+
+
+def build_contacts(prompt: str, tokens: int, rng: random.Random) -> dict:
+    emails = re.findall(r"[\w.+-]+@[\w-]+\.[\w.-]+\w", prompt)
+    return {"main_recipients": emails, "cc_recipients": [], "bcc_recipients": []}
+
+
+def build_keywords(prompt: str, tokens: int, rng: random.Random) -> dict:
+    return {"keywords_list": [", ".join(rng.sample(WORDS, 3)) for _ in range(5)]}
+
+
+def build_correction(prompt: str, tokens: int, rng: random.Random) -> dict:
+    match = re.search(r"subject: (.*),\nbody: (.*)\n\Z", prompt, re.DOTALL)
+    if not match:
+        return build_writing(prompt, tokens, rng)
+    return {"subject": match.group(1), "body": match.group(2)}
+
+
+def build_copywriting(prompt: str, tokens: int, rng: random.Random) -> str:
+    return "\n\n".join(
+        f"<strong>{title}</strong>:\n{make_sentence(rng, 12)}"
+        for title in (
+            "Subject Feedback",
+            "Suggestions for the Subject",
+            "Email Body Feedback",
+            "Suggestions for the Email Body",
+        )
+    )
+
+
+def build_categorization(prompt: str, tokens: int, rng: random.Random) -> dict:
+    return make_categorization(rng)
+
+
+def build_batch_categorization(prompt: str, tokens: int, rng: random.Random) -> dict:
+    count = len(re.findall(r"^Email \d+:$", prompt, re.MULTILINE))
+    return {
+        "emails": [
+            {"index": index, **make_categorization(rng)} for index in range(count)
+        ]
+    }
+
+
+def build_enrichment(prompt: str, tokens: int, rng: random.Random) -> dict:
+    conversation = ENRICH_EMAIL_KEYPOINTS["conversation"][0] in prompt
+    return {**make_categorization(rng), "knowledge": make_knowledge(rng, conversation)}
+
+
+def build_search(prompt: str, tokens: int, rng: random.Random) -> dict:
+    match = re.search(r"user query: '(.*)'\. Knowing", prompt, re.DOTALL)
+    query = match.group(1) if match else ""
+    keywords = [word for word in re.findall(r"\w+", query) if len(word) > 3][:3]
+    keyword = keywords[0] if keywords else ""
+    return {
+        "max_results": 100,
+        "from": [],
+        "to": [],
+        "subject": keyword,
+        "body": keyword,
+        "filenames": [],
+        "date_from": "",
+        "keywords": keywords,
+        "search_in": {
+            "read": True,
+            "unread": True,
+            "drafts": False,
+            "sent_emails": False,
+            "deleted_emails": False,
+            "spams": False,
+        },
+    }
+
+
+def build_review(prompt: str, tokens: int, rng: random.Random) -> dict:
+    return {"valid": True, "feedback": make_sentence(rng, 8)}
+
+
+def build_categories(prompt: str, tokens: int, rng: random.Random) -> dict:
+    return {
+        "categories": [
+            {
+                "name": word.capitalize(),
+                "description": make_sentence(rng, 10),
+                "feedback": make_sentence(rng, 6),
+            }
+            for word in rng.sample(WORDS, 3)
+        ]
+    }
+
+
+def build_prioritization(prompt: str, tokens: int, rng: random.Random) -> dict:
+    return {importance: make_sentence(rng, 12) for importance in IMPORTANCES}
+
+
+def build_scenario(prompt: str, tokens: int, rng: random.Random) -> dict:
+    return {"scenario": rng.choice([1, 2, 3])}
+
+
+def build_selection(prompt: str, tokens: int, rng: random.Random) -> dict:
+    return {}
+
+
+def build_answer(prompt: str, tokens: int, rng: random.Random) -> dict:
+    return {"sure": rng.random() < 0.5, "answer": make_sentence(rng, 12)}
+
+
+def build_conversation_summary(prompt: str, tokens: int, rng: random.Random) -> dict:
+    return make_knowledge(rng, True)
+
+
+def build_email_summary(prompt: str, tokens: int, rng: random.Random) -> dict:
+    return make_knowledge(rng, False)
+
+
+RESPONSE_BUILDERS = {
+    "extract_contacts_recipients": build_contacts,
+    "generate_response_keywords": build_keywords,
+    "generate_email": build_writing,
+    "correct_mail_language_mistakes": build_correction,
+    "improve_email_copywriting": build_copywriting,
+    "generate_email_response": build_body,
+    "categorize_and_summarize_email": build_categorization,
+    "categorize_and_summarize_emails": build_batch_categorization,
+    "enrich_email": build_enrichment,
+    "search_emails": build_search,
+    "review_user_description": build_review,
+    "generate_categories_scratch": build_categories,
+    "generate_prioritization_scratch": build_prioritization,
+    "determine_action_scenario": build_scenario,
+    "improve_email_response": build_body,
+    "improve_draft": build_writing,
+    "select_categories": build_selection,
+    "get_answer": build_answer,
+    "summarize_conversation": build_conversation_summary,
+    "summarize_email": build_email_summary,
+}
+
+
+######################## TEXT PROCESSING UTILITIES ########################
+def get_prompt_response(
+    formatted_prompt: str, function_name: str, model: str = "mock-1"
+) -> dict:
+    """Returns the text and the tokens of the simulated response of an LLM function"""
+    if not model:
+        model = "mock-1"
+
+    def request() -> dict:
+        time_to_first_token, response = create_response(formatted_prompt, function_name)
+        if isinstance(response, MockProviderError):
+            time.sleep(time_to_first_token)
+            raise response
+        time.sleep(time_to_first_token + get_generation_time(response["tokens_output"]))
+        return response
+
+    return rate_limiter.call(
+        "mock",
+        model,
+        estimate_tokens(formatted_prompt),
+        request,
+        lambda response: response["tokens_input"] + response["tokens_output"],
+    )
+
+
+def get_prompt_response_with_tokens(
+    formatted_prompt: str, function_name: str, model: str = "mock-1"
+) -> dict:
+    response = get_prompt_response(formatted_prompt, function_name, model)
+    result_json = extract_json_from_response(response["text"])
+    result_json["tokens_input"] = response["tokens_input"]
+    result_json["tokens_output"] = response["tokens_output"]
+    return result_json
+
+
+async def async_get_prompt_text(formatted_prompt: str, model: str = "mock-1") -> dict:
+    """Returns the text and the tokens of the simulated response without blocking the event loop"""
+    if not model:
+        model = "mock-1"
+    function_name = identify_function(formatted_prompt)
+
+    async def request() -> dict:
+        time_to_first_token, response = create_response(formatted_prompt, function_name)
+        if isinstance(response, MockProviderError):
+            await asyncio.sleep(time_to_first_token)
+            raise response
+        await asyncio.sleep(
+            time_to_first_token + get_generation_time(response["tokens_output"])
+        )
+        return response
+
+    return await rate_limiter.async_call(
+        "mock",
+        model,
+        estimate_tokens(formatted_prompt),
+        request,
+        lambda response: response["tokens_input"] + response["tokens_output"],
+    )
+
+
+async def async_stream_prompt_text(
+    formatted_prompt: str, model: str = "mock-1"
+) -> AsyncIterator[dict]:
+    """Yields the text deltas of the simulated response at the simulated generation speed, then its tokens"""
+    if not model:
+        model = "mock-1"
+    function_name = identify_function(formatted_prompt)
+
+    async def request() -> dict:
+        time_to_first_token, response = create_response(formatted_prompt, function_name)
+        await asyncio.sleep(time_to_first_token)
+        if isinstance(response, MockProviderError):
+            raise response
+        return response
+
+    response = await rate_limiter.async_call(
+        "mock",
+        model,
+        estimate_tokens(formatted_prompt),
+        request,
+        lambda response: response["tokens_input"] + response["tokens_output"],
+    )
+    text = response["text"]
+    chunk_size = max(1, math.ceil(len(text) / response["tokens_output"]))
+    delay = get_generation_time(1)
+    for start in range(0, len(text), chunk_size):
+        if start:
+            await asyncio.sleep(delay)
+        yield {
+            "text": text[start : start + chunk_size],
+            "tokens_input": 0,
+            "tokens_output": 0,
+        }
+    yield {
+        "text": "",
+        "tokens_input": response["tokens_input"],
+        "tokens_output": response["tokens_output"],
+    }
+
+
+def extract_contacts_recipients(query: str, llm_model: str = None) -> dict:
+    formatted_prompt = format_extract_contacts_recipients_prompt(query)
+    return get_prompt_response_with_tokens(
+        formatted_prompt, "extract_contacts_recipients", llm_model
+    )
+
+
+# ----------------------- PREPROCESSING REPLY EMAIL -----------------------#
+def generate_response_keywords(
+    base_prompt: str, input_email: str, input_subject: str, llm_model: str = None
+) -> dict:
+    formatted_prompt = format_generate_response_keywords_prompt(
+        base_prompt, input_email, input_subject
+    )
+    return get_prompt_response_with_tokens(
+        formatted_prompt, "generate_response_keywords", llm_model
+    )
+
+
+######################## WRITING ########################
+def generate_email(
+    base_prompt: str,
+    input_data: str,
+    length: str,
+    formality: str,
+    language: str,
+    agent_settings: dict,
+    signature: str = "",
+    llm_model: str = None,
+) -> dict:
+    formatted_prompt = format_generate_email_prompt(
+        base_prompt, input_data, length, formality, language, agent_settings, signature
+    )
+    return get_prompt_response_with_tokens(
+        formatted_prompt, "generate_email", llm_model
+    )
+
+
+def correct_mail_language_mistakes(
+    body: str, subject: str, llm_model: str = None
+) -> dict:
+    formatted_prompt = format_correct_mail_language_mistakes_prompt(body, subject)
+    result_json = get_prompt_response_with_tokens(
+        formatted_prompt, "correct_mail_language_mistakes", llm_model
+    )
+
+    corrected_subject = result_json["subject"]
+    corrected_body = result_json["body"]
+
+    num_corrections = count_corrections(
+        subject, body, corrected_subject, corrected_body
+    )
+
+    return {
+        "correctedSubject": corrected_subject,
+        "correctedBody": corrected_body,
+        "numCorrections": num_corrections,
+        "tokens_input": result_json["tokens_input"],
+        "tokens_output": result_json["tokens_output"],
+    }
+
+
+def improve_email_copywriting(
+    email_subject: str, email_body: str, llm_model: str = None
+) -> dict:
+    formatted_prompt = format_improve_email_copywriting_prompt(
+        email_subject, email_body
+    )
+    response = get_prompt_response(
+        formatted_prompt, "improve_email_copywriting", llm_model
+    )
+
+    return {
+        "feedback_ai": response["text"].strip(),
+        "tokens_input": response["tokens_input"],
+        "tokens_output": response["tokens_output"],
+    }
+
+
+def generate_email_response(
+    base_prompt: str,
+    input_subject: str,
+    input_body: str,
+    user_instruction: str,
+    agent_settings: dict,
+    signature: str = "",
+    llm_model: str = None,
+) -> dict:
+    formatted_prompt = format_generate_email_response_prompt(
+        base_prompt,
+        input_subject,
+        input_body,
+        user_instruction,
+        agent_settings,
+        signature,
+    )
+    return get_prompt_response_with_tokens(
+        formatted_prompt, "generate_email_response", llm_model
+    )
+
+
+def categorize_and_summarize_email(
+    base_prompt: str,
+    subject: str,
+    decoded_data: str,
+    category_dict: dict,
+    user_description: str,
+    sender: str,
+    important_guidelines: str,
+    informative_guidelines: str,
+    useless_guidelines: str,
+    llm_model: str = None,
+) -> dict:
+    formatted_prompt = "".join(
+        format_categorize_and_summarize_email_prompt(
+            base_prompt,
+            subject,
+            decoded_data,
+            category_dict,
+            user_description,
+            sender,
+            important_guidelines,
+            informative_guidelines,
+            useless_guidelines,
+        )
+    )
+    return get_prompt_response_with_tokens(
+        formatted_prompt, "categorize_and_summarize_email", llm_model
+    )
+
+
+def categorize_and_summarize_emails(
+    emails: list[dict],
+    category_dict: dict,
+    user_description: str,
+    important_guidelines: str,
+    informative_guidelines: str,
+    useless_guidelines: str,
+    llm_model: str = None,
+) -> dict:
+    formatted_prompt = "".join(
+        format_categorize_and_summarize_emails_prompt(
+            emails,
+            category_dict,
+            user_description,
+            important_guidelines,
+            informative_guidelines,
+            useless_guidelines,
+        )
+    )
+    return get_prompt_response_with_tokens(
+        formatted_prompt, "categorize_and_summarize_emails", llm_model
+    )
+
+
+def enrich_email(
+    subject: str,
+    decoded_data: str,
+    sender: str,
+    category_dict: dict,
+    user_description: str,
+    important_guidelines: str,
+    informative_guidelines: str,
+    useless_guidelines: str,
+    categories: dict,
+    language: str,
+    is_reply: bool,
+    llm_model: str = None,
+) -> dict:
+    formatted_prompt = "".join(
+        format_enrich_email_prompt(
+            subject,
+            decoded_data,
+            sender,
+            category_dict,
+            user_description,
+            important_guidelines,
+            informative_guidelines,
+            useless_guidelines,
+            categories,
+            language,
+            is_reply,
+        )
+    )
+    return get_prompt_response_with_tokens(formatted_prompt, "enrich_email", llm_model)
+
+
+def search_emails(query: str, language: str, llm_model: str = None) -> dict:
+    formatted_prompt = format_search_emails_prompt(query, language)
+    return get_prompt_response_with_tokens(formatted_prompt, "search_emails", llm_model)
+
+
+def review_user_description(user_description: str, llm_model: str = None) -> dict:
+    formatted_prompt = format_review_user_description_prompt(user_description)
+    return get_prompt_response_with_tokens(
+        formatted_prompt, "review_user_description", llm_model
+    )
+
+
+def generate_categories_scratch(
+    user_topics: list | str, chat_history: list = None, llm_model: str = None
+) -> dict:
+    formatted_prompt = format_generate_categories_scratch_prompt(
+        user_topics, chat_history
+    )
+    return get_prompt_response_with_tokens(
+        formatted_prompt, "generate_categories_scratch", llm_model
+    )
+
+
+def generate_prioritization_scratch(
+    user_input: dict | str, llm_model: str = None
+) -> dict:
+    formatted_prompt = format_generate_prioritization_scratch_prompt(user_input)
+    return get_prompt_response_with_tokens(
+        formatted_prompt, "generate_prioritization_scratch", llm_model
+    )
+
+
+def determine_action_scenario(
+    destinary: bool,
+    subject: bool,
+    email_content: bool,
+    user_request: str,
+    is_only_signature: bool,
+    llm_model: str = None,
+) -> dict:
+    result_json = {"tokens_input": 0, "tokens_output": 0, "scenario": 5}
+    if not destinary and not subject and (not email_content or is_only_signature):
+        formatted_prompt = format_determine_action_scenario_prompt(user_request)
+        result_json = get_prompt_response_with_tokens(
+            formatted_prompt, "determine_action_scenario", llm_model
+        )
+        if result_json.get("scenario", 5) not in [1, 2, 3]:
+            LOGGER.error(
+                f"Invalid scenario number received from AI: {result_json.get('scenario')}"
+            )
+            result_json["scenario"] = 5
+        return result_json
+
+    if destinary and not subject and (not email_content or is_only_signature):
+        result_json["scenario"] = 3
+        return result_json
+
+    if destinary and subject and (not email_content or is_only_signature):
+        result_json["scenario"] = 3
+        return result_json
+
+    if email_content and not is_only_signature:
+        result_json["scenario"] = 4
+        return result_json
+
+    result_json["scenario"] = 5
+    return result_json
+
+
+def improve_email_response(
+    base_prompt: str,
+    importance: str,
+    subject: str,
+    body: str,
+    history: dict,
+    user_input: str,
+    agent_settings: dict,
+    llm_model: str = None,
+) -> dict:
+    formatted_prompt = format_improve_email_response_prompt(
+        base_prompt, importance, subject, body, history, user_input, agent_settings
+    )
+    return get_prompt_response_with_tokens(
+        formatted_prompt, "improve_email_response", llm_model
+    )
+
+
+def improve_draft(
+    base_prompt: str,
+    language: str,
+    agent_settings: dict,
+    subject: str,
+    body: str,
+    history: dict,
+    user_input: str,
+    length: str,
+    formality: str,
+    llm_model: str = None,
+) -> dict:
+    formatted_prompt = format_improve_draft_prompt(
+        base_prompt,
+        language,
+        agent_settings,
+        subject,
+        body,
+        history,
+        user_input,
+        length,
+        formality,
+    )
+    return get_prompt_response_with_tokens(formatted_prompt, "improve_draft", llm_model)
+
+
+def select_categories(categories: str, question: str, llm_model: str = None) -> dict:
+    formatted_prompt = format_select_categories_prompt(categories, question)
+    return get_prompt_response_with_tokens(
+        formatted_prompt, "select_categories", llm_model
+    )
+
+
+def get_answer(
+    keypoints: dict, question: str, language: str, llm_model: str = None
+) -> dict:
+    formatted_prompt = format_get_answer_prompt(keypoints, question, language)
+    return get_prompt_response_with_tokens(formatted_prompt, "get_answer", llm_model)
+
+
+def summarize_conversation(
+    subject: str,
+    body: str,
+    user_description: str,
+    categories: dict,
+    language: str,
+    llm_model: str = None,
+) -> dict:
+    formatted_prompt = format_summarize_conversation_prompt(
+        subject, body, user_description, categories, language
+    )
+    return get_prompt_response_with_tokens(
+        formatted_prompt, "summarize_conversation", llm_model
+    )
+
+
+def summarize_email(
+    subject: str,
+    body: str,
+    user_description: str,
+    categories: dict,
+    language: str,
+    llm_model: str = None,
+) -> dict:
+    formatted_prompt = format_summarize_email_prompt(
+        subject, body, user_description, categories, language
+    )
+    return get_prompt_response_with_tokens(
+        formatted_prompt, "summarize_email", llm_model
+    )
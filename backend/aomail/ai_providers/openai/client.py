@@ -4,33 +4,47 @@ Handles prompt engineering requests for GPT-4 API.
 ⚠️ This file is untested ⚠️
 """
 
+import hashlib
 import logging
 import os
 import openai
-import re
 import json
 import logging
-from datetime import datetime
+from typing import AsyncIterator
 from openai.types.chat.chat_completion import ChatCompletion
-from aomail.ai_providers.utils import count_corrections, extract_json_from_response
-from aomail.ai_providers.prompts import (
-    CHAT_HISTORY_TEXT,
-    CORRECT_MAIL_LANGUAGE_MISTAKES_PROMPT,
-    DETERMINE_ACTION_SCENARIO_PROMPT,
-    EXTRACT_CONTACTS_RECIPIENTS_PROMPT,
-    GENERATE_CATEGORIES_SCRATCH_PROMPT,
-    GENERATE_PRIORITIZATION_SCRATCH_PROMPT,
-    GET_ANSWER_PROMPT,
-    IMPROVE_EMAIL_COPYWRITING_PROMPT,
-    RELEVANCE_LIST,
-    RESPONSE_LIST,
-    REVIEW_USER_DESCRIPTION_PROMPT,
-    SEARCH_EMAILS_PROMPT,
-    SELECT_CATEGORIES_PROMPT,
-    SIGNATURE_INSTRUCTION_WITH_CONTENT,
-    SIGNATURE_INSTRUCTION_WITHOUT_CONTENT,
-    SUMMARIZE_CONVERSATION_PROMPT,
-    SUMMARIZE_EMAIL_PROMPT,
+from openai.types.completion_usage import CompletionUsage
+from aomail.ai_providers.clients import (
+    get_async_client,
+    get_client,
+    get_http_limits,
+)
+from aomail.ai_providers import rate_limiter
+from aomail.ai_providers.utils import (
+    count_corrections,
+    estimate_tokens,
+    extract_json_from_response,
+)
+from aomail.ai_providers.prompt_formatters import (
+    format_categorize_and_summarize_email_prompt,
+    format_categorize_and_summarize_emails_prompt,
+    format_correct_mail_language_mistakes_prompt,
+    format_determine_action_scenario_prompt,
+    format_enrich_email_prompt,
+    format_extract_contacts_recipients_prompt,
+    format_generate_categories_scratch_prompt,
+    format_generate_email_prompt,
+    format_generate_email_response_prompt,
+    format_generate_prioritization_scratch_prompt,
+    format_generate_response_keywords_prompt,
+    format_get_answer_prompt,
+    format_improve_draft_prompt,
+    format_improve_email_copywriting_prompt,
+    format_improve_email_response_prompt,
+    format_review_user_description_prompt,
+    format_search_emails_prompt,
+    format_select_categories_prompt,
+    format_summarize_conversation_prompt,
+    format_summarize_email_prompt,
 )
 
 
@@ -39,33 +53,151 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 
 ######################## TEXT PROCESSING UTILITIES ########################
+def get_openai_client() -> openai.OpenAI:
+    """Returns the OpenAI client shared by the process"""
+    return get_client(
+        "openai",
+        None,
+        lambda: openai.OpenAI(
+            api_key=OPENAI_API_KEY,
+            http_client=openai.DefaultHttpxClient(limits=get_http_limits()),
+            max_retries=0,
+        ),
+    )
+
+
+def get_cache_options(cached_prefix: str) -> dict:
+    """
+    Returns the options routing the requests sharing a prompt prefix to the same prompt cache.
+
+    OpenAI caches the prompt prefixes automatically, the key only improves the cache hits.
+    """
+    if not cached_prefix:
+        return {}
+    return {
+        "prompt_cache_key": hashlib.sha256(cached_prefix.encode("utf-8")).hexdigest()[
+            :32
+        ]
+    }
+
+
+def get_cached_tokens(usage: CompletionUsage) -> int:
+    """Returns the input tokens of a response read from the prompt cache"""
+    details = usage.prompt_tokens_details
+    return (details.cached_tokens or 0) if details else 0
+
+
 def get_prompt_response(
-    formatted_prompt: str, model: str = "gpt-4o-mini"
+    formatted_prompt: str, model: str = "gpt-4o-mini", cached_prefix: str = ""
 ) -> ChatCompletion:
     """Returns the prompt response"""
     if not model:
         model = "gpt-4o-mini"
-    client = openai.OpenAI(api_key=OPENAI_API_KEY)
-    response = client.chat.completions.create(
-        model=model,
-        messages=[{"role": "user", "content": formatted_prompt}],
+    client = get_openai_client()
+    response = rate_limiter.call(
+        "openai",
+        model,
+        estimate_tokens(formatted_prompt),
+        lambda: client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": formatted_prompt}],
+            **get_cache_options(cached_prefix),
+        ),
+        lambda response: response.usage.total_tokens,
     )
     return response
 
 
 def get_prompt_response_with_tokens(
-    formatted_prompt: str, model: str = "gpt-4o-mini"
+    formatted_prompt: str, model: str = "gpt-4o-mini", cached_prefix: str = ""
 ) -> dict:
     """Returns the prompt response with tokens"""
-    response = get_prompt_response(formatted_prompt, model)
+    response = get_prompt_response(formatted_prompt, model, cached_prefix)
     result_json = extract_json_from_response(response.choices[0].message.content)
     result_json["tokens_input"] = response.usage.prompt_tokens
     result_json["tokens_output"] = response.usage.completion_tokens
+    if cached_prefix:
+        result_json["tokens_cache_read"] = get_cached_tokens(response.usage)
     return result_json
 
 
+def get_async_openai_client() -> openai.AsyncOpenAI:
+    """Returns the async OpenAI client of the running event loop"""
+    return get_async_client(
+        "openai",
+        None,
+        lambda: openai.AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            http_client=openai.DefaultAsyncHttpxClient(limits=get_http_limits()),
+            max_retries=0,
+        ),
+    )
+
+
+async def async_get_prompt_text(
+    formatted_prompt: str, model: str = "gpt-4o-mini", cached_prefix: str = ""
+) -> dict:
+    """Returns the text and the tokens of the prompt response without blocking the event loop"""
+    if not model:
+        model = "gpt-4o-mini"
+    client = get_async_openai_client()
+    response = await rate_limiter.async_call(
+        "openai",
+        model,
+        estimate_tokens(formatted_prompt),
+        lambda: client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": formatted_prompt}],
+            **get_cache_options(cached_prefix),
+        ),
+        lambda response: response.usage.total_tokens,
+    )
+    result = {
+        "text": response.choices[0].message.content,
+        "tokens_input": response.usage.prompt_tokens,
+        "tokens_output": response.usage.completion_tokens,
+    }
+    if cached_prefix:
+        result["tokens_cache_read"] = get_cached_tokens(response.usage)
+    return result
+
+
+async def async_stream_prompt_text(
+    formatted_prompt: str, model: str = "gpt-4o-mini"
+) -> AsyncIterator[dict]:
+    """Yields the text deltas of the prompt response as they are generated, then its tokens"""
+    if not model:
+        model = "gpt-4o-mini"
+    client = get_async_openai_client()
+    stream = await rate_limiter.async_call(
+        "openai",
+        model,
+        estimate_tokens(formatted_prompt),
+        lambda: client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": formatted_prompt}],
+            stream=True,
+            stream_options={"include_usage": True},
+        ),
+        lambda stream: estimate_tokens(formatted_prompt),
+    )
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield {
+                "text": chunk.choices[0].delta.content,
+                "tokens_input": 0,
+                "tokens_output": 0,
+            }
+        if chunk.usage:
+            yield {
+                "text": "",
+                "tokens_input": chunk.usage.prompt_tokens,
+                "tokens_output": chunk.usage.completion_tokens,
+            }
+
+
 def extract_contacts_recipients(query: str, llm_model: str = None) -> dict:
-    formatted_prompt = EXTRACT_CONTACTS_RECIPIENTS_PROMPT.format(query=query)
+    formatted_prompt = format_extract_contacts_recipients_prompt(query)
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
@@ -76,8 +208,8 @@ def generate_response_keywords(
     input_subject: str,
     llm_model: str = None,
 ) -> dict:
-    formatted_prompt = base_prompt.format(
-        input_subject=input_subject, input_email=input_email
+    formatted_prompt = format_generate_response_keywords_prompt(
+        base_prompt, input_email, input_subject
     )
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
@@ -93,21 +225,8 @@ def generate_email(
     signature: str = "",
     llm_model: str = None,
 ) -> dict:
-    has_content = bool(signature) and bool(re.sub(r"<[^>]+>", "", signature).strip())
-    if has_content:
-        signature_instruction = SIGNATURE_INSTRUCTION_WITH_CONTENT.format(
-            signature=signature
-        )
-    else:
-        signature_instruction = SIGNATURE_INSTRUCTION_WITHOUT_CONTENT
-
-    formatted_prompt = base_prompt.format(
-        agent_settings=json.dumps(agent_settings),
-        length=length,
-        formality=formality,
-        language=language,
-        input_data=input_data,
-        signature_instruction=signature_instruction,
+    formatted_prompt = format_generate_email_prompt(
+        base_prompt, input_data, length, formality, language, agent_settings, signature
     )
 
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
@@ -118,9 +237,7 @@ def correct_mail_language_mistakes(
     subject: str,
     llm_model: str = None,
 ) -> dict:
-    formatted_prompt = CORRECT_MAIL_LANGUAGE_MISTAKES_PROMPT.format(
-        subject=subject, body=body
-    )
+    formatted_prompt = format_correct_mail_language_mistakes_prompt(body, subject)
     response = get_prompt_response(formatted_prompt, llm_model)
     clear_text = response.content[0].text.strip()
     result_json = json.loads(clear_text)
@@ -144,8 +261,8 @@ def correct_mail_language_mistakes(
 def improve_email_copywriting(
     email_subject: str, email_body: str, llm_model: str = None
 ) -> dict:
-    formatted_prompt = IMPROVE_EMAIL_COPYWRITING_PROMPT.format(
-        email_subject=email_subject, email_body=email_body
+    formatted_prompt = format_improve_email_copywriting_prompt(
+        email_subject, email_body
     )
     response = get_prompt_response(formatted_prompt, llm_model)
     feedback_ai = response.content[0].text.strip()
@@ -166,20 +283,13 @@ def generate_email_response(
     signature: str = "",
     llm_model: str = None,
 ) -> dict:
-    has_content = bool(signature) and bool(re.sub(r"<[^>]+>", "", signature).strip())
-    if has_content:
-        signature_instruction = SIGNATURE_INSTRUCTION_WITH_CONTENT.format(
-            signature=signature
-        )
-    else:
-        signature_instruction = SIGNATURE_INSTRUCTION_WITHOUT_CONTENT
-
-    formatted_prompt = base_prompt.format(
-        agent_settings=json.dumps(agent_settings),
-        input_subject=input_subject,
-        input_body=input_body,
-        user_instruction=user_instruction,
-        signature_instruction=signature_instruction,
+    formatted_prompt = format_generate_email_response_prompt(
+        base_prompt,
+        input_subject,
+        input_body,
+        user_instruction,
+        agent_settings,
+        signature,
     )
     response = get_prompt_response(formatted_prompt, llm_model)
     body = response.content[0].text.strip()
@@ -203,45 +313,91 @@ def categorize_and_summarize_email(
     useless_guidelines: str,
     llm_model: str = None,
 ) -> dict:
-    formatted_prompt = base_prompt.format(
-        sender=sender,
-        subject=subject,
-        decoded_data=decoded_data,
-        user_description=user_description,
-        category_dict=category_dict,
-        response_list=RESPONSE_LIST,
-        relevance_list=RELEVANCE_LIST,
-        important_guidelines=important_guidelines,
-        informative_guidelines=informative_guidelines,
-        useless_guidelines=useless_guidelines,
+    cached_prefix, email_prompt = format_categorize_and_summarize_email_prompt(
+        base_prompt,
+        subject,
+        decoded_data,
+        category_dict,
+        user_description,
+        sender,
+        important_guidelines,
+        informative_guidelines,
+        useless_guidelines,
+    )
+    return get_prompt_response_with_tokens(
+        cached_prefix + email_prompt, llm_model, cached_prefix=cached_prefix
     )
-    return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
-def search_emails(query: str, language: str, llm_model: str = None) -> dict:
-    today = datetime.now().strftime("%m-%d-%Y")
-    formatted_prompt = SEARCH_EMAILS_PROMPT.format(
-        query=query, today=today, language=language
+def categorize_and_summarize_emails(
+    emails: list[dict],
+    category_dict: dict,
+    user_description: str,
+    important_guidelines: str,
+    informative_guidelines: str,
+    useless_guidelines: str,
+    llm_model: str = None,
+) -> dict:
+    cached_prefix, email_prompt = format_categorize_and_summarize_emails_prompt(
+        emails,
+        category_dict,
+        user_description,
+        important_guidelines,
+        informative_guidelines,
+        useless_guidelines,
+    )
+    return get_prompt_response_with_tokens(
+        cached_prefix + email_prompt, llm_model, cached_prefix=cached_prefix
+    )
+
+
+def enrich_email(
+    subject: str,
+    decoded_data: str,
+    sender: str,
+    category_dict: dict,
+    user_description: str,
+    important_guidelines: str,
+    informative_guidelines: str,
+    useless_guidelines: str,
+    categories: dict,
+    language: str,
+    is_reply: bool,
+    llm_model: str = None,
+) -> dict:
+    cached_prefix, email_prompt = format_enrich_email_prompt(
+        subject,
+        decoded_data,
+        sender,
+        category_dict,
+        user_description,
+        important_guidelines,
+        informative_guidelines,
+        useless_guidelines,
+        categories,
+        language,
+        is_reply,
+    )
+    return get_prompt_response_with_tokens(
+        cached_prefix + email_prompt, llm_model, cached_prefix=cached_prefix
     )
+
+
+def search_emails(query: str, language: str, llm_model: str = None) -> dict:
+    formatted_prompt = format_search_emails_prompt(query, language)
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
 def review_user_description(user_description: str, llm_model: str = None) -> dict:
-    formatted_prompt = REVIEW_USER_DESCRIPTION_PROMPT.format(
-        user_description=user_description
-    )
+    formatted_prompt = format_review_user_description_prompt(user_description)
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
 def generate_categories_scratch(
     user_topics: list | str, chat_history: list = None, llm_model: str = None
 ) -> dict:
-    chat_history_text = (
-        CHAT_HISTORY_TEXT.format(chat_history=chat_history) if chat_history else ""
-    )
-    formatted_prompt = GENERATE_CATEGORIES_SCRATCH_PROMPT.format(
-        user_topics=user_topics,
-        chat_history_text=chat_history_text,
+    formatted_prompt = format_generate_categories_scratch_prompt(
+        user_topics, chat_history
     )
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
@@ -249,9 +405,7 @@ def generate_categories_scratch(
 def generate_prioritization_scratch(
     user_input: dict | str, llm_model: str = None
 ) -> dict:
-    formatted_prompt = GENERATE_PRIORITIZATION_SCRATCH_PROMPT.format(
-        user_input=user_input
-    )
+    formatted_prompt = format_generate_prioritization_scratch_prompt(user_input)
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
@@ -265,9 +419,7 @@ def determine_action_scenario(
 ) -> dict:
     result_json = {"tokens_input": 0, "tokens_output": 0, "scenario": 5}
     if not destinary and not subject and (not email_content or is_only_signature):
-        formatted_prompt = DETERMINE_ACTION_SCENARIO_PROMPT.format(
-            user_request=user_request
-        )
+        formatted_prompt = format_determine_action_scenario_prompt(user_request)
         response = get_prompt_response_with_tokens(formatted_prompt, llm_model)
         try:
             scenario = response.get("scenario", 5)
@@ -308,13 +460,8 @@ def improve_email_response(
     agent_settings: dict,
     llm_model: str = None,
 ) -> dict:
-    formatted_prompt = base_prompt.format(
-        importance=importance,
-        subject=subject,
-        body=body,
-        history=history,
-        user_input=user_input,
-        agent_settings=agent_settings,
+    formatted_prompt = format_improve_email_response_prompt(
+        base_prompt, importance, subject, body, history, user_input, agent_settings
     )
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
@@ -331,32 +478,29 @@ def improve_draft(
     formality: str,
     llm_model: str = None,
 ) -> dict:
-    formatted_prompt = base_prompt.format(
-        language=language,
-        agent_settings=agent_settings,
-        subject=subject,
-        body=body,
-        history=history,
-        user_input=user_input,
-        length=length,
-        formality=formality,
+    formatted_prompt = format_improve_draft_prompt(
+        base_prompt,
+        language,
+        agent_settings,
+        subject,
+        body,
+        history,
+        user_input,
+        length,
+        formality,
     )
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
 def select_categories(categories: str, question: str, llm_model: str = None) -> dict:
-    formatted_prompt = SELECT_CATEGORIES_PROMPT.format(
-        categories=categories, question=question
-    )
+    formatted_prompt = format_select_categories_prompt(categories, question)
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
 def get_answer(
     keypoints: dict, question: str, language: str, llm_model: str = None
 ) -> dict:
-    formatted_prompt = GET_ANSWER_PROMPT.format(
-        keypoints=keypoints, question=question, language=language
-    )
+    formatted_prompt = format_get_answer_prompt(keypoints, question, language)
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
 
@@ -368,12 +512,8 @@ def summarize_conversation(
     language: str,
     llm_model: str = None,
 ) -> dict:
-    formatted_prompt = SUMMARIZE_CONVERSATION_PROMPT.format(
-        subject=subject,
-        body=body,
-        categories=categories,
-        user_description=user_description,
-        language=language,
+    formatted_prompt = format_summarize_conversation_prompt(
+        subject, body, user_description, categories, language
     )
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
 
@@ -386,11 +526,7 @@ def summarize_email(
     language: str,
     llm_model: str = None,
 ) -> dict:
-    formatted_prompt = SUMMARIZE_EMAIL_PROMPT.format(
-        subject=subject,
-        body=body,
-        categories=categories,
-        user_description=user_description,
-        language=language,
+    formatted_prompt = format_summarize_email_prompt(
+        subject, body, user_description, categories, language
     )
     return get_prompt_response_with_tokens(formatted_prompt, llm_model)
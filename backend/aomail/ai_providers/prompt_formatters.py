@@ -0,0 +1,315 @@
+"""
+Builds the prompts of the LLM functions, shared by the provider clients, `async_llm_functions` and `streaming`.
+
+Each function returns the prompt of the LLM function it is named after, so the synchronous, async and
+streaming code paths always send the same prompt. The categorization prompts are returned as a
+(cached_prefix, email_prompt) tuple (see `utils.format_cacheable_prompt`): providers without prompt
+caching send `cached_prefix + email_prompt`.
+
+Features:
+- ✅ get_signature_instruction: Returns the prompt instruction matching the signature of the user.
+- ✅ format_<function>_prompt: Returns the prompt of the LLM function <function>.
+"""
+
+import json
+import re
+from datetime import datetime
+from aomail.ai_providers.prompts import (
+    CATEGORIZE_AND_SUMMARIZE_EMAILS_PROMPT,
+    CHAT_HISTORY_TEXT,
+    CORRECT_MAIL_LANGUAGE_MISTAKES_PROMPT,
+    DETERMINE_ACTION_SCENARIO_PROMPT,
+    ENRICH_EMAIL_KEYPOINTS,
+    ENRICH_EMAIL_PROMPT,
+    EXTRACT_CONTACTS_RECIPIENTS_PROMPT,
+    GENERATE_CATEGORIES_SCRATCH_PROMPT,
+    GENERATE_PRIORITIZATION_SCRATCH_PROMPT,
+    GET_ANSWER_PROMPT,
+    IMPROVE_EMAIL_COPYWRITING_PROMPT,
+    RELEVANCE_LIST,
+    RESPONSE_LIST,
+    REVIEW_USER_DESCRIPTION_PROMPT,
+    SEARCH_EMAILS_PROMPT,
+    SELECT_CATEGORIES_PROMPT,
+    SIGNATURE_INSTRUCTION_WITH_CONTENT,
+    SIGNATURE_INSTRUCTION_WITHOUT_CONTENT,
+    SUMMARIZE_CONVERSATION_PROMPT,
+    SUMMARIZE_EMAIL_PROMPT,
+)
+from aomail.ai_providers.utils import format_cacheable_prompt, format_emails_batch
+
+
+def get_signature_instruction(signature: str) -> str:
+    """Returns the prompt instruction matching the signature of the user"""
+    has_content = bool(signature) and bool(re.sub(r"<[^>]+>", "", signature).strip())
+    if has_content:
+        return SIGNATURE_INSTRUCTION_WITH_CONTENT.format(signature=signature)
+    return SIGNATURE_INSTRUCTION_WITHOUT_CONTENT
+
+
+def format_extract_contacts_recipients_prompt(query: str) -> str:
+    """Returns the prompt of `extract_contacts_recipients`"""
+    return EXTRACT_CONTACTS_RECIPIENTS_PROMPT.format(query=query)
+
+
+######################## PREPROCESSING REPLY EMAIL ########################
+def format_generate_response_keywords_prompt(
+    base_prompt: str, input_email: str, input_subject: str
+) -> str:
+    """Returns the prompt of `generate_response_keywords`"""
+    return base_prompt.format(input_subject=input_subject, input_email=input_email)
+
+
+######################## WRITING ########################
+def format_generate_email_prompt(
+    base_prompt: str,
+    input_data: str,
+    length: str,
+    formality: str,
+    language: str,
+    agent_settings: dict,
+    signature: str = "",
+) -> str:
+    """Returns the prompt of `generate_email`"""
+    return base_prompt.format(
+        agent_settings=json.dumps(agent_settings),
+        length=length,
+        formality=formality,
+        language=language,
+        input_data=input_data,
+        signature_instruction=get_signature_instruction(signature),
+    )
+
+
+def format_correct_mail_language_mistakes_prompt(body: str, subject: str) -> str:
+    """Returns the prompt of `correct_mail_language_mistakes`"""
+    return CORRECT_MAIL_LANGUAGE_MISTAKES_PROMPT.format(subject=subject, body=body)
+
+
+def format_improve_email_copywriting_prompt(email_subject: str, email_body: str) -> str:
+    """Returns the prompt of `improve_email_copywriting`"""
+    return IMPROVE_EMAIL_COPYWRITING_PROMPT.format(
+        email_subject=email_subject, email_body=email_body
+    )
+
+
+def format_generate_email_response_prompt(
+    base_prompt: str,
+    input_subject: str,
+    input_body: str,
+    user_instruction: str,
+    agent_settings: dict,
+    signature: str = "",
+) -> str:
+    """Returns the prompt of `generate_email_response`"""
+    return base_prompt.format(
+        agent_settings=json.dumps(agent_settings),
+        input_subject=input_subject,
+        input_body=input_body,
+        user_instruction=user_instruction,
+        signature_instruction=get_signature_instruction(signature),
+    )
+
+
+def format_improve_email_response_prompt(
+    base_prompt: str,
+    importance: str,
+    subject: str,
+    body: str,
+    history: dict,
+    user_input: str,
+    agent_settings: dict,
+) -> str:
+    """Returns the prompt of `improve_email_response`"""
+    return base_prompt.format(
+        importance=importance,
+        subject=subject,
+        body=body,
+        history=history,
+        user_input=user_input,
+        agent_settings=agent_settings,
+    )
+
+
+def format_improve_draft_prompt(
+    base_prompt: str,
+    language: str,
+    agent_settings: dict,
+    subject: str,
+    body: str,
+    history: dict,
+    user_input: str,
+    length: str,
+    formality: str,
+) -> str:
+    """Returns the prompt of `improve_draft`"""
+    return base_prompt.format(
+        language=language,
+        agent_settings=agent_settings,
+        subject=subject,
+        body=body,
+        history=history,
+        user_input=user_input,
+        length=length,
+        formality=formality,
+    )
+
+
+######################## CATEGORIZATION ########################
+def format_categorize_and_summarize_email_prompt(
+    base_prompt: str,
+    subject: str,
+    decoded_data: str,
+    category_dict: dict,
+    user_description: str,
+    sender: str,
+    important_guidelines: str,
+    informative_guidelines: str,
+    useless_guidelines: str,
+) -> tuple[str, str]:
+    """Returns the (cached_prefix, email_prompt) of `categorize_and_summarize_email`"""
+    return format_cacheable_prompt(
+        base_prompt,
+        sender=sender,
+        subject=subject,
+        decoded_data=decoded_data,
+        user_description=user_description,
+        category_dict=category_dict,
+        response_list=RESPONSE_LIST,
+        relevance_list=RELEVANCE_LIST,
+        important_guidelines=important_guidelines,
+        informative_guidelines=informative_guidelines,
+        useless_guidelines=useless_guidelines,
+    )
+
+
+def format_categorize_and_summarize_emails_prompt(
+    emails: list[dict],
+    category_dict: dict,
+    user_description: str,
+    important_guidelines: str,
+    informative_guidelines: str,
+    useless_guidelines: str,
+) -> tuple[str, str]:
+    """Returns the (cached_prefix, email_prompt) of `categorize_and_summarize_emails`"""
+    return format_cacheable_prompt(
+        CATEGORIZE_AND_SUMMARIZE_EMAILS_PROMPT,
+        emails=format_emails_batch(emails),
+        user_description=user_description,
+        category_dict=category_dict,
+        response_list=RESPONSE_LIST,
+        relevance_list=RELEVANCE_LIST,
+        important_guidelines=important_guidelines,
+        informative_guidelines=informative_guidelines,
+        useless_guidelines=useless_guidelines,
+    )
+
+
+def format_enrich_email_prompt(
+    subject: str,
+    decoded_data: str,
+    sender: str,
+    category_dict: dict,
+    user_description: str,
+    important_guidelines: str,
+    informative_guidelines: str,
+    useless_guidelines: str,
+    categories: dict,
+    language: str,
+    is_reply: bool,
+) -> tuple[str, str]:
+    """Returns the (cached_prefix, email_prompt) of `enrich_email`"""
+    keypoints_instruction, keypoints_format = ENRICH_EMAIL_KEYPOINTS[
+        "conversation" if is_reply else "email"
+    ]
+    return format_cacheable_prompt(
+        ENRICH_EMAIL_PROMPT,
+        sender=sender,
+        subject=subject,
+        decoded_data=decoded_data,
+        user_description=user_description,
+        category_dict=category_dict,
+        response_list=RESPONSE_LIST,
+        relevance_list=RELEVANCE_LIST,
+        important_guidelines=important_guidelines,
+        informative_guidelines=informative_guidelines,
+        useless_guidelines=useless_guidelines,
+        categories=categories,
+        language=language,
+        keypoints_instruction=keypoints_instruction,
+        keypoints_format=keypoints_format,
+    )
+
+
+######################## SEARCH AND SETTINGS ########################
+def format_search_emails_prompt(query: str, language: str) -> str:
+    """Returns the prompt of `search_emails`"""
+    today = datetime.now().strftime("%m-%d-%Y")
+    return SEARCH_EMAILS_PROMPT.format(query=query, today=today, language=language)
+
+
+def format_review_user_description_prompt(user_description: str) -> str:
+    """Returns the prompt of `review_user_description`"""
+    return REVIEW_USER_DESCRIPTION_PROMPT.format(user_description=user_description)
+
+
+def format_generate_categories_scratch_prompt(
+    user_topics: list | str, chat_history: list = None
+) -> str:
+    """Returns the prompt of `generate_categories_scratch`"""
+    chat_history_text = (
+        CHAT_HISTORY_TEXT.format(chat_history=chat_history) if chat_history else ""
+    )
+    return GENERATE_CATEGORIES_SCRATCH_PROMPT.format(
+        user_topics=user_topics,
+        chat_history_text=chat_history_text,
+    )
+
+
+def format_generate_prioritization_scratch_prompt(user_input: dict | str) -> str:
+    """Returns the prompt of `generate_prioritization_scratch`"""
+    return GENERATE_PRIORITIZATION_SCRATCH_PROMPT.format(user_input=user_input)
+
+
+def format_determine_action_scenario_prompt(user_request: str) -> str:
+    """Returns the prompt of `determine_action_scenario`"""
+    return DETERMINE_ACTION_SCENARIO_PROMPT.format(user_request=user_request)
+
+
+def format_select_categories_prompt(categories: str, question: str) -> str:
+    """Returns the prompt of `select_categories`"""
+    return SELECT_CATEGORIES_PROMPT.format(categories=categories, question=question)
+
+
+def format_get_answer_prompt(keypoints: dict, question: str, language: str) -> str:
+    """Returns the prompt of `get_answer`"""
+    return GET_ANSWER_PROMPT.format(
+        keypoints=keypoints, question=question, language=language
+    )
+
+
+######################## SUMMARY ########################
+def format_summarize_conversation_prompt(
+    subject: str, body: str, user_description: str, categories: dict, language: str
+) -> str:
+    """Returns the prompt of `summarize_conversation`"""
+    return SUMMARIZE_CONVERSATION_PROMPT.format(
+        subject=subject,
+        body=body,
+        categories=categories,
+        user_description=user_description,
+        language=language,
+    )
+
+
+def format_summarize_email_prompt(
+    subject: str, body: str, user_description: str, categories: dict, language: str
+) -> str:
+    """Returns the prompt of `summarize_email`"""
+    return SUMMARIZE_EMAIL_PROMPT.format(
+        subject=subject,
+        body=body,
+        categories=categories,
+        user_description=user_description,
+        language=language,
+    )
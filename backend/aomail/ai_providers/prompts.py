@@ -137,18 +137,9 @@ RELEVANCE_LIST = {
     NOT_RELEVANT: "Message is not relevant to the recipient.",
 }
 
+# The categorization prompts end with the email: the text before it only depends on the user, so it is
+# sent through the prompt cache of the providers (see `utils.format_cacheable_prompt`).
 CATEGORIZE_AND_SUMMARIZE_EMAIL_PROMPT = """You are a smart email assistant acting as if you were a secretary, summarizing an email for the recipient orally.
-    
-Given the following email:
-
-Sender:
-{sender}
-
-Subject:
-{subject}
-
-Text:
-{decoded_data}
 
 User description:
 {user_description}
@@ -178,7 +169,6 @@ Complete the following tasks in same language used in the email:
 - If the email appears to be a response or a conversation, summarize only the last email and IGNORE the previous ones.
 - The summary should objectively reflect the most important information of the email without making subjective judgments.    
 
----
 Return this JSON object completed with the requested information:
 {{
     "topic": Selected Category,
@@ -196,7 +186,19 @@ Return this JSON object completed with the requested information:
         "one_line": One sentence summary,
         "short": Summary of the email (MUST INCLUDE links, dates, technical details, and action items of the email)
     }}
-}}"""
+}}
+
+---
+Given the following email:
+
+Sender:
+{sender}
+
+Subject:
+{subject}
+
+Text:
+{decoded_data}"""
 CATEGORIZE_AND_SUMMARIZE_EMAIL_PROMPT_VARIABLES = [
     "sender",
     "subject",
@@ -210,6 +212,159 @@ CATEGORIZE_AND_SUMMARIZE_EMAIL_PROMPT_VARIABLES = [
     "useless_guidelines",
 ]
 
+CATEGORIZE_AND_SUMMARIZE_EMAILS_PROMPT = """You are a smart email assistant acting as if you were a secretary, summarizing emails for the recipient orally.
+
+User description:
+{user_description}
+
+Using the provided categories:
+
+Topic Categories:
+{category_dict}
+
+Response Categories:
+{response_list}
+
+Relevance Categories:
+{relevance_list}
+
+Follow those rules:
+"important" emails: {important_guidelines}
+"informative" emails: {informative_guidelines}
+"useless" emails: {useless_guidelines}
+
+Complete the following tasks for EACH email, independently of the other emails and in the same language used in the email:
+- Categorize the email according to the user description (if provided) and given categories.
+- Summarize the email without adding any greetings.
+- If the email explicitly mentions the name of the user (provided with user description), then use 'You' instead of the name of the user.
+- Provide a short sentence (up to 10 words) summarizing the core content of the email.
+- Define the importance level of the email with one keyword: "important", "informative" or "useless".
+- If the email appears to be a response or a conversation, summarize only the last email and IGNORE the previous ones.
+- The summary should objectively reflect the most important information of the email without making subjective judgments.
+
+Return this JSON object completed with the requested information, with one item per email in the same order:
+{{
+    "emails": [
+        {{
+            "index": Index of the email,
+            "topic": Selected Category,
+            "response": Response,
+            "relevance": Relevance,
+            "importance": Importance of the email,
+            "flags": {{
+                "spam": bool,
+                "scam": bool,
+                "newsletter": bool,
+                "notification": bool,
+                "meeting": bool
+            }},
+            "summary": {{
+                "one_line": One sentence summary,
+                "short": Summary of the email (MUST INCLUDE links, dates, technical details, and action items of the email)
+            }}
+        }}
+    ]
+}}
+
+---
+Given the following emails:
+
+{emails}"""
+ENRICH_EMAIL_PROMPT = """You are a smart email assistant acting as if you were a secretary, summarizing an email for the recipient orally and filing it in their knowledge base.
+
+User description:
+{user_description}
+
+Using the provided categories:
+
+Topic Categories:
+{category_dict}
+
+Response Categories:
+{response_list}
+
+Relevance Categories:
+{relevance_list}
+
+Follow those rules:
+"important" emails: {important_guidelines}
+"informative" emails: {informative_guidelines}
+"useless" emails: {useless_guidelines}
+
+Complete the following tasks in same language used in the email:
+- Categorize the email according to the user description (if provided) and given categories.
+- Summarize the email without adding any greetings.
+- If the email explicitly mentions the name of the user (provided with user description), then use 'You' instead of the name of the user.
+- Provide a short sentence (up to 10 words) summarizing the core content of the email.
+- Define the importance level of the email with one keyword: "important", "informative" or "useless".
+- If the email appears to be a response or a conversation, summarize only the last email and IGNORE the previous ones.
+- The summary should objectively reflect the most important information of the email without making subjective judgments.
+
+Then complete the following tasks in {language} for the "knowledge" object:
+- {keypoints_instruction}
+- The keypoints must be highly relevant and should not include minor details or unnecessary information. If in doubt, do not add the keypoint.
+- If a user description is clearly provided, use it to enhance the keypoints.
+- Add a 'category' (one word), an 'organization', and a 'topic' that best describe the email. If you hesitate on any of them, or if it is unclear or not explicitly mentioned, set it to 'Unknown'.
+- To assist you, here are the existing categories and organizations: {categories}. If you can classify the email within an existing category/organization, do so. If uncertain, create another category/organization in {language}.
+
+Return this JSON object completed with the requested information:
+{{
+    "topic": Selected Category,
+    "response": Response,
+    "relevance": Relevance,
+    "importance": Importance of the email,
+    "flags": {{
+        "spam": bool,
+        "scam": bool,
+        "newsletter": bool,
+        "notification": bool,
+        "meeting": bool
+    }},
+    "summary": {{
+        "one_line": One sentence summary,
+        "short": Summary of the email (MUST INCLUDE links, dates, technical details, and action items of the email)
+    }},
+    "knowledge": {{
+        "category": "",
+        "organization": "",
+        "topic": "",
+        "keypoints": {keypoints_format}
+    }}
+}}
+
+---
+Given the following email:
+
+Sender:
+{sender}
+
+Subject:
+{subject}
+
+Text:
+{decoded_data}"""
+ENRICH_EMAIL_KEYPOINTS = {
+    "email": (
+        "Summarize the email body as a list of up to three ultra-concise keypoints (up to seven words each) that encapsulate the core information.",
+        "[list of keypoints]",
+    ),
+    "conversation": (
+        "For each email in the conversation, summarize it as a list of up to three ultra-concise keypoints (up to seven words). The number of keys must STRICTLY correspond to the number of emails.",
+        '{"1": [list of keypoints], "2": [list of keypoints], "n": [list of keypoints]}',
+    ),
+}
+
+EMAIL_BATCH_ITEM = """Email {index}:
+Sender:
+{sender}
+
+Subject:
+{subject}
+
+Text:
+{decoded_data}
+"""
+
 SEARCH_EMAILS_PROMPT = """As a smart email assistant and based on the user query: '{query}'. Knowing today's date: {today}
 1. Analyse and create a filter to search emails content with the Gmail API and Graph API.
 2. If nothing special is specified, 'from', 'to', 'subject', 'body' MUST have the same value as the most relevant keyword. By default, search in 'read', 'unread' emails
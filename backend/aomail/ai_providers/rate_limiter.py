@@ -0,0 +1,366 @@
+"""
+Adaptive rate limiter of the LLM requests, per provider and model.
+
+Each (provider, model) has two token buckets refilled continuously: one for requests per minute and
+one for tokens per minute. A request waits until both buckets can pay for it, using an estimate of its
+input tokens, and the estimate is corrected with the real usage once the response arrives.
+
+Limits adapt to the provider: a 429 halves the refill rate and pauses the key until `Retry-After`,
+a 5xx reduces it by a fifth, and every success raises it back towards the configured limit.
+Throttled and failed requests are retried up to LLM_RATE_LIMIT_MAX_RETRIES times. Limits apply per
+process. The latency and outcome of every request are recorded for the router.
+
+Features:
+- ✅ call: Run an LLM request through the limiter of its provider and model.
+- ✅ async_call: Async counterpart of `call`.
+- ✅ get_rate_limiter_stats: Queue wait time, throttling and current rates per provider and model.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Awaitable, Callable
+from aomail.constants import (
+    LLM_DEFAULT_RPM,
+    LLM_DEFAULT_TPM,
+    LLM_RATE_LIMIT_MAX_RETRIES,
+    LLM_RATE_LIMITS,
+)
+from aomail.ai_providers.router import (
+    get_status_code,
+    is_provider_error,
+    record_request,
+)
+
+
+LOGGER = logging.getLogger(__name__)
+
+MIN_RATE_FACTOR = 0.05
+THROTTLE_BACKOFF = 0.5
+SERVER_ERROR_BACKOFF = 0.8
+RECOVERY_STEP = 0.05
+DEFAULT_RETRY_AFTER = 1.0  # seconds, doubled after each consecutive failure
+MAX_RETRY_AFTER = 60.0  # seconds
+
+
+class RateLimitedError(Exception):
+    """Raised when an LLM request is still throttled after every retry."""
+
+
+class RateLimiter:
+    """Token buckets of requests and tokens per minute, adapted to the provider responses."""
+
+    def __init__(self, rpm: int, tpm: int):
+        """
+        Initializes a RateLimiter object.
+
+        Args:
+            rpm (int): Maximum number of requests per minute.
+            tpm (int): Maximum number of tokens per minute.
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests = float(rpm)
+        self.tokens = float(tpm)
+        self.rate_factor = 1.0
+        self.paused_until = 0.0
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "throttled": 0,
+            "server_errors": 0,
+            "wait_total": 0.0,
+            "wait_max": 0.0,
+        }
+
+    def _refill(self, now: float):
+        """Adds the requests and tokens earned since the last refill. Must hold the lock."""
+        elapsed = now - self.updated_at
+        self.updated_at = now
+        self.requests = min(
+            self.rpm, self.requests + elapsed * self.rpm / 60 * self.rate_factor
+        )
+        self.tokens = min(
+            self.tpm, self.tokens + elapsed * self.tpm / 60 * self.rate_factor
+        )
+
+    def try_acquire(self, tokens: int) -> float:
+        """
+        Takes a request and `tokens` tokens from the buckets if they are available.
+
+        Args:
+            tokens (int): Estimated tokens of the request, capped to the bucket size.
+
+        Returns:
+            float: 0 if the request can be sent, otherwise the seconds to wait before trying again.
+        """
+        tokens = min(tokens, self.tpm)
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self.paused_until:
+                return self.paused_until - now
+            if self.requests >= 1 and self.tokens >= tokens:
+                self.requests -= 1
+                self.tokens -= tokens
+                return 0.0
+
+            rate = self.rate_factor / 60
+            missing_requests = max(1 - self.requests, 0) / (self.rpm * rate)
+            missing_tokens = max(tokens - self.tokens, 0) / (self.tpm * rate)
+            return max(missing_requests, missing_tokens, 0.001)
+
+    def record_usage(self, estimated_tokens: int, used_tokens: int):
+        """
+        Corrects the token bucket with the real usage of a request, and recovers the rate.
+
+        Args:
+            estimated_tokens (int): Tokens taken when the request was sent.
+            used_tokens (int): Input and output tokens reported by the provider.
+        """
+        with self.lock:
+            self.tokens -= used_tokens - min(estimated_tokens, self.tpm)
+            self.rate_factor = min(1.0, self.rate_factor + RECOVERY_STEP)
+            self.stats["requests"] += 1
+
+    def record_failure(self, status_code: int, retry_after: float):
+        """
+        Slows down after a throttled or failed request.
+
+        Args:
+            status_code (int): HTTP status of the failed request.
+            retry_after (float): Seconds during which no request is sent.
+        """
+        with self.lock:
+            if status_code == 429:
+                self.rate_factor = max(
+                    MIN_RATE_FACTOR, self.rate_factor * THROTTLE_BACKOFF
+                )
+                self.stats["throttled"] += 1
+            else:
+                self.rate_factor = max(
+                    MIN_RATE_FACTOR, self.rate_factor * SERVER_ERROR_BACKOFF
+                )
+                self.stats["server_errors"] += 1
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+
+    def record_wait(self, waited: float):
+        """Adds the time a request waited for the buckets to the statistics."""
+        with self.lock:
+            self.stats["wait_total"] += waited
+            self.stats["wait_max"] = max(self.stats["wait_max"], waited)
+
+    def get_stats(self) -> dict:
+        """Returns the statistics and the current rates of the limiter."""
+        with self.lock:
+            nb_requests = self.stats["requests"] + self.stats["throttled"]
+            return {
+                **self.stats,
+                "wait_avg": (
+                    self.stats["wait_total"] / nb_requests if nb_requests else 0.0
+                ),
+                "rpm": round(self.rpm * self.rate_factor, 2),
+                "tpm": round(self.tpm * self.rate_factor, 2),
+            }
+
+
+_limiters: dict[tuple[str, str], RateLimiter] = {}
+_lock = threading.Lock()
+
+
+def get_limiter(provider: str, model: str | None) -> RateLimiter:
+    """
+    Returns the limiter of a provider and model, created with the configured limits.
+
+    Limits are looked up in LLM_RATE_LIMITS under "provider/model", then "provider", then default
+    to LLM_DEFAULT_RPM and LLM_DEFAULT_TPM.
+
+    Args:
+        provider (str): The LLM provider.
+        model (str | None): The model.
+
+    Returns:
+        RateLimiter: The limiter shared by the process.
+    """
+    key = (provider, model or "")
+    with _lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limits = {
+                **LLM_RATE_LIMITS.get(provider, {}),
+                **LLM_RATE_LIMITS.get(f"{provider}/{model}", {}),
+            }
+            limiter = _limiters[key] = RateLimiter(
+                limits.get("rpm", LLM_DEFAULT_RPM), limits.get("tpm", LLM_DEFAULT_TPM)
+            )
+        return limiter
+
+
+def get_failure(error: Exception) -> tuple[int, float] | None:
+    """
+    Extracts the HTTP status and the Retry-After delay of a provider error.
+
+    Args:
+        error (Exception): The exception raised by a provider SDK.
+
+    Returns:
+        tuple[int, float] | None: The status and the delay in seconds (0 if not given), or None
+                                  if the error is neither a 429 nor a 5xx.
+    """
+    status_code = get_status_code(error)
+    if status_code is None or not (status_code == 429 or 500 <= status_code < 600):
+        return None
+
+    response = getattr(error, "response", None) or getattr(error, "raw_response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        retry_after = float(headers.get("retry-after", 0))
+    except (TypeError, ValueError):
+        retry_after = 0.0
+    return status_code, min(retry_after, MAX_RETRY_AFTER)
+
+
+def call(
+    provider: str,
+    model: str | None,
+    estimated_tokens: int,
+    request: Callable[[], object],
+    get_used_tokens: Callable[[object], int],
+):
+    """
+    Run an LLM request through the limiter of its provider and model.
+
+    Args:
+        provider (str): The LLM provider.
+        model (str | None): The model.
+        estimated_tokens (int): Estimated input tokens of the request.
+        request (Callable[[], object]): Sends the request and returns the response.
+        get_used_tokens (Callable[[object], int]): Returns the tokens used by a response.
+
+    Returns:
+        object: The response of the request.
+    """
+    limiter = get_limiter(provider, model)
+    for attempt in range(LLM_RATE_LIMIT_MAX_RETRIES + 1):
+        waited = 0.0
+        while (delay := limiter.try_acquire(estimated_tokens)) > 0:
+            time.sleep(delay)
+            waited += delay
+        limiter.record_wait(waited)
+
+        started_at = time.monotonic()
+        try:
+            response = request()
+        except Exception as e:
+            record_request(
+                provider, time.monotonic() - started_at, is_provider_error(e)
+            )
+            failure = get_failure(e)
+            if failure is None:
+                raise
+            retry_after = handle_failure(limiter, provider, model, failure, attempt, e)
+            time.sleep(retry_after)
+            continue
+
+        record_request(provider, time.monotonic() - started_at, False)
+        limiter.record_usage(estimated_tokens, get_used_tokens(response))
+        return response
+
+
+async def async_call(
+    provider: str,
+    model: str | None,
+    estimated_tokens: int,
+    request: Callable[[], Awaitable[object]],
+    get_used_tokens: Callable[[object], int],
+):
+    """
+    Async counterpart of `call`: waits without blocking the event loop.
+
+    Args:
+        provider (str): The LLM provider.
+        model (str | None): The model.
+        estimated_tokens (int): Estimated input tokens of the request.
+        request (Callable[[], Awaitable[object]]): Sends the request and returns the response.
+        get_used_tokens (Callable[[object], int]): Returns the tokens used by a response.
+
+    Returns:
+        object: The response of the request.
+    """
+    limiter = get_limiter(provider, model)
+    for attempt in range(LLM_RATE_LIMIT_MAX_RETRIES + 1):
+        waited = 0.0
+        while (delay := limiter.try_acquire(estimated_tokens)) > 0:
+            await asyncio.sleep(delay)
+            waited += delay
+        limiter.record_wait(waited)
+
+        started_at = time.monotonic()
+        try:
+            response = await request()
+        except Exception as e:
+            record_request(
+                provider, time.monotonic() - started_at, is_provider_error(e)
+            )
+            failure = get_failure(e)
+            if failure is None:
+                raise
+            retry_after = handle_failure(limiter, provider, model, failure, attempt, e)
+            await asyncio.sleep(retry_after)
+            continue
+
+        record_request(provider, time.monotonic() - started_at, False)
+        limiter.record_usage(estimated_tokens, get_used_tokens(response))
+        return response
+
+
+def handle_failure(
+    limiter: RateLimiter,
+    provider: str,
+    model: str | None,
+    failure: tuple[int, float],
+    attempt: int,
+    error: Exception,
+) -> float:
+    """
+    Records a throttled or failed request and returns the delay before retrying it.
+
+    Raises:
+        RateLimitedError: If the request was already retried LLM_RATE_LIMIT_MAX_RETRIES times.
+    """
+    status_code, retry_after = failure
+    if not retry_after:
+        retry_after = min(DEFAULT_RETRY_AFTER * 2**attempt, MAX_RETRY_AFTER)
+    limiter.record_failure(status_code, retry_after)
+
+    if attempt >= LLM_RATE_LIMIT_MAX_RETRIES:
+        raise RateLimitedError(
+            f"{provider} request failed with status {status_code} after {attempt + 1} attempts"
+        ) from error
+
+    LOGGER.warning(
+        f"{provider} ({model}) answered {status_code}, retrying in {retry_after:.1f}s"
+    )
+    return retry_after
+
+
+def get_rate_limiter_stats() -> dict[str, dict]:
+    """
+    Returns the statistics of the limiters since the process started.
+
+    Returns:
+        dict[str, dict]: For each "provider/model":
+            - requests (int): Successful requests.
+            - throttled (int): Requests answered with a 429.
+            - server_errors (int): Requests answered with a 5xx.
+            - wait_total, wait_avg, wait_max (float): Seconds spent waiting for the buckets.
+            - rpm, tpm (float): Current adapted limits.
+    """
+    with _lock:
+        limiters = list(_limiters.items())
+    return {
+        f"{provider}/{model}": limiter.get_stats()
+        for (provider, model), limiter in limiters
+    }
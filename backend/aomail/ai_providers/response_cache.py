@@ -0,0 +1,206 @@
+"""
+Cache of the responses of idempotent LLM prompts.
+
+Some `llm_functions` calls return the same answer for the same inputs (temperature 0, no hidden
+state) and users often repeat them. Functions opt in with the `cached_llm_call` decorator: the
+response is keyed by a SHA-256 of the function name and its bound arguments, which include the
+provider and the model. Responses live in an LRU cache with a TTL, and optionally in Postgres
+(LLM_CACHE_DB) so every process shares them.
+
+Cached responses are returned with zero tokens, so `update_tokens_stats` reports them as free.
+
+Features:
+- ✅ cached_llm_call: Decorator caching the responses of an idempotent LLM function.
+- ✅ get_llm_cache_stats: Memory hits, database hits and misses per function.
+- ✅ delete_expired_entries: Delete the expired responses stored in the database.
+"""
+
+import copy
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Callable
+from cachetools import TTLCache
+from django.db import IntegrityError
+from django.utils import timezone
+from aomail.constants import LLM_CACHE_DB, LLM_CACHE_SIZE, LLM_CACHE_TTL
+from aomail.models import LLMCacheEntry
+
+
+LOGGER = logging.getLogger(__name__)
+
+_cache = TTLCache(maxsize=max(LLM_CACHE_SIZE, 1), ttl=LLM_CACHE_TTL)
+_lock = threading.Lock()
+_stats = Counter()
+
+
+def cached_llm_call(vary_on_day: bool = False) -> Callable:
+    """
+    Decorator caching the responses of an idempotent LLM function.
+
+    Args:
+        vary_on_day (bool): Include the current day in the key, for prompts containing the date.
+
+    Returns:
+        Callable: The decorator.
+    """
+
+    def decorator(function: Callable) -> Callable:
+        signature = inspect.signature(function)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs) -> dict:
+            if LLM_CACHE_SIZE <= 0:
+                return function(*args, **kwargs)
+
+            arguments = signature.bind(*args, **kwargs)
+            arguments.apply_defaults()
+            inputs = dict(arguments.arguments)
+            if vary_on_day:
+                inputs["day"] = datetime.now().strftime("%Y-%m-%d")
+            key = get_cache_key(function.__name__, inputs)
+
+            response = get_cached_response(function.__name__, key)
+            if response is not None:
+                return {**response, "tokens_input": 0, "tokens_output": 0}
+
+            response = function(*args, **kwargs)
+            set_cached_response(function.__name__, key, response)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def get_cache_key(function_name: str, inputs: dict) -> str:
+    """
+    Hash the name and the arguments of an LLM function.
+
+    Args:
+        function_name (str): The name of the function.
+        inputs (dict): The bound arguments, including llm_provider and llm_model.
+
+    Returns:
+        str: The SHA-256 hex digest of the inputs.
+    """
+    payload = json.dumps(
+        {"function": function_name, **inputs}, sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_cached_response(function_name: str, key: str) -> dict | None:
+    """
+    Return a copy of a cached response, from memory then from the database.
+
+    Args:
+        function_name (str): The name of the function, used for the statistics.
+        key (str): The key returned by `get_cache_key`.
+
+    Returns:
+        dict | None: The response, or None on a miss.
+    """
+    with _lock:
+        response = _cache.get(key)
+    if response is not None:
+        _count(function_name, "memory_hits")
+        return copy.deepcopy(response)
+
+    if LLM_CACHE_DB:
+        entry = (
+            LLMCacheEntry.objects.filter(key=key, expires_at__gt=timezone.now())
+            .only("response")
+            .first()
+        )
+        if entry is not None:
+            with _lock:
+                _cache[key] = entry.response
+            _count(function_name, "db_hits")
+            return copy.deepcopy(entry.response)
+
+    _count(function_name, "misses")
+    return None
+
+
+def set_cached_response(function_name: str, key: str, response: dict):
+    """
+    Cache a response in memory and, if enabled, in the database.
+
+    Args:
+        function_name (str): The name of the function.
+        key (str): The key returned by `get_cache_key`.
+        response (dict): The response, with its real token counts.
+    """
+    with _lock:
+        _cache[key] = copy.deepcopy(response)
+
+    if LLM_CACHE_DB:
+        try:
+            LLMCacheEntry.objects.update_or_create(
+                key=key,
+                defaults={
+                    "function": function_name,
+                    "response": response,
+                    "expires_at": timezone.now() + timedelta(seconds=LLM_CACHE_TTL),
+                },
+            )
+        except IntegrityError:
+            # another process stored the same response first
+            pass
+        except Exception as e:
+            LOGGER.error(
+                f"Failed to store the {function_name} response in the cache: {str(e)}"
+            )
+
+
+def _count(function_name: str, name: str):
+    """Increments a statistic of the cache."""
+    with _lock:
+        _stats[(function_name, name)] += 1
+
+
+def get_llm_cache_stats() -> dict[str, dict]:
+    """
+    Returns the statistics of the cache per function since the process started.
+
+    Returns:
+        dict[str, dict]: For each function:
+            - memory_hits (int): Responses served from memory.
+            - db_hits (int): Responses served from the database.
+            - misses (int): Responses computed by the LLM.
+    """
+    with _lock:
+        counters = list(_stats.items())
+
+    stats = {}
+    for (function_name, name), value in counters:
+        stats.setdefault(function_name, {"memory_hits": 0, "db_hits": 0, "misses": 0})[
+            name
+        ] = value
+    return stats
+
+
+def clear_llm_cache():
+    """Empties the memory cache and resets its statistics."""
+    with _lock:
+        _cache.clear()
+        _stats.clear()
+
+
+def delete_expired_entries() -> int:
+    """
+    Delete the expired responses stored in the database.
+
+    Returns:
+        int: The number of deleted responses.
+    """
+    nb_deleted, _ = LLMCacheEntry.objects.filter(
+        expires_at__lte=timezone.now()
+    ).delete()
+    return nb_deleted
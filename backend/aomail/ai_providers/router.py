@@ -0,0 +1,340 @@
+"""
+Latency-aware routing of the LLM requests, with a circuit breaker per provider.
+
+Every request sent by a provider transport is recorded with its latency and whether the provider
+failed (429, 5xx, timeout or connection error). Over the last LLM_ROUTER_WINDOW seconds, a provider
+whose error rate or p95 latency exceeds its threshold opens its circuit breaker for
+LLM_ROUTER_COOLDOWN seconds, then lets one probe request through to decide whether to close it.
+
+`llm_functions` decorated with `routed_llm_call` accept an `allow_fallback` argument. When it is
+set, calls go to LLM_FALLBACK_PROVIDER / LLM_FALLBACK_MODEL while the circuit of the requested
+provider is open, or when the requested provider fails with a provider error. Other errors, such as a
+rejected request, are raised as is. Background ingestion always allows the
+fallback; user-facing calls only do if the user enabled `Preference.llm_fallback`, otherwise they
+stay pinned to the provider of the user. Health is tracked per process.
+
+Features:
+- ✅ routed_llm_call: Decorator failing an LLM function over to the fallback provider.
+- ✅ record_request: Record the latency and outcome of a provider request.
+- ✅ is_provider_error: Whether an error means the provider failed to answer.
+- ✅ is_available: Whether the circuit breaker of a provider lets requests through.
+- ✅ get_router_stats: Latency, error rate and circuit state per provider.
+"""
+
+import functools
+import inspect
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable
+import httpx
+from aomail.constants import (
+    LLM_FALLBACK_MODEL,
+    LLM_FALLBACK_PROVIDER,
+    LLM_ROUTER_COOLDOWN,
+    LLM_ROUTER_MAX_ERROR_RATE,
+    LLM_ROUTER_MAX_P95_LATENCY,
+    LLM_ROUTER_MIN_REQUESTS,
+    LLM_ROUTER_WINDOW,
+)
+from aomail.utils.metrics import percentile
+
+
+LOGGER = logging.getLogger(__name__)
+
+# raised on timeouts and connection errors, directly or as the cause of the SDK error
+CONNECTION_ERRORS = (TimeoutError, ConnectionError, httpx.TransportError)
+
+
+class ProviderHealth:
+    """Rolling latencies and errors of a provider, and the state of its circuit breaker."""
+
+    def __init__(self):
+        self.samples: deque[tuple[float, float, bool]] = deque()
+        self.open_until = 0.0
+        self.probe_started_at = None
+        self.trips = 0
+        self.fallbacks = 0
+
+    def prune(self, now: float):
+        """Drops the samples older than the window."""
+        while self.samples and self.samples[0][0] < now - LLM_ROUTER_WINDOW:
+            self.samples.popleft()
+
+    def get_error_rate(self) -> float:
+        """Returns the share of failed requests in the window."""
+        if not self.samples:
+            return 0.0
+        return sum(failed for _, _, failed in self.samples) / len(self.samples)
+
+    def get_p95_latency(self) -> float:
+        """Returns the p95 latency of the requests in the window, in seconds."""
+        return percentile([latency for _, latency, _ in self.samples], 95)
+
+    def get_state(self, now: float) -> str:
+        """Returns "closed", "open" or "half_open"."""
+        if not self.open_until:
+            return "closed"
+        return "open" if now < self.open_until else "half_open"
+
+
+_health: dict[str, ProviderHealth] = {}
+_lock = threading.Lock()
+
+
+def _get_health(provider: str) -> ProviderHealth:
+    """Returns the health of a provider. Must hold the lock."""
+    health = _health.get(provider)
+    if health is None:
+        health = _health[provider] = ProviderHealth()
+    return health
+
+
+def get_status_code(error: Exception) -> int | None:
+    """
+    Returns the HTTP status of a provider error, None for timeouts and connection errors.
+
+    Args:
+        error (Exception): The exception raised by a provider SDK.
+
+    Returns:
+        int | None: `status_code` for most SDKs, `code` for the Google API errors.
+    """
+    status_code = getattr(error, "status_code", None)
+    if not isinstance(status_code, int):
+        status_code = getattr(error, "code", None)
+    return status_code if isinstance(status_code, int) else None
+
+
+def is_provider_error(error: Exception) -> bool:
+    """
+    Whether an error means the provider failed to answer, as opposed to a rejected request.
+
+    The chain of causes is followed, so SDK errors wrapping a timeout and requests that were still
+    throttled after every retry are provider errors too.
+
+    Args:
+        error (Exception): The exception raised by a provider SDK.
+
+    Returns:
+        bool: True for 429, 5xx, timeouts and connection errors.
+    """
+    while error is not None:
+        status_code = get_status_code(error)
+        if status_code is not None:
+            return status_code == 429 or 500 <= status_code < 600
+        if isinstance(error, CONNECTION_ERRORS):
+            return True
+        error = error.__cause__
+    return False
+
+
+def record_request(provider: str, latency: float, failed: bool):
+    """
+    Record the latency and outcome of a provider request, and update its circuit breaker.
+
+    Args:
+        provider (str): The LLM provider.
+        latency (float): Duration of the request in seconds.
+        failed (bool): Whether the provider failed to answer (429, 5xx, timeout, connection error).
+    """
+    with _lock:
+        now = time.monotonic()
+        health = _get_health(provider)
+        health.samples.append((now, latency, failed))
+        health.prune(now)
+
+        state = health.get_state(now)
+        if state == "half_open":
+            health.probe_started_at = None
+            if failed:
+                health.open_until = now + LLM_ROUTER_COOLDOWN
+            else:
+                LOGGER.info(f"Circuit breaker of {provider} closed")
+                health.open_until = 0.0
+                health.samples.clear()
+        elif state == "closed" and len(health.samples) >= LLM_ROUTER_MIN_REQUESTS:
+            error_rate = health.get_error_rate()
+            p95_latency = health.get_p95_latency()
+            if (
+                error_rate >= LLM_ROUTER_MAX_ERROR_RATE
+                or p95_latency >= LLM_ROUTER_MAX_P95_LATENCY
+            ):
+                LOGGER.warning(
+                    f"Circuit breaker of {provider} opened: error rate {error_rate:.0%}, p95 latency {p95_latency:.1f}s"
+                )
+                health.open_until = now + LLM_ROUTER_COOLDOWN
+                health.trips += 1
+
+
+def is_available(provider: str) -> bool:
+    """
+    Whether the circuit breaker of a provider lets a request through.
+
+    Once the cooldown has elapsed, a single probe request is let through at a time.
+
+    Args:
+        provider (str): The LLM provider.
+
+    Returns:
+        bool: False if the circuit is open, or half open with a probe in flight.
+    """
+    with _lock:
+        now = time.monotonic()
+        health = _get_health(provider)
+        state = health.get_state(now)
+        if state == "closed":
+            return True
+        if state == "open":
+            return False
+        if (
+            health.probe_started_at is not None
+            and now - health.probe_started_at < LLM_ROUTER_COOLDOWN
+        ):
+            return False
+        health.probe_started_at = now
+        return True
+
+
+def get_fallback(
+    llm_provider: str, llm_model: str | None
+) -> tuple[str, str | None] | None:
+    """
+    Returns the configured fallback of a provider and model.
+
+    Args:
+        llm_provider (str): The requested provider.
+        llm_model (str | None): The requested model.
+
+    Returns:
+        tuple[str, str | None] | None: The fallback provider and model, or None if no fallback is
+                                       configured or if it is the requested provider and model.
+    """
+    if not LLM_FALLBACK_PROVIDER:
+        return None
+    if (LLM_FALLBACK_PROVIDER, LLM_FALLBACK_MODEL) == (llm_provider, llm_model):
+        return None
+    return LLM_FALLBACK_PROVIDER, LLM_FALLBACK_MODEL
+
+
+def _count_fallback(provider: str):
+    """Increments the number of calls of a provider sent to the fallback."""
+    with _lock:
+        _get_health(provider).fallbacks += 1
+
+
+def routed_llm_call(function: Callable) -> Callable:
+    """
+    Decorator failing an LLM function over to the fallback provider.
+
+    The decorated function accepts an additional keyword argument `allow_fallback` (default False).
+    Without it, calls stay on the requested provider. Works with sync and async functions taking
+    `llm_provider` and `llm_model` arguments.
+
+    Args:
+        function (Callable): The LLM function.
+
+    Returns:
+        Callable: The routed function.
+    """
+    signature = inspect.signature(function)
+
+    def route(args: tuple, kwargs: dict, allow_fallback: bool):
+        """Returns the requested arguments, and the fallback ones if the fallback may be used."""
+        arguments = signature.bind(*args, **kwargs)
+        arguments.apply_defaults()
+        llm_provider = arguments.arguments["llm_provider"]
+        fallback = get_fallback(llm_provider, arguments.arguments["llm_model"])
+        if not allow_fallback or fallback is None:
+            return llm_provider, None
+
+        arguments.arguments["llm_provider"], arguments.arguments["llm_model"] = fallback
+        return llm_provider, arguments
+
+    def log_fallback(llm_provider: str, fallback_arguments, error: Exception = None):
+        _count_fallback(llm_provider)
+        fallback_provider = fallback_arguments.arguments["llm_provider"]
+        if error:
+            LOGGER.warning(
+                f"{function.__name__} failed on {llm_provider}, falling back to {fallback_provider}: {str(error)}"
+            )
+        else:
+            LOGGER.info(
+                f"Circuit breaker of {llm_provider} is open, sending {function.__name__} to {fallback_provider}"
+            )
+
+    if inspect.iscoroutinefunction(function):
+
+        @functools.wraps(function)
+        async def async_wrapper(*args, allow_fallback: bool = False, **kwargs):
+            llm_provider, fallback_arguments = route(args, kwargs, allow_fallback)
+            if fallback_arguments is None:
+                return await function(*args, **kwargs)
+
+            if is_available(llm_provider):
+                try:
+                    return await function(*args, **kwargs)
+                except Exception as e:
+                    if not is_provider_error(e):
+                        raise
+                    log_fallback(llm_provider, fallback_arguments, e)
+            else:
+                log_fallback(llm_provider, fallback_arguments)
+            return await function(*fallback_arguments.args, **fallback_arguments.kwargs)
+
+        return async_wrapper
+
+    @functools.wraps(function)
+    def wrapper(*args, allow_fallback: bool = False, **kwargs):
+        llm_provider, fallback_arguments = route(args, kwargs, allow_fallback)
+        if fallback_arguments is None:
+            return function(*args, **kwargs)
+
+        if is_available(llm_provider):
+            try:
+                return function(*args, **kwargs)
+            except Exception as e:
+                if not is_provider_error(e):
+                    raise
+                log_fallback(llm_provider, fallback_arguments, e)
+        else:
+            log_fallback(llm_provider, fallback_arguments)
+        return function(*fallback_arguments.args, **fallback_arguments.kwargs)
+
+    return wrapper
+
+
+def get_router_stats() -> dict[str, dict]:
+    """
+    Returns the health of the providers over the last LLM_ROUTER_WINDOW seconds.
+
+    Returns:
+        dict[str, dict]: For each provider:
+            - requests (int): Requests in the window.
+            - error_rate (float): Share of failed requests in the window.
+            - p95_latency (float): p95 latency in seconds.
+            - state (str): "closed", "open" or "half_open".
+            - trips (int): Times the circuit breaker opened since the process started.
+            - fallbacks (int): Calls sent to the fallback provider since the process started.
+    """
+    with _lock:
+        now = time.monotonic()
+        stats = {}
+        for provider, health in _health.items():
+            health.prune(now)
+            stats[provider] = {
+                "requests": len(health.samples),
+                "error_rate": round(health.get_error_rate(), 3),
+                "p95_latency": round(health.get_p95_latency(), 3),
+                "state": health.get_state(now),
+                "trips": health.trips,
+                "fallbacks": health.fallbacks,
+            }
+        return stats
+
+
+def reset_router():
+    """Forgets the health of every provider."""
+    with _lock:
+        _health.clear()
@@ -0,0 +1,339 @@
+"""
+Streaming variants of the writing functions of `async_llm_functions`.
+
+The writing functions wait for the whole JSON response of the LLM before returning it. Their
+streaming variants send the prompt through the stream transport of the provider
+(`async_stream_prompt_text`) and extract the string fields of the JSON response ("subject", "body")
+while it is being generated, so the first words can be shown as soon as the provider sends them.
+Once the stream ends, the full response is parsed and post-processed as in the non-streaming
+functions.
+
+A response cannot be retried once part of it was shown, so the fallback provider (see `router`) is
+only used when the circuit of the requested provider is open, or when it fails with a provider error
+before streaming anything.
+
+Features:
+- ✅ JsonFieldParser: Extracts the string fields of a JSON object from its partial text.
+- ✅ stream_prompt_fields: Streams the fields of the JSON response of a prompt.
+- ✅ stream_generate_email: Streaming variant of `generate_email`.
+- ✅ stream_generate_email_response: Streaming variant of `generate_email_response`.
+- ✅ stream_improve_email_response: Streaming variant of `improve_email_response`.
+- ✅ stream_improve_draft: Streaming variant of `improve_draft`.
+"""
+
+import logging
+from typing import AsyncIterator
+from aomail.ai_providers.async_llm_functions import get_provider_client
+from aomail.ai_providers.prompt_formatters import (
+    format_generate_email_prompt,
+    format_generate_email_response_prompt,
+    format_improve_draft_prompt,
+    format_improve_email_response_prompt,
+)
+from aomail.ai_providers.router import get_fallback, is_available, is_provider_error
+from aomail.ai_providers.utils import ensure_proper_spacing, extract_json_from_response
+
+
+LOGGER = logging.getLogger(__name__)
+
+JSON_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+
+class JsonFieldParser:
+    """
+    Incremental parser extracting the top-level string fields of a JSON object from its partial text.
+
+    Nested values, numbers and the text around the object (such as markdown code fences) are skipped.
+    """
+
+    def __init__(self, fields: tuple[str, ...]):
+        """
+        Initializes a JsonFieldParser.
+
+        Args:
+            fields (tuple[str, ...]): The keys of the string fields to extract.
+        """
+        self.fields = fields
+        self.depth = 0
+        self.expecting = None
+        self.in_string = False
+        self.string_role = None
+        self.escape = None
+        self.high_surrogate = None
+        self.key = ""
+
+    def feed(self, text: str) -> list[tuple[str, str]]:
+        """
+        Parses the next characters of the JSON text.
+
+        Args:
+            text (str): The characters received since the previous call.
+
+        Returns:
+            list[tuple[str, str]]: The field and its new decoded characters, for each extracted field
+                                   that received characters, in order.
+        """
+        deltas = []
+        for char in text:
+            if self.in_string:
+                decoded = self.read_string_char(char)
+                if not decoded:
+                    continue
+                if self.string_role == "key":
+                    self.key += decoded
+                elif self.string_role == "value" and self.key in self.fields:
+                    if deltas and deltas[-1][0] == self.key:
+                        deltas[-1] = (self.key, deltas[-1][1] + decoded)
+                    else:
+                        deltas.append((self.key, decoded))
+            elif char == '"':
+                self.in_string = True
+                self.string_role = self.expecting if self.depth == 1 else None
+                if self.string_role == "key":
+                    self.key = ""
+            elif char in "{[":
+                self.depth += 1
+                self.expecting = "key" if self.depth == 1 else None
+            elif char in "}]":
+                self.depth = max(self.depth - 1, 0)
+            elif self.depth == 1:
+                if char == ":":
+                    self.expecting = "value"
+                elif char == ",":
+                    self.expecting = "key"
+                elif not char.isspace():
+                    # number, boolean or null value
+                    self.expecting = None
+        return deltas
+
+    def read_string_char(self, char: str) -> str:
+        """
+        Decodes a character of a JSON string, handling the escape sequences.
+
+        Args:
+            char (str): The raw character.
+
+        Returns:
+            str: The decoded characters, empty while an escape sequence is incomplete or when the string ends.
+        """
+        if self.escape is not None:
+            if self.escape == "" and char != "u":
+                self.escape = None
+                return JSON_ESCAPES.get(char, char)
+
+            self.escape += char
+            if len(self.escape) < 5:
+                return ""
+            try:
+                code = int(self.escape[1:], 16)
+            except ValueError:
+                code = 0xFFFD
+            self.escape = None
+
+            if 0xD800 <= code < 0xDC00:
+                self.high_surrogate = code
+                return ""
+            if 0xDC00 <= code < 0xE000 and self.high_surrogate is not None:
+                code = 0x10000 + (self.high_surrogate - 0xD800) * 0x400 + code - 0xDC00
+            self.high_surrogate = None
+            return chr(code)
+
+        if char == "\\":
+            self.escape = ""
+            return ""
+        if char == '"':
+            self.in_string = False
+            self.expecting = None
+            return ""
+        return char
+
+
+async def stream_prompt_fields(
+    formatted_prompt: str,
+    fields: tuple[str, ...],
+    llm_provider: str,
+    llm_model: str = None,
+    allow_fallback: bool = False,
+    **kwargs,
+) -> AsyncIterator[dict]:
+    """
+    Sends a prompt to an LLM provider and streams the string fields of its JSON response.
+
+    Args:
+        formatted_prompt (str): The prompt.
+        fields (tuple[str, ...]): The string fields of the JSON response to stream.
+        llm_provider (str): The LLM provider.
+        llm_model (str): The model, None for the default model of the provider.
+        allow_fallback (bool): Use the fallback provider when the circuit of the requested one is open,
+                               or when it fails before streaming anything.
+        **kwargs: Provider-specific options, such as max_output_tokens for Gemini.
+
+    Yields:
+        dict: Events with a 'type':
+            - delta: The new characters 'text' of the response 'field'.
+            - result: The parsed JSON 'result' with 'tokens_input' and 'tokens_output', and the
+                      'llm_provider' that generated it. Always the last event.
+    """
+    attempts = [(llm_provider, llm_model)]
+    fallback = get_fallback(llm_provider, llm_model) if allow_fallback else None
+    if fallback:
+        if is_available(llm_provider):
+            attempts.append(fallback)
+        else:
+            LOGGER.info(
+                f"Circuit breaker of {llm_provider} is open, streaming from {fallback[0]}"
+            )
+            attempts = [fallback]
+
+    for attempt, (provider, model) in enumerate(attempts):
+        client = get_provider_client(provider)
+        parser = JsonFieldParser(fields)
+        text = ""
+        tokens_input = tokens_output = 0
+        streamed = False
+        try:
+            async for chunk in client.async_stream_prompt_text(
+                formatted_prompt, model, **kwargs
+            ):
+                text += chunk["text"]
+                tokens_input += chunk["tokens_input"]
+                tokens_output += chunk["tokens_output"]
+                for field, delta in parser.feed(chunk["text"]):
+                    streamed = True
+                    yield {"type": "delta", "field": field, "text": delta}
+        except Exception as e:
+            if streamed or attempt == len(attempts) - 1 or not is_provider_error(e):
+                raise
+            LOGGER.warning(
+                f"Streaming failed on {provider}, falling back to {attempts[-1][0]}: {str(e)}"
+            )
+            continue
+
+        result = extract_json_from_response(text)
+        result["tokens_input"] = tokens_input
+        result["tokens_output"] = tokens_output
+        yield {"type": "result", "result": result, "llm_provider": provider}
+        return
+
+
+async def stream_generate_email(
+    base_prompt: str,
+    input_data: str,
+    length: str,
+    formality: str,
+    language: str,
+    agent_settings: dict,
+    signature: str = "",
+    llm_provider: str = "google",
+    llm_model: str = None,
+    allow_fallback: bool = False,
+) -> AsyncIterator[dict]:
+    """Streaming variant of `async_llm_functions.generate_email`, streams "subject" and "body"."""
+    formatted_prompt = format_generate_email_prompt(
+        base_prompt, input_data, length, formality, language, agent_settings, signature
+    )
+    async for event in stream_prompt_fields(
+        formatted_prompt, ("subject", "body"), llm_provider, llm_model, allow_fallback
+    ):
+        if event["type"] == "result" and event["llm_provider"] == "google":
+            result = event["result"]
+            if "body" in result:
+                result["body"] = ensure_proper_spacing(result["body"], signature)
+        yield event
+
+
+async def stream_generate_email_response(
+    base_prompt: str,
+    input_subject: str,
+    input_body: str,
+    user_instruction: str,
+    agent_settings: dict,
+    signature: str = "",
+    llm_provider: str = "google",
+    llm_model: str = None,
+    allow_fallback: bool = False,
+) -> AsyncIterator[dict]:
+    """Streaming variant of `async_llm_functions.generate_email_response`, streams "body"."""
+    formatted_prompt = format_generate_email_response_prompt(
+        base_prompt,
+        input_subject,
+        input_body,
+        user_instruction,
+        agent_settings,
+        signature,
+    )
+    async for event in stream_prompt_fields(
+        formatted_prompt, ("body",), llm_provider, llm_model, allow_fallback
+    ):
+        if event["type"] == "result":
+            result = event["result"]
+            body = result.get("body", "")
+            result["body"] = (
+                ensure_proper_spacing(body, signature)
+                if event["llm_provider"] == "google"
+                else body.strip()
+            )
+        yield event
+
+
+async def stream_improve_email_response(
+    base_prompt: str,
+    importance: str,
+    subject: str,
+    body: str,
+    history: dict,
+    user_input: str,
+    agent_settings: dict,
+    llm_provider: str = "google",
+    llm_model: str = None,
+    allow_fallback: bool = False,
+) -> AsyncIterator[dict]:
+    """Streaming variant of `async_llm_functions.improve_email_response`, streams "body"."""
+    formatted_prompt = format_improve_email_response_prompt(
+        base_prompt, importance, subject, body, history, user_input, agent_settings
+    )
+    async for event in stream_prompt_fields(
+        formatted_prompt, ("body",), llm_provider, llm_model, allow_fallback
+    ):
+        yield event
+
+
+async def stream_improve_draft(
+    base_prompt: str,
+    language: str,
+    agent_settings: dict,
+    subject: str,
+    body: str,
+    history: dict,
+    user_input: str,
+    length: str,
+    formality: str,
+    llm_provider: str = "google",
+    llm_model: str = None,
+    allow_fallback: bool = False,
+) -> AsyncIterator[dict]:
+    """Streaming variant of `async_llm_functions.improve_draft`, streams "subject" and "body"."""
+    formatted_prompt = format_improve_draft_prompt(
+        base_prompt,
+        language,
+        agent_settings,
+        subject,
+        body,
+        history,
+        user_input,
+        length,
+        formality,
+    )
+    async for event in stream_prompt_fields(
+        formatted_prompt, ("subject", "body"), llm_provider, llm_model, allow_fallback
+    ):
+        yield event
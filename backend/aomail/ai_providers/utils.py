@@ -1,9 +1,15 @@
 import json
+import string
+from aomail.ai_providers.prompts import EMAIL_BATCH_ITEM
 from aomail.models import Statistics
 from django.contrib.auth.models import User
 import re
 
 
+# variables of the categorization prompts that change with every email
+CACHEABLE_PROMPT_EMAIL_VARIABLES = ("sender", "subject", "decoded_data", "emails")
+
+
 def update_tokens_stats(user: User, result: dict) -> dict:
     """
     Update token statistics for a user and remove token information from the result dictionary.
@@ -13,11 +19,13 @@ def update_tokens_stats(user: User, result: dict) -> dict:
         result (dict): A dictionary containing the result of an AI function.
 
     Returns:
-        dict: The modified result dictionary with 'tokens_input' and 'tokens_output' keys removed.
+        dict: The modified result dictionary with 'tokens_input', 'tokens_output' and 'tokens_cache_read'
+              keys removed.
     """
     statistics = Statistics.objects.get(user=user)
     statistics.nb_tokens_input += result.pop("tokens_input")
     statistics.nb_tokens_output += result.pop("tokens_output")
+    statistics.nb_tokens_cache_read += result.pop("tokens_cache_read", 0)
     statistics.save()
     return result
 
@@ -55,6 +63,116 @@ def extract_json_from_response(response_text: str) -> dict:
         raise
 
 
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the number of tokens of a text without calling a tokenizer.
+
+    Args:
+        text (str): The text sent to an LLM.
+
+    Returns:
+        int: About one token per four characters, the average of the supported models.
+    """
+    return len(text) // 4 + 1
+
+
+def format_emails_batch(emails: list[dict]) -> str:
+    """
+    Formats several emails into a single prompt section, each email prefixed by its index.
+
+    Args:
+        emails (list[dict]): The emails, each containing 'sender', 'subject' and 'decoded_data' keys.
+
+    Returns:
+        str: The formatted emails.
+    """
+    return "\n".join(
+        EMAIL_BATCH_ITEM.format(
+            index=index,
+            sender=email["sender"],
+            subject=email["subject"],
+            decoded_data=email["decoded_data"],
+        )
+        for index, email in enumerate(emails)
+    )
+
+
+def format_cacheable_prompt(base_prompt: str, **variables) -> tuple[str, str]:
+    """
+    Formats a categorization prompt and splits it before the first variable of the email.
+
+    The text before the email is the same for every email of a user: providers supporting prompt
+    caching bill it as cache reads after the first request.
+
+    Args:
+        base_prompt (str): The prompt template, possibly customized by the user.
+        **variables: The values of the variables of the template.
+
+    Returns:
+        tuple[str, str]: The formatted prefix shared by the emails of the user, and the rest of the
+                         prompt. The prompt is their concatenation.
+    """
+    prefix, rest = "", ""
+    split = False
+    for literal_text, field_name, format_spec, conversion in string.Formatter().parse(
+        base_prompt
+    ):
+        # the parser unescapes the literal text: escape it again to format both parts
+        literal_text = literal_text.replace("{", "{{").replace("}", "}}")
+        field = ""
+        if field_name is not None:
+            field = "{" + field_name
+            field += f"!{conversion}" if conversion else ""
+            field += f":{format_spec}" if format_spec else ""
+            field += "}"
+
+        if split:
+            rest += literal_text + field
+        elif (
+            field_name is not None
+            and re.split(r"[.\[]", field_name)[0] in CACHEABLE_PROMPT_EMAIL_VARIABLES
+        ):
+            split = True
+            prefix += literal_text
+            rest += field
+        else:
+            prefix += literal_text + field
+
+    return prefix.format(**variables), rest.format(**variables)
+
+
+def split_enriched_email(result: dict) -> tuple[dict, dict]:
+    """
+    Splits the result of `enrich_email` into the results of the two-request path.
+
+    Args:
+        result (dict): The result of `enrich_email`, with 'tokens_input' and 'tokens_output'.
+
+    Returns:
+        tuple[dict, dict]: The categorization, as returned by `categorize_and_summarize_email` and
+                           carrying the tokens of the request, and the keypoints, as returned by
+                           `summarize_email` or `summarize_conversation` with zero tokens.
+
+    Raises:
+        KeyError: If the result misses a field of the categorization or the keypoints.
+    """
+    email_processed = dict(result)
+    knowledge: dict = email_processed.pop("knowledge")
+    for key in ("topic", "response", "relevance", "importance", "flags", "summary"):
+        if key not in email_processed:
+            raise KeyError(f"The combined enrichment is missing '{key}'")
+
+    summary = {
+        "category": knowledge.get("category") or "Unknown",
+        "organization": knowledge.get("organization") or "Unknown",
+        "topic": knowledge.get("topic") or "Unknown",
+        "keypoints": knowledge["keypoints"],
+        "tokens_input": 0,
+        "tokens_output": 0,
+    }
+    return email_processed, summary
+
+
 def count_corrections(
     original_subject: str,
     original_body: str,
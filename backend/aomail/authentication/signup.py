@@ -11,7 +11,6 @@ import json
 import logging
 import threading
 import jwt
-from concurrent.futures import ThreadPoolExecutor
 from django.contrib.auth.models import User
 from django.http import HttpRequest
 from django.utils import timezone
@@ -55,7 +54,7 @@ from aomail.email_providers.google import (
 from aomail.email_providers.imap import (
     email_operations as email_operations_imap,
 )
-from aomail.email_providers.utils import email_to_db
+from aomail.email_providers.utils import emails_to_db
 from aomail.authentication.authentication import subscribe_listeners
 from aomail.utils.email_processing import validate_email_address
 from aomail.email_providers.imap.authentication import validate_imap_connection
@@ -320,19 +319,7 @@ def process_demo_emails(type_api: str, user: User, email: str):
         f"Retrieved {len(email_ids)} email IDs for user ID {user.id}. Processing each email now."
     )
 
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        future_to_email_id = {
-            executor.submit(email_to_db, social_api, email_id): email_id
-            for email_id in email_ids
-        }
-
-        for future in future_to_email_id:
-            try:
-                future.result()
-            except Exception as e:
-                LOGGER.error(
-                    f"Error processing email ID {future_to_email_id[future]}: {e}"
-                )
+    emails_to_db(social_api, email_ids)
 
     LOGGER.info(f"Completed processing demo emails for user ID {user.id}.")
 
@@ -2,6 +2,7 @@
 File that stores all constants and computed paths
 """
 
+import json
 import os
 import dotenv
 
@@ -134,3 +135,142 @@ MICROSOFT_CLIENT_SECRET = os.getenv("MICROSOFT_CLIENT_SECRET")
 MICROSOFT_TENANT_ID = os.getenv("MICROSOFT_TENANT_ID")
 MICROSOFT_CLIENT_STATE = os.getenv("MICROSOFT_CLIENT_STATE")
 MICROSOFT = "microsoft"
+
+######################## EMAIL INGESTION ########################
+INGESTION_JOB_PENDING = "pending"
+INGESTION_JOB_RUNNING = "running"
+INGESTION_JOB_DONE = "done"
+INGESTION_JOB_FAILED = "failed"
+INGESTION_WORKER_CONCURRENCY = int(
+    os.getenv("INGESTION_WORKER_CONCURRENCY", 10)
+)  # ingestion tasks, and LLM or email provider calls, running at the same time in one process
+INGESTION_POLL_INTERVAL = float(os.getenv("INGESTION_POLL_INTERVAL", 1))  # seconds
+INGESTION_VISIBILITY_TIMEOUT = int(
+    os.getenv("INGESTION_VISIBILITY_TIMEOUT", 300)
+)  # seconds
+INGESTION_MAX_ATTEMPTS = int(os.getenv("INGESTION_MAX_ATTEMPTS", 5))
+INGESTION_RETRY_BASE_DELAY = int(os.getenv("INGESTION_RETRY_BASE_DELAY", 30))  # seconds
+INGESTION_COALESCE_WINDOW = float(
+    os.getenv("INGESTION_COALESCE_WINDOW", 2)
+)  # seconds during which notifications of the same mailbox are merged
+INGESTION_MAX_PER_USER = int(
+    os.getenv("INGESTION_MAX_PER_USER", 3)
+)  # tasks of a single user running at the same time
+INGESTION_MAX_PER_PROVIDER = int(
+    os.getenv("INGESTION_MAX_PER_PROVIDER", 20)
+)  # tasks calling a single email provider at the same time
+INGESTION_METRICS_INTERVAL = int(
+    os.getenv("INGESTION_METRICS_INTERVAL", 60)
+)  # seconds between two logs of the executor metrics
+INGESTION_BACKFILL_BATCH_SIZE = int(
+    os.getenv("INGESTION_BACKFILL_BATCH_SIZE", 10)
+)  # emails categorized in a single LLM request during backfills
+ENRICHMENT_CACHE_SIZE = int(
+    os.getenv("ENRICHMENT_CACHE_SIZE", 10000)
+)  # AI enrichment results shared across users, 0 disables the cache
+ENRICHMENT_CACHE_TTL = int(os.getenv("ENRICHMENT_CACHE_TTL", 3600))  # seconds
+LLM_HTTP_POOL_SIZE = int(
+    os.getenv("LLM_HTTP_POOL_SIZE", 20)
+)  # keep-alive connections per LLM provider and process
+LLM_HTTP_KEEPALIVE_EXPIRY = float(
+    os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", 60)
+)  # seconds an idle LLM connection is kept open
+LLM_CACHE_SIZE = int(
+    os.getenv("LLM_CACHE_SIZE", 1000)
+)  # idempotent LLM responses kept in memory, 0 disables the cache
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", 86400))  # seconds
+LLM_CACHE_DB = (
+    os.getenv("LLM_CACHE_DB", "false").lower() == "true"
+)  # also share the cached responses between processes through Postgres
+LLM_DEFAULT_RPM = int(
+    os.getenv("LLM_DEFAULT_RPM", 500)
+)  # requests per minute and process for each LLM provider and model
+LLM_DEFAULT_TPM = int(
+    os.getenv("LLM_DEFAULT_TPM", 200000)
+)  # tokens per minute and process for each LLM provider and model
+LLM_RATE_LIMITS = json.loads(
+    os.getenv("LLM_RATE_LIMITS", "{}")
+)  # overrides, e.g. {"anthropic": {"rpm": 50}, "openai/gpt-4o": {"rpm": 100, "tpm": 30000}}
+LLM_RATE_LIMIT_MAX_RETRIES = int(
+    os.getenv("LLM_RATE_LIMIT_MAX_RETRIES", 3)
+)  # retries of a throttled (429) or failed (5xx) LLM request
+LLM_FALLBACK_PROVIDER = os.getenv(
+    "LLM_FALLBACK_PROVIDER", ""
+)  # provider used when the provider of a user fails, empty disables the fallback
+LLM_FALLBACK_MODEL = (
+    os.getenv("LLM_FALLBACK_MODEL") or None
+)  # model of the fallback provider, empty for its default model
+LLM_ROUTER_WINDOW = int(
+    os.getenv("LLM_ROUTER_WINDOW", 300)
+)  # seconds of requests used to compute the latency and error rate of a provider
+LLM_ROUTER_MIN_REQUESTS = int(
+    os.getenv("LLM_ROUTER_MIN_REQUESTS", 10)
+)  # requests in the window before the circuit breaker of a provider can open
+LLM_ROUTER_MAX_ERROR_RATE = float(
+    os.getenv("LLM_ROUTER_MAX_ERROR_RATE", 0.5)
+)  # error rate opening the circuit breaker of a provider
+LLM_ROUTER_MAX_P95_LATENCY = float(
+    os.getenv("LLM_ROUTER_MAX_P95_LATENCY", 30)
+)  # p95 latency in seconds opening the circuit breaker of a provider
+LLM_ROUTER_COOLDOWN = int(
+    os.getenv("LLM_ROUTER_COOLDOWN", 60)
+)  # seconds before an open circuit breaker lets a probe request through
+LLM_COMBINED_ENRICHMENT = (
+    os.getenv("LLM_COMBINED_ENRICHMENT", "false").lower() == "true"
+)  # categorize, summarize and extract the keypoints of a new email with a single LLM request
+LLM_TOKEN_BUDGETS = {
+    "categorize_and_summarize_email": 2000,
+    "categorize_and_summarize_emails": 1000,
+    "enrich_email": 2000,
+    "summarize_email": 1500,
+    "summarize_conversation": 3000,
+    **json.loads(os.getenv("LLM_TOKEN_BUDGETS", "{}")),
+}  # maximum tokens of an email body sent to each LLM function, 0 disables the truncation
+LLM_PROMPT_CACHE_TTL = int(
+    os.getenv("LLM_PROMPT_CACHE_TTL", 3600)
+)  # seconds a Gemini context cache of a categorization prompt prefix is kept
+GEMINI_CONTEXT_CACHE_MIN_TOKENS = int(
+    os.getenv("GEMINI_CONTEXT_CACHE_MIN_TOKENS", 32768)
+)  # smallest prefix cached with Gemini context caching, shorter prefixes rely on implicit caching
+LLM_MOCK_SEED = int(
+    os.getenv("LLM_MOCK_SEED", 0)
+)  # seed of the mock LLM provider, a seed replays the same latencies, token counts and errors
+LLM_MOCK_LATENCY_MEDIAN = float(
+    os.getenv("LLM_MOCK_LATENCY_MEDIAN", 0.5)
+)  # median time to first token of the mock LLM provider in seconds (log-normal)
+LLM_MOCK_LATENCY_SIGMA = float(
+    os.getenv("LLM_MOCK_LATENCY_SIGMA", 0.5)
+)  # spread of the log-normal time to first token, 0 for a constant latency
+LLM_MOCK_TOKENS_PER_SECOND = float(
+    os.getenv("LLM_MOCK_TOKENS_PER_SECOND", 100)
+)  # output tokens generated per second by the mock LLM provider after the first token
+LLM_MOCK_OUTPUT_TOKENS_MEAN = int(
+    os.getenv("LLM_MOCK_OUTPUT_TOKENS_MEAN", 150)
+)  # mean output tokens of a mock LLM response (normal)
+LLM_MOCK_OUTPUT_TOKENS_STDDEV = int(
+    os.getenv("LLM_MOCK_OUTPUT_TOKENS_STDDEV", 50)
+)  # standard deviation of the output tokens of a mock LLM response
+LLM_MOCK_RATE_LIMIT_ERROR_RATE = float(
+    os.getenv("LLM_MOCK_RATE_LIMIT_ERROR_RATE", 0)
+)  # share of mock LLM requests failing with a 429
+LLM_MOCK_SERVER_ERROR_RATE = float(
+    os.getenv("LLM_MOCK_SERVER_ERROR_RATE", 0)
+)  # share of mock LLM requests failing with a 503
+LLM_MOCK_MALFORMED_JSON_RATE = float(
+    os.getenv("LLM_MOCK_MALFORMED_JSON_RATE", 0)
+)  # share of mock LLM responses with a truncated JSON
+LLM_MOCK_ENABLED = (
+    os.getenv("LLM_MOCK_ENABLED", "false").lower() == "true" or ENV != "production"
+)  # whether users can select the mock LLM provider, always allowed outside of production
+LLM_PROVIDERS = (
+    "anthropic",
+    "deepseek",
+    "google",
+    "groq",
+    "mistral",
+    "mock",
+    "openai",
+)  # LLM providers a user can select
+
+######################## EMAIL LIST ########################
+EMAIL_IDS_MAX_PAGE_SIZE = 1000  # largest `limit` of a page of email ids
@@ -12,6 +12,8 @@ Endpoints:
 - ✅ check_email_copywriting: Check and provide feedback on the email copywriting.
 - ✅ generate_email_response_keywords: Generate response keywords based on the email.
 - ✅ generate_email_answer: Generate an answer to an email.
+- ✅ new_email_ai_stream, improve_draft_stream, get_new_email_response_stream, generate_email_answer_stream:
+  Streaming variants sending the generated text as Server-Sent Events while it is generated.
 """
 
 import json
@@ -19,13 +21,16 @@ import logging
 import threading
 import re
 import difflib
+from django.contrib.auth.models import User
 from django.core.mail import send_mail
-from django.http import HttpRequest
+from django.http import HttpRequest, StreamingHttpResponse
 from django.template.loader import render_to_string
 from rest_framework import status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, renderer_classes
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from aomail.utils.security import block_user, subscription
+from aomail.utils.sse import EventStreamRenderer, get_sse_response, stream_sse
 from aomail.constants import (
     EMAIL_ADMIN,
     ALLOWED_PLANS,
@@ -59,6 +64,8 @@ from aomail.utils.serializers import (
     EmailProposalAnswerSerializer,
     EmailGenerateAnswer,
     ContactSerializer,
+    ImproveDraftSerializer,
+    NewEmailResponseSerializer,
 )
 from aomail.utils.ai_memory import (
     EmailReplyConversation,
@@ -67,7 +74,7 @@ from aomail.utils.ai_memory import (
 from langchain_community.chat_message_histories import ChatMessageHistory
 from langchain.schema import AIMessage, HumanMessage
 from aomail.ai_providers.utils import update_tokens_stats
-from aomail.ai_providers import llm_functions
+from aomail.ai_providers import llm_functions, streaming
 from aomail.ai_providers.prompts import (
     GENERATE_EMAIL_PROMPT,
     GENERATE_EMAIL_RESPONSE_PROMPT,
@@ -104,6 +111,57 @@ def dict_to_chat_history(data: dict) -> ChatMessageHistory:
     return ChatMessageHistory(messages=messages)
 
 
+def get_agent_settings(user: User) -> dict | None:
+    """
+    Returns the settings of the active agent of the user.
+
+    Args:
+        user (User): The user.
+
+    Returns:
+        dict | None: The settings passed to the LLM functions, None if the user has no active agent.
+    """
+    try:
+        agent = Agent.objects.get(user=user, last_used=True)
+    except Agent.DoesNotExist:
+        return None
+
+    return {
+        "ai_template": agent.ai_template,
+        "email_example": agent.email_example,
+        "length": agent.length,
+        "formality": agent.formality,
+        "language": agent.language,
+    }
+
+
+def is_blank_response(body: str, signature: str) -> bool:
+    """
+    Whether the response being written is empty: it only contains the signature, or nearly nothing.
+
+    Args:
+        body (str): The HTML body of the response.
+        signature (str): The HTML signature of the user.
+
+    Returns:
+        bool: True if a response must be generated from scratch rather than improved.
+    """
+
+    def strip_html_tags(text):
+        clean = re.compile("<.*?>")
+        return re.sub(clean, "", text)
+
+    def similarity_ratio(str1, str2):
+        return difflib.SequenceMatcher(None, str1, str2).ratio()
+
+    clean_signature = strip_html_tags(signature) if signature else ""
+    clean_body = strip_html_tags(body) if body else ""
+
+    if signature:
+        return similarity_ratio(clean_signature.strip(), clean_body.strip()) > 0.9
+    return len(clean_body.strip()) < 10
+
+
 @api_view(["POST"])
 @block_user
 @subscription(ALLOWED_PLANS)
@@ -132,44 +190,14 @@ def get_new_email_response(request: HttpRequest) -> Response:
     signature: str = parameters["signature"]
     history: dict = parameters["history"]
 
-    try:
-        agent = Agent.objects.get(user=user, last_used=True)
-    except Agent.DoesNotExist:
+    agent_settings = get_agent_settings(user)
+    if agent_settings is None:
         return Response(
             {"error": "No active agent found for the user."},
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    agent_settings = {
-        "ai_template": agent.ai_template,
-        "email_example": agent.email_example,
-        "length": agent.length,
-        "formality": agent.formality,
-        "language": agent.language,
-    }
-
-    def strip_html_tags(text):
-        clean = re.compile("<.*?>")
-        return re.sub(clean, "", text)
-
-    def similarity_ratio(str1, str2):
-        return difflib.SequenceMatcher(None, str1, str2).ratio()
-
-    clean_signature = strip_html_tags(signature) if signature else ""
-    clean_body = strip_html_tags(body) if body else ""
-
-    is_only_signature = False
-    is_nearly_empty = False
-
-    if signature:
-        is_only_signature = (
-            similarity_ratio(clean_signature.strip(), clean_body.strip()) > 0.9
-        )
-    else:
-        clean_content = clean_body.strip()
-        is_nearly_empty = len(clean_content) < 10
-
-    if is_only_signature or is_nearly_empty:
+    if is_blank_response(body, signature):
         try:
             preference = Preference.objects.get(user=user)
             base_prompt = (
@@ -186,6 +214,7 @@ def get_new_email_response(request: HttpRequest) -> Response:
                 signature,
                 preference.llm_provider,
                 preference.llm_model,
+                allow_fallback=preference.llm_fallback,
             )
             update_tokens_stats(user, result)
             return Response(
@@ -246,6 +275,93 @@ def get_new_email_response(request: HttpRequest) -> Response:
     )
 
 
+@api_view(["POST"])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
+@block_user
+@subscription(ALLOWED_PLANS)
+def get_new_email_response_stream(
+    request: HttpRequest,
+) -> StreamingHttpResponse | Response:
+    """
+    Streaming variant of `get_new_email_response`, without retries once the stream started.
+
+    Parameters:
+        request (HttpRequest): The HTTP request object with the POST data of `get_new_email_response`.
+
+    Returns:
+        StreamingHttpResponse: Server-Sent Events: "delta" events with the new characters of "emailBody",
+                               then a "done" event with the response of `get_new_email_response`,
+                               or an "error" event.
+    """
+    user = request.user
+    serializer = NewEmailResponseSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(
+            {"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    user_input: str = serializer.validated_data["userInput"]
+    importance: str = serializer.validated_data["importance"]
+    subject: str = serializer.validated_data["subject"]
+    body: str = serializer.validated_data["body"]
+    emailBody: str = serializer.validated_data["emailBody"]
+    signature: str = serializer.validated_data["signature"]
+    history: dict = serializer.validated_data["history"]
+
+    agent_settings = get_agent_settings(user)
+    if agent_settings is None:
+        return Response(
+            {"error": "No active agent found for the user."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    preference = Preference.objects.get(user=user)
+
+    if is_blank_response(body, signature):
+        events = streaming.stream_generate_email_response(
+            (
+                preference.generate_email_response_prompt
+                if preference.generate_email_response_prompt
+                else GENERATE_EMAIL_RESPONSE_PROMPT
+            ),
+            subject,
+            emailBody,
+            user_input,
+            agent_settings,
+            signature,
+            preference.llm_provider,
+            preference.llm_model,
+            allow_fallback=preference.llm_fallback,
+        )
+
+        def finish(result: dict) -> dict:
+            update_tokens_stats(user, result)
+            return {"emailBody": result["body"], "history": history}
+
+    else:
+        email_reply_conv = EmailReplyConversation(
+            user, importance, subject, body, dict_to_chat_history(history)
+        )
+        events = email_reply_conv.stream_improve_email_response(
+            user_input, agent_settings, preference
+        )
+
+        def finish(result: dict) -> dict:
+            update_tokens_stats(user, result)
+            return {
+                "emailBody": result["body"],
+                "history": email_reply_conv.history.dict(),
+            }
+
+    return get_sse_response(
+        stream_sse(
+            events,
+            {"body": "emailBody"},
+            finish,
+            "Failed to generate email response",
+        )
+    )
+
+
 @api_view(["POST"])
 @block_user
 @subscription(ALLOWED_PLANS)
@@ -275,23 +391,13 @@ def improve_draft(request: HttpRequest) -> Response:
     body: str = parameters["body"]
     history: dict = parameters["history"]
 
-    # Fetch the active agent
-    try:
-        agent = Agent.objects.get(user=user, last_used=True)
-    except Agent.DoesNotExist:
+    agent_settings = get_agent_settings(user)
+    if agent_settings is None:
         return Response(
             {"error": "No active agent found for the user."},
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    agent_settings = {
-        "ai_template": agent.ai_template,
-        "email_example": agent.email_example,
-        "length": agent.length,
-        "formality": agent.formality,
-        "language": agent.language,
-    }
-
     chat_history = dict_to_chat_history(history)
     gen_email_conv = GenerateEmailConversation(
         user, length, formality, subject, body, chat_history
@@ -337,6 +443,69 @@ def improve_draft(request: HttpRequest) -> Response:
     )
 
 
+@api_view(["POST"])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
+@block_user
+@subscription(ALLOWED_PLANS)
+def improve_draft_stream(request: HttpRequest) -> StreamingHttpResponse | Response:
+    """
+    Streaming variant of `improve_draft`, without retries once the stream started.
+
+    Parameters:
+        request (HttpRequest): The HTTP request object with the POST data of `improve_draft`.
+
+    Returns:
+        StreamingHttpResponse: Server-Sent Events: "delta" events with the new characters of "subject"
+                               and "emailBody", then a "done" event with the response of
+                               `improve_draft`, or an "error" event.
+    """
+    user = request.user
+    serializer = ImproveDraftSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(
+            {"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    user_input: str = serializer.validated_data["userInput"]
+    length: str = serializer.validated_data["length"]
+    formality: str = serializer.validated_data["formality"]
+    subject: str = serializer.validated_data["subject"]
+    body: str = serializer.validated_data["body"]
+    history: dict = serializer.validated_data["history"]
+
+    agent_settings = get_agent_settings(user)
+    if agent_settings is None:
+        return Response(
+            {"error": "No active agent found for the user."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    preference = Preference.objects.get(user=user)
+
+    gen_email_conv = GenerateEmailConversation(
+        user, length, formality, subject, body, dict_to_chat_history(history)
+    )
+    events = gen_email_conv.stream_improve_draft(
+        user_input, preference.language, agent_settings, preference
+    )
+
+    def finish(result: dict) -> dict:
+        update_tokens_stats(user, result)
+        return {
+            "subject": result["subject"],
+            "emailBody": result["body"],
+            "history": gen_email_conv.history.dict(),
+        }
+
+    return get_sse_response(
+        stream_sse(
+            events,
+            {"subject": "subject", "body": "emailBody"},
+            finish,
+            "Failed to generate a draft",
+        )
+    )
+
+
 @api_view(["POST"])
 @block_user
 @subscription(ALLOWED_PLANS)
@@ -361,7 +530,11 @@ def search_emails_ai(request: HttpRequest) -> Response:
     language = Preference.objects.get(user=user).language
     preference = Preference.objects.get(user=user)
     result: dict = llm_functions.search_emails(
-        query, language, preference.llm_provider, preference.llm_model
+        query,
+        language,
+        preference.llm_provider,
+        preference.llm_model,
+        allow_fallback=preference.llm_fallback,
     )
     search_params = result["search_params"]
     update_tokens_stats(user, result)
@@ -542,7 +715,10 @@ def find_user_view_ai(request: HttpRequest) -> Response:
 
     preference = Preference.objects.get(user=request.user)
     recipients_dict = llm_functions.extract_contacts_recipients(
-        search_query, preference.llm_provider, preference.llm_model
+        search_query,
+        preference.llm_provider,
+        preference.llm_model,
+        allow_fallback=preference.llm_fallback,
     )
     update_tokens_stats(request.user, recipients_dict)
 
@@ -626,21 +802,12 @@ def new_email_ai(request: HttpRequest) -> Response:
         language = preference.language
         signature = ""
 
-        try:
-            agent = Agent.objects.get(user=user, last_used=True)
-        except Agent.DoesNotExist:
+        agent_settings = get_agent_settings(user)
+        if agent_settings is None:
             return Response(
                 {"error": "No active agent found for the user."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-
-        agent_settings = {
-            "ai_template": agent.ai_template,
-            "email_example": agent.email_example,
-            "length": agent.length,
-            "formality": agent.formality,
-            "language": agent.language,
-        }
         result = llm_functions.generate_email(
             (
                 preference.generate_email_prompt
@@ -655,6 +822,7 @@ def new_email_ai(request: HttpRequest) -> Response:
             signature,
             preference.llm_provider,
             preference.llm_model,
+            allow_fallback=preference.llm_fallback,
         )
         update_tokens_stats(user, result)
 
@@ -665,6 +833,69 @@ def new_email_ai(request: HttpRequest) -> Response:
         )
 
 
+@api_view(["POST"])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
+@block_user
+@subscription(ALLOWED_PLANS)
+def new_email_ai_stream(request: HttpRequest) -> StreamingHttpResponse | Response:
+    """
+    Streaming variant of `new_email_ai`.
+
+    Args:
+        request (HttpRequest): The HTTP request object containing input data in the body.
+
+    Returns:
+        StreamingHttpResponse: Server-Sent Events: "delta" events with the new characters of "subject"
+                               and "mail", then a "done" event with the response of `new_email_ai`,
+                               or an "error" event.
+    """
+    serializer = NewEmailAISerializer(data=request.data)
+    user = request.user
+
+    if not serializer.is_valid():
+        return Response(
+            {"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    agent_settings = get_agent_settings(user)
+    if agent_settings is None:
+        return Response(
+            {"error": "No active agent found for the user."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    preference = Preference.objects.get(user=user)
+
+    events = streaming.stream_generate_email(
+        (
+            preference.generate_email_prompt
+            if preference.generate_email_prompt
+            else GENERATE_EMAIL_PROMPT
+        ),
+        serializer.validated_data["inputData"],
+        serializer.validated_data["length"],
+        serializer.validated_data["formality"],
+        preference.language,
+        agent_settings,
+        "",
+        preference.llm_provider,
+        preference.llm_model,
+        allow_fallback=preference.llm_fallback,
+    )
+
+    def finish(result: dict) -> dict:
+        update_tokens_stats(user, result)
+        return {"subject": result["subject"], "mail": result["body"]}
+
+    return get_sse_response(
+        stream_sse(
+            events,
+            {"subject": "subject", "body": "mail"},
+            finish,
+            "Failed to generate the email",
+        )
+    )
+
+
 @api_view(["POST"])
 @block_user
 @subscription(ALLOWED_PLANS)
@@ -692,7 +923,11 @@ def correct_email_language(request: HttpRequest) -> Response:
 
         preference = Preference.objects.get(user=request.user)
         result = llm_functions.correct_mail_language_mistakes(
-            body, subject, preference.llm_provider, preference.llm_model
+            body,
+            subject,
+            preference.llm_provider,
+            preference.llm_model,
+            allow_fallback=preference.llm_fallback,
         )
         result = update_tokens_stats(request.user, result)
 
@@ -730,7 +965,11 @@ def check_email_copywriting(request: HttpRequest) -> Response:
 
         preference = Preference.objects.get(user=request.user)
         result = llm_functions.improve_email_copywriting(
-            body, subject, preference.llm_provider, preference.llm_model
+            body,
+            subject,
+            preference.llm_provider,
+            preference.llm_model,
+            allow_fallback=preference.llm_fallback,
         )
         update_tokens_stats(request.user, result)
 
@@ -778,6 +1017,7 @@ def generate_email_response_keywords(request: HttpRequest) -> Response:
             subject,
             preference.llm_provider,
             preference.llm_model,
+            allow_fallback=preference.llm_fallback,
         )
         update_tokens_stats(user, result)
 
@@ -818,22 +1058,13 @@ def generate_email_answer(request: HttpRequest) -> Response:
         user_instruction = serializer.validated_data["keyword"]
         signature = serializer.validated_data["signature"]
 
-        try:
-            agent = Agent.objects.get(user=user, last_used=True)
-        except Agent.DoesNotExist:
+        agent_settings = get_agent_settings(user)
+        if agent_settings is None:
             return Response(
                 {"error": "No active agent found for the user."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        agent_settings = {
-            "ai_template": agent.ai_template,
-            "email_example": agent.email_example,
-            "length": agent.length,
-            "formality": agent.formality,
-            "language": agent.language,
-        }
-
         preference = Preference.objects.get(user=request.user)
         base_prompt = (
             preference.generate_email_response_prompt
@@ -849,6 +1080,7 @@ def generate_email_answer(request: HttpRequest) -> Response:
             signature,
             preference.llm_provider,
             preference.llm_model,
+            allow_fallback=preference.llm_fallback,
         )
         update_tokens_stats(user, result)
 
@@ -859,6 +1091,70 @@ def generate_email_answer(request: HttpRequest) -> Response:
         )
 
 
+@api_view(["POST"])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
+@block_user
+@subscription(ALLOWED_PLANS)
+def generate_email_answer_stream(
+    request: HttpRequest,
+) -> StreamingHttpResponse | Response:
+    """
+    Streaming variant of `generate_email_answer`.
+
+    Parameters:
+        request (HttpRequest): HTTP request with the POST data of `generate_email_answer`.
+
+    Returns:
+        StreamingHttpResponse: Server-Sent Events: "delta" events with the new characters of
+                               "emailAnswer", then a "done" event with the response of
+                               `generate_email_answer`, or an "error" event.
+    """
+    serializer = EmailGenerateAnswer(data=request.data)
+    user = request.user
+
+    if not serializer.is_valid():
+        return Response(
+            {"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    agent_settings = get_agent_settings(user)
+    if agent_settings is None:
+        return Response(
+            {"error": "No active agent found for the user."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    preference = Preference.objects.get(user=user)
+
+    events = streaming.stream_generate_email_response(
+        (
+            preference.generate_email_response_prompt
+            if preference.generate_email_response_prompt
+            else GENERATE_EMAIL_RESPONSE_PROMPT
+        ),
+        serializer.validated_data["subject"],
+        serializer.validated_data["body"],
+        serializer.validated_data["keyword"],
+        agent_settings,
+        serializer.validated_data["signature"],
+        preference.llm_provider,
+        preference.llm_model,
+        allow_fallback=preference.llm_fallback,
+    )
+
+    def finish(result: dict) -> dict:
+        update_tokens_stats(user, result)
+        return {"emailAnswer": result["body"]}
+
+    return get_sse_response(
+        stream_sse(
+            events,
+            {"body": "emailAnswer"},
+            finish,
+            "Failed to generate the answer",
+        )
+    )
+
+
 @api_view(["POST"])
 @block_user
 @subscription(ALLOWED_PLANS)
@@ -918,22 +1214,13 @@ def handle_email_action(request: HttpRequest) -> Response:
         preference = Preference.objects.get(user=user)
         language = preference.language
 
-        try:
-            agent = Agent.objects.get(user=user, last_used=True)
-        except Agent.DoesNotExist:
+        agent_settings = get_agent_settings(user)
+        if agent_settings is None:
             return Response(
                 {"error": "No active agent found for the user."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        agent_settings = {
-            "ai_template": agent.ai_template,
-            "email_example": agent.email_example,
-            "length": agent.length,
-            "formality": agent.formality,
-            "language": agent.language,
-        }
-
         result_json = llm_functions.determine_action_scenario(
             destinary_present,
             subject_present,
@@ -942,6 +1229,7 @@ def handle_email_action(request: HttpRequest) -> Response:
             is_only_signature,
             preference.llm_provider,
             preference.llm_model,
+            allow_fallback=preference.llm_fallback,
         )
         scenario = result_json.get("scenario", 5)
 
@@ -979,7 +1267,10 @@ def handle_email_action(request: HttpRequest) -> Response:
 
         if scenario == 1:
             recipients = llm_functions.extract_contacts_recipients(
-                user_input, preference.llm_provider, preference.llm_model
+                user_input,
+                preference.llm_provider,
+                preference.llm_model,
+                allow_fallback=preference.llm_fallback,
             )
             update_tokens_stats(user, recipients)
 
@@ -1025,6 +1316,7 @@ def handle_email_action(request: HttpRequest) -> Response:
                 signature,
                 preference.llm_provider,
                 preference.llm_model,
+                allow_fallback=preference.llm_fallback,
             )
             update_tokens_stats(user, result)
 
@@ -1037,7 +1329,10 @@ def handle_email_action(request: HttpRequest) -> Response:
 
             if scenario == 2:
                 recipients = llm_functions.extract_contacts_recipients(
-                    user_input, preference.llm_provider, preference.llm_model
+                    user_input,
+                    preference.llm_provider,
+                    preference.llm_model,
+                    allow_fallback=preference.llm_fallback,
                 )
                 update_tokens_stats(user, recipients)
 
@@ -38,7 +38,10 @@ def review_user_description(request: HttpRequest) -> dict:
     user_description: str = parameters["description"]
     preference = Preference.objects.get(user=request.user)
     result = llm_functions.review_user_description(
-        user_description, preference.llm_provider, preference.llm_model
+        user_description,
+        preference.llm_provider,
+        preference.llm_model,
+        allow_fallback=preference.llm_fallback,
     )
     update_tokens_stats(request.user, result)
 
@@ -70,6 +73,7 @@ def generate_categories_scratch(request: HttpRequest) -> dict:
         chat_history,
         preference.llm_provider,
         preference.llm_model,
+        allow_fallback=preference.llm_fallback,
     )
     update_tokens_stats(request.user, result)
 
@@ -97,7 +101,10 @@ def generate_prioritization_scratch(request: HttpRequest) -> dict:
     user_input: str = parameters["userInput"]
     preference = Preference.objects.get(user=request.user)
     result = llm_functions.generate_prioritization_scratch(
-        user_input, preference.llm_provider, preference.llm_model
+        user_input,
+        preference.llm_provider,
+        preference.llm_model,
+        allow_fallback=preference.llm_fallback,
     )
     update_tokens_stats(request.user, result)
 
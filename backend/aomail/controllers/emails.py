@@ -22,12 +22,11 @@ from django.utils import timezone
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from aomail.utils.security import decrypt_text, subscription
+from aomail.utils.security import subscription
+from aomail.utils.serializers import EmailDetailSerializer
 from aomail.constants import (
     ALLOW_ALL,
     ANSWER_REQUIRED,
-    EMAIL_ONE_LINE_SUMMARY_KEY,
-    EMAIL_SHORT_SUMMARY_KEY,
     GOOGLE,
     IMPORTANT,
     INFORMATIVE,
@@ -242,59 +241,10 @@ def get_simple_email_data(request: HttpRequest) -> Response:
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        queryset = Email.objects.filter(id__in=email_ids, user=user)
-
-        emails_data = []
-        for email in queryset:
-            emails_data.append(
-                {
-                    "id": email.id,
-                    "subject": email.subject,
-                    "sender": {
-                        "email": email.sender.email,
-                        "name": email.sender.name,
-                    },
-                    "providerId": email.provider_id,
-                    "shortSummary": decrypt_text(
-                        EMAIL_SHORT_SUMMARY_KEY, email.short_summary
-                    ),
-                    "oneLineSummary": decrypt_text(
-                        EMAIL_ONE_LINE_SUMMARY_KEY,
-                        email.one_line_summary,
-                    ),
-                    "cc": [
-                        {"email": cc.email, "name": cc.name}
-                        for cc in email.cc_senders.all()
-                    ],
-                    "bcc": [
-                        {"email": bcc.email, "name": bcc.name}
-                        for bcc in email.bcc_senders.all()
-                    ],
-                    "read": email.read,
-                    "answerLater": email.answer_later,
-                    "hasAttachments": email.has_attachments,
-                    "attachments": [
-                        {
-                            "attachmentName": attachment.name,
-                            "attachmentId": attachment.id_api,
-                        }
-                        for attachment in email.attachments.all()
-                    ],
-                    "sentDate": email.date.date() if email.date else None,
-                    "sentTime": email.date.strftime("%H:%M") if email.date else None,
-                    "answer": email.answer,
-                    "relevance": email.relevance,
-                    "priority": email.priority,
-                    "flags": {
-                        "spam": email.spam,
-                        "scam": email.scam,
-                        "newsletter": email.newsletter,
-                        "notification": email.notification,
-                        "meeting": email.meeting,
-                    },
-                    "archive": email.archive,
-                }
-            )
+        queryset = EmailDetailSerializer.setup_eager_loading(
+            Email.objects.filter(id__in=email_ids, user=user)
+        )
+        emails_data = EmailDetailSerializer(queryset, many=True).data
 
         return Response({"emailsData": emails_data}, status=status.HTTP_200_OK)
     except Exception as e:
@@ -26,7 +26,7 @@ from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from aomail.utils.security import subscription
-from aomail.constants import ALLOW_ALL
+from aomail.constants import ALLOW_ALL, LLM_MOCK_ENABLED, LLM_PROVIDERS
 from aomail.models import Preference, Subscription
 from aomail.ai_providers.prompts import (
     CATEGORIZE_AND_SUMMARIZE_EMAIL_PROMPT,
@@ -449,6 +449,7 @@ def get_user_llm_settings(request: HttpRequest) -> Response:
             "llmModel": (
                 preference.llm_model if preference.llm_model else "gemini-1.5-flash"
             ),
+            "llmFallback": preference.llm_fallback,
             "improveEmailDraftPrompt": {
                 "prompt": (
                     preference.improve_email_draft_prompt
@@ -517,10 +518,20 @@ def update_user_llm_settings(request: HttpRequest) -> Response:
     parameters: dict = json.loads(request.body)
     preference = get_object_or_404(Preference, user=request.user)
 
-    if parameters.get("llmProvider"):
-        preference.llm_provider = parameters.get("llmProvider")
+    llm_provider = parameters.get("llmProvider")
+    if llm_provider:
+        if llm_provider not in LLM_PROVIDERS or (
+            llm_provider == "mock" and not LLM_MOCK_ENABLED
+        ):
+            return Response(
+                {"error": f"Unsupported LLM provider: {llm_provider}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        preference.llm_provider = llm_provider
     if parameters.get("llmModel"):
         preference.llm_model = parameters.get("llmModel")
+    if "llmFallback" in parameters:
+        preference.llm_fallback = bool(parameters["llmFallback"])
 
     improve_email_draft_prompt = parameters.get("improveEmailDraftPrompt")
     if improve_email_draft_prompt and all(
@@ -591,6 +602,7 @@ def reset_user_llm_settings(request: HttpRequest) -> Response:
         preference.generate_response_keywords_prompt = None
         preference.llm_model = None
         preference.llm_provider = "google"
+        preference.llm_fallback = False
         preference.save()
 
         return Response(
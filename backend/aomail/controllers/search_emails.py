@@ -7,11 +7,16 @@ Endpoints:
 - ✅ get_emails_data: Retrieves formatted email data to be displayed.
 """
 
+import base64
 import json
 import logging
+import re
 import threading
 from collections import defaultdict
-from django.db.models import Q
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import Case, Count, F, FloatField, IntegerField, Q, Value, When
+from django.db.models.functions import Cast
 from django.db.models.manager import BaseManager
 from django.http import HttpRequest
 from rest_framework import status
@@ -20,16 +25,16 @@ from rest_framework.response import Response
 from aomail.constants import (
     ALLOW_ALL,
     EMAIL_HTML_CONTENT_KEY,
-    EMAIL_ONE_LINE_SUMMARY_KEY,
-    EMAIL_SHORT_SUMMARY_KEY,
+    EMAIL_IDS_MAX_PAGE_SIZE,
     IMPORTANT,
     INFORMATIVE,
     USELESS,
 )
-from datetime import timedelta
+from datetime import datetime, timedelta
 from django.utils import timezone
 from aomail.models import Category, SocialAPI, Email, Subscription
 from aomail.utils.security import subscription, decrypt_text
+from aomail.utils.serializers import EmailDetailSerializer
 from django.contrib.auth.models import User
 from aomail.email_providers.imap.emails_sync import save_emails_to_db
 
@@ -63,56 +68,14 @@ def get_emails_data(request: HttpRequest) -> Response:
             )
 
         formatted_data = defaultdict(lambda: defaultdict(list))
-        queryset = Email.objects.filter(id__in=email_ids, user=user)
+        queryset = EmailDetailSerializer.setup_eager_loading(
+            Email.objects.filter(id__in=email_ids, user=user)
+        )
 
         for email in queryset:
-            email_data = {
-                "id": email.id,
-                "subject": email.subject,
-                "sender": {
-                    "email": email.sender.email,
-                    "name": email.sender.name,
-                },
-                "providerId": email.provider_id,
-                "shortSummary": decrypt_text(
-                    EMAIL_SHORT_SUMMARY_KEY, email.short_summary
-                ),
-                "oneLineSummary": decrypt_text(
-                    EMAIL_ONE_LINE_SUMMARY_KEY, email.one_line_summary
-                ),
-                "cc": [
-                    {"email": cc.email, "name": cc.name}
-                    for cc in email.cc_senders.all()
-                ],
-                "bcc": [
-                    {"email": bcc.email, "name": bcc.name}
-                    for bcc in email.bcc_senders.all()
-                ],
-                "read": email.read,
-                "answerLater": email.answer_later,
-                "hasAttachments": email.has_attachments,
-                "attachments": [
-                    {
-                        "attachmentName": attachment.name,
-                        "attachmentId": attachment.id_api,
-                    }
-                    for attachment in email.attachments.all()
-                ],
-                "sentDate": email.date.date() if email.date else None,
-                "sentTime": email.date.strftime("%H:%M") if email.date else None,
-                "answer": email.answer,
-                "relevance": email.relevance,
-                "priority": email.priority,
-                "flags": {
-                    "spam": email.spam,
-                    "scam": email.scam,
-                    "newsletter": email.newsletter,
-                    "notification": email.notification,
-                    "meeting": email.meeting,
-                },
-                "archive": email.archive,
-            }
-            formatted_data[email.category.name][email.priority].append(email_data)
+            formatted_data[email.category.name][email.priority].append(
+                EmailDetailSerializer(email).data
+            )
 
         return Response(
             {"data": formatted_data},
@@ -203,6 +166,28 @@ def validate_and_parse_parameters(request: HttpRequest) -> dict:
     }
 
 
+def get_search_query(search: str) -> SearchQuery | None:
+    """
+    Converts the search of the user into a full-text query on `Email.search_vector`
+    (subject, sender and CC senders), each word matching as a prefix: "inv jo" matches "Invoice from John".
+
+    Args:
+        search (str): The text typed in the search bar.
+
+    Returns:
+        SearchQuery | None: The full-text query, None if the search has no word.
+    """
+    words = re.findall(r"[^\W_]+", search or "")
+    if not words:
+        return None
+
+    return SearchQuery(
+        " & ".join(f"{word}:*" for word in words),
+        config="simple",
+        search_type="raw",
+    )
+
+
 def construct_filters(user: User, parameters: dict) -> tuple[dict, Q]:
     """
     Constructs a dictionary of filters and a Q object for OR conditions based on provided user and parameters.
@@ -271,28 +256,17 @@ def construct_filters(user: User, parameters: dict) -> tuple[dict, Q]:
             and_filters["cc_senders__email__in"] = parameters["CCEmails"]
         if "CCNames" in parameters:
             and_filters["cc_senders__name__in"] = parameters["CCNames"]
-        if "search" in parameters:
-            search = parameters.get("search", "")
-            or_filters_search |= (
-                Q(subject__icontains=search)
-                | Q(sender__email__icontains=search)
-                | Q(sender__name__icontains=search)
-                | Q(cc_senders__email__icontains=search)
-                | Q(cc_senders__name__icontains=search)
-            )
+        search_query = get_search_query(parameters.get("search", ""))
+        if search_query:
+            or_filters_search &= Q(search_vector=search_query)
 
     else:
         if "category" in parameters:
             category_obj = Category.objects.get(name=parameters["category"], user=user)
             and_filters["category"] = category_obj
-        search = parameters.get("search", "")
-        or_filters |= (
-            Q(subject__icontains=search)
-            | Q(sender__email__icontains=search)
-            | Q(sender__name__icontains=search)
-            | Q(cc_senders__email__icontains=search)
-            | Q(cc_senders__name__icontains=search)
-        )
+        search_query = get_search_query(parameters.get("search", ""))
+        if search_query:
+            or_filters &= Q(search_vector=search_query)
 
     return and_filters, or_filters, or_filters_search
 
@@ -311,37 +285,181 @@ def get_sorted_queryset(
     return queryset
 
 
-def format_email_data(queryset: BaseManager[Email]) -> tuple:
+EMAIL_LIST_GROUPS = [
+    (False, IMPORTANT),
+    (False, INFORMATIVE),
+    (False, USELESS),
+    (True, IMPORTANT),
+    (True, INFORMATIVE),
+    (True, USELESS),
+]
+
+
+def order_email_list(
+    queryset: BaseManager[Email], search_query: SearchQuery | None = None
+) -> tuple[BaseManager[Email], list[str]]:
+    """
+    Orders the emails of the list in a single query: unread emails before read emails, each by priority
+    (important, informative then useless), by relevance when searching, then the most recent first.
+
+    Args:
+        queryset (BaseManager): A Django BaseManager containing Email objects.
+        search_query (SearchQuery | None): The full-text search, orders each group by relevance first.
+
+    Returns:
+        tuple: A tuple containing:
+            queryset (BaseManager): The ordered emails.
+            keys (list[str]): The sort keys, all descending except "list_group", stored in the cursors.
+    """
+    queryset = queryset.filter(priority__in=[IMPORTANT, INFORMATIVE, USELESS]).annotate(
+        list_group=Case(
+            *[
+                When(read=read, priority=priority, then=Value(index))
+                for index, (read, priority) in enumerate(EMAIL_LIST_GROUPS)
+            ],
+            output_field=IntegerField(),
+        )
+    )
+    keys = ["list_group", "date", "id"]
+    ordering = [F("list_group").asc(), F("date").desc(nulls_first=True), F("id").desc()]
+    if search_query:
+        # ts_rank returns a real: the cast keeps the rank exact once decoded from a cursor
+        queryset = queryset.annotate(
+            rank=Cast(SearchRank(F("search_vector"), search_query), FloatField())
+        )
+        keys.insert(1, "rank")
+        ordering.insert(1, F("rank").desc())
+
+    return queryset.order_by(*ordering), keys
+
+
+def encode_cursor(row: dict, keys: list[str]) -> str:
+    """
+    Encodes the sort keys of the last email of a page into the cursor of the next page.
+
+    Args:
+        row (dict): The values of the sort keys of the email.
+        keys (list[str]): The sort keys returned by `order_email_list`.
+
+    Returns:
+        str: The opaque cursor.
+    """
+    values = [
+        row[key].isoformat() if isinstance(row[key], datetime) else row[key]
+        for key in keys
+    ]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str, keys: list[str]) -> list:
+    """
+    Decodes a cursor returned by `encode_cursor`.
+
+    Args:
+        cursor (str): The cursor of the page.
+        keys (list[str]): The sort keys returned by `order_email_list`.
+
+    Returns:
+        list: The values of the sort keys.
+
+    Raises:
+        ValueError: If the cursor was not returned for the same list.
+    """
+    if not isinstance(cursor, str):
+        raise ValueError("The cursor must be a string")
+
+    values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise ValueError("The cursor does not match the sort of the list")
+    for key, value in zip(keys, values):
+        expected_types = (str, type(None)) if key == "date" else (int, float)
+        if isinstance(value, bool) or not isinstance(value, expected_types):
+            raise ValueError(f"Invalid cursor value for {key}")
+
+    date_index = keys.index("date")
+    if values[date_index] is not None:
+        values[date_index] = datetime.fromisoformat(values[date_index])
+
+    return values
+
+
+def get_keyset_filter(keys: list[str], values: list) -> Q:
+    """
+    Filters the emails sorted after the cursor (keyset pagination), the same way as the
+    order of `order_email_list`: emails without date come first among the descending dates.
+
+    Args:
+        keys (list[str]): The sort keys returned by `order_email_list`.
+        values (list): The values of the sort keys decoded from the cursor.
+
+    Returns:
+        Q: The filter of the emails after the cursor.
+    """
+    after = Q()
+    equal = Q()
+    for key, value in zip(keys, values):
+        if value is None:
+            greater = Q(**{f"{key}__isnull": False})
+            equal_key = Q(**{f"{key}__isnull": True})
+        else:
+            greater = Q(**{f"{key}__{'gt' if key == 'list_group' else 'lt'}": value})
+            equal_key = Q(**{key: value})
+        after |= equal & greater
+        equal &= equal_key
+
+    return after
+
+
+def get_email_ids_page(
+    queryset: BaseManager[Email],
+    search_query: SearchQuery | None,
+    after: str | None,
+    limit: int,
+) -> tuple[list[int], str | None]:
+    """
+    Returns a page of the ordered email IDs of the list.
+
+    Args:
+        queryset (BaseManager): A Django BaseManager containing Email objects.
+        search_query (SearchQuery | None): The full-text search, orders each group by relevance first.
+        after (str | None): The cursor returned with the previous page, None for the first page.
+        limit (int): The maximum number of IDs of the page.
+
+    Returns:
+        tuple: A tuple containing:
+            email_ids (list[int]): The IDs of the page.
+            next_cursor (str | None): The cursor of the next page, None if this page is the last one.
+
+    Raises:
+        ValueError: If the cursor is invalid.
+    """
+    queryset, keys = order_email_list(queryset, search_query)
+    if after:
+        queryset = queryset.filter(get_keyset_filter(keys, decode_cursor(after, keys)))
+
+    rows = list(queryset.values(*keys)[: limit + 1])
+    next_cursor = encode_cursor(rows[limit - 1], keys) if len(rows) > limit else None
+
+    return [row["id"] for row in rows[:limit]], next_cursor
+
+
+def format_email_data(
+    queryset: BaseManager[Email], search_query: SearchQuery | None = None
+) -> tuple:
     """
     Formats email data from the provided queryset and collects email IDs.
 
     Args:
         queryset (BaseManager): A Django BaseManager containing Email objects.
-        result_per_page (int): Number of email results per page.
+        search_query (SearchQuery | None): The full-text search, orders each group by relevance first.
 
     Returns:
         tuple: A tuple containing:
             email_count (int): Total number of emails in the queryset.
             email_ids (list): List of email IDs from the queryset.
     """
-    priority_order = [IMPORTANT, INFORMATIVE, USELESS]
-    email_ids = []
-
-    for priority in priority_order:
-        priority_unread_ids = list(
-            queryset.filter(priority=priority, read=False)
-            .order_by("-date")
-            .values_list("id", flat=True)
-        )
-        email_ids.extend(priority_unread_ids)
-
-    for priority in priority_order:
-        priority_read_ids = list(
-            queryset.filter(priority=priority, read=True)
-            .order_by("-date")
-            .values_list("id", flat=True)
-        )
-        email_ids.extend(priority_read_ids)
+    queryset, _ = order_email_list(queryset, search_query)
+    email_ids = list(queryset.values_list("id", flat=True))
 
     email_count = len(email_ids)
     return email_count, email_ids
@@ -359,6 +477,7 @@ def get_user_emails_ids(request: HttpRequest) -> Response:
     JSON Body:
         Optional filters:
             advanced (bool): True if specific filters have been used.
+            search (str): Words searched in the subject, sender and CC senders (prefix match, ranked by relevance).
             sort (str): Sorting order ("asc" for ascending, "desc" for descending). Default is "asc".
             emailProvider (list[str]): List of email providers to filter by.
             subject (str): Keyword to filter by email subject.
@@ -382,12 +501,15 @@ def get_user_emails_ids(request: HttpRequest) -> Response:
             newsletter (bool): Filter by newsletter status.
             notification (bool): Filter by notification status.
             meeting (bool): Filter by meeting status.
+            limit (int): Returns a page of at most `limit` IDs instead of all of them (1 to EMAIL_IDS_MAX_PAGE_SIZE).
+            after (str): The "next" cursor of the previous page.
 
     Returns:
         Response: JSON response with the following structure:
             {
                 "count": int,  # Total number of emails matching the filters.
-                "ids": list[int]  # List of email IDs matching the filters.
+                "ids": list[int],  # List of email IDs matching the filters, unread then read, by priority then date.
+                "next": str | None  # Paginated requests only: cursor of the next page, None after the last page.
             }
     """
     try:
@@ -407,10 +529,39 @@ def get_user_emails_ids(request: HttpRequest) -> Response:
         queryset = get_sorted_queryset(
             and_filters, or_filters, or_filters_search, sort, user
         )
-        email_count, email_ids = format_email_data(queryset)
+        search_query = get_search_query(parameters.get("search", ""))
+
+        if "after" not in parameters and "limit" not in parameters:
+            email_count, email_ids = format_email_data(queryset, search_query)
+            return Response(
+                {"count": email_count, "ids": email_ids},
+                status=status.HTTP_200_OK,
+            )
+
+        limit = parameters.get("limit", EMAIL_IDS_MAX_PAGE_SIZE)
+        if (
+            not isinstance(limit, int)
+            or isinstance(limit, bool)
+            or not (1 <= limit <= EMAIL_IDS_MAX_PAGE_SIZE)
+        ):
+            return Response(
+                {
+                    "error": f"limit must be an integer between 1 and {EMAIL_IDS_MAX_PAGE_SIZE}"
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            email_ids, next_cursor = get_email_ids_page(
+                queryset, search_query, parameters.get("after"), limit
+            )
+        except ValueError:
+            return Response(
+                {"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST
+            )
 
         return Response(
-            {"count": email_count, "ids": email_ids},
+            {"count": queryset.count(), "ids": email_ids, "next": next_cursor},
             status=status.HTTP_200_OK,
         )
     except ValueError as e:
@@ -430,6 +581,34 @@ def get_user_emails_ids(request: HttpRequest) -> Response:
         )
 
 
+EMAIL_COUNT_FILTERS = {
+    "useless": Q(priority=USELESS, read=False),
+    "important": Q(priority=IMPORTANT, read=False),
+    "informative": Q(priority=INFORMATIVE, read=False),
+    "read": Q(read=True, archive=False),
+}
+
+
+def count_emails(queryset: BaseManager[Email], with_ids: bool = True) -> dict:
+    """
+    Counts the unread emails of each priority and the read emails in a single aggregate query.
+
+    Args:
+        queryset (BaseManager): A Django BaseManager containing the filtered Email objects.
+        with_ids (bool): Also returns the IDs of each group, collected by the same query.
+
+    Returns:
+        dict: "<group>_count" for each group of `EMAIL_COUNT_FILTERS`, and "<group>_ids" if `with_ids` is True.
+    """
+    aggregates = {}
+    for name, group_filter in EMAIL_COUNT_FILTERS.items():
+        aggregates[f"{name}_count"] = Count("id", filter=group_filter)
+        if with_ids:
+            aggregates[f"{name}_ids"] = ArrayAgg("id", filter=group_filter, default=[])
+
+    return queryset.aggregate(**aggregates)
+
+
 @api_view(["POST"])
 @subscription(ALLOW_ALL)
 def get_email_counts(request: HttpRequest) -> Response:
@@ -443,6 +622,7 @@ def get_email_counts(request: HttpRequest) -> Response:
     JSON Body:
         Optional filters:
             advanced (bool): True if specific filters have been used.
+            search (str): Words searched in the subject, sender and CC senders (prefix match, ranked by relevance).
             sort (str): Sorting order ("asc" for ascending, "desc" for descending). Default is "asc".
             emailProvider (list[str]): List of email providers to filter by.
             subject (str): Keyword to filter by email subject.
@@ -466,9 +646,10 @@ def get_email_counts(request: HttpRequest) -> Response:
             newsletter (bool): Filter by newsletter status.
             notification (bool): Filter by notification status.
             meeting (bool): Filter by meeting status.
+            countsOnly (bool): Returns the counts without the lists of email IDs.
 
     Returns:
-        Response: JSON response containing the counts and lists of email IDs.
+        Response: JSON response containing the counts and lists of email IDs (without the "_ids" keys if countsOnly).
             {
                 "useless_count": int,
                 "useless_ids": list[int],
@@ -496,22 +677,7 @@ def get_email_counts(request: HttpRequest) -> Response:
         if or_filters_search:
             queryset = queryset.filter(or_filters_search)
 
-        # Fetch email querysets for each category
-        useless_emails = queryset.filter(priority=USELESS, read=False)
-        important_emails = queryset.filter(priority=IMPORTANT, read=False)
-        informative_emails = queryset.filter(priority=INFORMATIVE, read=False)
-        read_emails = queryset.filter(read=True, archive=False)
-
-        counts = {
-            "useless_count": useless_emails.count(),
-            "useless_ids": list(useless_emails.values_list("id", flat=True)),
-            "important_count": important_emails.count(),
-            "important_ids": list(important_emails.values_list("id", flat=True)),
-            "informative_count": informative_emails.count(),
-            "informative_ids": list(informative_emails.values_list("id", flat=True)),
-            "read_count": read_emails.count(),
-            "read_ids": list(read_emails.values_list("id", flat=True)),
-        }
+        counts = count_emails(queryset, with_ids=not parameters.get("countsOnly"))
 
         return Response(counts, status=status.HTTP_200_OK)
 
@@ -145,31 +145,46 @@ def auth_url_link_email(request: HttpRequest) -> HttpResponseRedirect:
         )
 
 
-def fetch_email_ids_since(service, email: str, start_date: datetime) -> list[str]:
+def fetch_email_ids_since(
+    service, email: str, start_date: datetime, raise_errors: bool = False
+) -> list[str]:
     """
-    Fetches email IDs from the user's Gmail inbox since the specified start date.
+    Fetches the IDs of all the emails received in the user's Gmail inbox since the specified start date,
+    following the pages of the listing.
 
     Args:
         service: The authenticated Gmail API service instance.
+        email (str): The email address of the user, whose sent emails are excluded.
         start_date (datetime): The date from which to fetch email IDs.
+        raise_errors (bool): Whether to re-raise the errors of the Gmail API instead of returning an empty list.
 
     Returns:
         list[str]: A list of email IDs retrieved from the inbox, or an empty list
                     if an error occurs.
     """
+    email_ids = []
+    page_token = None
     try:
-        results = (
-            service.users()
-            .messages()
-            .list(userId="me", q=f"after:{int(start_date.timestamp())} -from:{email}")
-            .execute()
-        )
-        messages = results.get("messages", [])
-        email_ids = [message["id"] for message in messages]
-
-        return email_ids
+        while True:
+            results = (
+                service.users()
+                .messages()
+                .list(
+                    userId="me",
+                    labelIds=["INBOX"],
+                    q=f"after:{int(start_date.timestamp())} -from:{email}",
+                    pageToken=page_token,
+                )
+                .execute()
+            )
+            email_ids.extend(message["id"] for message in results.get("messages", []))
+            page_token = results.get("nextPageToken")
+            if not page_token:
+                return email_ids
 
     except Exception as e:
+        if raise_errors:
+            raise
         LOGGER.error(f"Error fetching email IDs: {str(e)}")
         return []
 
@@ -7,9 +7,13 @@ import logging
 import uuid
 import re
 import os
+from datetime import timedelta
 from urllib.parse import unquote
 from django.contrib.auth.models import User
+from django.db.models import Max
+from django.utils import timezone
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from httpx import HTTPError
 from email.utils import parsedate_to_datetime
 from aomail.constants import (
@@ -19,9 +23,11 @@ from aomail.constants import (
 )
 from aomail.email_providers.google.authentication import (
     authenticate_service,
+    fetch_email_ids_since,
 )
 from aomail.utils import email_processing
-from aomail.models import SocialAPI
+from aomail.ingestion.timing import stage_timer
+from aomail.models import Email, GoogleListener, SocialAPI
 from bs4 import BeautifulSoup
 
 
@@ -349,6 +355,119 @@ def get_demo_list(user: User, email: str) -> list[str]:
     return [msg["id"] for msg in messages] if messages else []
 
 
+def get_new_email_ids(social_api: SocialAPI) -> dict | None:
+    """
+    Retrieves the IDs of the emails added to the INBOX since the last synchronization,
+    using the Gmail history API from the historyId stored on the GoogleListener.
+
+    No lock is held during the Gmail calls: the new historyId is only stored by `save_history_id`,
+    once the emails are stored, and only if no other synchronization stored one meanwhile.
+
+    Args:
+        social_api (SocialAPI): Contains user and email data necessary for authentication.
+
+    Returns:
+        dict | None: A dictionary containing:
+            - email_ids (list[str]): The new email IDs, in the order they were added.
+            - listener_id (int): The ID of the synchronized GoogleListener.
+            - start_history_id (str): The historyId the synchronization started from.
+            - history_id (str): The historyId to store once the emails are stored.
+        None if no historyId was stored yet: the current historyId is saved
+        as the starting point and the caller should only process the latest email.
+    """
+    service = authenticate_service(social_api.user, social_api.email, ["gmail"])[
+        "gmail"
+    ]
+
+    listener = (
+        GoogleListener.objects.filter(social_api=social_api)
+        .order_by("-last_modified")
+        .first()
+    )
+    if listener is None:
+        return None
+
+    if listener.history_id is None:
+        profile = service.users().getProfile(userId="me").execute()
+        GoogleListener.objects.filter(id=listener.id, history_id__isnull=True).update(
+            history_id=profile["historyId"]
+        )
+        return None
+
+    email_ids = []
+    seen_ids = set()
+    history_id = listener.history_id
+    page_token = None
+    try:
+        while True:
+            results: dict = (
+                service.users()
+                .history()
+                .list(
+                    userId="me",
+                    startHistoryId=listener.history_id,
+                    historyTypes=["messageAdded"],
+                    labelId="INBOX",
+                    pageToken=page_token,
+                )
+                .execute()
+            )
+            for record in results.get("history", []):
+                for added in record.get("messagesAdded", []):
+                    message = added["message"]
+                    if message["id"] not in seen_ids and "INBOX" in message.get(
+                        "labelIds", ["INBOX"]
+                    ):
+                        seen_ids.add(message["id"])
+                        email_ids.append(message["id"])
+
+            history_id = results.get("historyId", history_id)
+            page_token = results.get("nextPageToken")
+            if not page_token:
+                break
+
+    except HttpError as e:
+        if e.resp.status != 404:
+            raise
+        # the stored historyId is too old: fall back to a date-based listing of the INBOX
+        LOGGER.warning(
+            f"History ID expired for social API ID: {social_api.id}, falling back to a full synchronization"
+        )
+        # read before the listing so that the emails received meanwhile are listed again next time
+        history_id = service.users().getProfile(userId="me").execute()["historyId"]
+        last_email_date = Email.objects.filter(social_api=social_api).aggregate(
+            Max("date")
+        )["date__max"]
+        start_date = last_email_date or timezone.now() - timedelta(days=1)
+        email_ids = fetch_email_ids_since(
+            service, social_api.email, start_date, raise_errors=True
+        )
+
+    return {
+        "email_ids": email_ids,
+        "listener_id": listener.id,
+        "start_history_id": listener.history_id,
+        "history_id": history_id,
+    }
+
+
+def save_history_id(sync_state: dict) -> bool:
+    """
+    Stores the historyId reached by `get_new_email_ids` once its emails are stored.
+
+    Args:
+        sync_state (dict): The synchronization state returned by `get_new_email_ids`.
+
+    Returns:
+        bool: False if another synchronization stored a historyId meanwhile, in which case it is kept.
+    """
+    return bool(
+        GoogleListener.objects.filter(
+            id=sync_state["listener_id"], history_id=sync_state["start_history_id"]
+        ).update(history_id=sync_state["history_id"])
+    )
+
+
 def get_mail_to_db(social_api: SocialAPI, email_id: str = None) -> dict:
     """
     Retrieves detailed email information from the Gmail API, processing it for storage in the database.
@@ -517,24 +636,25 @@ def get_mail_to_db(social_api: SocialAPI, email_id: str = None) -> dict:
     if email_detect_html is False:
         email_html = email_txt_html
 
-    # Replace CID references in HTML with local paths
-    soup = BeautifulSoup(email_html, "html.parser")
-    for img in soup.find_all("img"):
-        src = img.get("src", "")
-        if src.startswith("cid:"):
-            cid_ref = src[4:].strip().strip("<>").strip()
-            cid_ref = unquote(cid_ref).lower()
-            LOGGER.info(f"Found CID in HTML: '{cid_ref}'")
-            if cid_ref in cid_to_filename:
-                img["src"] = (
-                    f"{BASE_URL_API}pictures/{cid_to_filename[cid_ref]}?v={uuid.uuid4()}"
-                )
-            else:
-                LOGGER.error(f"CID '{cid_ref}' not found in mapping")
+    with stage_timer("parse"):
+        # Replace CID references in HTML with local paths
+        soup = BeautifulSoup(email_html, "html.parser")
+        for img in soup.find_all("img"):
+            src = img.get("src", "")
+            if src.startswith("cid:"):
+                cid_ref = src[4:].strip().strip("<>").strip()
+                cid_ref = unquote(cid_ref).lower()
+                LOGGER.info(f"Found CID in HTML: '{cid_ref}'")
+                if cid_ref in cid_to_filename:
+                    img["src"] = (
+                        f"{BASE_URL_API}pictures/{cid_to_filename[cid_ref]}?v={uuid.uuid4()}"
+                    )
+                else:
+                    LOGGER.error(f"CID '{cid_ref}' not found in mapping")
 
-    cleaned_html = email_processing.html_clear(str(soup))
-    preprocessed_data = email_processing.preprocess_email(cleaned_html)
-    safe_html = soup.prettify()
+        cleaned_html = email_processing.html_clear(str(soup))
+        preprocessed_data = email_processing.preprocess_email(cleaned_html)
+        safe_html = soup.prettify()
 
     return {
         "subject": subject,
@@ -7,7 +7,6 @@ Endpoints:
 
 import base64
 import logging
-import threading
 import json
 from rest_framework import status
 from django.utils import timezone
@@ -23,7 +22,7 @@ from aomail.constants import (
 )
 from aomail.email_providers.google.authentication import authenticate_service
 from aomail.models import GoogleListener, SocialAPI, Subscription
-from aomail.email_providers.utils import email_to_db
+from aomail.ingestion.queue import enqueue_email
 from aomail.email_providers.google import authentication as auth_google
 
 
@@ -82,7 +81,7 @@ def receive_mail_notifications(request: HttpRequest) -> Response:
                 )
                 unsubscribe_from_email_notifications(social_api.user, email)
             else:
-                threading.Thread(target=email_to_db, args=(social_api,)).start()
+                enqueue_email(social_api)
 
         except SocialAPI.DoesNotExist:
             pass
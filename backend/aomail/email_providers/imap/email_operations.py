@@ -8,6 +8,7 @@ from imap_tools import AND, Header, OR
 from aomail.models import SocialAPI
 from aomail.email_providers.imap.authentication import connect_to_imap
 from aomail.utils import email_processing
+from aomail.ingestion.timing import stage_timer
 from django.contrib.auth.models import User
 from aomail.email_providers.imap.utils import get_imap_email_id
 
@@ -290,8 +291,9 @@ def get_mail_to_db(social_api: SocialAPI, email_id: str) -> dict:
 
     email = list(emails)[0]
 
-    clear_html = email_processing.html_clear(email.html)
-    preprocessed_data = email_processing.preprocess_email(clear_html)
+    with stage_timer("parse"):
+        clear_html = email_processing.html_clear(email.html)
+        preprocessed_data = email_processing.preprocess_email(clear_html)
 
     return {
         "subject": email.subject,
@@ -364,7 +364,7 @@ def refresh_access_token(social_api: SocialAPI) -> str | None:
     if "access_token" in response_data:
         access_token = response_data["access_token"]
         social_api.access_token = access_token
-        social_api.save()
+        social_api.save(update_fields=["access_token"])
         return access_token
     else:
         error = response_data.get("error_description", response.reason)
@@ -13,6 +13,7 @@ from aomail.email_providers.microsoft.authentication import (
     refresh_access_token,
 )
 from aomail.utils import email_processing
+from aomail.ingestion.timing import stage_timer
 from aomail.constants import GRAPH_URL
 from aomail.models import Attachment, Email, SocialAPI
 
@@ -429,6 +430,91 @@ def get_demo_list(user: User, email: str) -> list[str]:
     return [msg["id"] for msg in messages] if messages else []
 
 
+def get_new_email_ids(social_api: SocialAPI, start_date: datetime.datetime) -> dict:
+    """
+    Retrieves the IDs of the inbox emails created or changed since the last synchronization,
+    using a Microsoft Graph delta query whose delta link is stored on the SocialAPI.
+
+    No lock is held during the Graph calls: the new delta link is only stored by `save_delta_link`,
+    once the emails are stored, and only if no other synchronization stored one meanwhile.
+
+    Args:
+        social_api (SocialAPI): SocialAPI object containing authentication information.
+        start_date (datetime.datetime): Date from which emails are listed when no delta link is stored yet.
+
+    Returns:
+        dict: A dictionary containing:
+            - email_ids (list[str]): The IDs of the new or changed emails, removed emails excluded.
+            - start_delta_link (str | None): The delta link the synchronization started from.
+            - delta_link (str | None): The delta link to store once the emails are stored.
+    """
+    access_token = refresh_access_token(social_api)
+    headers = get_headers(access_token)
+    headers["Prefer"] = "odata.maxpagesize=100"
+
+    start_delta_link = SocialAPI.objects.values_list("delta_link", flat=True).get(
+        id=social_api.id
+    )
+    start_date_str = start_date.strftime("%Y-%m-%dT%H:%M:%SZ")
+    initial_url = (
+        f"{GRAPH_URL}me/mailFolders/inbox/messages/delta"
+        f"?$select=id&$filter=receivedDateTime ge {start_date_str}"
+    )
+
+    email_ids = []
+    seen_ids = set()
+    delta_link = start_delta_link
+    url = start_delta_link or initial_url
+    while url:
+        response = requests.get(url, headers=headers)
+
+        if response.status_code == 410 and url != initial_url:
+            # the sync state expired: restart from the start date
+            LOGGER.warning(
+                f"Delta link expired for social API ID: {social_api.id}, restarting synchronization"
+            )
+            email_ids, seen_ids, url = [], set(), initial_url
+            continue
+        if response.status_code != 200:
+            raise Exception(
+                f"Failed to fetch delta: {response.status_code}, {response.text}"
+            )
+
+        data: dict = response.json()
+        for message in data.get("value", []):
+            if "@removed" not in message and message["id"] not in seen_ids:
+                seen_ids.add(message["id"])
+                email_ids.append(message["id"])
+
+        url = data.get("@odata.nextLink")
+        delta_link = data.get("@odata.deltaLink", delta_link)
+
+    return {
+        "email_ids": email_ids,
+        "start_delta_link": start_delta_link,
+        "delta_link": delta_link,
+    }
+
+
+def save_delta_link(social_api: SocialAPI, sync_state: dict) -> bool:
+    """
+    Stores the delta link reached by `get_new_email_ids` once its emails are stored.
+
+    Args:
+        social_api (SocialAPI): The synchronized SocialAPI.
+        sync_state (dict): The synchronization state returned by `get_new_email_ids`.
+
+    Returns:
+        bool: False if another synchronization stored a delta link meanwhile, in which case it is kept.
+    """
+    updated = SocialAPI.objects.filter(
+        id=social_api.id, delta_link=sync_state["start_delta_link"]
+    ).update(delta_link=sync_state["delta_link"])
+    if updated:
+        social_api.delta_link = sync_state["delta_link"]
+    return bool(updated)
+
+
 def fetch_attachments(social_api: SocialAPI, email_id: str) -> list:
     """
     Fetch attachments for a given email by ID.
@@ -520,9 +606,10 @@ def get_mail_to_db(social_api: SocialAPI, email_id: str) -> dict:
     attachments = fetch_attachments(social_api, email_id) if has_attachments else []
 
     # Process the email body
-    decoded_data = parse_message_body(message_data)
-    cleaned_html = email_processing.html_clear(decoded_data)
-    preprocessed_data = email_processing.preprocess_email(cleaned_html)
+    with stage_timer("parse"):
+        decoded_data = parse_message_body(message_data)
+        cleaned_html = email_processing.html_clear(decoded_data)
+        preprocessed_data = email_processing.preprocess_email(cleaned_html)
 
     return {
         "subject": subject,
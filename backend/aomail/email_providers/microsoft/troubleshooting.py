@@ -8,7 +8,6 @@ Endpoints:
 
 import json
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from django.http import HttpRequest
 from rest_framework.response import Response
 from rest_framework import status
@@ -18,11 +17,12 @@ from aomail.constants import (
     ALLOWED_PLANS,
 )
 from aomail.models import Email, SocialAPI, Subscription
-from aomail.email_providers.microsoft.authentication import (
-    fetch_email_ids_since,
-    refresh_access_token,
+from aomail.email_providers.microsoft.authentication import refresh_access_token
+from aomail.email_providers.microsoft.email_operations import (
+    get_new_email_ids,
+    save_delta_link,
 )
-from aomail.email_providers.utils import email_to_db
+from aomail.email_providers.utils import emails_to_db
 from aomail.email_providers.microsoft.webhook import (
     check_and_resubscribe_to_missing_resources,
 )
@@ -62,12 +62,14 @@ def check_connectivity(request: HttpRequest) -> Response:
             status=status.HTTP_200_OK,
         )
 
-    email_ids = fetch_email_ids_since(access_token, start_date)
-
-    nb_missed_emails = 0
-    for email_id in email_ids:
-        if not Email.objects.filter(user=user, provider_id=email_id).exists():
-            nb_missed_emails += 1
+    # the delta is not saved: the missed emails are processed by `synchronize`
+    email_ids = get_new_email_ids(social_api, start_date)["email_ids"]
+    stored_ids = set(
+        Email.objects.filter(user=user, provider_id__in=email_ids).values_list(
+            "provider_id", flat=True
+        )
+    )
+    nb_missed_emails = len(set(email_ids) - stored_ids)
 
     return Response(
         {"isTokenValid": True, "nbMissedEmails": nb_missed_emails},
@@ -97,31 +99,15 @@ def synchronize(request: HttpRequest) -> Response:
     start_date = subscription.created_at
     social_api = SocialAPI.objects.get(user=user, email=email)
 
-    access_token = refresh_access_token(social_api)
-    email_ids = fetch_email_ids_since(access_token, start_date)
+    sync_state = get_new_email_ids(social_api, start_date)
+    email_ids = sync_state["email_ids"]
 
     LOGGER.info(
         f"Starting to process {len(email_ids)} emails for user ID: {user.id} and social API ID: {social_api.id}"
     )
 
-    nb_processed_emails = 0
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        future_to_email_id = {}
-
-        for email_id in email_ids:
-            if Email.objects.filter(provider_id=email_id).exists():
-                continue
-
-            future = executor.submit(email_to_db, social_api, email_id)
-            future_to_email_id[future] = email_id
-
-        for future in as_completed(future_to_email_id):
-            email_id = future_to_email_id[future]
-            try:
-                if future.result():  # Increment count if email_to_db returns True
-                    nb_processed_emails += 1
-            except Exception as e:
-                LOGGER.error(f"Error processing email ID {email_id}: {str(e)}")
+    nb_processed_emails = emails_to_db(social_api, email_ids)
+    save_delta_link(social_api, sync_state)
 
     LOGGER.info(
         f"All emails have been processed. Processed: {nb_processed_emails}, Missed: {nb_missed_emails}"
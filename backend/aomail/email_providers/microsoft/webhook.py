@@ -10,7 +10,6 @@ Endpoints:
 import datetime
 import json
 import logging
-import threading
 import requests
 from django.contrib.auth.models import User
 from django.http import HttpRequest, HttpResponse, JsonResponse
@@ -37,7 +36,7 @@ from aomail.models import (
     SocialAPI,
     Subscription,
 )
-from aomail.email_providers.utils import email_to_db
+from aomail.ingestion.queue import enqueue_email
 from aomail.email_providers.microsoft import webhook as webhook_microsoft
 
 
@@ -425,6 +424,14 @@ class MicrosoftSubscriptionNotification(View):
                         microsoft_listener.first().user,
                         microsoft_listener.first().email,
                     )
+                    if lifecycle_event == "missed":
+                        # reconcile the notifications lost while the subscription was down
+                        enqueue_email(
+                            get_social_api(
+                                microsoft_listener.first().user,
+                                microsoft_listener.first().email,
+                            )
+                        )
 
             return JsonResponse(
                 {"status": "Notification received"}, status=status.HTTP_202_ACCEPTED
@@ -503,9 +510,8 @@ class MicrosoftEmailNotification(View):
                         microsoft_listener.first().user,
                         microsoft_listener.first().email,
                     )
-                    threading.Thread(
-                        target=email_to_db, args=(social_api, email_id)
-                    ).start()
+                    # the delta query also picks up emails whose notification was lost
+                    enqueue_email(social_api)
 
                 return JsonResponse(
                     {"status": "Notification received"}, status=status.HTTP_202_ACCEPTED
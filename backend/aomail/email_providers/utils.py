@@ -3,11 +3,14 @@ Contains common functions for email service provider APIs.
 
 Features:
 - ✅ email_to_db: Save email notifications from various email service APIs to the database.
+- ✅ emails_to_db: Backfill many emails, categorized in batches with a single LLM request.
+- ✅ save_emails_to_db: Save a batch of processed emails in a single transaction.
 """
 
 import logging
-from concurrent.futures import ThreadPoolExecutor
-from django.db import transaction
+from collections import Counter
+from django.db import IntegrityError, transaction
+from django.db.models import F
 from django.contrib.auth.models import User
 from aomail.ai_providers import llm_functions
 from aomail.constants import (
@@ -22,6 +25,8 @@ from aomail.constants import (
     HIGHLY_RELEVANT,
     IMPORTANT,
     INFORMATIVE,
+    INGESTION_BACKFILL_BATCH_SIZE,
+    LLM_COMBINED_ENRICHMENT,
     MICROSOFT,
     MIGHT_REQUIRE_ANSWER,
     NO_ANSWER_REQUIRED,
@@ -56,7 +61,21 @@ from aomail.email_providers.google import (
 from aomail.email_providers.imap import (
     email_operations as email_operations_imap,
 )
-from aomail.ai_providers.utils import update_tokens_stats
+from aomail.ai_providers.utils import split_enriched_email, update_tokens_stats
+from aomail.ingestion.enrichment_cache import (
+    get_cached,
+    get_enrichment_key,
+    get_or_compute,
+    set_cached,
+)
+from aomail.ingestion.budget import prepare_email_body
+from aomail.ingestion.executor import (
+    get_call_limit,
+    get_enrichment_pool,
+    get_executor,
+    get_provider,
+)
+from aomail.ingestion.timing import stage_context, stage_timer
 from aomail.controllers.labels import is_shipping_label, process_label
 from aomail.utils.security import encrypt_text
 from aomail.email_providers.google import labels as google_labels
@@ -78,93 +97,216 @@ from aomail.ai_providers.prompts import CATEGORIZE_AND_SUMMARIZE_EMAIL_PROMPT
 LOGGER = logging.getLogger(__name__)
 
 
-def email_to_db(social_api: SocialAPI, email_id: str = None) -> bool:
+def email_to_db(
+    social_api: SocialAPI, email_id: str = None, raise_errors: bool = False
+) -> bool:
     """
     Save email notifications from various email service APIs to the database.
 
+    The email goes through three phases: it is fetched from the provider, enriched by the AI
+    outside of any database transaction, then persisted in a short transaction. The LLM latency
+    therefore never holds a database connection inside an open transaction.
+
     Args:
         social_api (SocialAPI): The SocialAPI instance associated with the user.
         email_id (Optional[str]): The ID of the email notification (if applicable).
+        raise_errors (bool): Re-raise unexpected errors instead of returning False, so the caller can retry.
 
     Returns:
         bool: True if the email was successfully saved, False otherwise.
     """
     user = social_api.user
     api_type = social_api.type_api
+    email_data = {"email_id": email_id}
 
     try:
-        with transaction.atomic():
-            subscription = Subscription.objects.get(user=user)
+        subscription = Subscription.objects.get(user=user)
 
-            if subscription.is_block:
-                LOGGER.info(f"Skipping processing for blocked user ID: {user.id}.")
-                return False
-
-            email_data = get_email_data(social_api, email_id)
-            if not email_data:
-                return False
+        if subscription.is_block:
+            LOGGER.info(f"Skipping processing for blocked user ID: {user.id}.")
+            return False
 
-            if (
-                Email.objects.select_for_update(skip_locked=True)
-                .filter(provider_id=email_data["email_id"], user=user)
-                .exists()
-            ):
-                LOGGER.info(
-                    f"Email ID: {email_data['email_id']} already exists for user ID: {user.id}. Skipping."
-                )
-                return False
+        # Phase 1: fetch
+        email_data = get_email_data(social_api, email_id)
+        if not email_data:
+            return False
 
+        if Email.objects.filter(provider_id=email_data["email_id"], user=user).exists():
             LOGGER.info(
-                f"Saving email to database for user ID: {user.id} using {api_type.capitalize()} API"
+                f"Email ID: {email_data['email_id']} already exists for user ID: {user.id}. Skipping."
             )
+            return False
 
-            if delete_email_rule(user, email_data):
-                delete_email(social_api, email_data, user)
-                return False
-
-            processed_email = process_email(email_data, user, social_api)
+        LOGGER.info(
+            f"Saving email to database for user ID: {user.id} using {api_type.capitalize()} API"
+        )
 
-            ai_output: dict = processed_email["email_processed"].copy()
-            ai_output.pop("summary")
+        if delete_email_rule(user, email_data):
+            delete_email(social_api, email_data, user)
+            return False
 
-            if social_api.type_api == GOOGLE and not social_api.imap_config:
-                google_labels.replicate_labels(
-                    social_api, ai_output, email_data["email_id"]
-                )
-            elif social_api.type_api == MICROSOFT and not social_api.imap_config:
-                microsoft_labels.replicate_labels(
-                    social_api, ai_output, email_data["email_id"]
-                )
+        # Phase 2: AI enrichment, without transaction
+        processed_email = process_email(email_data, user, social_api)
 
+        # Phase 3: persistence, idempotent on provider_id
+        with stage_timer("persist", email_provider=get_provider(social_api)):
             email_entry = save_email_to_db(processed_email, user, social_api)
-
-            if is_shipping_label(email_data["subject"]):
-                process_label(
-                    email_data["from_info"][1],
-                    email_data["subject"],
-                    email_data["safe_html"],
-                    email_entry,
-                )
-
-            apply_rules(processed_email, user, email_entry)
-
+        if email_entry is None:
             LOGGER.info(
-                f"Email ID: {email_data['email_id']} saved successfully for social_api email: {social_api.email}"
+                f"Email ID: {email_data['email_id']} already saved by another process for user ID: {user.id}. Skipping."
             )
-            return True
+            return False
+
+        post_process_email(processed_email, social_api, email_entry)
+
+        LOGGER.info(
+            f"Email ID: {email_data['email_id']} saved successfully for social_api email: {social_api.email}"
+        )
+        return True
 
     except Exception as e:
-        if "duplicate key value violates unique constraint" in str(e):
-            LOGGER.info(
-                f"Email ID already saved by another process for user ID: {user.id}. Skipping."
-            )
-            return False
         LOGGER.error(
             f"Error saving email ID: {email_data['email_id']} for user ID: {user.id}: {str(e)}"
         )
+        if raise_errors:
+            raise
         return False
 
 
+def post_process_email(
+    processed_email: dict, social_api: SocialAPI, email_entry: Email
+):
+    """
+    Run the actions following the storage of an email: label replication on the provider,
+    shipping label detection and user rules.
+
+    Args:
+        processed_email (dict): A dictionary containing the processed email data.
+        social_api (SocialAPI): The SocialAPI instance associated with the user.
+        email_entry (Email): The saved Email object.
+    """
+    email_data = processed_email["email_data"]
+    ai_output: dict = processed_email["email_processed"].copy()
+    ai_output.pop("summary")
+    email_provider = get_provider(social_api)
+
+    with get_call_limit().slot(), stage_timer("labels", email_provider=email_provider):
+        if social_api.type_api == GOOGLE and not social_api.imap_config:
+            google_labels.replicate_labels(
+                social_api, ai_output, email_data["email_id"]
+            )
+        elif social_api.type_api == MICROSOFT and not social_api.imap_config:
+            microsoft_labels.replicate_labels(
+                social_api, ai_output, email_data["email_id"]
+            )
+
+        if is_shipping_label(email_data["subject"]):
+            process_label(
+                email_data["from_info"][1],
+                email_data["subject"],
+                email_data["safe_html"],
+                email_entry,
+            )
+
+    with stage_timer("rules", email_provider=email_provider):
+        apply_rules(processed_email, social_api.user, email_entry)
+
+
+def emails_to_db(
+    social_api: SocialAPI,
+    email_ids: list[str],
+    batch_size: int = INGESTION_BACKFILL_BATCH_SIZE,
+) -> int:
+    """
+    Backfill mode of `email_to_db`: save many emails of a mailbox to the database.
+
+    Emails are fetched concurrently on the shared ingestion executor, categorized `batch_size`
+    at a time with a single LLM request per batch, and each batch is persisted in a single
+    transaction. Must not be called from a task of the shared executor.
+
+    Args:
+        social_api (SocialAPI): The SocialAPI instance associated with the user.
+        email_ids (list[str]): The IDs of the emails to save.
+        batch_size (int): Number of emails categorized in a single LLM request.
+
+    Returns:
+        int: The number of emails saved.
+    """
+    user = social_api.user
+    if Subscription.objects.get(user=user).is_block:
+        LOGGER.info(f"Skipping processing for blocked user ID: {user.id}.")
+        return 0
+
+    stored_ids = set(
+        Email.objects.filter(provider_id__in=email_ids).values_list(
+            "provider_id", flat=True
+        )
+    )
+    email_ids = [
+        email_id for email_id in dict.fromkeys(email_ids) if email_id not in stored_ids
+    ]
+    LOGGER.info(
+        f"Backfilling {len(email_ids)} emails for user ID: {user.id} and social API ID: {social_api.id}"
+    )
+
+    def fetch(email_id: str) -> dict | None:
+        try:
+            return get_email_data(social_api, email_id)
+        except Exception as e:
+            LOGGER.error(f"Error fetching email ID {email_id}: {str(e)}")
+            return None
+
+    executor = get_executor()
+    provider = get_provider(social_api)
+    nb_saved_emails = 0
+    for start in range(0, len(email_ids), batch_size):
+        fetch_futures = [
+            executor.submit(user.id, provider, fetch, email_id)
+            for email_id in email_ids[start : start + batch_size]
+        ]
+        emails_data = []
+        for fetch_future in fetch_futures:
+            email_data = fetch_future.result()
+            if not email_data:
+                continue
+            if delete_email_rule(user, email_data):
+                delete_email(social_api, email_data, user)
+                continue
+            emails_data.append(email_data)
+
+        try:
+            processed_emails = process_emails_batch(emails_data, user, social_api)
+            with stage_timer("persist_batch", email_provider=provider):
+                email_entries = save_emails_to_db(processed_emails, user, social_api)
+        except Exception as e:
+            LOGGER.error(
+                f"Error saving a batch of {len(emails_data)} emails for user ID: {user.id}: {str(e)}"
+            )
+            continue
+
+        processed_by_id = {
+            processed_email["email_data"]["email_id"]: processed_email
+            for processed_email in processed_emails
+        }
+        for email_entry in email_entries:
+            try:
+                post_process_email(
+                    processed_by_id[email_entry.provider_id],
+                    social_api,
+                    email_entry,
+                )
+            except Exception as e:
+                LOGGER.error(
+                    f"Error post-processing email ID {email_entry.provider_id}: {str(e)}"
+                )
+        nb_saved_emails += len(email_entries)
+
+    LOGGER.info(
+        f"Backfill saved {nb_saved_emails} emails for social API ID: {social_api.id}"
+    )
+    return nb_saved_emails
+
+
 def delete_email(social_api: SocialAPI, email_data: dict, user: User):
     if social_api.type_api == GOOGLE and not social_api.imap_config:
         result = email_operations_google.delete_email(
@@ -369,14 +511,17 @@ def get_email_data(social_api: SocialAPI, email_id: str = None) -> dict:
     Returns:
         dict: A dictionary containing the fetched email data.
     """
-    if social_api.type_api == MICROSOFT and not social_api.imap_config:
-        return email_operations_microsoft.get_mail_to_db(social_api, email_id)
-    elif social_api.type_api == GOOGLE and not social_api.imap_config:
-        return email_operations_google.get_mail_to_db(social_api, email_id)
-    elif social_api.imap_config:
-        return email_operations_imap.get_mail_to_db(social_api, email_id)
-    else:
-        raise ValueError(f"Unsupported API type: {social_api.type_api}")
+    with get_call_limit().slot(), stage_context(
+        email_provider=get_provider(social_api)
+    ), stage_timer("fetch"):
+        if social_api.type_api == MICROSOFT and not social_api.imap_config:
+            return email_operations_microsoft.get_mail_to_db(social_api, email_id)
+        elif social_api.type_api == GOOGLE and not social_api.imap_config:
+            return email_operations_google.get_mail_to_db(social_api, email_id)
+        elif social_api.imap_config:
+            return email_operations_imap.get_mail_to_db(social_api, email_id)
+        else:
+            raise ValueError(f"Unsupported API type: {social_api.type_api}")
 
 
 def delete_email_rule(user: User, email_data: dict) -> bool:
@@ -414,6 +559,9 @@ def process_email(email_data: dict, user: User, social_api: SocialAPI) -> dict:
     """
     Process the email data.
 
+    With LLM_COMBINED_ENRICHMENT, the categorization and the keypoints are requested in a single
+    LLM call, falling back to two calls if it fails or the user has a custom categorization prompt.
+
     Args:
         email_data (dict): A dictionary containing the email data to be processed.
         user (User): The user object associated with the email.
@@ -436,43 +584,135 @@ def process_email(email_data: dict, user: User, social_api: SocialAPI) -> dict:
         from_email = email_data["from_info"][1]
         preference = Preference.objects.get(user=user)
 
-        def get_summary():
-            if email_data["is_reply"]:
-                return search.summarize_conversation(
-                    email_data["subject"], email_content, user_description, language
-                )
-            else:
-                return search.summarize_email(
-                    email_data["subject"], email_content, user_description, language
-                )
+        stage_fields = {
+            "email_provider": get_provider(social_api),
+            "llm_provider": preference.llm_provider,
+            "llm_model": preference.llm_model,
+        }
 
+        @stage_timer("llm_summarize", **stage_fields)
+        def get_summary():
+            with get_call_limit().slot():
+                if email_data["is_reply"]:
+                    return search.summarize_conversation(
+                        email_data["subject"],
+                        prepare_email_body(
+                            email_content, "summarize_conversation", keep_thread=True
+                        ),
+                        user_description,
+                        language,
+                    )
+                else:
+                    return search.summarize_email(
+                        email_data["subject"],
+                        prepare_email_body(email_content, "summarize_email"),
+                        user_description,
+                        language,
+                    )
+
+        @stage_timer("llm_categorize", **stage_fields)
         def get_email_processed():
-            return llm_functions.categorize_and_summarize_email(
-                (
-                    preference.categorize_and_summarize_email_prompt
-                    if preference.categorize_and_summarize_email_prompt
-                    else CATEGORIZE_AND_SUMMARIZE_EMAIL_PROMPT
+            return get_or_compute(
+                get_categorization_key(
+                    email_data, category_dict, user_description, preference
                 ),
-                email_data["subject"],
-                email_data["preprocessed_data"],
-                category_dict,
-                user_description,
-                from_email,
-                preference.important_guidelines,
-                preference.informative_guidelines,
-                preference.useless_guidelines,
                 preference.llm_provider,
-                preference.llm_model,
+                lambda: get_call_limit().run(
+                    llm_functions.categorize_and_summarize_email,
+                    (
+                        preference.categorize_and_summarize_email_prompt
+                        if preference.categorize_and_summarize_email_prompt
+                        else CATEGORIZE_AND_SUMMARIZE_EMAIL_PROMPT
+                    ),
+                    email_data["subject"],
+                    prepare_email_body(
+                        email_data["preprocessed_data"],
+                        "categorize_and_summarize_email",
+                    ),
+                    category_dict,
+                    user_description,
+                    from_email,
+                    preference.important_guidelines,
+                    preference.informative_guidelines,
+                    preference.useless_guidelines,
+                    preference.llm_provider,
+                    preference.llm_model,
+                    allow_fallback=True,
+                ),
             )
 
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            summary_future = executor.submit(get_summary)
-            email_processed_future = executor.submit(get_email_processed)
+        @stage_timer("llm_enrich", **stage_fields)
+        def get_enrichment():
+            key = get_enrichment_key(
+                "enrich",
+                email_content,
+                subject=email_data["subject"],
+                sender=from_email,
+                is_reply=email_data["is_reply"],
+                category_dict=category_dict,
+                categories=search.categories,
+                user_description=user_description,
+                language=language,
+                important_guidelines=preference.important_guidelines,
+                informative_guidelines=preference.informative_guidelines,
+                useless_guidelines=preference.useless_guidelines,
+                llm_provider=preference.llm_provider,
+                llm_model=preference.llm_model,
+            )
 
+            def enrich() -> dict:
+                result = get_call_limit().run(
+                    llm_functions.enrich_email,
+                    email_data["subject"],
+                    prepare_email_body(
+                        email_content,
+                        "enrich_email",
+                        keep_thread=email_data["is_reply"],
+                    ),
+                    from_email,
+                    category_dict,
+                    user_description,
+                    preference.important_guidelines,
+                    preference.informative_guidelines,
+                    preference.useless_guidelines,
+                    search.categories,
+                    language,
+                    email_data["is_reply"],
+                    preference.llm_provider,
+                    preference.llm_model,
+                    allow_fallback=True,
+                )
+                try:
+                    split_enriched_email(result)
+                except Exception:
+                    # an unparsable result is not cached, but its tokens were used
+                    update_tokens_stats(user, result)
+                    raise
+                return result
+
+            return get_or_compute(key, preference.llm_provider, enrich)
+
+        email_processed = None
+        if (
+            LLM_COMBINED_ENRICHMENT
+            and not preference.categorize_and_summarize_email_prompt
+        ):
+            try:
+                email_processed, summary = split_enriched_email(get_enrichment())
+            except Exception as e:
+                LOGGER.error(
+                    f"Combined enrichment failed for user ID: {user.id}, using two requests: {str(e)}"
+                )
+
+        if email_processed is None:
+            enrichment_pool = get_enrichment_pool()
+            summary_future = enrichment_pool.submit(get_summary)
+            email_processed_future = enrichment_pool.submit(get_email_processed)
             summary = summary_future.result()
             email_processed = email_processed_future.result()
-            summary = update_tokens_stats(user, summary)
-            email_processed = update_tokens_stats(user, email_processed)
+
+        summary = update_tokens_stats(user, summary)
+        email_processed = update_tokens_stats(user, email_processed)
 
         if email_processed["topic"] not in category_dict:
             email_processed["topic"] = DEFAULT_CATEGORY
@@ -504,8 +744,210 @@ def process_email(email_data: dict, user: User, social_api: SocialAPI) -> dict:
         )
 
 
+def process_emails_batch(
+    emails_data: list[dict],
+    user: User,
+    social_api: SocialAPI,
+) -> list[dict]:
+    """
+    Process several emails, categorizing them with a single LLM request.
+
+    Emails missing from the LLM response, or all emails if the request fails or the user
+    has a custom categorization prompt, are processed one by one with `process_email`.
+
+    Args:
+        emails_data (list[dict]): The email data to be processed.
+        user (User): The user object associated with the emails.
+        social_api (SocialAPI): An object representing the social API being used.
+
+    Returns:
+        list[dict]: The processed emails, in the format returned by `process_email`.
+    """
+    if not emails_data:
+        return []
+
+    executor = get_executor()
+    provider = get_provider(social_api)
+    preference = Preference.objects.get(user=user)
+    if preference.categorize_and_summarize_email_prompt:
+        futures = [
+            executor.submit(
+                user.id, provider, process_email, email_data, user, social_api
+            )
+            for email_data in emails_data
+        ]
+        processed_emails = [future.result() for future in futures]
+        return [
+            processed_email for processed_email in processed_emails if processed_email
+        ]
+
+    user_description = social_api.user_description or ""
+    category_dict = email_processing.get_db_categories(user)
+    search = Search(user.id)
+    stage_fields = {
+        "email_provider": provider,
+        "llm_provider": preference.llm_provider,
+        "llm_model": preference.llm_model,
+    }
+
+    @stage_timer("llm_summarize", **stage_fields)
+    def get_summary(email_data: dict) -> dict:
+        email_content = email_processing.preprocess_email(
+            email_data["preprocessed_data"]
+        )
+        with get_call_limit().slot():
+            if email_data["is_reply"]:
+                return search.summarize_conversation(
+                    email_data["subject"],
+                    prepare_email_body(
+                        email_content, "summarize_conversation", keep_thread=True
+                    ),
+                    user_description,
+                    preference.language,
+                )
+            else:
+                return search.summarize_email(
+                    email_data["subject"],
+                    prepare_email_body(email_content, "summarize_email"),
+                    user_description,
+                    preference.language,
+                )
+
+    summary_futures = [
+        executor.submit(user.id, provider, get_summary, email_data)
+        for email_data in emails_data
+    ]
+
+    keys = [
+        get_categorization_key(email_data, category_dict, user_description, preference)
+        for email_data in emails_data
+    ]
+    emails_processed = {}
+    for index, key in enumerate(keys):
+        cached = get_cached(key, preference.llm_provider)
+        if cached is not None:
+            cached.pop("tokens_input")
+            cached.pop("tokens_output")
+            emails_processed[index] = cached
+    uncached = [
+        index for index in range(len(emails_data)) if index not in emails_processed
+    ]
+
+    try:
+        if uncached:
+            with stage_timer(
+                "llm_categorize_batch", **stage_fields
+            ), get_call_limit().slot():
+                result = llm_functions.categorize_and_summarize_emails(
+                    [
+                        {
+                            "sender": emails_data[index]["from_info"][1],
+                            "subject": emails_data[index]["subject"],
+                            "decoded_data": prepare_email_body(
+                                emails_data[index]["preprocessed_data"],
+                                "categorize_and_summarize_emails",
+                            ),
+                        }
+                        for index in uncached
+                    ],
+                    category_dict,
+                    user_description,
+                    preference.important_guidelines,
+                    preference.informative_guidelines,
+                    preference.useless_guidelines,
+                    preference.llm_provider,
+                    preference.llm_model,
+                    allow_fallback=True,
+                )
+            tokens_per_email = {
+                "tokens_input": result["tokens_input"] // len(uncached),
+                "tokens_output": result["tokens_output"] // len(uncached),
+                "tokens_cache_read": result.get("tokens_cache_read", 0)
+                // len(uncached),
+            }
+            result = update_tokens_stats(user, result)
+            for email_processed in result["emails"]:
+                position = int(email_processed.pop("index"))
+                if 0 <= position < len(uncached):
+                    index = uncached[position]
+                    emails_processed[index] = email_processed
+                    set_cached(keys[index], {**email_processed, **tokens_per_email})
+    except Exception as e:
+        LOGGER.error(
+            f"Batch categorization failed for user ID: {user.id}, processing emails one by one: {str(e)}"
+        )
+
+    processed_emails = []
+    for index, (email_data, summary_future) in enumerate(
+        zip(emails_data, summary_futures)
+    ):
+        email_processed = emails_processed.get(index)
+        try:
+            summary = update_tokens_stats(user, summary_future.result())
+        except Exception as e:
+            LOGGER.error(
+                f"Failed to summarize email ID {email_data['email_id']}: {str(e)}"
+            )
+            email_processed = None
+
+        if email_processed is None:
+            processed_email = process_email(email_data, user, social_api)
+            if processed_email:
+                processed_emails.append(processed_email)
+            continue
+
+        if email_processed["topic"] not in category_dict:
+            email_processed["topic"] = DEFAULT_CATEGORY
+
+        processed_emails.append(
+            {
+                "email_data": email_data,
+                "email_processed": email_processed,
+                "summary": summary,
+            }
+        )
+
+    return processed_emails
+
+
+def get_categorization_key(
+    email_data: dict,
+    category_dict: dict,
+    user_description: str,
+    preference: Preference,
+) -> str:
+    """
+    Returns the enrichment cache key of the categorization of an email.
+
+    Args:
+        email_data (dict): A dictionary containing the email data.
+        category_dict (dict): The categories of the user.
+        user_description (str): The description of the user.
+        preference (Preference): The preferences of the user.
+
+    Returns:
+        str: The key of the categorization in the enrichment cache.
+    """
+    return get_enrichment_key(
+        "categorize",
+        email_data["preprocessed_data"],
+        subject=email_data["subject"],
+        sender=email_data["from_info"][1],
+        categories=category_dict,
+        user_description=user_description,
+        prompt=preference.categorize_and_summarize_email_prompt or "",
+        important_guidelines=preference.important_guidelines,
+        informative_guidelines=preference.informative_guidelines,
+        useless_guidelines=preference.useless_guidelines,
+        llm_provider=preference.llm_provider,
+        llm_model=preference.llm_model,
+    )
+
+
 @transaction.atomic
-def save_email_to_db(processed_email: dict, user: User, social_api: SocialAPI) -> Email:
+def save_email_to_db(
+    processed_email: dict, user: User, social_api: SocialAPI
+) -> Email | None:
     """
     Save the processed email to the database.
 
@@ -515,13 +957,12 @@ def save_email_to_db(processed_email: dict, user: User, social_api: SocialAPI) -
         social_api (SocialAPI): An object representing the social API being used.
 
     Returns:
-        email_entry (Email): The saved Email model instance representing the stored email.
+        email_entry (Email | None): The saved Email model instance representing the stored email,
+                                    or None if the email was already stored by another process.
     """
     email_data = processed_email["email_data"]
     email_ai = processed_email["email_processed"]
-    summary = processed_email["summary"]
     topic = email_ai["topic"]
-    is_reply = email_data["is_reply"]
     from_info = email_data["from_info"]
 
     category, sender = process_email_entities(topic, from_info, user)
@@ -529,55 +970,156 @@ def save_email_to_db(processed_email: dict, user: User, social_api: SocialAPI) -
     email_entry = create_email_entry(
         email_ai, email_data, user, social_api, category, sender
     )
-    create_keypoints(summary, is_reply, email_entry)
-    save_stats(email_ai, user)
-    create_cc_bcc_senders(email_data, email_entry)
-    create_pictures_and_attachments(email_data, email_entry)
+    if email_entry is None:
+        return None
+
+    create_email_children([(processed_email, email_entry)])
+    save_stats([email_ai], user)
 
     return email_entry
 
 
-def save_stats(email_ai: dict, user: User):
+@transaction.atomic
+def save_emails_to_db(
+    processed_emails: list[dict], user: User, social_api: SocialAPI
+) -> list[Email]:
     """
-    Updates the statistical data for a user based on the AI analysis of an email.
+    Save several processed emails in a single transaction, with one bulk insert per table.
+
+    Intended for backfills: emails already stored are skipped. If another process stores one of
+    the emails concurrently, the emails are inserted one by one and only that one is skipped.
 
     Args:
-        email_ai (dict): A dictionary containing AI-generated information about the email.
-        user (User): The user object whose statistics are being updated.
+        processed_emails (list[dict]): The processed emails, as returned by `process_email`.
+        user (User): The user object associated with the emails.
+        social_api (SocialAPI): An object representing the social API being used.
+
+    Returns:
+        list[Email]: The saved Email model instances.
     """
-    statistics = Statistics.objects.get(user=user)
+    provider_ids = [
+        processed_email["email_data"]["email_id"]
+        for processed_email in processed_emails
+    ]
+    stored_ids = set(
+        Email.objects.filter(provider_id__in=provider_ids).values_list(
+            "provider_id", flat=True
+        )
+    )
 
-    statistics.nb_emails_received += 1
+    entities = {}
+    new_emails = {}
+    for processed_email in processed_emails:
+        email_data = processed_email["email_data"]
+        if email_data["email_id"] in stored_ids:
+            continue
+
+        topic = processed_email["email_processed"]["topic"]
+        from_info = tuple(email_data["from_info"])
+        if (topic, from_info) not in entities:
+            entities[(topic, from_info)] = process_email_entities(
+                topic, from_info, user
+            )
+        new_emails[email_data["email_id"]] = (
+            processed_email,
+            entities[(topic, from_info)],
+        )
 
-    statistics.nb_meeting += 1 if email_ai["flags"]["meeting"] else 0
-    statistics.nb_spam += 1 if email_ai["flags"]["spam"] else 0
-    statistics.nb_scam += 1 if email_ai["flags"]["scam"] else 0
-    statistics.nb_newsletter += 1 if email_ai["flags"]["newsletter"] else 0
-    statistics.nb_notification += 1 if email_ai["flags"]["notification"] else 0
+    try:
+        with transaction.atomic():
+            email_entries = Email.objects.bulk_create(
+                [
+                    Email(
+                        **get_email_entry_fields(
+                            processed_email["email_processed"],
+                            processed_email["email_data"],
+                            user,
+                            social_api,
+                            category,
+                            sender,
+                        )
+                    )
+                    for processed_email, (category, sender) in new_emails.values()
+                ]
+            )
+        entries = [
+            (processed_email, email_entry)
+            for (processed_email, _), email_entry in zip(
+                new_emails.values(), email_entries
+            )
+        ]
+    except IntegrityError:
+        LOGGER.info(
+            f"An email of the batch was stored concurrently for user ID: {user.id}, saving the emails one by one"
+        )
+        entries = []
+        for processed_email, (category, sender) in new_emails.values():
+            email_entry = create_email_entry(
+                processed_email["email_processed"],
+                processed_email["email_data"],
+                user,
+                social_api,
+                category,
+                sender,
+            )
+            if email_entry is not None:
+                entries.append((processed_email, email_entry))
 
-    statistics.nb_emails_important += 1 if email_ai["importance"] == IMPORTANT else 0
-    statistics.nb_emails_informative += (
-        1 if email_ai["importance"] == INFORMATIVE else 0
+    create_email_children(entries)
+    save_stats(
+        [processed_email["email_processed"] for processed_email, _ in entries],
+        user,
     )
-    statistics.nb_emails_useless += 1 if email_ai["importance"] == USELESS else 0
 
-    statistics.nb_answer_required += 1 if email_ai["response"] == ANSWER_REQUIRED else 0
-    statistics.nb_might_require_answer += (
-        1 if email_ai["response"] == MIGHT_REQUIRE_ANSWER else 0
-    )
-    statistics.nb_no_answer_required += (
-        1 if email_ai["response"] == NO_ANSWER_REQUIRED else 0
-    )
+    return [email_entry for _, email_entry in entries]
 
-    statistics.nb_highly_relevant += (
-        1 if email_ai["relevance"] == HIGHLY_RELEVANT else 0
-    )
-    statistics.nb_possibly_relevant += (
-        1 if email_ai["relevance"] == POSSIBLY_RELEVANT else 0
-    )
-    statistics.nb_not_relevant += 1 if email_ai["relevance"] == NOT_RELEVANT else 0
 
-    statistics.save()
+def get_stats_increments(email_ai: dict) -> dict[str, int]:
+    """
+    Computes the statistics counters to increment for an email based on its AI analysis.
+
+    Args:
+        email_ai (dict): A dictionary containing AI-generated information about the email.
+
+    Returns:
+        dict[str, int]: The increment of each Statistics field.
+    """
+    return {
+        "nb_emails_received": 1,
+        "nb_meeting": int(bool(email_ai["flags"]["meeting"])),
+        "nb_spam": int(bool(email_ai["flags"]["spam"])),
+        "nb_scam": int(bool(email_ai["flags"]["scam"])),
+        "nb_newsletter": int(bool(email_ai["flags"]["newsletter"])),
+        "nb_notification": int(bool(email_ai["flags"]["notification"])),
+        "nb_emails_important": int(email_ai["importance"] == IMPORTANT),
+        "nb_emails_informative": int(email_ai["importance"] == INFORMATIVE),
+        "nb_emails_useless": int(email_ai["importance"] == USELESS),
+        "nb_answer_required": int(email_ai["response"] == ANSWER_REQUIRED),
+        "nb_might_require_answer": int(email_ai["response"] == MIGHT_REQUIRE_ANSWER),
+        "nb_no_answer_required": int(email_ai["response"] == NO_ANSWER_REQUIRED),
+        "nb_highly_relevant": int(email_ai["relevance"] == HIGHLY_RELEVANT),
+        "nb_possibly_relevant": int(email_ai["relevance"] == POSSIBLY_RELEVANT),
+        "nb_not_relevant": int(email_ai["relevance"] == NOT_RELEVANT),
+    }
+
+
+def save_stats(email_ais: list[dict], user: User):
+    """
+    Updates the statistical data for a user based on the AI analysis of emails,
+    with a single `UPDATE ... SET field = field + n` query.
+
+    Args:
+        email_ais (list[dict]): AI-generated information about each email.
+        user (User): The user object whose statistics are being updated.
+    """
+    increments = Counter()
+    for email_ai in email_ais:
+        increments.update(get_stats_increments(email_ai))
+
+    if increments:
+        Statistics.objects.filter(user=user).update(
+            **{field: F(field) + value for field, value in increments.items() if value}
+        )
 
 
 def process_email_entities(
@@ -603,24 +1145,23 @@ def process_email_entities(
         email=sender_email, defaults={"name": sender_name or sender_email}
     )
 
-    if not Contact.objects.filter(user=user, email=sender_email).exists():
-        Contact.objects.get_or_create(
-            user=user, email=sender_email, defaults={"username": sender_name}
-        )
+    Contact.objects.get_or_create(
+        user=user, email=sender_email, defaults={"username": sender_name}
+    )
 
     return category, sender
 
 
-def create_email_entry(
+def get_email_entry_fields(
     email_ai: dict,
     email_data: dict,
     user: User,
     social_api: SocialAPI,
     category: Category,
     sender: Sender,
-) -> Email:
+) -> dict:
     """
-    Create the main Email entry in the database.
+    Build the field values of the main Email entry.
 
     Args:
         email_ai (dict): Information provided by the AI processing.
@@ -631,9 +1172,9 @@ def create_email_entry(
         sender (Sender): The sender object for the email.
 
     Returns:
-        Email: The created Email object.
+        dict: The Email field values, keyed by field name.
     """
-    return Email.objects.create(
+    return dict(
         social_api=social_api,
         provider_id=email_data["email_id"],
         email_provider=social_api.type_api,
@@ -664,30 +1205,102 @@ def create_email_entry(
     )
 
 
-def create_keypoints(summary: dict, is_reply: bool, email_entry: Email):
+def create_email_entry(
+    email_ai: dict,
+    email_data: dict,
+    user: User,
+    social_api: SocialAPI,
+    category: Category,
+    sender: Sender,
+) -> Email | None:
     """
-    Create KeyPoint entries for the email.
+    Create the main Email entry in the database, unless an email with the same provider ID exists.
 
     Args:
-        summary (dict): data from ai aswith keypoiiunts
-        is_reply (Email): The Email object to associate the keypoints with.
+        email_ai (dict): Information provided by the AI processing.
+        email_data (dict): Raw email data from the email provider.
+        user (User): The user object associated with the email.
+        social_api (SocialAPI): The social API object used to fetch the email.
+        category (Category): The category object for the email.
+        sender (Sender): The sender object for the email.
+
+    Returns:
+        Email | None: The created Email object, or None if it already existed.
+    """
+    fields = get_email_entry_fields(
+        email_ai, email_data, user, social_api, category, sender
+    )
+    email_entry, created = Email.objects.get_or_create(
+        provider_id=fields.pop("provider_id"), defaults=fields
+    )
+    return email_entry if created else None
+
+
+def create_email_children(entries: list[tuple[dict, Email]]):
+    """
+    Create the KeyPoint, CC, BCC, Picture and Attachment entries of saved emails,
+    with one bulk insert per table.
+
+    Args:
+        entries (list[tuple[dict, Email]]): The processed emails and their saved Email objects.
+    """
+    keypoints, cc_senders, bcc_senders, pictures, attachments = [], [], [], [], []
+    for processed_email, email_entry in entries:
+        email_data = processed_email["email_data"]
+        keypoints += build_keypoints(
+            processed_email["summary"], email_data["is_reply"], email_entry
+        )
+        cc_list, bcc_list = build_cc_bcc_senders(email_data, email_entry)
+        cc_senders += cc_list
+        bcc_senders += bcc_list
+        picture_list, attachment_list = build_pictures_and_attachments(
+            email_data, email_entry
+        )
+        pictures += picture_list
+        attachments += attachment_list
+
+    for model, objects in (
+        (KeyPoint, keypoints),
+        (CC_sender, cc_senders),
+        (BCC_sender, bcc_senders),
+        (Picture, pictures),
+        (Attachment, attachments),
+    ):
+        if objects:
+            model.objects.bulk_create(objects)
+
+
+def build_keypoints(
+    summary: dict, is_reply: bool, email_entry: Email
+) -> list[KeyPoint]:
+    """
+    Build the KeyPoint entries of the email.
+
+    Args:
+        summary (dict): The summary returned by the AI, containing the keypoints.
+        is_reply (bool): Whether the email is a reply, keypoints are then grouped by message position.
+        email_entry (Email): The Email object to associate the keypoints with.
+
+    Returns:
+        list[KeyPoint]: The unsaved KeyPoint objects.
     """
     if is_reply:
-        keypoints = summary["keypoints"]
-        for index, keypoints_list in keypoints.items():
-            for keypoint in keypoints_list:
-                KeyPoint.objects.create(
-                    is_reply=True,
-                    position=index,
-                    category=summary["category"],
-                    organization=summary["organization"],
-                    topic=summary["topic"],
-                    content=keypoint,
-                    email=email_entry,
-                )
+        return [
+            KeyPoint(
+                is_reply=True,
+                position=index,
+                category=summary["category"],
+                organization=summary["organization"],
+                topic=summary["topic"],
+                content=keypoint,
+                email=email_entry,
+            )
+            for index, keypoints_list in summary["keypoints"].items()
+            for keypoint in keypoints_list
+        ]
     else:
-        for keypoint in summary["keypoints"]:
-            KeyPoint.objects.create(
+        return [
+            KeyPoint(
                 is_reply=False,
                 category=summary["category"],
                 organization=summary["organization"],
@@ -695,15 +1308,22 @@ def create_keypoints(summary: dict, is_reply: bool, email_entry: Email):
                 content=keypoint,
                 email=email_entry,
             )
+            for keypoint in summary["keypoints"]
+        ]
 
 
-def create_cc_bcc_senders(processed_email: dict, email_entry: Email):
+def build_cc_bcc_senders(
+    processed_email: dict, email_entry: Email
+) -> tuple[list[CC_sender], list[BCC_sender]]:
     """
-    Create CC and BCC sender entries.
+    Build the CC and BCC sender entries.
 
     Args:
         processed_email (dict): A dictionary containing the processed email data.
         email_entry (Email): The Email object to associate the CC and BCC senders with.
+
+    Returns:
+        tuple: The unsaved CC_sender objects and the unsaved BCC_sender objects.
     """
     cc_info = processed_email.get("cc_info", [])
     bcc_info = processed_email.get("bcc_info", [])
@@ -748,8 +1368,10 @@ def create_cc_bcc_senders(processed_email: dict, email_entry: Email):
 
         return None, ""
 
-    def safe_create_sender(sender_info, creator_func):
-        """Helper function to safely create sender entries"""
+    cc_senders, bcc_senders = [], []
+
+    def safe_create_sender(sender_info, model: type[models.Model], senders: list):
+        """Helper function to safely build sender entries"""
         try:
             email, name = extract_email_and_name(sender_info)
 
@@ -759,7 +1381,7 @@ def create_cc_bcc_senders(processed_email: dict, email_entry: Email):
             if "@" not in email:
                 return
 
-            creator_func(email_object=email_entry, email=email, name=name)
+            senders.append(model(email_object=email_entry, email=email, name=name))
         except Exception as e:
             LOGGER.warning(f"Failed to create sender entry: {str(e)}")
 
@@ -767,39 +1389,50 @@ def create_cc_bcc_senders(processed_email: dict, email_entry: Email):
         if isinstance(cc_info, dict):
             for email, name in cc_info.items():
                 if email and isinstance(email, str):
-                    safe_create_sender([email, name], CC_sender.objects.create)
+                    safe_create_sender([email, name], CC_sender, cc_senders)
         elif isinstance(cc_info, (list, tuple)):
             for sender in cc_info:
-                safe_create_sender(sender, CC_sender.objects.create)
+                safe_create_sender(sender, CC_sender, cc_senders)
         else:
-            safe_create_sender(cc_info, CC_sender.objects.create)
+            safe_create_sender(cc_info, CC_sender, cc_senders)
 
     if bcc_info:
         if isinstance(bcc_info, dict):
             for email, name in bcc_info.items():
                 if email and isinstance(email, str):
-                    safe_create_sender([email, name], BCC_sender.objects.create)
+                    safe_create_sender([email, name], BCC_sender, bcc_senders)
         elif isinstance(bcc_info, (list, tuple)):
             for sender in bcc_info:
-                safe_create_sender(sender, BCC_sender.objects.create)
+                safe_create_sender(sender, BCC_sender, bcc_senders)
         else:
-            safe_create_sender(bcc_info, BCC_sender.objects.create)
+            safe_create_sender(bcc_info, BCC_sender, bcc_senders)
+
+    return cc_senders, bcc_senders
 
 
-def create_pictures_and_attachments(processed_email: dict, email_entry: Email):
+def build_pictures_and_attachments(
+    processed_email: dict, email_entry: Email
+) -> tuple[list[Picture], list[Attachment]]:
     """
-    Create Picture and Attachment entries.
+    Build the Picture and Attachment entries.
 
     Args:
         processed_email (dict): A dictionary containing the processed email data.
         email_entry (Email): The Email object to associate the pictures and attachments with.
-    """
-    for image_path in processed_email.get("image_files", []):
-        Picture.objects.create(email=email_entry, path=image_path)
 
-    for attachment in processed_email.get("attachments", []):
-        Attachment.objects.create(
+    Returns:
+        tuple: The unsaved Picture objects and the unsaved Attachment objects.
+    """
+    pictures = [
+        Picture(email=email_entry, path=image_path)
+        for image_path in processed_email.get("image_files", [])
+    ]
+    attachments = [
+        Attachment(
             email=email_entry,
             name=attachment["attachmentName"],
             id_api=attachment["attachmentId"],
         )
+        for attachment in processed_email.get("attachments", [])
+    ]
+    return pictures, attachments
@@ -0,0 +1,105 @@
+"""
+Token budgeting of the email bodies sent to the LLM during ingestion.
+
+Before an LLM call, the body of an email is reduced to what the function needs: quoted replies are
+stripped unless the function summarizes the whole thread, signatures and legal disclaimers are
+removed, and the rest is truncated to the budget of the function (LLM_TOKEN_BUDGETS), keeping its
+head and tail. Whole threads are truncated by dropping their oldest emails instead. Tokens are estimated locally, and the tokens saved are logged per email and counted
+per function.
+
+Features:
+- ✅ prepare_email_body: Reduce an email body to the token budget of an LLM function.
+- ✅ get_budget_stats: Tokens before and after budgeting per LLM function.
+"""
+
+import logging
+import threading
+from collections import Counter
+from aomail.ai_providers.utils import estimate_tokens
+from aomail.constants import LLM_TOKEN_BUDGETS
+from aomail.utils.email_processing import (
+    strip_boilerplate,
+    strip_quoted_replies,
+    truncate_thread_to_budget,
+    truncate_to_budget,
+)
+
+
+LOGGER = logging.getLogger(__name__)
+
+_stats = Counter()
+_lock = threading.Lock()
+
+
+def prepare_email_body(
+    email_content: str, function_name: str, keep_thread: bool = False
+) -> str:
+    """
+    Reduce an email body to the token budget of an LLM function.
+
+    Args:
+        email_content (str): The preprocessed content of the email.
+        function_name (str): The `llm_functions` function receiving the body, key of LLM_TOKEN_BUDGETS.
+        keep_thread (bool): Keep the quoted replies, for functions summarizing the whole conversation.
+
+    Returns:
+        str: The body to send to the LLM.
+    """
+    tokens_before = estimate_tokens(email_content)
+
+    body = email_content if keep_thread else strip_quoted_replies(email_content)
+    body = strip_boilerplate(body)
+    max_tokens = LLM_TOKEN_BUDGETS.get(function_name, 0)
+    if keep_thread:
+        body = truncate_thread_to_budget(body, max_tokens)
+    else:
+        body = truncate_to_budget(body, max_tokens)
+
+    tokens_after = estimate_tokens(body)
+    with _lock:
+        _stats[(function_name, "emails")] += 1
+        _stats[(function_name, "tokens_before")] += tokens_before
+        _stats[(function_name, "tokens_after")] += tokens_after
+
+    LOGGER.info(
+        f"Email body for {function_name}: {tokens_before} -> {tokens_after} tokens",
+        extra={
+            "function": function_name,
+            "tokens_before": tokens_before,
+            "tokens_after": tokens_after,
+            "tokens_saved": tokens_before - tokens_after,
+        },
+    )
+    return body
+
+
+def get_budget_stats() -> dict[str, dict]:
+    """
+    Returns the estimated tokens before and after budgeting per LLM function since the process started.
+
+    Returns:
+        dict[str, dict]: For each function:
+            - emails (int): Email bodies prepared.
+            - tokens_before (int): Estimated tokens of the preprocessed bodies.
+            - tokens_after (int): Estimated tokens sent to the LLM.
+            - tokens_saved (int): The difference.
+    """
+    with _lock:
+        counters = list(_stats.items())
+
+    stats = {}
+    for (function_name, name), value in counters:
+        stats.setdefault(
+            function_name, {"emails": 0, "tokens_before": 0, "tokens_after": 0}
+        )[name] = value
+    for function_stats in stats.values():
+        function_stats["tokens_saved"] = (
+            function_stats["tokens_before"] - function_stats["tokens_after"]
+        )
+    return stats
+
+
+def reset_budget_stats():
+    """Resets the statistics of the budgeting."""
+    with _lock:
+        _stats.clear()
@@ -0,0 +1,203 @@
+"""
+Cache of AI enrichment results shared across users.
+
+Newsletters and notifications are often delivered byte-identical to many users. The categorization
+and the summary of an email only depend on its content and on the user-specific inputs of the prompt
+(categories, guidelines, description, language, model), so a result is reused whenever all of them
+match. Concurrent requests for the same key wait for the first one instead of calling the LLM again.
+
+Cached results are returned with zero tokens, so `update_tokens_stats` only counts real LLM usage.
+
+Features:
+- ✅ get_enrichment_key: Hash of the inputs of an enrichment prompt.
+- ✅ get_or_compute: Return a cached enrichment result or compute and cache it.
+- ✅ get_cached: Return a cached enrichment result without computing it.
+- ✅ set_cached: Cache a result computed in a batch.
+- ✅ get_enrichment_cache_stats: Hits, misses and saved tokens per LLM provider.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import Future
+from typing import Callable
+from cachetools import TTLCache
+from aomail.constants import ENRICHMENT_CACHE_SIZE, ENRICHMENT_CACHE_TTL
+
+
+LOGGER = logging.getLogger(__name__)
+
+_cache = TTLCache(maxsize=max(ENRICHMENT_CACHE_SIZE, 1), ttl=ENRICHMENT_CACHE_TTL)
+_in_flight: dict[str, Future] = {}
+_lock = threading.Lock()
+_stats = Counter()
+
+
+def get_enrichment_key(kind: str, body: str, **inputs) -> str:
+    """
+    Hash the inputs of an enrichment prompt.
+
+    Args:
+        kind (str): The kind of enrichment, such as "categorize" or "summarize_email".
+        body (str): The email body, whitespace-normalized before hashing.
+        **inputs: The other inputs of the prompt (subject, sender, categories, guidelines, model...).
+
+    Returns:
+        str: The SHA-256 hex digest identifying the result.
+    """
+    payload = json.dumps(
+        {"kind": kind, "body": " ".join(body.split()), **inputs},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_or_compute(key: str, llm_provider: str, compute: Callable[[], dict]) -> dict:
+    """
+    Return the cached result of a key, or compute and cache it.
+
+    Args:
+        key (str): The key returned by `get_enrichment_key`.
+        llm_provider (str): The LLM provider, used to report the hit rates.
+        compute (Callable[[], dict]): Calls the LLM and returns a result with `tokens_input`
+                                      and `tokens_output`.
+
+    Returns:
+        dict: A copy of the result. On a hit, `tokens_input` and `tokens_output` are 0.
+    """
+    if ENRICHMENT_CACHE_SIZE <= 0:
+        return compute()
+
+    with _lock:
+        cached = _cache.get(key)
+        future = _in_flight.get(key) if cached is None else None
+        owner = cached is None and future is None
+        if owner:
+            future = _in_flight[key] = Future()
+
+    if cached is None and not owner:
+        try:
+            cached = future.result()
+        except Exception:
+            # the first request failed: try again without sharing the result
+            _count(llm_provider, "misses")
+            return compute()
+
+    if cached is not None:
+        _count(llm_provider, "hits")
+        _count(
+            llm_provider,
+            "tokens_saved",
+            cached["tokens_input"] + cached["tokens_output"],
+        )
+        return _without_tokens(cached)
+
+    _count(llm_provider, "misses")
+    try:
+        result = compute()
+    except Exception as e:
+        with _lock:
+            del _in_flight[key]
+        future.set_exception(e)
+        raise
+
+    cached = copy.deepcopy(result)
+    with _lock:
+        _cache[key] = cached
+        del _in_flight[key]
+    future.set_result(cached)
+    return result
+
+
+def get_cached(key: str, llm_provider: str) -> dict | None:
+    """
+    Return the cached result of a key without computing it.
+
+    Args:
+        key (str): The key returned by `get_enrichment_key`.
+        llm_provider (str): The LLM provider, used to report the hit rates.
+
+    Returns:
+        dict | None: A copy of the result with zero tokens, or None on a miss.
+    """
+    if ENRICHMENT_CACHE_SIZE <= 0:
+        return None
+
+    with _lock:
+        cached = _cache.get(key)
+
+    if cached is None:
+        _count(llm_provider, "misses")
+        return None
+
+    _count(llm_provider, "hits")
+    _count(
+        llm_provider, "tokens_saved", cached["tokens_input"] + cached["tokens_output"]
+    )
+    return _without_tokens(cached)
+
+
+def set_cached(key: str, result: dict):
+    """
+    Cache a result computed outside of `get_or_compute`.
+
+    Args:
+        key (str): The key returned by `get_enrichment_key`.
+        result (dict): The result, with `tokens_input` and `tokens_output`.
+    """
+    if ENRICHMENT_CACHE_SIZE <= 0:
+        return
+
+    with _lock:
+        _cache[key] = copy.deepcopy(result)
+
+
+def _without_tokens(cached: dict) -> dict:
+    """Returns a copy of a cached result with zero tokens."""
+    result = {**copy.deepcopy(cached), "tokens_input": 0, "tokens_output": 0}
+    result.pop("tokens_cache_read", None)
+    return result
+
+
+def _count(llm_provider: str, name: str, value: int = 1):
+    """Increments a statistic of the cache."""
+    with _lock:
+        _stats[(llm_provider, name)] += value
+
+
+def get_enrichment_cache_stats() -> dict[str, dict]:
+    """
+    Returns the hit rates of the cache per LLM provider since the process started.
+
+    Returns:
+        dict[str, dict]: For each LLM provider:
+            - hits (int): Results reused from the cache.
+            - misses (int): Results computed by the LLM.
+            - hit_rate (float): Share of the requests served by the cache.
+            - tokens_saved (int): Input and output tokens of the reused results.
+    """
+    with _lock:
+        counters = list(_stats.items())
+
+    stats = {}
+    for (llm_provider, name), value in counters:
+        stats.setdefault(
+            llm_provider, {"hits": 0, "misses": 0, "hit_rate": 0.0, "tokens_saved": 0}
+        )[name] = value
+
+    for provider_stats in stats.values():
+        total = provider_stats["hits"] + provider_stats["misses"]
+        provider_stats["hit_rate"] = provider_stats["hits"] / total if total else 0.0
+
+    return stats
+
+
+def clear_enrichment_cache():
+    """Empties the cache and resets its statistics."""
+    with _lock:
+        _cache.clear()
+        _stats.clear()
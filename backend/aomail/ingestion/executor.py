@@ -0,0 +1,337 @@
+"""
+Bounded executor shared by the email ingestion code paths.
+
+Tasks are tagged with the user and the email provider they belong to. The executor runs at most
+`max_workers` tasks at the same time, at most `max_per_user` per user and at most `max_per_provider`
+per provider. Pending tasks are dispatched round-robin across users, so one user's resync cannot
+starve the others. Limits apply per process.
+
+Tasks must not wait on other tasks of the same executor: nested work (such as the LLM calls of
+`process_email`) runs on the separate enrichment pool.
+
+The executors and the enrichment pool only provide threads. The LLM and email provider calls they
+make are capped by a single per-process limit: each call holds a slot of `get_call_limit` while it
+runs, and never waits on other tasks while holding it.
+
+Features:
+- ✅ IngestionExecutor: Executor with global, per-user and per-provider concurrency caps.
+- ✅ CallLimit: Semaphore capping the LLM and email provider calls, with its queue depth.
+- ✅ get_executor: Executor shared by the ingestion code paths of the process.
+- ✅ get_enrichment_pool: Thread pool running the nested LLM calls of an email.
+- ✅ get_call_limit: Limit shared by the LLM and email provider calls of the process.
+- ✅ get_provider: Provider key of a SocialAPI used for the per-provider cap.
+"""
+
+import logging
+import threading
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable
+from aomail.constants import (
+    INGESTION_MAX_PER_PROVIDER,
+    INGESTION_MAX_PER_USER,
+    INGESTION_WORKER_CONCURRENCY,
+)
+from aomail.models import SocialAPI
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class IngestionExecutor:
+    """Runs tasks with a global, a per-user and a per-provider concurrency cap."""
+
+    def __init__(
+        self,
+        max_workers: int = INGESTION_WORKER_CONCURRENCY,
+        max_per_user: int = INGESTION_MAX_PER_USER,
+        max_per_provider: int = INGESTION_MAX_PER_PROVIDER,
+    ):
+        """
+        Initializes an IngestionExecutor object.
+
+        Args:
+            max_workers (int): Maximum number of tasks running at the same time.
+            max_per_user (int): Maximum number of tasks of a single user running at the same time.
+            max_per_provider (int): Maximum number of tasks of a single provider running at the same time.
+        """
+        self.max_workers = max_workers
+        self.max_per_user = max_per_user
+        self.max_per_provider = max_per_provider
+        self.pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="ingestion"
+        )
+        self.condition = threading.Condition()
+        self.pending: OrderedDict[Any, deque] = OrderedDict()
+        self.running_per_user = Counter()
+        self.running_per_provider = Counter()
+        self.nb_running = 0
+        self.nb_pending = 0
+
+    def submit(
+        self, user_id: Any, provider: str, fn: Callable, *args, **kwargs
+    ) -> Future:
+        """
+        Schedules `fn(*args, **kwargs)` on behalf of a user and a provider.
+
+        Args:
+            user_id (Any): The ID of the user the task belongs to.
+            provider (str): The email provider the task calls.
+            fn (Callable): The function to run.
+
+        Returns:
+            Future: The future of the task.
+        """
+        future = Future()
+        with self.condition:
+            self.pending.setdefault(user_id, deque()).append(
+                (future, provider, fn, args, kwargs)
+            )
+            self.nb_pending += 1
+            self._dispatch()
+        return future
+
+    def _dispatch(self):
+        """Starts the pending tasks allowed by the caps, one user at a time. Must hold the lock."""
+        started = True
+        while started and self.nb_running < self.max_workers:
+            started = False
+            for user_id in list(self.pending):
+                if self.nb_running >= self.max_workers:
+                    break
+                if self.running_per_user[user_id] >= self.max_per_user:
+                    continue
+
+                tasks = self.pending[user_id]
+                future, provider, fn, args, kwargs = tasks[0]
+                if self.running_per_provider[provider] >= self.max_per_provider:
+                    continue
+
+                tasks.popleft()
+                if tasks:
+                    self.pending.move_to_end(user_id)
+                else:
+                    del self.pending[user_id]
+                self.nb_pending -= 1
+
+                if not future.set_running_or_notify_cancel():
+                    continue
+
+                self.nb_running += 1
+                self.running_per_user[user_id] += 1
+                self.running_per_provider[provider] += 1
+                self.pool.submit(self._run, user_id, provider, future, fn, args, kwargs)
+                started = True
+
+    def _run(
+        self,
+        user_id: Any,
+        provider: str,
+        future: Future,
+        fn: Callable,
+        args: tuple,
+        kwargs: dict,
+    ):
+        """Runs a task and releases its slots."""
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self.condition:
+                self.nb_running -= 1
+                self.running_per_user[user_id] -= 1
+                if not self.running_per_user[user_id]:
+                    del self.running_per_user[user_id]
+                self.running_per_provider[provider] -= 1
+                if not self.running_per_provider[provider]:
+                    del self.running_per_provider[provider]
+                self._dispatch()
+                self.condition.notify_all()
+
+    def get_saturated_users(self) -> set:
+        """
+        Returns the users whose new tasks would have to wait for their own running tasks.
+
+        Returns:
+            set: The IDs of the users with at least `max_per_user` running or pending tasks.
+        """
+        with self.condition:
+            return {
+                user_id
+                for user_id in set(self.running_per_user) | set(self.pending)
+                if self.running_per_user[user_id] + len(self.pending.get(user_id, ()))
+                >= self.max_per_user
+            }
+
+    def get_metrics(self) -> dict:
+        """
+        Returns the current load of the executor.
+
+        Returns:
+            dict: A dictionary containing:
+                - pending (int): Number of tasks waiting for a slot.
+                - running (int): Number of running tasks.
+                - pending_per_user (dict): Number of waiting tasks per user.
+                - running_per_user (dict): Number of running tasks per user.
+                - running_per_provider (dict): Number of running tasks per provider.
+        """
+        with self.condition:
+            return {
+                "pending": self.nb_pending,
+                "running": self.nb_running,
+                "pending_per_user": {
+                    user_id: len(tasks) for user_id, tasks in self.pending.items()
+                },
+                "running_per_user": dict(self.running_per_user),
+                "running_per_provider": dict(self.running_per_provider),
+            }
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stops the executor.
+
+        Args:
+            wait (bool): Wait for the pending and running tasks to complete.
+        """
+        if wait:
+            with self.condition:
+                self.condition.wait_for(
+                    lambda: not self.nb_pending and not self.nb_running
+                )
+        self.pool.shutdown(wait=wait)
+
+
+class CallLimit:
+    """Caps the number of LLM and email provider calls running at the same time."""
+
+    def __init__(self, limit: int = INGESTION_WORKER_CONCURRENCY):
+        """
+        Initializes a CallLimit object.
+
+        Args:
+            limit (int): Maximum number of calls running at the same time.
+        """
+        self.limit = limit
+        self.condition = threading.Condition()
+        self.nb_running = 0
+        self.nb_waiting = 0
+        self.max_waiting = 0
+
+    @contextmanager
+    def slot(self):
+        """Waits for a free slot and holds it while the block runs."""
+        with self.condition:
+            self.nb_waiting += 1
+            self.max_waiting = max(self.max_waiting, self.nb_waiting)
+            self.condition.wait_for(lambda: self.nb_running < self.limit)
+            self.nb_waiting -= 1
+            self.nb_running += 1
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.nb_running -= 1
+                self.condition.notify()
+
+    def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Runs `fn(*args, **kwargs)` while holding a slot.
+
+        Args:
+            fn (Callable): The function making the call.
+
+        Returns:
+            Any: The result of the function.
+        """
+        with self.slot():
+            return fn(*args, **kwargs)
+
+    def get_metrics(self) -> dict:
+        """
+        Returns the current load of the limit and resets the peak queue depth.
+
+        Returns:
+            dict: A dictionary containing:
+                - limit (int): Maximum number of calls running at the same time.
+                - running (int): Number of running calls.
+                - waiting (int): Number of calls waiting for a slot.
+                - max_waiting (int): Peak number of waiting calls since the previous metrics.
+        """
+        with self.condition:
+            metrics = {
+                "limit": self.limit,
+                "running": self.nb_running,
+                "waiting": self.nb_waiting,
+                "max_waiting": self.max_waiting,
+            }
+            self.max_waiting = self.nb_waiting
+            return metrics
+
+
+_executor = None
+_enrichment_pool = None
+_call_limit = None
+_lock = threading.Lock()
+
+
+def get_executor() -> IngestionExecutor:
+    """
+    Returns the executor shared by the ingestion code paths of the process.
+
+    Returns:
+        IngestionExecutor: The shared executor.
+    """
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = IngestionExecutor()
+        return _executor
+
+
+def get_enrichment_pool() -> ThreadPoolExecutor:
+    """
+    Returns the thread pool running the LLM calls of an email concurrently.
+
+    Its tasks never submit other tasks, so ingestion tasks can wait on them without deadlock.
+    Its size only bounds the threads: the LLM calls themselves are capped by `get_call_limit`.
+
+    Returns:
+        ThreadPoolExecutor: The shared enrichment pool.
+    """
+    global _enrichment_pool
+    with _lock:
+        if _enrichment_pool is None:
+            _enrichment_pool = ThreadPoolExecutor(
+                max_workers=2 * INGESTION_WORKER_CONCURRENCY,
+                thread_name_prefix="enrichment",
+            )
+        return _enrichment_pool
+
+
+def get_call_limit() -> CallLimit:
+    """
+    Returns the limit shared by the LLM and email provider calls of the ingestion code paths.
+
+    Returns:
+        CallLimit: The shared limit, of INGESTION_WORKER_CONCURRENCY calls.
+    """
+    global _call_limit
+    with _lock:
+        if _call_limit is None:
+            _call_limit = CallLimit()
+        return _call_limit
+
+
+def get_provider(social_api: SocialAPI) -> str:
+    """
+    Returns the provider key of a SocialAPI used for the per-provider cap.
+
+    Args:
+        social_api (SocialAPI): The SocialAPI instance.
+
+    Returns:
+        str: "imap" for IMAP accounts, the API type otherwise.
+    """
+    return "imap" if social_api.imap_config_id else social_api.type_api
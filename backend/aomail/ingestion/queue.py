@@ -0,0 +1,300 @@
+"""
+Database-backed queue of email ingestion jobs.
+
+Webhooks enqueue jobs and return immediately, ingestion workers claim them with
+`SELECT ... FOR UPDATE SKIP LOCKED` so several worker processes can consume the queue concurrently.
+
+Features:
+- ✅ enqueue_email: Add an email to the ingestion queue.
+- ✅ enqueue_emails: Add several emails to the ingestion queue, skipping known ones.
+- ✅ claim_jobs: Lock a batch of runnable jobs for a worker.
+- ✅ complete_job: Mark a job as successfully processed.
+- ✅ fail_job: Reschedule a job with exponential backoff or mark it as failed.
+- ✅ release_expired_jobs: Fail jobs whose worker died after their last attempt.
+- ✅ get_coalescing_stats: Count the notifications received and folded into pending sync jobs.
+"""
+
+import logging
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+from aomail.constants import (
+    INGESTION_COALESCE_WINDOW,
+    INGESTION_JOB_DONE,
+    INGESTION_JOB_FAILED,
+    INGESTION_JOB_PENDING,
+    INGESTION_JOB_RUNNING,
+    INGESTION_MAX_ATTEMPTS,
+    INGESTION_RETRY_BASE_DELAY,
+    INGESTION_VISIBILITY_TIMEOUT,
+)
+from aomail.models import Email, IngestionJob, SocialAPI
+
+
+LOGGER = logging.getLogger(__name__)
+CLAIM_CANDIDATES_FACTOR = 4
+
+
+def enqueue_email(social_api: SocialAPI, email_id: str = None) -> IngestionJob:
+    """
+    Add an email to the ingestion queue.
+
+    Mailbox sync jobs (without email ID) are delayed by the coalescing window: notifications
+    received for the same mailbox before the job is claimed are folded into it. The SocialAPI row
+    is locked meanwhile, so that concurrent notifications do not create several sync jobs.
+
+    Args:
+        social_api (SocialAPI): The SocialAPI instance the email belongs to.
+        email_id (Optional[str]): The provider ID of the email. If None, the worker synchronizes the mailbox.
+
+    Returns:
+        IngestionJob: The created job, or the pending job the notification was folded into.
+    """
+    with transaction.atomic():
+        if email_id is None:
+            # concurrent notifications of a mailbox wait for each other so that they fold into one job
+            SocialAPI.objects.select_for_update().only("id").get(id=social_api.id)
+            job = (
+                IngestionJob.objects.filter(
+                    social_api=social_api,
+                    email_id__isnull=True,
+                    status=INGESTION_JOB_PENDING,
+                    attempts=0,
+                )
+                .order_by("run_after")
+                .first()
+            )
+            # the update is ignored if a worker claimed the job in the meantime
+            if job and IngestionJob.objects.filter(
+                id=job.id, status=INGESTION_JOB_PENDING
+            ).update(coalesced_count=F("coalesced_count") + 1):
+                LOGGER.info(
+                    f"Folded notification into ingestion job ID: {job.id} for social API ID: {social_api.id}"
+                )
+                return job
+
+        job = IngestionJob.objects.create(
+            social_api=social_api,
+            email_id=email_id,
+            max_attempts=INGESTION_MAX_ATTEMPTS,
+            run_after=(
+                timezone.now() + timedelta(seconds=INGESTION_COALESCE_WINDOW)
+                if email_id is None
+                else timezone.now()
+            ),
+        )
+    LOGGER.info(
+        f"Enqueued ingestion job ID: {job.id} for social API ID: {social_api.id}"
+    )
+    return job
+
+
+def enqueue_emails(social_api: SocialAPI, email_ids: list[str]) -> list[IngestionJob]:
+    """
+    Add several emails to the ingestion queue in a single query.
+
+    Emails already stored in the database or already waiting in the queue are skipped.
+
+    Args:
+        social_api (SocialAPI): The SocialAPI instance the emails belong to.
+        email_ids (list[str]): The provider IDs of the emails.
+
+    Returns:
+        list[IngestionJob]: The created jobs.
+    """
+    known_ids = set(
+        Email.objects.filter(provider_id__in=email_ids).values_list(
+            "provider_id", flat=True
+        )
+    )
+    known_ids.update(
+        IngestionJob.objects.filter(
+            social_api=social_api,
+            email_id__in=email_ids,
+            status__in=[INGESTION_JOB_PENDING, INGESTION_JOB_RUNNING],
+        ).values_list("email_id", flat=True)
+    )
+    new_ids = [
+        email_id for email_id in dict.fromkeys(email_ids) if email_id not in known_ids
+    ]
+
+    jobs = IngestionJob.objects.bulk_create(
+        [
+            IngestionJob(
+                social_api=social_api,
+                email_id=email_id,
+                max_attempts=INGESTION_MAX_ATTEMPTS,
+            )
+            for email_id in new_ids
+        ]
+    )
+    if jobs:
+        LOGGER.info(
+            f"Enqueued {len(jobs)} ingestion jobs for social API ID: {social_api.id}"
+        )
+    return jobs
+
+
+def claim_jobs(
+    worker_id: str,
+    limit: int,
+    exclude_user_ids: set = None,
+    max_per_user: int = None,
+) -> list[IngestionJob]:
+    """
+    Lock up to `limit` runnable jobs for the given worker.
+
+    A job is runnable if it is pending and due, or if it is running but its visibility
+    timeout expired (the worker that claimed it crashed or was restarted).
+
+    Args:
+        worker_id (str): Unique identifier of the claiming worker.
+        limit (int): Maximum number of jobs to claim.
+        exclude_user_ids (Optional[set]): Users whose jobs are left to other workers.
+        max_per_user (Optional[int]): Maximum number of jobs of a single user to claim,
+                                      so that one user's backlog does not fill the batch.
+
+    Returns:
+        list[IngestionJob]: The claimed jobs.
+    """
+    if limit <= 0:
+        return []
+
+    now = timezone.now()
+    nb_candidates = limit * CLAIM_CANDIDATES_FACTOR if max_per_user else limit
+    with transaction.atomic():
+        candidates = list(
+            IngestionJob.objects.select_for_update(skip_locked=True)
+            .select_related("social_api", "social_api__user")
+            .filter(
+                Q(status=INGESTION_JOB_PENDING, run_after__lte=now)
+                | Q(
+                    status=INGESTION_JOB_RUNNING,
+                    locked_until__lt=now,
+                    attempts__lt=F("max_attempts"),
+                )
+            )
+            .exclude(social_api__user_id__in=exclude_user_ids or ())
+            .order_by("run_after")[:nb_candidates]
+        )
+        # candidates that are not kept are unlocked when the transaction commits
+        jobs = []
+        jobs_per_user = Counter()
+        for job in candidates:
+            user_id = job.social_api.user_id
+            if max_per_user and jobs_per_user[user_id] >= max_per_user:
+                continue
+            jobs_per_user[user_id] += 1
+            jobs.append(job)
+            if len(jobs) == limit:
+                break
+
+        for job in jobs:
+            job.status = INGESTION_JOB_RUNNING
+            job.attempts += 1
+            job.locked_by = worker_id
+            job.locked_until = now + timedelta(seconds=INGESTION_VISIBILITY_TIMEOUT)
+        IngestionJob.objects.bulk_update(
+            jobs, ["status", "attempts", "locked_by", "locked_until"]
+        )
+
+    return jobs
+
+
+def complete_job(job: IngestionJob):
+    """
+    Mark a job as successfully processed.
+
+    The update is ignored if another worker reclaimed the job in the meantime.
+
+    Args:
+        job (IngestionJob): The job to complete.
+    """
+    IngestionJob.objects.filter(id=job.id, locked_by=job.locked_by).update(
+        status=INGESTION_JOB_DONE,
+        locked_until=None,
+        updated_at=timezone.now(),
+    )
+
+
+def fail_job(job: IngestionJob, error: str):
+    """
+    Reschedule a failed job with exponential backoff, or mark it as failed once
+    it has no attempts left.
+
+    Args:
+        job (IngestionJob): The job that failed.
+        error (str): Description of the error.
+    """
+    now = timezone.now()
+
+    if job.attempts >= job.max_attempts:
+        LOGGER.error(
+            f"Ingestion job ID: {job.id} failed after {job.attempts} attempts: {error}"
+        )
+        status = INGESTION_JOB_FAILED
+        run_after = job.run_after
+    else:
+        delay = INGESTION_RETRY_BASE_DELAY * 2 ** (job.attempts - 1)
+        delay += random.uniform(0, delay / 2)  # jitter to spread retries
+        LOGGER.warning(
+            f"Ingestion job ID: {job.id} failed (attempt {job.attempts}/{job.max_attempts}), retrying in {int(delay)}s: {error}"
+        )
+        status = INGESTION_JOB_PENDING
+        run_after = now + timedelta(seconds=delay)
+
+    IngestionJob.objects.filter(id=job.id, locked_by=job.locked_by).update(
+        status=status,
+        run_after=run_after,
+        locked_until=None,
+        last_error=error,
+        updated_at=now,
+    )
+
+
+def release_expired_jobs() -> int:
+    """
+    Mark as failed the running jobs whose visibility timeout expired on their last attempt.
+
+    Returns:
+        int: The number of jobs marked as failed.
+    """
+    return IngestionJob.objects.filter(
+        status=INGESTION_JOB_RUNNING,
+        locked_until__lt=timezone.now(),
+        attempts__gte=F("max_attempts"),
+    ).update(
+        status=INGESTION_JOB_FAILED,
+        locked_until=None,
+        last_error="Visibility timeout expired",
+        updated_at=timezone.now(),
+    )
+
+
+def get_coalescing_stats(since: datetime = None) -> dict:
+    """
+    Count the mailbox notifications received and the ones folded into an existing sync job.
+
+    Args:
+        since (Optional[datetime]): Only count jobs created after this date.
+
+    Returns:
+        dict: A dictionary containing:
+            - notifications (int): Number of notifications received.
+            - folded (int): Number of notifications folded into an existing job.
+            - sync_jobs (int): Number of sync jobs created.
+    """
+    jobs = IngestionJob.objects.filter(email_id__isnull=True)
+    if since:
+        jobs = jobs.filter(created_at__gte=since)
+
+    stats = jobs.aggregate(sync_jobs=Count("id"), folded=Sum("coalesced_count"))
+    folded = stats["folded"] or 0
+    return {
+        "notifications": stats["sync_jobs"] + folded,
+        "folded": folded,
+        "sync_jobs": stats["sync_jobs"],
+    }
@@ -0,0 +1,77 @@
+"""
+Mailbox synchronization for ingestion jobs that do not target a specific email.
+
+Push notifications only tell that a mailbox changed. When the provider supports it, the
+worker asks for the changes since the last synchronization and enqueues one job per new email.
+
+Features:
+- ✅ get_sync_start_date: Date from which a mailbox without synchronization state is listed.
+- ✅ sync_mailbox: Enqueue the emails received since the last synchronization.
+"""
+
+import logging
+from django.db.models import Max
+from aomail.constants import GOOGLE, MICROSOFT
+from aomail.email_providers.google import email_operations as email_operations_google
+from aomail.email_providers.microsoft import (
+    email_operations as email_operations_microsoft,
+)
+from aomail.email_providers.utils import email_to_db
+from aomail.ingestion.queue import enqueue_emails
+from aomail.models import Email, SocialAPI, Subscription
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+def get_sync_start_date(social_api: SocialAPI):
+    """
+    Returns the date from which a mailbox without synchronization state is listed:
+    the date of the latest stored email, or the subscription date if none is stored.
+
+    Args:
+        social_api (SocialAPI): The SocialAPI instance to synchronize.
+
+    Returns:
+        datetime: The start date of the synchronization.
+    """
+    last_email_date = Email.objects.filter(social_api=social_api).aggregate(
+        Max("date")
+    )["date__max"]
+    if last_email_date:
+        return last_email_date
+    return Subscription.objects.get(user=social_api.user).created_at
+
+
+def sync_mailbox(social_api: SocialAPI):
+    """
+    Enqueue the emails received since the last synchronization of the mailbox.
+
+    Falls back to processing the latest email when the provider has no incremental
+    synchronization or when no synchronization state is stored yet. The synchronization
+    state is only saved once the new emails are enqueued.
+
+    Args:
+        social_api (SocialAPI): The SocialAPI instance to synchronize.
+    """
+    sync_state = None
+    if social_api.type_api == GOOGLE:
+        sync_state = email_operations_google.get_new_email_ids(social_api)
+    elif social_api.type_api == MICROSOFT:
+        sync_state = email_operations_microsoft.get_new_email_ids(
+            social_api, get_sync_start_date(social_api)
+        )
+
+    if sync_state is None:
+        email_to_db(social_api, raise_errors=True)
+        return
+
+    email_ids = sync_state["email_ids"]
+    LOGGER.info(f"Found {len(email_ids)} new emails for social API ID: {social_api.id}")
+    enqueue_emails(social_api, email_ids)
+
+    # the synchronization state only moves forward once the new emails are enqueued
+    if social_api.type_api == GOOGLE:
+        email_operations_google.save_history_id(sync_state)
+    elif social_api.type_api == MICROSOFT:
+        email_operations_microsoft.save_delta_link(social_api, sync_state)
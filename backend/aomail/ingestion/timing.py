@@ -0,0 +1,188 @@
+"""
+Per-stage latency instrumentation of the email ingestion pipeline.
+
+Each timed stage is logged with structured fields (stage, duration_ms, email_provider, llm_provider,
+llm_model, status) and recorded in an in-process histogram. The JSON log file is what
+`python manage.py ingest_profile` reads to compute percentiles across processes. Stages may nest:
+"fetch" includes "parse".
+
+Features:
+- ✅ stage_context: Set the default fields of the stages timed by the current thread.
+- ✅ stage_timer: Time a block of code as an ingestion stage.
+- ✅ get_stage_histograms: Histograms of the stage durations recorded by the process.
+- ✅ read_stage_durations: Read the stage durations logged in a JSON log file.
+"""
+
+import contextvars
+import json
+import logging
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator
+
+
+LOGGER = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets, in milliseconds
+STAGE_BUCKETS_MS = (
+    5,
+    10,
+    25,
+    50,
+    100,
+    250,
+    500,
+    1000,
+    2500,
+    5000,
+    10000,
+    30000,
+    60000,
+    math.inf,
+)
+STAGE_FIELDS = ("email_provider", "llm_provider", "llm_model")
+
+_stage_fields = contextvars.ContextVar("stage_fields", default={})
+_histograms: dict[tuple, dict] = {}
+_histograms_lock = threading.Lock()
+
+
+@contextmanager
+def stage_context(**fields) -> Iterator[None]:
+    """
+    Set the default fields of the stages timed by the current thread inside the block.
+
+    Args:
+        **fields: Values of STAGE_FIELDS, such as email_provider="google".
+    """
+    token = _stage_fields.set({**_stage_fields.get(), **fields})
+    try:
+        yield
+    finally:
+        _stage_fields.reset(token)
+
+
+@contextmanager
+def stage_timer(stage: str, **fields) -> Iterator[None]:
+    """
+    Time a block of code as an ingestion stage.
+
+    The duration is recorded even if the block raises, with the status "error".
+
+    Args:
+        stage (str): Name of the stage, such as "fetch" or "llm_categorize".
+        **fields: Values of STAGE_FIELDS overriding the ones of `stage_context`.
+    """
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        record_stage(stage, duration_ms, status, {**_stage_fields.get(), **fields})
+
+
+def record_stage(stage: str, duration_ms: float, status: str, fields: dict):
+    """
+    Log a stage duration and add it to the histograms of the process.
+
+    Args:
+        stage (str): Name of the stage.
+        duration_ms (float): Duration of the stage in milliseconds.
+        status (str): "ok" or "error".
+        fields (dict): Values of STAGE_FIELDS.
+    """
+    values = {field: fields.get(field) for field in STAGE_FIELDS}
+    LOGGER.info(
+        f"Ingestion stage {stage} took {duration_ms:.1f} ms",
+        extra={
+            "stage": stage,
+            "duration_ms": round(duration_ms, 3),
+            "status": status,
+            **values,
+        },
+    )
+
+    key = (stage, values["email_provider"], values["llm_model"])
+    with _histograms_lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {
+                "count": 0,
+                "errors": 0,
+                "sum_ms": 0.0,
+                "buckets": [0] * len(STAGE_BUCKETS_MS),
+            }
+        histogram["count"] += 1
+        histogram["errors"] += status != "ok"
+        histogram["sum_ms"] += duration_ms
+        histogram["buckets"][bisect_left(STAGE_BUCKETS_MS, duration_ms)] += 1
+
+
+def get_stage_histograms() -> dict[tuple, dict]:
+    """
+    Returns the histograms of the stage durations recorded by the process.
+
+    Returns:
+        dict[tuple, dict]: Histograms keyed by (stage, email_provider, llm_model), each containing:
+            - count (int): Number of recorded durations.
+            - errors (int): Number of stages that raised.
+            - sum_ms (float): Sum of the durations in milliseconds.
+            - buckets (list[int]): Number of durations per bucket of STAGE_BUCKETS_MS.
+    """
+    with _histograms_lock:
+        return {
+            key: {**histogram, "buckets": list(histogram["buckets"])}
+            for key, histogram in _histograms.items()
+        }
+
+
+def reset_stage_histograms():
+    """Clears the histograms of the process."""
+    with _histograms_lock:
+        _histograms.clear()
+
+
+def read_stage_durations(
+    log_path: str, since: datetime | None = None, date_format: str = "%Y-%m-%d %H:%M:%S"
+) -> dict[tuple, list[float]]:
+    """
+    Read the stage durations logged in a JSON log file.
+
+    Args:
+        log_path (str): Path of the JSON log file.
+        since (datetime | None): Ignore the records logged before this local time.
+        date_format (str): Format of the "asctime" field of the records.
+
+    Returns:
+        dict[tuple, list[float]]: Durations in milliseconds keyed by (stage, email_provider, llm_model).
+    """
+    durations: dict[tuple, list[float]] = {}
+    with open(log_path, encoding="utf-8", errors="replace") as log_file:
+        for line in log_file:
+            if '"duration_ms"' not in line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "stage" not in record:
+                continue
+            if since and datetime.strptime(record["asctime"], date_format) < since:
+                continue
+
+            key = (
+                record["stage"],
+                record.get("email_provider"),
+                record.get("llm_model"),
+            )
+            durations.setdefault(key, []).append(float(record["duration_ms"]))
+
+    return durations
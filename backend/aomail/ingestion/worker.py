@@ -0,0 +1,148 @@
+"""
+Ingestion worker consuming the email ingestion queue.
+
+Each worker process runs jobs on a bounded IngestionExecutor, with per-user and per-provider caps.
+Throughput scales by starting more worker processes (`python manage.py ingest_worker`),
+independently of the web server.
+"""
+
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from django.db import close_old_connections
+from aomail.ai_providers.rate_limiter import get_rate_limiter_stats
+from aomail.ai_providers.router import get_router_stats
+from aomail.constants import (
+    INGESTION_METRICS_INTERVAL,
+    INGESTION_POLL_INTERVAL,
+    INGESTION_WORKER_CONCURRENCY,
+)
+from aomail.email_providers.utils import email_to_db
+from aomail.ingestion.budget import get_budget_stats
+from aomail.ingestion.enrichment_cache import get_enrichment_cache_stats
+from aomail.ingestion.executor import (
+    IngestionExecutor,
+    get_call_limit,
+    get_provider,
+)
+from aomail.ingestion.queue import (
+    claim_jobs,
+    complete_job,
+    fail_job,
+    release_expired_jobs,
+)
+from aomail.ingestion.sync import sync_mailbox
+from aomail.ingestion.timing import get_stage_histograms
+from aomail.models import IngestionJob
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class IngestionWorker:
+    """Claims ingestion jobs from the database and processes them with bounded concurrency."""
+
+    def __init__(
+        self,
+        concurrency: int = INGESTION_WORKER_CONCURRENCY,
+        poll_interval: float = INGESTION_POLL_INTERVAL,
+    ):
+        """
+        Initializes an IngestionWorker object.
+
+        Args:
+            concurrency (int): Maximum number of jobs processed at the same time.
+            poll_interval (float): Seconds to wait between two polls when the queue is empty.
+        """
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.stop_event = threading.Event()
+
+    def stop(self, *args):
+        """Stops claiming new jobs. In-flight jobs are completed before `run` returns."""
+        LOGGER.info(f"Stopping ingestion worker {self.worker_id}")
+        self.stop_event.set()
+
+    def run(self):
+        """Polls the queue until the worker is stopped."""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        LOGGER.info(
+            f"Ingestion worker {self.worker_id} started with concurrency {self.concurrency}"
+        )
+
+        executor = IngestionExecutor(max_workers=self.concurrency)
+        in_flight: set[Future] = set()
+        last_metrics_log = time.monotonic()
+        while not self.stop_event.is_set():
+            release_expired_jobs()
+            jobs = claim_jobs(
+                self.worker_id,
+                self.concurrency - len(in_flight),
+                executor.get_saturated_users(),
+                executor.max_per_user,
+            )
+            for job in jobs:
+                in_flight.add(
+                    executor.submit(
+                        job.social_api.user_id,
+                        get_provider(job.social_api),
+                        self.process_job,
+                        job,
+                    )
+                )
+
+            if time.monotonic() - last_metrics_log >= INGESTION_METRICS_INTERVAL:
+                LOGGER.info(
+                    f"Ingestion worker {self.worker_id} metrics: {executor.get_metrics()}",
+                    extra={
+                        "call_limit": get_call_limit().get_metrics(),
+                        "enrichment_cache": get_enrichment_cache_stats(),
+                        "llm_rate_limits": get_rate_limiter_stats(),
+                        "llm_router": get_router_stats(),
+                        "token_budget": get_budget_stats(),
+                        "stage_histograms": {
+                            "/".join(str(field) for field in key): histogram
+                            for key, histogram in get_stage_histograms().items()
+                        },
+                    },
+                )
+                last_metrics_log = time.monotonic()
+
+            if in_flight:
+                _, in_flight = wait(
+                    in_flight, timeout=self.poll_interval, return_when=FIRST_COMPLETED
+                )
+            else:
+                self.stop_event.wait(self.poll_interval)
+
+        executor.shutdown(wait=True)
+
+        LOGGER.info(f"Ingestion worker {self.worker_id} stopped")
+
+    def process_job(self, job: IngestionJob):
+        """
+        Processes a single job and records its outcome in the queue.
+
+        Args:
+            job (IngestionJob): The claimed job.
+        """
+        try:
+            if job.email_id is None:
+                LOGGER.info(
+                    f"Synchronizing social API ID: {job.social_api.id} ({job.coalesced_count} notifications folded)"
+                )
+                sync_mailbox(job.social_api)
+            else:
+                email_to_db(job.social_api, job.email_id, raise_errors=True)
+            complete_job(job)
+        except Exception as e:
+            fail_job(job, str(e))
+        finally:
+            close_old_connections()
@@ -0,0 +1,75 @@
+"""
+Prints the latency percentiles of the email ingestion stages from the JSON log file.
+
+Usage:
+    python manage.py ingest_profile [--minutes N] [--log-file PATH] [--stage NAME]
+"""
+
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from aomail.ingestion.timing import read_stage_durations
+from aomail.utils.metrics import percentile
+
+
+class Command(BaseCommand):
+    help = "Prints p50/p95/p99 per ingestion stage from recent runs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--minutes",
+            type=float,
+            default=60,
+            help="Only use the stages logged during the last N minutes (0 for the whole file)",
+        )
+        parser.add_argument(
+            "--log-file",
+            default=settings.BACKEND_LOG_PATH,
+            help="JSON log file written by the ingestion workers",
+        )
+        parser.add_argument(
+            "--stage",
+            action="append",
+            help="Only print this stage (repeatable)",
+        )
+
+    def handle(self, *args, **options):
+        since = (
+            datetime.now() - timedelta(minutes=options["minutes"])
+            if options["minutes"]
+            else None
+        )
+        durations = read_stage_durations(
+            options["log_file"], since, settings.CUSTOM_DATE_FORMAT
+        )
+        if options["stage"]:
+            durations = {
+                key: values
+                for key, values in durations.items()
+                if key[0] in options["stage"]
+            }
+
+        if not durations:
+            self.stdout.write("No ingestion stage recorded in this period")
+            return
+
+        row = "{:<22} {:<10} {:<28} {:>7} {:>10} {:>10} {:>10}"
+        self.stdout.write(
+            row.format(
+                "stage", "provider", "llm_model", "count", "p50 ms", "p95 ms", "p99 ms"
+            )
+        )
+        for (stage, email_provider, llm_model), values in sorted(
+            durations.items(), key=lambda item: tuple(str(field) for field in item[0])
+        ):
+            self.stdout.write(
+                row.format(
+                    stage,
+                    email_provider or "-",
+                    llm_model or "-",
+                    len(values),
+                    f"{percentile(values, 50):.1f}",
+                    f"{percentile(values, 95):.1f}",
+                    f"{percentile(values, 99):.1f}",
+                )
+            )
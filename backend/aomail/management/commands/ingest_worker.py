@@ -0,0 +1,35 @@
+"""
+Starts an email ingestion worker.
+
+Usage:
+    python manage.py ingest_worker [--concurrency N] [--poll-interval SECONDS]
+"""
+
+from django.core.management.base import BaseCommand
+from aomail.constants import INGESTION_POLL_INTERVAL, INGESTION_WORKER_CONCURRENCY
+from aomail.ingestion.worker import IngestionWorker
+
+
+class Command(BaseCommand):
+    help = "Consumes the email ingestion queue"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=INGESTION_WORKER_CONCURRENCY,
+            help="Maximum number of emails processed at the same time",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=INGESTION_POLL_INTERVAL,
+            help="Seconds to wait between two polls when the queue is empty",
+        )
+
+    def handle(self, *args, **options):
+        worker = IngestionWorker(
+            concurrency=options["concurrency"],
+            poll_interval=options["poll_interval"],
+        )
+        worker.run()
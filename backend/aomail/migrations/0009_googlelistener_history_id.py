@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aomail', '0008_ingestionjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='googlelistener',
+            name='history_id',
+            field=models.CharField(max_length=50, null=True),
+        ),
+    ]
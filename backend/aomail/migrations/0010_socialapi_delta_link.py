@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aomail', '0009_googlelistener_history_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='socialapi',
+            name='delta_link',
+            field=models.TextField(null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aomail', '0010_socialapi_delta_link'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestionjob',
+            name='coalesced_count',
+            field=models.IntegerField(default=0),
+        ),
+    ]
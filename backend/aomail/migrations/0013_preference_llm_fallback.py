@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aomail', '0012_llmcacheentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='preference',
+            name='llm_fallback',
+            field=models.BooleanField(default=False),
+        ),
+    ]
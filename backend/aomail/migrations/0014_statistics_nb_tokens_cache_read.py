@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aomail', '0013_preference_llm_fallback'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='statistics',
+            name='nb_tokens_cache_read',
+            field=models.IntegerField(default=0),
+        ),
+    ]
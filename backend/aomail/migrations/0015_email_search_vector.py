@@ -0,0 +1,96 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:44
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+
+# The search document of an email: subject (weight A), sender (weight B) and CC senders (weight C).
+# Addresses are also indexed split on their punctuation so that "john" or "example" match "john.doe@example.com".
+CREATE_SEARCH_VECTOR_TRIGGERS = """
+CREATE FUNCTION aomail_email_search_document(email_subject text, email_sender_id bigint, email_id bigint)
+RETURNS tsvector LANGUAGE sql STABLE AS $$
+    SELECT setweight(to_tsvector('simple', coalesce(email_subject, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce((
+            SELECT name || ' ' || email || ' ' || regexp_replace(email, '[^[:alnum:]]+', ' ', 'g')
+            FROM aomail_sender WHERE id = email_sender_id
+        ), '')), 'B')
+        || setweight(to_tsvector('simple', coalesce((
+            SELECT string_agg(name || ' ' || email || ' ' || regexp_replace(email, '[^[:alnum:]]+', ' ', 'g'), ' ')
+            FROM aomail_cc_sender WHERE email_object_id = email_id
+        ), '')), 'C')
+$$;
+
+CREATE FUNCTION aomail_email_search_vector_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector := aomail_email_search_document(NEW.subject, NEW.sender_id, NEW.id);
+    RETURN NEW;
+END;
+$$;
+
+CREATE TRIGGER aomail_email_search_vector
+BEFORE INSERT OR UPDATE OF subject, sender_id ON aomail_email
+FOR EACH ROW EXECUTE FUNCTION aomail_email_search_vector_trigger();
+
+CREATE FUNCTION aomail_cc_sender_search_vector_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE aomail_email SET search_vector = aomail_email_search_document(subject, sender_id, id)
+    WHERE id IN (SELECT email_object_id FROM changed_cc_senders);
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER aomail_cc_sender_insert_search_vector
+AFTER INSERT ON aomail_cc_sender REFERENCING NEW TABLE AS changed_cc_senders
+FOR EACH STATEMENT EXECUTE FUNCTION aomail_cc_sender_search_vector_trigger();
+
+CREATE TRIGGER aomail_cc_sender_update_search_vector
+AFTER UPDATE ON aomail_cc_sender REFERENCING NEW TABLE AS changed_cc_senders
+FOR EACH STATEMENT EXECUTE FUNCTION aomail_cc_sender_search_vector_trigger();
+
+CREATE TRIGGER aomail_cc_sender_delete_search_vector
+AFTER DELETE ON aomail_cc_sender REFERENCING OLD TABLE AS changed_cc_senders
+FOR EACH STATEMENT EXECUTE FUNCTION aomail_cc_sender_search_vector_trigger();
+
+CREATE FUNCTION aomail_sender_search_vector_trigger() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE aomail_email SET search_vector = aomail_email_search_document(subject, sender_id, id)
+    WHERE sender_id = NEW.id;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER aomail_sender_search_vector
+AFTER UPDATE OF name, email ON aomail_sender
+FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name OR OLD.email IS DISTINCT FROM NEW.email)
+EXECUTE FUNCTION aomail_sender_search_vector_trigger();
+"""
+
+DROP_SEARCH_VECTOR_TRIGGERS = """
+DROP TRIGGER IF EXISTS aomail_sender_search_vector ON aomail_sender;
+DROP TRIGGER IF EXISTS aomail_cc_sender_delete_search_vector ON aomail_cc_sender;
+DROP TRIGGER IF EXISTS aomail_cc_sender_update_search_vector ON aomail_cc_sender;
+DROP TRIGGER IF EXISTS aomail_cc_sender_insert_search_vector ON aomail_cc_sender;
+DROP TRIGGER IF EXISTS aomail_email_search_vector ON aomail_email;
+DROP FUNCTION IF EXISTS aomail_sender_search_vector_trigger();
+DROP FUNCTION IF EXISTS aomail_cc_sender_search_vector_trigger();
+DROP FUNCTION IF EXISTS aomail_email_search_vector_trigger();
+DROP FUNCTION IF EXISTS aomail_email_search_document(text, bigint, bigint);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aomail', '0014_statistics_nb_tokens_cache_read'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='email',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(CREATE_SEARCH_VECTOR_TRIGGERS, DROP_SEARCH_VECTOR_TRIGGERS),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:50
+
+from django.db import migrations
+
+
+BACKFILL_BATCH_SIZE = 10000
+
+
+def backfill_search_vector(apps, schema_editor):
+    """Fills the search vector of the existing emails, one range of ids per transaction."""
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('SELECT min(id), max(id) FROM aomail_email')
+        min_id, max_id = cursor.fetchone()
+        if min_id is None:
+            return
+
+        for start in range(min_id, max_id + 1, BACKFILL_BATCH_SIZE):
+            cursor.execute(
+                'UPDATE aomail_email SET search_vector = aomail_email_search_document(subject, sender_id, id) '
+                'WHERE id >= %s AND id < %s',
+                [start, start + BACKFILL_BATCH_SIZE],
+            )
+
+
+class Migration(migrations.Migration):
+    # each batch is committed on its own instead of locking the whole email table
+    atomic = False
+
+    dependencies = [
+        ('aomail', '0015_email_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:52
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # the index is built without locking the writes to the email table
+    atomic = False
+
+    dependencies = [
+        ('aomail', '0016_email_search_vector_backfill'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='email',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='email_search_vector_gin'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:57
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # the indexes are built without locking the writes to the email table
+    atomic = False
+
+    dependencies = [
+        ('aomail', '0017_email_search_vector_gin'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='email',
+            index=models.Index(fields=['user', 'read', 'priority', '-date'], name='email_user_read_priority_date'),
+        ),
+        AddIndexConcurrently(
+            model_name='email',
+            index=models.Index(fields=['user', '-date'], name='email_user_date'),
+        ),
+        AddIndexConcurrently(
+            model_name='email',
+            index=models.Index(condition=models.Q(('read', False)), fields=['user', 'answer', 'date'], name='email_unread_answer_date'),
+        ),
+    ]
@@ -5,8 +5,11 @@ Each model corresponds to a database table, storing data and implementing securi
 """
 
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 
 
 class Subscription(models.Model):
@@ -35,6 +38,7 @@ class Statistics(models.Model):
     # Token usage
     nb_tokens_input = models.IntegerField(default=0)
     nb_tokens_output = models.IntegerField(default=0)
+    nb_tokens_cache_read = models.IntegerField(default=0)  # part of nb_tokens_input
 
     # Answer
     nb_answer_required = models.IntegerField(default=0)
@@ -90,6 +94,7 @@ class Preference(models.Model):
     # LLM settings
     llm_provider = models.CharField(max_length=50, default="google")
     llm_model = models.CharField(max_length=50, null=True)
+    llm_fallback = models.BooleanField(default=False)
 
     # Prompts
     improve_email_draft_prompt = models.TextField(max_length=1000, null=True)
@@ -151,6 +156,7 @@ class SocialAPI(models.Model):
         null=True,
         related_name="smtp_config",
     )
+    delta_link = models.TextField(null=True)  # Microsoft Graph inbox delta link
 
 
 class Rule(models.Model):
@@ -207,6 +213,7 @@ class GoogleListener(models.Model):
     """Stores information about Google subscriptions"""
 
     last_modified = models.DateTimeField(null=True)
+    history_id = models.CharField(max_length=50, null=True)  # last synced historyId
     social_api = models.ForeignKey(
         SocialAPI,
         on_delete=models.CASCADE,
@@ -215,6 +222,40 @@ class GoogleListener(models.Model):
     )
 
 
+class IngestionJob(models.Model):
+    """Model for storing email ingestion jobs consumed by the ingestion workers."""
+
+    social_api = models.ForeignKey(
+        SocialAPI, on_delete=models.CASCADE, related_name="ingestion_jobs"
+    )
+    email_id = models.CharField(max_length=200, null=True)  # None = mailbox sync
+    status = models.CharField(max_length=20, default="pending")
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True)
+    locked_by = models.CharField(max_length=100, null=True)
+    last_error = models.TextField(null=True)
+    coalesced_count = models.IntegerField(
+        default=0
+    )  # notifications folded into the job
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "run_after"])]
+
+
+class LLMCacheEntry(models.Model):
+    """Model for storing the responses of idempotent LLM prompts, shared by identical requests."""
+
+    key = models.CharField(max_length=64, unique=True)  # SHA-256 of the prompt inputs
+    function = models.CharField(max_length=100)
+    response = models.JSONField()
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
 class Email(models.Model):
     """Model for storing email information."""
 
@@ -246,6 +287,26 @@ class Email(models.Model):
     newsletter = models.BooleanField(default=False)
     notification = models.BooleanField(default=False)
     meeting = models.BooleanField(default=False)
+    # subject, sender and CC senders, kept up to date by the database triggers of migration 0015
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="email_search_vector_gin"),
+            # email list and sidebar counts: unread then read emails by priority, most recent first
+            models.Index(
+                fields=["user", "read", "priority", "-date"],
+                name="email_user_read_priority_date",
+            ),
+            # statistics over a period of time and archived emails
+            models.Index(fields=["user", "-date"], name="email_user_date"),
+            # answer suggestions: unread emails waiting for an answer
+            models.Index(
+                fields=["user", "answer", "date"],
+                condition=models.Q(read=False),
+                name="email_unread_answer_date",
+            ),
+        ]
 
 
 class Filter(models.Model):
@@ -8,6 +8,7 @@ from django.utils import timezone
 from datetime import timedelta
 from aomail.models import GoogleListener
 from aomail.email_providers.google import webhook as google_webhook
+from aomail.ai_providers.response_cache import delete_expired_entries
 from aomail.constants import ENV
 
 
@@ -66,3 +67,9 @@ def renew_gmail_subscriptions():
     minutes, seconds = divmod(remainder, 60)
     formatted_time = f"{int(hours):02}:{int(minutes):02}:{int(seconds):02}"
     LOGGER.info(f"Renewed {nb_subrenew} subscriptions in {formatted_time}.")
+
+
+def delete_expired_llm_cache_entries():
+    """Deletes the LLM responses whose cache entry has expired."""
+    nb_deleted = delete_expired_entries()
+    LOGGER.info(f"[{ENV}] Deleted {nb_deleted} expired LLM cache entries.")
@@ -117,12 +117,16 @@ urlpatterns = [
     path('search_tree_knowledge/', ai.search_tree_knowledge, name='search_tree_knowledge'),
     path('find_user_ai/', ai.find_user_view_ai, name='find_user_view_ai'),
     path('new_email_ai/', ai.new_email_ai, name='new_email_ai'),
+    path('new_email_ai_stream/', ai.new_email_ai_stream, name='new_email_ai_stream'),
     path('correct_email_language/', ai.correct_email_language, name='correct_email_language'),
     path('check_email_copywriting/', ai.check_email_copywriting, name='check_email_copywriting'),
     path('generate_email_response_keywords/', ai.generate_email_response_keywords, name='generate_email_response_keywords'),
     path('generate_email_answer/', ai.generate_email_answer, name='generate_email_answer'),
+    path('generate_email_answer_stream/', ai.generate_email_answer_stream, name='generate_email_answer_stream'),
     path('get_new_email_response/', ai.get_new_email_response, name='get_new_email_response'),
+    path('get_new_email_response_stream/', ai.get_new_email_response_stream, name='get_new_email_response_stream'),
     path('improve_draft/', ai.improve_draft, name='improve_draft'),
+    path('improve_draft_stream/', ai.improve_draft_stream, name='improve_draft_stream'),
     path('handle_email_action/', ai.handle_email_action, name='handle_email_action'),
     #----------------------- OAuth 2.0 EMAIL PROVIDERS API -----------------------#
     path('microsoft/auth_url/', auth_microsoft.generate_auth_url, name='microsoft_auth_url'),
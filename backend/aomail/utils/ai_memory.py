@@ -2,9 +2,11 @@
 Handles conversations with prompt engineering for user/AI interaction.
 """
 
+import re
+from typing import AsyncIterator
 from django.contrib.auth.models import User
 from langchain_community.chat_message_histories import ChatMessageHistory
-from aomail.ai_providers import llm_functions
+from aomail.ai_providers import llm_functions, streaming
 from aomail.models import Preference
 from aomail.ai_providers.prompts import (
     IMPROVE_EMAIL_DRAFT_PROMPT,
@@ -80,6 +82,7 @@ class EmailReplyConversation:
             agent_settings,
             preference.llm_provider,
             preference.llm_model,
+            allow_fallback=preference.llm_fallback,
         )
         body = result_json.get("body", "")
 
@@ -87,6 +90,42 @@ class EmailReplyConversation:
 
         return result_json
 
+    async def stream_improve_email_response(
+        self, user_input: str, agent_settings: dict, preference: Preference
+    ) -> AsyncIterator[dict]:
+        """
+        Streaming variant of `improve_email_response`.
+
+        Args:
+            user_input (str): The user's input for improving the email response.
+            agent_settings (dict): Settings for the AI agent to guide the response.
+            preference (Preference): The preferences of the user, loaded before the stream starts.
+
+        Yields:
+            dict: The events of `streaming.stream_improve_email_response`, the history is updated
+                  before the result event.
+        """
+        base_prompt = (
+            preference.improve_email_response_prompt
+            if preference.improve_email_response_prompt
+            else IMPROVE_EMAIL_RESPONSE_PROMPT
+        )
+        async for event in streaming.stream_improve_email_response(
+            base_prompt,
+            self.importance,
+            self.subject,
+            self.body,
+            self.history.model_dump(),
+            user_input,
+            agent_settings,
+            preference.llm_provider,
+            preference.llm_model,
+            allow_fallback=preference.llm_fallback,
+        ):
+            if event["type"] == "result":
+                self.update_history(user_input, event["result"].get("body", ""))
+            yield event
+
 
 class GenerateEmailConversation:
     """Handles the conversation with the AI to generate an email."""
@@ -167,15 +206,68 @@ class GenerateEmailConversation:
             self.formality,
             preference.llm_provider,
             preference.llm_model,
+            allow_fallback=preference.llm_fallback,
         )
 
+        self.finish_draft(user_input, result_json)
+
+        return result_json
+
+    async def stream_improve_draft(
+        self,
+        user_input: str,
+        language: str,
+        agent_settings: dict,
+        preference: Preference,
+    ) -> AsyncIterator[dict]:
+        """
+        Streaming variant of `improve_draft`.
+
+        Args:
+            user_input (str): The user's input for improving the email draft.
+            language (str): The language used for the email content.
+            agent_settings (dict): Settings for the AI agent to guide the response.
+            preference (Preference): The preferences of the user, loaded before the stream starts.
+
+        Yields:
+            dict: The events of `streaming.stream_improve_draft`, the body of the result is formatted
+                  and the history updated before the result event.
+        """
+        base_prompt = (
+            preference.improve_email_draft_prompt
+            if preference.improve_email_draft_prompt
+            else IMPROVE_EMAIL_DRAFT_PROMPT
+        )
+        async for event in streaming.stream_improve_draft(
+            base_prompt,
+            language,
+            agent_settings,
+            self.subject,
+            self.body,
+            self.history.model_dump(),
+            user_input,
+            self.length,
+            self.formality,
+            preference.llm_provider,
+            preference.llm_model,
+            allow_fallback=preference.llm_fallback,
+        ):
+            if event["type"] == "result":
+                self.finish_draft(user_input, event["result"])
+            yield event
+
+    def finish_draft(self, user_input: str, result_json: dict):
+        """
+        Formats the body of an improved draft and updates the history with it.
+
+        Args:
+            user_input (str): The user's input for improving the email draft.
+            result_json (dict): The result of the LLM, its body is updated in place.
+        """
         # Get the subject and body from the result
         subject = result_json.get("subject", "")
         body = result_json.get("body", "")
 
-        # Ensure proper spacing in the HTML content
-        import re
-
         # Add spaces between words if they're missing (camelCase or after punctuation)
         body = re.sub(r"([a-zA-Z0-9])([A-Z])", r"\1 \2", body)
         body = re.sub(r"([.!?])([A-Za-z])", r"\1 \2", body)
@@ -185,5 +277,3 @@ class GenerateEmailConversation:
 
         # Update history with the improved content
         self.update_history(user_input, subject, body)
-
-        return result_json
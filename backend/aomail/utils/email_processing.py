@@ -6,6 +6,7 @@ import logging
 import re
 import base64
 from django.db import IntegrityError
+from aomail.ai_providers.utils import estimate_tokens
 from aomail.constants import DEFAULT_CATEGORY
 from aomail.models import Category, Contact
 from bs4 import BeautifulSoup
@@ -297,3 +298,197 @@ def preprocess_email(email_content: str) -> str:
     email_content = re.sub(r"\n{3,}", "\n\n", email_content)
 
     return email_content.strip()
+
+
+# ----------------------- TOKEN BUDGETING -----------------------#
+QUOTE_HEADER_PATTERNS = [
+    # Gmail and Apple Mail, possibly wrapped on two lines: "On Mon, Jan 1, 2024, John <john@x.com> wrote:"
+    re.compile(
+        r"^(?:On|Le|Am|El)\s[^\n]*(?:\n[^\n]*)?(?:wrote|a écrit|schrieb|escribió)\s?:$",
+        re.M,
+    ),
+    # Outlook
+    re.compile(
+        r"^-{2,}\s*(?:Original Message|Message d'origine)\s*-{2,}$", re.M | re.I
+    ),
+    re.compile(r"^(?:From|De)\s?:[^\n]*\n(?:Sent|Date|Envoyé)\s?:", re.M),
+    re.compile(r"^_{10,}$", re.M),
+]
+# the header block following these markers is the one of a forwarded email, not of a quoted reply
+FORWARD_MARKER_PATTERN = re.compile(
+    r"^[ \t-]*(?:Forwarded message|Message transféré|Begin forwarded message|"
+    r"Début du message réexpédié)[ \t:-]*$",
+    re.M | re.I,
+)
+BANNER_PATTERN = re.compile(
+    r"^(?:\[?(?:EXTERNAL|EXTERNE)\]?|CAUTION\s?:|ATTENTION\s?:)", re.I
+)
+QUOTED_LINE_PATTERN = re.compile(r"^>.*(?:\n|$)", re.M)
+MOBILE_SIGNATURE_PATTERN = re.compile(
+    r"^(?:Sent from my|Get Outlook for|Envoyé de mon|Télécharger Outlook pour)\b.*$",
+    re.M | re.I,
+)
+QUOTE_PREFIX_PATTERN = re.compile(r"^(?:> ?)+", re.M)
+SIGNATURE_DELIMITER_PATTERN = re.compile(r"^--$", re.M)
+DISCLAIMER_MARKERS = [
+    re.compile(pattern, re.I)
+    for pattern in (
+        r"(?:this|the) (?:e-?mail|message|communication)[^.\n]{0,80}(?:confidential|privileged)",
+        r"intended (?:solely )?(?:only )?for the (?:use of the )?(?:individual|addressee|recipient)",
+        r"received this (?:e-?mail|message|communication) in error",
+        r"notify the sender",
+        r"(?:disclosure|distribution|copying|dissemination)[^.\n]{0,80}(?:strictly )?prohibited",
+        r"(?:ce|le) (?:message|courriel|e-?mail)[^.\n]{0,80}confidentiel",
+        r"(?:intention|usage) exclusi(?:f|ve) de (?:son|ses|leurs?) destinataires?",
+        r"reçu ce (?:message|courriel|e-?mail) par erreur",
+        r"(?:avertir|prévenir|informer) (?:immédiatement )?l['’]expéditeur",
+    )
+]
+MAX_SIGNATURE_LINES = 10
+MAX_DISCLAIMER_LENGTH = 1500
+
+
+def strip_quoted_replies(email_content: str) -> str:
+    """
+    Removes the quoted history of a reply, keeping only the latest message.
+
+    The header block of a forwarded email, right after a forward marker, is not a quote header: a
+    forwarded email keeps its content.
+
+    Args:
+        email_content (str): The preprocessed content of the email.
+
+    Returns:
+        str: The content before the first quote header, without ">" quoted lines. The content is
+             returned unchanged if nothing would be left but a banner or a one-line note.
+    """
+    forward_ends = [
+        match.end() for match in FORWARD_MARKER_PATTERN.finditer(email_content)
+    ]
+
+    cut = len(email_content)
+    for pattern in QUOTE_HEADER_PATTERNS:
+        for match in pattern.finditer(email_content):
+            follows_forward_marker = any(
+                email_content[end : match.start()].strip() == ""
+                for end in forward_ends
+                if end <= match.start()
+            )
+            if not follows_forward_marker:
+                cut = min(cut, match.start())
+                break
+
+    latest_message = QUOTED_LINE_PATTERN.sub("", email_content[:cut]).strip()
+    lines = [
+        line
+        for line in latest_message.split("\n")
+        if line.strip()
+        and not FORWARD_MARKER_PATTERN.match(line)
+        and not BANNER_PATTERN.match(line)
+    ]
+    return latest_message if len(lines) > 1 else email_content
+
+
+def strip_boilerplate(email_content: str) -> str:
+    """
+    Removes signatures, mobile signatures and legal disclaimers.
+
+    Args:
+        email_content (str): The preprocessed content of the email.
+
+    Returns:
+        str: The content without boilerplate, or unchanged if nothing would be left.
+    """
+    text = MOBILE_SIGNATURE_PATTERN.sub("", email_content)
+
+    delimiters = list(SIGNATURE_DELIMITER_PATTERN.finditer(text))
+    if delimiters:
+        signature = text[delimiters[-1].end() :]
+        if signature.count("\n") <= MAX_SIGNATURE_LINES:
+            text = text[: delimiters[-1].start()]
+
+    paragraphs = [
+        paragraph
+        for paragraph in text.split("\n\n")
+        if len(paragraph) > MAX_DISCLAIMER_LENGTH
+        or sum(bool(marker.search(paragraph)) for marker in DISCLAIMER_MARKERS) < 2
+    ]
+    text = re.sub(r"\n{3,}", "\n\n", "\n\n".join(paragraphs)).strip()
+    return text if text else email_content
+
+
+def truncate_to_budget(email_content: str, max_tokens: int) -> str:
+    """
+    Truncates a text to a token budget, keeping its head and its tail.
+
+    The head keeps two thirds of the budget (greetings, request, context) and the tail one third
+    (latest updates, deadlines, sign-off), joined by a "[...]" marker.
+
+    Args:
+        email_content (str): The text to truncate.
+        max_tokens (int): The maximum number of tokens, estimated with `estimate_tokens`.
+
+    Returns:
+        str: The truncated text, or the text unchanged if it fits in the budget.
+    """
+    if max_tokens <= 0 or estimate_tokens(email_content) <= max_tokens:
+        return email_content
+
+    max_chars = max_tokens * 4
+    head_chars = max_chars * 2 // 3
+    tail_chars = max_chars - head_chars
+    return f"{email_content[:head_chars].rstrip()}\n[...]\n{email_content[-tail_chars:].lstrip()}"
+
+
+def split_thread(email_content: str) -> list[str]:
+    """
+    Splits a thread into its emails at the quote headers, including the headers of quoted replies.
+
+    Args:
+        email_content (str): The preprocessed content of the thread.
+
+    Returns:
+        list[str]: The emails of the thread, from the latest to the oldest.
+    """
+    unquoted = QUOTE_PREFIX_PATTERN.sub("", email_content)
+    header_lines = {
+        unquoted.count("\n", 0, match.start())
+        for pattern in QUOTE_HEADER_PATTERNS
+        for match in pattern.finditer(unquoted)
+    }
+    lines = email_content.split("\n")
+    bounds = [0, *sorted(header_lines - {0}), len(lines)]
+    emails = [
+        "\n".join(lines[start:end]).strip() for start, end in zip(bounds, bounds[1:])
+    ]
+    return [email for email in emails if email]
+
+
+def truncate_thread_to_budget(email_content: str, max_tokens: int) -> str:
+    """
+    Truncates a thread to a token budget by dropping its oldest emails.
+
+    The latest email is always kept, truncated with `truncate_to_budget` if it exceeds the budget
+    alone. The earlier emails are kept from the most recent one while they fit, and a "[...]" marker
+    replaces the dropped ones.
+
+    Args:
+        email_content (str): The preprocessed content of the thread.
+        max_tokens (int): The maximum number of tokens, estimated with `estimate_tokens`.
+
+    Returns:
+        str: The truncated thread, or the thread unchanged if it fits in the budget.
+    """
+    if max_tokens <= 0 or estimate_tokens(email_content) <= max_tokens:
+        return email_content
+
+    emails = split_thread(email_content)
+    kept = [truncate_to_budget(emails[0], max_tokens)]
+    tokens = estimate_tokens(kept[0])
+    for email in emails[1:]:
+        tokens += estimate_tokens(email)
+        if tokens > max_tokens:
+            kept.append("[...]")
+            break
+        kept.append(email)
+    return "\n\n".join(kept)
@@ -0,0 +1,26 @@
+"""
+Statistics shared by the latency instrumentation of the ingestion pipeline and the LLM router.
+
+Features:
+- ✅ percentile: Compute a percentile of a list of values.
+"""
+
+import math
+
+
+def percentile(values: list[float], q: float) -> float:
+    """
+    Compute a percentile of a list of values with the nearest-rank method.
+
+    Args:
+        values (list[float]): The values, such as durations.
+        q (float): The percentile, between 0 and 100.
+
+    Returns:
+        float: The percentile, or 0.0 for an empty list.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
@@ -6,6 +6,9 @@ A serializer is an object that requires specific parameters and is used to check
 
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.db.models import QuerySet
+from aomail.constants import EMAIL_ONE_LINE_SUMMARY_KEY, EMAIL_SHORT_SUMMARY_KEY
+from aomail.utils.security import decrypt_text
 from aomail.models import (
     Message,
     Category,
@@ -31,6 +34,68 @@ class EmailDataSerializer(serializers.Serializer):
     attachments = serializers.ListField(child=serializers.FileField(), required=False)
 
 
+class EmailDetailSerializer(serializers.BaseSerializer):
+    """
+    Read-only serializer for the email details displayed in the email lists.
+
+    Load the emails with `setup_eager_loading` so that serializing a page runs a constant number of queries.
+    """
+
+    @staticmethod
+    def setup_eager_loading(queryset: QuerySet[Email]) -> QuerySet[Email]:
+        """Fetches the sender, the category, the CC and BCC senders and the attachments with the emails."""
+        return (
+            queryset.select_related("sender", "category")
+            .prefetch_related("cc_senders", "bcc_senders", "attachments")
+            .defer("html_content", "search_vector")
+        )
+
+    def to_representation(self, email: Email) -> dict:
+        return {
+            "id": email.id,
+            "subject": email.subject,
+            "sender": {
+                "email": email.sender.email,
+                "name": email.sender.name,
+            },
+            "providerId": email.provider_id,
+            "shortSummary": decrypt_text(EMAIL_SHORT_SUMMARY_KEY, email.short_summary),
+            "oneLineSummary": decrypt_text(
+                EMAIL_ONE_LINE_SUMMARY_KEY, email.one_line_summary
+            ),
+            "cc": [
+                {"email": cc.email, "name": cc.name} for cc in email.cc_senders.all()
+            ],
+            "bcc": [
+                {"email": bcc.email, "name": bcc.name}
+                for bcc in email.bcc_senders.all()
+            ],
+            "read": email.read,
+            "answerLater": email.answer_later,
+            "hasAttachments": email.has_attachments,
+            "attachments": [
+                {
+                    "attachmentName": attachment.name,
+                    "attachmentId": attachment.id_api,
+                }
+                for attachment in email.attachments.all()
+            ],
+            "sentDate": email.date.date() if email.date else None,
+            "sentTime": email.date.strftime("%H:%M") if email.date else None,
+            "answer": email.answer,
+            "relevance": email.relevance,
+            "priority": email.priority,
+            "flags": {
+                "spam": email.spam,
+                "scam": email.scam,
+                "newsletter": email.newsletter,
+                "notification": email.notification,
+                "meeting": email.meeting,
+            },
+            "archive": email.archive,
+        }
+
+
 class EmailScheduleDataSerializer(serializers.Serializer):
     """Serializer for scheduling emails (POST request)."""
 
@@ -89,6 +154,29 @@ class EmailGenerateAnswer(serializers.Serializer):
     signature = serializers.CharField(allow_blank=True)
 
 
+class NewEmailResponseSerializer(serializers.Serializer):
+    """Serializer for handling the data of a new email response body."""
+
+    userInput = serializers.CharField(allow_blank=True)
+    importance = serializers.CharField(allow_blank=True)
+    subject = serializers.CharField(allow_blank=True)
+    body = serializers.CharField(allow_blank=True)
+    emailBody = serializers.CharField(required=False, allow_blank=True, default="")
+    signature = serializers.CharField(allow_blank=True)
+    history = serializers.DictField()
+
+
+class ImproveDraftSerializer(serializers.Serializer):
+    """Serializer for handling the data of a draft improvement."""
+
+    userInput = serializers.CharField(allow_blank=True)
+    length = serializers.CharField()
+    formality = serializers.CharField()
+    subject = serializers.CharField(allow_blank=True)
+    body = serializers.CharField(allow_blank=True)
+    history = serializers.DictField()
+
+
 class UserLoginSerializer(serializers.ModelSerializer):
     """Serializer for retrieving user login data through a GET request."""
 
@@ -0,0 +1,104 @@
+"""
+Server-Sent Events responses of the streaming AI views.
+
+The streaming views authenticate and validate the request synchronously like the other DRF views,
+then return a StreamingHttpResponse over an async iterator: under ASGI, Django forwards each event
+to the browser as soon as the provider sends the tokens, without holding a thread during the
+generation.
+
+Events sent to the browser:
+- delta: {"field": <response key>, "text": <new characters of the field>}
+- done: The response of the non-streaming view.
+- error: {"error": <message>}
+
+Features:
+- ✅ EventStreamRenderer: Renderer accepting `Accept: text/event-stream` on the streaming views.
+- ✅ format_sse: Formats a Server-Sent Event.
+- ✅ stream_sse: Formats the events of a streaming LLM function as Server-Sent Events.
+- ✅ get_sse_response: Returns the streaming HTTP response of Server-Sent Events.
+"""
+
+import json
+import logging
+from typing import AsyncIterator, Callable
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Lets the streaming views be requested with `Accept: text/event-stream`, rendering their errors as an "error" event."""
+
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        return format_sse("error", data).encode(self.charset)
+
+
+def format_sse(event: str, data: dict) -> str:
+    """
+    Formats a Server-Sent Event.
+
+    Args:
+        event (str): The name of the event.
+        data (dict): The JSON payload of the event.
+
+    Returns:
+        str: The event, terminated by a blank line.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_sse(
+    events: AsyncIterator[dict],
+    field_names: dict[str, str],
+    finish: Callable[[dict], dict],
+    error_message: str,
+) -> AsyncIterator[str]:
+    """
+    Formats the events of a streaming LLM function (see `ai_providers.streaming`) as Server-Sent Events.
+
+    Args:
+        events (AsyncIterator[dict]): The events of the streaming function.
+        field_names (dict[str, str]): The response key of each streamed field, e.g. {"body": "emailBody"}.
+        finish (Callable[[dict], dict]): Receives the final result, saves what must be saved (token
+                                         statistics) and returns the payload of the "done" event.
+                                         Runs in a thread as it may access the database.
+        error_message (str): The message of the "error" event if the generation fails.
+
+    Yields:
+        str: "delta" events, then a "done" or an "error" event.
+    """
+    try:
+        async for event in events:
+            if event["type"] == "delta":
+                yield format_sse(
+                    "delta",
+                    {"field": field_names[event["field"]], "text": event["text"]},
+                )
+            else:
+                yield format_sse("done", await sync_to_async(finish)(event["result"]))
+    except Exception as e:
+        LOGGER.error(f"Failed to stream the AI response: {str(e)}")
+        yield format_sse("error", {"error": error_message})
+
+
+def get_sse_response(events: AsyncIterator[str]) -> StreamingHttpResponse:
+    """
+    Returns the streaming HTTP response of Server-Sent Events.
+
+    Args:
+        events (AsyncIterator[str]): The formatted events.
+
+    Returns:
+        StreamingHttpResponse: The response, with proxy buffering and caching disabled.
+    """
+    response = StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -5,6 +5,7 @@ Handles AI-driven search to extract data from emails and help Ao to answer user
 import json
 import logging
 from aomail.ai_providers import llm_functions
+from aomail.ingestion.enrichment_cache import get_enrichment_key, get_or_compute
 from aomail.models import KeyPoint, Preference
 
 
@@ -144,6 +145,7 @@ class Search:
                 self.question,
                 preference.llm_provider,
                 preference.llm_model,
+                allow_fallback=preference.llm_fallback,
             )
         except json.JSONDecodeError:
             LOGGER.critical(
@@ -172,6 +174,7 @@ class Search:
                 language,
                 preference.llm_provider,
                 preference.llm_model,
+                allow_fallback=preference.llm_fallback,
             )
         except json.JSONDecodeError:
             LOGGER.critical(
@@ -198,14 +201,29 @@ class Search:
         """
         try:
             preference = Preference.objects.get(user_id=self.user_id)
-            result_json = llm_functions.summarize_conversation(
-                subject,
+            key = get_enrichment_key(
+                "summarize_conversation",
                 body,
-                user_description,
-                self.get_categories(),
-                language,
+                subject=subject,
+                user_description=user_description,
+                categories=self.categories,
+                language=language,
+                llm_provider=preference.llm_provider,
+                llm_model=preference.llm_model,
+            )
+            result_json = get_or_compute(
+                key,
                 preference.llm_provider,
-                preference.llm_model,
+                lambda: llm_functions.summarize_conversation(
+                    subject,
+                    body,
+                    user_description,
+                    self.categories,
+                    language,
+                    preference.llm_provider,
+                    preference.llm_model,
+                    allow_fallback=True,
+                ),
             )
         except json.JSONDecodeError:
             LOGGER.critical(
@@ -232,14 +250,29 @@ class Search:
         """
         try:
             preference = Preference.objects.get(user_id=self.user_id)
-            result_json = llm_functions.summarize_email(
-                subject,
+            key = get_enrichment_key(
+                "summarize_email",
                 body,
-                user_description,
-                self.get_categories(),
-                language,
+                subject=subject,
+                user_description=user_description,
+                categories=self.categories,
+                language=language,
+                llm_provider=preference.llm_provider,
+                llm_model=preference.llm_model,
+            )
+            result_json = get_or_compute(
+                key,
                 preference.llm_provider,
-                preference.llm_model,
+                lambda: llm_functions.summarize_email(
+                    subject,
+                    body,
+                    user_description,
+                    self.categories,
+                    language,
+                    preference.llm_provider,
+                    preference.llm_model,
+                    allow_fallback=True,
+                ),
             )
         except json.JSONDecodeError:
             LOGGER.critical(
@@ -0,0 +1,81 @@
+"""
+Compares the former per-group queries of get_email_counts with the single aggregate query of `count_emails`.
+
+Generates large synthetic mailboxes with the dataset of bench_email_search, then times the counts
+of one user with and without the lists of email IDs.
+The benchmark runs against the configured database inside a transaction that is rolled back.
+
+Usage:
+    python benchmarks/bench_email_counts.py [--emails N] [--users N] [--repeat N]
+"""
+
+import argparse
+import statistics
+import time
+from bench_email_search import Rollback, generate_dataset
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from aomail.constants import IMPORTANT, INFORMATIVE, USELESS
+from aomail.controllers.search_emails import count_emails
+from aomail.models import Email
+
+
+def legacy_count_emails(queryset) -> dict:
+    useless_emails = queryset.filter(priority=USELESS, read=False)
+    important_emails = queryset.filter(priority=IMPORTANT, read=False)
+    informative_emails = queryset.filter(priority=INFORMATIVE, read=False)
+    read_emails = queryset.filter(read=True, archive=False)
+
+    return {
+        "useless_count": useless_emails.count(),
+        "useless_ids": list(useless_emails.values_list("id", flat=True)),
+        "important_count": important_emails.count(),
+        "important_ids": list(important_emails.values_list("id", flat=True)),
+        "informative_count": informative_emails.count(),
+        "informative_ids": list(informative_emails.values_list("id", flat=True)),
+        "read_count": read_emails.count(),
+        "read_ids": list(read_emails.values_list("id", flat=True)),
+    }
+
+
+def run(label: str, count, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            count()
+            timings.append(time.perf_counter() - start)
+
+    print(
+        f"{label:<26} {len(queries):>3} queries {statistics.median(timings) * 1000:>9.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--emails", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--senders", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    try:
+        with transaction.atomic():
+            user = generate_dataset(args.emails, args.users, args.senders)[0]
+            queryset = Email.objects.filter(user=user)
+            print(f"mailbox of {queryset.count()} emails")
+
+            run("per-group queries", lambda: legacy_count_emails(queryset), args.repeat)
+            run("aggregate with ids", lambda: count_emails(queryset), args.repeat)
+            run(
+                "aggregate counts only",
+                lambda: count_emails(queryset, with_ids=False),
+                args.repeat,
+            )
+            raise Rollback
+    except Rollback:
+        pass
+
+
+if __name__ == "__main__":
+    main()
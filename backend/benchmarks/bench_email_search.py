@@ -0,0 +1,224 @@
+"""
+Compares the former `icontains` email search with the full-text search on `Email.search_vector`.
+
+Generates a synthetic mailbox dataset (1M emails by default, spread over several users, with
+senders and CC senders) with SQL, then times the search of one user and prints the scans of the plan.
+The benchmark runs against the configured database inside a transaction that is rolled back.
+
+Usage:
+    python benchmarks/bench_email_search.py [--emails N] [--users N] [--senders N] [--repeat N] [--search TEXT ...]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchRank
+from django.db import connection, transaction
+from django.db.models import F, Q
+from aomail.controllers.search_emails import (
+    construct_filters,
+    get_search_query,
+    get_sorted_queryset,
+)
+from aomail.models import Category, Email, SocialAPI
+
+
+WORDS = [
+    "invoice",
+    "meeting",
+    "budget",
+    "report",
+    "project",
+    "contract",
+    "update",
+    "review",
+    "deadline",
+    "proposal",
+    "order",
+    "shipping",
+    "payment",
+    "reminder",
+    "newsletter",
+    "webinar",
+    "quarterly",
+    "weekly",
+    "team",
+    "launch",
+    "offer",
+    "account",
+    "security",
+    "password",
+    "delivery",
+    "feedback",
+    "survey",
+    "event",
+    "partner",
+    "client",
+    "roadmap",
+    "release",
+    "acme",
+    "globex",
+    "initech",
+    "umbrella",
+    "stark",
+    "wayne",
+    "hooli",
+    "vandelay",
+]
+
+
+class Rollback(Exception):
+    pass
+
+
+def generate_dataset(nb_emails: int, nb_users: int, nb_senders: int) -> list[User]:
+    users = [User.objects.create(username=f"bench_search_{i}") for i in range(nb_users)]
+    categories, social_apis = [], []
+    for user in users:
+        categories.append(Category.objects.create(name="Others", user=user).id)
+        social_apis.append(
+            SocialAPI.objects.create(
+                user=user, email=f"{user.username}@example.com", type_api="google"
+            ).id
+        )
+
+    words = "ARRAY[" + ", ".join(f"'{word}'" for word in WORDS) + "]"
+    random_word = f"({words})[1 + floor(random() * {len(WORDS)})::int]"
+    user_ids = "ARRAY[" + ", ".join(str(user.id) for user in users) + "]"
+    category_ids = "ARRAY[" + ", ".join(map(str, categories)) + "]"
+    social_api_ids = "ARRAY[" + ", ".join(map(str, social_apis)) + "]"
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO aomail_sender (email, name)
+            SELECT 'bench_sender_' || i || '@' || {random_word} || '.com', initcap({random_word}) || ' ' || i
+            FROM generate_series(1, %s) AS i
+            RETURNING id
+            """,
+            [nb_senders],
+        )
+        sender_ids = (
+            "ARRAY[" + ", ".join(str(row[0]) for row in cursor.fetchall()) + "]"
+        )
+
+        cursor.execute(
+            f"""
+            INSERT INTO aomail_email (
+                user_id, social_api_id, category_id, sender_id, provider_id, email_provider,
+                short_summary, one_line_summary, html_content, subject, priority, read, archive,
+                answer_later, date, has_attachments, answer, relevance,
+                spam, scam, newsletter, notification, meeting
+            )
+            SELECT
+                ({user_ids})[1 + mod(i, {nb_users})], ({social_api_ids})[1 + mod(i, {nb_users})],
+                ({category_ids})[1 + mod(i, {nb_users})], ({sender_ids})[1 + floor(random() * {nb_senders})::int],
+                'bench_search_' || i, 'google', '', '', '',
+                initcap({random_word}) || ' ' || {random_word} || ' ' || {random_word} || ' #' || i,
+                (ARRAY['important', 'informative', 'useless'])[1 + mod(i, 3)], random() < 0.7, false,
+                false, now() - i * interval '1 minute', false, 'Answer Required', 'Highly Relevant',
+                false, false, false, false, false
+            FROM generate_series(1, %s) AS i
+            """,
+            [nb_emails],
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO aomail_cc_sender (email_object_id, email, name)
+            SELECT id, {random_word} || '.' || n || '@' || {random_word} || '.io', initcap({random_word})
+            FROM aomail_email CROSS JOIN generate_series(1, 2) AS n
+            WHERE user_id = ANY({user_ids}) AND random() < 0.3
+            """
+        )
+        cursor.execute("ANALYZE aomail_email, aomail_sender, aomail_cc_sender")
+
+    return users
+
+
+def get_scans(queryset) -> str:
+    """Returns the scans of the plan of the query, e.g. "Bitmap Index Scan on email_search_vector_gin"."""
+    return ", ".join(
+        sorted(
+            set(
+                re.findall(
+                    r"((?:Parallel )?(?:Bitmap Index|Index Only|Index|Seq) Scan on \w+)",
+                    queryset.explain(),
+                )
+            )
+        )
+    )
+
+
+def run(label: str, queryset, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ids = list(queryset.values_list("id", flat=True))
+        timings.append(time.perf_counter() - start)
+
+    print(
+        f"  {label:<10} {len(ids):>7} emails {statistics.median(timings) * 1000:>9.1f} ms  {get_scans(queryset)}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--emails", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--senders", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--search", nargs="+", default=["inv", "invoice", "meeting budget", "acme"]
+    )
+    args = parser.parse_args()
+
+    try:
+        with transaction.atomic():
+            start = time.perf_counter()
+            user = generate_dataset(args.emails, args.users, args.senders)[0]
+            print(
+                f"{args.emails} emails generated in {time.perf_counter() - start:.1f} s, "
+                f"{Email.objects.filter(user=user).count()} for the searching user"
+            )
+
+            for search in args.search:
+                print(f'search "{search}"')
+                legacy = Email.objects.filter(
+                    Q(subject__icontains=search)
+                    | Q(sender__email__icontains=search)
+                    | Q(sender__name__icontains=search)
+                    | Q(cc_senders__email__icontains=search)
+                    | Q(cc_senders__name__icontains=search),
+                    user=user,
+                ).order_by("-date")
+                run("icontains", legacy, args.repeat)
+
+                and_filters, or_filters, or_filters_search = construct_filters(
+                    user, {"search": search}
+                )
+                search_query = get_search_query(search)
+                full_text = (
+                    get_sorted_queryset(
+                        and_filters, or_filters, or_filters_search, "asc", user
+                    )
+                    .annotate(rank=SearchRank(F("search_vector"), search_query))
+                    .order_by("-rank", "-date")
+                )
+                run("full-text", full_text, args.repeat)
+            raise Rollback
+    except Rollback:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Compares the tokens and latency per email of the combined enrichment prompt against the two-request path
+(`categorize_and_summarize_email` + `summarize_email` / `summarize_conversation`).
+
+Without --provider, only the input tokens of the prompts are estimated, so no token is spent. With
+--provider, every sample email is enriched both ways with the configured API key of the provider, and
+the tokens reported by the provider and the latency are compared. The two requests run in parallel,
+as in `process_email`.
+
+Usage:
+    python benchmarks/bench_enrichment.py [--provider NAME --model NAME --rounds N]
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from aomail.ai_providers import llm_functions
+from aomail.ai_providers.prompts import (
+    CATEGORIZE_AND_SUMMARIZE_EMAIL_PROMPT,
+    ENRICH_EMAIL_KEYPOINTS,
+    ENRICH_EMAIL_PROMPT,
+    RELEVANCE_LIST,
+    RESPONSE_LIST,
+    SUMMARIZE_CONVERSATION_PROMPT,
+    SUMMARIZE_EMAIL_PROMPT,
+)
+from aomail.ai_providers.utils import estimate_tokens, split_enriched_email
+from aomail.models import Preference
+
+
+CATEGORY_DICT = {
+    "Work": "Projects, meetings and colleagues",
+    "Finance": "Invoices, payments and banking",
+    "Others": "",
+}
+CATEGORIES = {"Work": ["Acme"], "Finance": ["Bank"]}
+USER_DESCRIPTION = "Jane Doe, project manager at Acme"
+LANGUAGE = "english"
+GUIDELINES = {
+    field: Preference._meta.get_field(field).default
+    for field in (
+        "important_guidelines",
+        "informative_guidelines",
+        "useless_guidelines",
+    )
+}
+SAMPLE_EMAILS = [
+    {
+        "sender": "john@acme.com",
+        "subject": "Project kickoff on Monday",
+        "body": (
+            "Hi Jane,\n\nThe kickoff of the Atlas project is planned on Monday at 10am in room B2. "
+            "Please bring the updated budget and the list of vendors we discussed. The client will "
+            "join remotely: https://meet.acme.com/atlas\n\nThanks,\nJohn"
+        ),
+        "is_reply": False,
+    },
+    {
+        "sender": "billing@bank.com",
+        "subject": "Your invoice #4821 is overdue",
+        "body": (
+            "Dear customer,\n\nInvoice #4821 of 1,250.00 EUR was due on March 3rd. Please pay it "
+            "before March 17th to avoid a late fee of 5%. You can pay online at https://bank.com/pay "
+            "or reply to this email for a payment plan.\n\nBilling team"
+        ),
+        "is_reply": False,
+    },
+    {
+        "sender": "marie@acme.com",
+        "subject": "Re: Vendor shortlist",
+        "body": (
+            "Sounds good, let's keep Northwind and Contoso and drop Fabrikam.\n\n"
+            "On Tue, Jane wrote:\n> I reviewed the three quotes. Fabrikam is 20% above the others "
+            "and cannot deliver before June.\n\nOn Mon, Marie wrote:\n> Can you review the vendor "
+            "quotes before Wednesday? We need a shortlist for the steering committee."
+        ),
+        "is_reply": True,
+    },
+]
+
+
+def format_two_requests(email: dict) -> list[str]:
+    categorize_prompt = CATEGORIZE_AND_SUMMARIZE_EMAIL_PROMPT.format(
+        sender=email["sender"],
+        subject=email["subject"],
+        decoded_data=email["body"],
+        user_description=USER_DESCRIPTION,
+        category_dict=CATEGORY_DICT,
+        response_list=RESPONSE_LIST,
+        relevance_list=RELEVANCE_LIST,
+        **GUIDELINES,
+    )
+    summary_prompt = (
+        SUMMARIZE_CONVERSATION_PROMPT if email["is_reply"] else SUMMARIZE_EMAIL_PROMPT
+    ).format(
+        subject=email["subject"],
+        body=email["body"],
+        categories=CATEGORIES,
+        user_description=USER_DESCRIPTION,
+        language=LANGUAGE,
+    )
+    return [categorize_prompt, summary_prompt]
+
+
+def format_combined(email: dict) -> str:
+    keypoints_instruction, keypoints_format = ENRICH_EMAIL_KEYPOINTS[
+        "conversation" if email["is_reply"] else "email"
+    ]
+    return ENRICH_EMAIL_PROMPT.format(
+        sender=email["sender"],
+        subject=email["subject"],
+        decoded_data=email["body"],
+        user_description=USER_DESCRIPTION,
+        category_dict=CATEGORY_DICT,
+        response_list=RESPONSE_LIST,
+        relevance_list=RELEVANCE_LIST,
+        categories=CATEGORIES,
+        language=LANGUAGE,
+        keypoints_instruction=keypoints_instruction,
+        keypoints_format=keypoints_format,
+        **GUIDELINES,
+    )
+
+
+def run_two_requests(email: dict, provider: str, model: str) -> tuple[float, int, int]:
+    summarize = (
+        llm_functions.summarize_conversation
+        if email["is_reply"]
+        else llm_functions.summarize_email
+    )
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        categorization = executor.submit(
+            llm_functions.categorize_and_summarize_email,
+            CATEGORIZE_AND_SUMMARIZE_EMAIL_PROMPT,
+            email["subject"],
+            email["body"],
+            CATEGORY_DICT,
+            USER_DESCRIPTION,
+            email["sender"],
+            *GUIDELINES.values(),
+            provider,
+            model,
+        )
+        summary = executor.submit(
+            summarize,
+            email["subject"],
+            email["body"],
+            USER_DESCRIPTION,
+            CATEGORIES,
+            LANGUAGE,
+            provider,
+            model,
+        )
+        results = [categorization.result(), summary.result()]
+    duration = (time.perf_counter() - start) * 1000
+    return (
+        duration,
+        sum(result["tokens_input"] for result in results),
+        sum(result["tokens_output"] for result in results),
+    )
+
+
+def run_combined(email: dict, provider: str, model: str) -> tuple[float, int, int]:
+    start = time.perf_counter()
+    result = llm_functions.enrich_email(
+        email["subject"],
+        email["body"],
+        email["sender"],
+        CATEGORY_DICT,
+        USER_DESCRIPTION,
+        *GUIDELINES.values(),
+        CATEGORIES,
+        LANGUAGE,
+        email["is_reply"],
+        provider,
+        model,
+    )
+    duration = (time.perf_counter() - start) * 1000
+    split_enriched_email(result)
+    return duration, result["tokens_input"], result["tokens_output"]
+
+
+def report(name: str, runs: list[tuple[float, int, int]]):
+    durations = [run[0] for run in runs]
+    print(
+        f"{name:<10} latency mean {statistics.mean(durations):8.1f} ms   "
+        f"p50 {statistics.median(durations):8.1f} ms   "
+        f"input {statistics.mean(run[1] for run in runs):7.1f} tokens   "
+        f"output {statistics.mean(run[2] for run in runs):7.1f} tokens"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--provider")
+    parser.add_argument("--model")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    print("Estimated input tokens per email")
+    for email in SAMPLE_EMAILS:
+        two_requests = sum(
+            estimate_tokens(prompt) for prompt in format_two_requests(email)
+        )
+        combined = estimate_tokens(format_combined(email))
+        print(
+            f"  {email['subject'][:30]:<30} two requests {two_requests:6d}   "
+            f"combined {combined:6d}   saved {1 - combined / two_requests:6.1%}"
+        )
+
+    if not args.provider:
+        return
+
+    print(f"\n{args.rounds} rounds of {len(SAMPLE_EMAILS)} emails on {args.provider}")
+    two_requests_runs, combined_runs = [], []
+    for _ in range(args.rounds):
+        for email in SAMPLE_EMAILS:
+            two_requests_runs.append(run_two_requests(email, args.provider, args.model))
+            combined_runs.append(run_combined(email, args.provider, args.model))
+    report("two calls", two_requests_runs)
+    report("combined", combined_runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Measures the per-call latency of an LLM request with a shared client versus a fresh client per call.
+
+By default the requests go to a local HTTPS server answering like the OpenAI chat completions API,
+so the numbers show the connection and TLS handshake cost without any token spent. Pass --base-url
+and --api-key to measure against a real OpenAI-compatible endpoint instead.
+
+Usage:
+    python benchmarks/bench_llm_clients.py [--calls N] [--threads N] [--base-url URL --api-key KEY --model NAME]
+"""
+
+import argparse
+import datetime
+import ipaddress
+import json
+import logging
+import os
+import ssl
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+import openai
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+from aomail.ai_providers.clients import close_clients, get_client, get_http_limits
+
+
+COMPLETION = {
+    "id": "chatcmpl-bench",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "bench",
+    "choices": [
+        {
+            "index": 0,
+            "message": {"role": "assistant", "content": '{"topic": "Others"}'},
+            "finish_reason": "stop",
+        }
+    ],
+    "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+}
+
+
+class CompletionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps(COMPLETION).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def create_certificate(directory: str) -> tuple[str, str]:
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(
+            x509.SubjectAlternativeName(
+                [x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]
+            ),
+            critical=False,
+        )
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = os.path.join(directory, "cert.pem")
+    key_path = os.path.join(directory, "key.pem")
+    with open(cert_path, "wb") as cert_file:
+        cert_file.write(certificate.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as key_file:
+        key_file.write(
+            key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            )
+        )
+    return cert_path, key_path
+
+
+def start_server(directory: str) -> tuple[ThreadingHTTPServer, str, str]:
+    cert_path, key_path = create_certificate(directory)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CompletionHandler)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_path, key_path)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"https://127.0.0.1:{server.server_address[1]}/v1", cert_path
+
+
+def create_client(base_url: str, api_key: str, verify) -> openai.OpenAI:
+    return openai.OpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        http_client=openai.DefaultHttpxClient(limits=get_http_limits(), verify=verify),
+    )
+
+
+def run(calls: int, threads: int, call) -> list[float]:
+    def timed_call(_):
+        start = time.perf_counter()
+        call()
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(timed_call, range(calls)))
+
+
+def report(name: str, durations: list[float]):
+    durations = sorted(durations)
+    p95 = durations[max(int(len(durations) * 0.95) - 1, 0)]
+    print(
+        f"{name:<8} mean {statistics.mean(durations):8.2f} ms   "
+        f"p50 {statistics.median(durations):8.2f} ms   p95 {p95:8.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--base-url")
+    parser.add_argument("--api-key", default="bench")
+    parser.add_argument("--model", default="bench")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as directory:
+        server = None
+        base_url, verify = args.base_url, True
+        if not base_url:
+            server, base_url, verify = start_server(directory)
+
+        messages = [{"role": "user", "content": "Categorize this email"}]
+
+        def fresh_call():
+            with create_client(base_url, args.api_key, verify) as client:
+                client.chat.completions.create(model=args.model, messages=messages)
+
+        def shared_call():
+            client = get_client(
+                "bench", None, lambda: create_client(base_url, args.api_key, verify)
+            )
+            client.chat.completions.create(model=args.model, messages=messages)
+
+        print(f"{args.calls} calls on {args.threads} threads to {base_url}")
+        report("fresh", run(args.calls, args.threads, fresh_call))
+        report("shared", run(args.calls, args.threads, shared_call))
+
+        close_clients()
+        if server:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
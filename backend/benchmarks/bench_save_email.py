@@ -0,0 +1,138 @@
+"""
+Measures the number of queries and the time needed to persist processed emails.
+
+The benchmark runs against the configured database inside a transaction that is rolled back.
+
+Usage:
+    python benchmarks/bench_save_email.py [--emails N] [--keypoints N] [--recipients N] [--attachments N]
+"""
+
+import argparse
+import os
+import sys
+import time
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from aomail.constants import DEFAULT_CATEGORY, HIGHLY_RELEVANT, IMPORTANT
+from aomail.email_providers import utils
+from aomail.models import SocialAPI, Statistics
+
+
+class Rollback(Exception):
+    pass
+
+
+def build_processed_email(
+    index: int, nb_keypoints: int, nb_recipients: int, nb_attachments: int
+) -> dict:
+    return {
+        "email_data": {
+            "email_id": f"bench_email_{index}",
+            "subject": f"subject {index}",
+            "from_info": (f"sender {index % 10}", f"sender{index % 10}@example.com"),
+            "safe_html": "<p>html content</p>",
+            "sent_date": timezone.now(),
+            "has_attachments": nb_attachments > 0,
+            "is_reply": False,
+            "cc_info": [
+                (f"cc{i}@example.com", f"cc {i}") for i in range(nb_recipients)
+            ],
+            "bcc_info": [
+                (f"bcc{i}@example.com", f"bcc {i}") for i in range(nb_recipients)
+            ],
+            "image_files": [],
+            "attachments": [
+                {"attachmentId": f"attachment_{i}", "attachmentName": f"file_{i}.pdf"}
+                for i in range(nb_attachments)
+            ],
+        },
+        "email_processed": {
+            "topic": DEFAULT_CATEGORY,
+            "importance": IMPORTANT,
+            "response": "Answer Required",
+            "relevance": HIGHLY_RELEVANT,
+            "summary": {"short": "short summary", "one_line": "one line summary"},
+            "flags": {
+                "spam": False,
+                "scam": False,
+                "newsletter": False,
+                "notification": True,
+                "meeting": False,
+            },
+        },
+        "summary": {
+            "keypoints": [f"keypoint {i}" for i in range(nb_keypoints)],
+            "category": DEFAULT_CATEGORY,
+            "organization": "organization",
+            "topic": "topic",
+        },
+    }
+
+
+def run(label: str, save, processed_emails: list[dict]):
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        save(processed_emails)
+        elapsed = time.perf_counter() - start
+
+    nb_emails = len(processed_emails)
+    print(
+        f"{label:<28} {len(queries) / nb_emails:>8.1f} queries/email {elapsed / nb_emails * 1000:>8.2f} ms/email"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--emails", type=int, default=200)
+    parser.add_argument("--keypoints", type=int, default=5)
+    parser.add_argument("--recipients", type=int, default=3)
+    parser.add_argument("--attachments", type=int, default=2)
+    args = parser.parse_args()
+
+    try:
+        with transaction.atomic():
+            user = User.objects.create(username="bench_save_email")
+            Statistics.objects.create(user=user)
+            social_api = SocialAPI.objects.create(
+                user=user, email="bench@example.com", type_api="google"
+            )
+
+            def build(offset: int) -> list[dict]:
+                return [
+                    build_processed_email(
+                        offset + index,
+                        args.keypoints,
+                        args.recipients,
+                        args.attachments,
+                    )
+                    for index in range(args.emails)
+                ]
+
+            run(
+                "save_email_to_db",
+                lambda emails: [
+                    utils.save_email_to_db(email, user, social_api) for email in emails
+                ],
+                build(0),
+            )
+            if hasattr(utils, "save_emails_to_db"):
+                run(
+                    "save_emails_to_db (batch)",
+                    lambda emails: utils.save_emails_to_db(emails, user, social_api),
+                    build(args.emails),
+                )
+            raise Rollback
+    except Rollback:
+        pass
+
+
+if __name__ == "__main__":
+    main()
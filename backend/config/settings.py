@@ -217,4 +217,5 @@ AUTH_PASSWORD_VALIDATORS = [
 # https://crontab.guru/
 CRONJOBS = [
     ("0 3 * * *", "aomail.schedule_tasks.renew_gmail_subscriptions"),
+    ("30 3 * * *", "aomail.schedule_tasks.delete_expired_llm_cache_entries"),
 ]
@@ -1,6 +1,12 @@
 import json
 import pytest
-from aomail.ai_providers.utils import extract_json_from_response, count_corrections
+from aomail.ai_providers.utils import (
+    count_corrections,
+    extract_json_from_response,
+    format_cacheable_prompt,
+    format_emails_batch,
+    split_enriched_email,
+)
 from django.contrib.auth.models import User
 from aomail.models import Statistics
 from aomail.ai_providers.utils import update_tokens_stats
@@ -73,3 +79,78 @@ def test_update_tokens_stats(user: User, statistics: Statistics):
     statistics.refresh_from_db()
     assert statistics.nb_tokens_input == 10
     assert statistics.nb_tokens_output == 20
+
+
+def test_format_emails_batch():
+    formatted = format_emails_batch(
+        [
+            {"sender": "a@example.com", "subject": "first", "decoded_data": "body 1"},
+            {"sender": "b@example.com", "subject": "second", "decoded_data": "body 2"},
+        ]
+    )
+    assert formatted.index("Email 0:") < formatted.index("first")
+    assert formatted.index("Email 1:") < formatted.index("second")
+    assert "b@example.com" in formatted and "body 2" in formatted
+
+
+def test_format_cacheable_prompt():
+    prefix, email_prompt = format_cacheable_prompt(
+        "Rules: {rules} {{json}}\nEmail from {sender}: {decoded_data}",
+        rules="be brief",
+        sender="a@example.com",
+        decoded_data="Hello",
+    )
+    assert prefix == "Rules: be brief {json}\nEmail from "
+    assert email_prompt == "a@example.com: Hello"
+
+    # a custom prompt starting with the email has nothing to cache
+    prefix, email_prompt = format_cacheable_prompt(
+        "{subject} {rules}", subject="Hi", rules="x"
+    )
+    assert (prefix, email_prompt) == ("", "Hi x")
+
+    # escaped braces around a variable name are not a variable
+    prefix, email_prompt = format_cacheable_prompt(
+        'Answer {{"sender": ...}} for {{sender}}, {rules}\nFrom {sender!r}: {subject}',
+        rules="x",
+        sender="a@example.com",
+        subject="Hi",
+    )
+    assert prefix == 'Answer {"sender": ...} for {sender}, x\nFrom '
+    assert email_prompt == "'a@example.com': Hi"
+
+
+def test_split_enriched_email():
+    result = {
+        "topic": "Work",
+        "response": "Answer Required",
+        "relevance": "Highly Relevant",
+        "importance": "important",
+        "flags": {"meeting": True},
+        "summary": {"one_line": "Kickoff on Monday", "short": "Kickoff on Monday 10am"},
+        "knowledge": {
+            "category": "Work",
+            "organization": "",
+            "topic": "Kickoff",
+            "keypoints": ["Kickoff Monday 10am"],
+        },
+        "tokens_input": 900,
+        "tokens_output": 150,
+    }
+
+    email_processed, summary = split_enriched_email(result)
+
+    assert "knowledge" not in email_processed
+    assert email_processed["tokens_input"] == 900
+    assert summary == {
+        "category": "Work",
+        "organization": "Unknown",
+        "topic": "Kickoff",
+        "keypoints": ["Kickoff Monday 10am"],
+        "tokens_input": 0,
+        "tokens_output": 0,
+    }
+
+    del result["flags"]
+    with pytest.raises(KeyError):
+        split_enriched_email(result)
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import pytest
+from rest_framework.test import APIRequestFactory, force_authenticate
+from aomail.ai_providers import router
+from aomail.ai_providers.anthropic import client as claude
+from aomail.ai_providers.openai import client as openai_client
+from aomail.ai_providers.streaming import JsonFieldParser, stream_prompt_fields
+from aomail.constants import START_PLAN
+from aomail.controllers.artificial_intelligence import (
+    generate_email_answer_stream,
+    get_new_email_response_stream,
+    improve_draft_stream,
+    new_email_ai_stream,
+)
+from aomail.models import Subscription
+from aomail.utils.sse import format_sse, stream_sse
+
+
+def feed_chunks(parser: JsonFieldParser, chunks: list[str]) -> dict[str, str]:
+    fields = {}
+    for chunk in chunks:
+        for field, delta in parser.feed(chunk):
+            fields[field] = fields.get(field, "") + delta
+    return fields
+
+
+def collect(events) -> list[dict]:
+    async def run():
+        return [event async for event in events]
+
+    return asyncio.run(run())
+
+
+def fake_stream(chunks: list[str], error: Exception = None):
+    async def async_stream_prompt_text(formatted_prompt, model=None):
+        for chunk in chunks:
+            yield {"text": chunk, "tokens_input": 0, "tokens_output": 0}
+        if error:
+            raise error
+        yield {"text": "", "tokens_input": 12, "tokens_output": 5}
+
+    return async_stream_prompt_text
+
+
+def test_parser_extracts_string_fields_character_by_character():
+    response = 'Content: ```json\n{"subject": "Caf\\u00e9 \\ud83d\\ude00", "priority": 2, "meta": {"body": "no"}, "body": "<p>Hi \\"Jane\\"</p>\\n"}\n```'
+    parser = JsonFieldParser(("subject", "body"))
+
+    fields = feed_chunks(parser, list(response))
+
+    assert fields == {"subject": "Café 😀", "body": '<p>Hi "Jane"</p>\n'}
+
+
+def test_parser_merges_the_deltas_of_a_chunk():
+    parser = JsonFieldParser(("body",))
+
+    assert parser.feed('{"body": "Hel') == [("body", "Hel")]
+    assert parser.feed('lo", "subject": "x"}') == [("body", "lo")]
+
+
+def test_fields_are_streamed_then_the_result(monkeypatch):
+    response = json.dumps({"subject": "Meeting", "body": "See you at 10"})
+    chunks = [response[i : i + 7] for i in range(0, len(response), 7)]
+    monkeypatch.setattr(openai_client, "async_stream_prompt_text", fake_stream(chunks))
+
+    events = collect(stream_prompt_fields("prompt", ("subject", "body"), "openai"))
+
+    deltas = [event for event in events if event["type"] == "delta"]
+    assert "".join(e["text"] for e in deltas if e["field"] == "body") == "See you at 10"
+    assert events[-1] == {
+        "type": "result",
+        "result": {
+            "subject": "Meeting",
+            "body": "See you at 10",
+            "tokens_input": 12,
+            "tokens_output": 5,
+        },
+        "llm_provider": "openai",
+    }
+
+
+def test_failure_before_the_first_delta_falls_back(monkeypatch):
+    monkeypatch.setattr(router, "LLM_FALLBACK_PROVIDER", "openai")
+    monkeypatch.setattr(router, "LLM_FALLBACK_MODEL", None)
+    router.reset_router()
+    monkeypatch.setattr(
+        claude, "async_stream_prompt_text", fake_stream([], ConnectionError("down"))
+    )
+    monkeypatch.setattr(
+        openai_client, "async_stream_prompt_text", fake_stream(['{"body": "ok"}'])
+    )
+
+    events = collect(
+        stream_prompt_fields("prompt", ("body",), "anthropic", allow_fallback=True)
+    )
+
+    assert events[0] == {"type": "delta", "field": "body", "text": "ok"}
+    assert events[-1]["llm_provider"] == "openai"
+
+
+def test_failure_after_the_first_delta_is_raised(monkeypatch):
+    monkeypatch.setattr(router, "LLM_FALLBACK_PROVIDER", "openai")
+    router.reset_router()
+    monkeypatch.setattr(
+        claude,
+        "async_stream_prompt_text",
+        fake_stream(['{"body": "Hel'], ConnectionError("down")),
+    )
+
+    with pytest.raises(ConnectionError):
+        collect(
+            stream_prompt_fields("prompt", ("body",), "anthropic", allow_fallback=True)
+        )
+
+
+def test_stream_sse_renames_the_fields_and_ends_with_done():
+    async def events():
+        yield {"type": "delta", "field": "body", "text": "Hi"}
+        yield {
+            "type": "result",
+            "result": {"body": "Hi", "tokens_input": 1, "tokens_output": 1},
+        }
+
+    sse = collect(
+        stream_sse(
+            events(),
+            {"body": "emailBody"},
+            lambda result: {"emailBody": result["body"]},
+            "Failed",
+        )
+    )
+
+    assert sse == [
+        format_sse("delta", {"field": "emailBody", "text": "Hi"}),
+        'event: done\ndata: {"emailBody": "Hi"}\n\n',
+    ]
+
+
+def test_stream_sse_ends_with_an_error_event():
+    async def events():
+        yield {"type": "delta", "field": "body", "text": "Hi"}
+        raise RuntimeError("provider down")
+
+    sse = collect(
+        stream_sse(events(), {"body": "emailBody"}, lambda result: {}, "Failed")
+    )
+
+    assert sse[-1] == 'event: error\ndata: {"error": "Failed"}\n\n'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "view, body",
+    [
+        (get_new_email_response_stream, {"userInput": "Shorter", "subject": "Hi"}),
+        (get_new_email_response_stream, "not json"),
+        (improve_draft_stream, {"userInput": "Shorter", "history": "not a dict"}),
+        (new_email_ai_stream, {"length": "short"}),
+        (new_email_ai_stream, "not json"),
+        (generate_email_answer_stream, {"subject": "Hi"}),
+        (generate_email_answer_stream, "not json"),
+    ],
+)
+def test_streaming_views_reject_invalid_input(user, view, body):
+    Subscription.objects.create(user=user, plan=START_PLAN, is_trial=False)
+    request = APIRequestFactory().post(
+        "/",
+        body if isinstance(body, str) else json.dumps(body),
+        content_type="application/json",
+    )
+    force_authenticate(request, user=user)
+
+    response = view(request)
+
+    assert response.status_code == 400
@@ -0,0 +1,61 @@
+import asyncio
+import json
+from aomail.ai_providers import async_llm_functions
+from aomail.ai_providers.clients import get_async_client
+from aomail.ai_providers.openai import client as openai_client
+
+
+def test_calls_run_concurrently_on_one_event_loop(monkeypatch):
+    prompts = []
+
+    async def async_get_prompt_text(formatted_prompt, model=None):
+        prompts.append(formatted_prompt)
+        await asyncio.sleep(0.1)
+        return {
+            "text": json.dumps({"subject": "Hello", "body": "World"}),
+            "tokens_input": 10,
+            "tokens_output": 2,
+        }
+
+    monkeypatch.setattr(openai_client, "async_get_prompt_text", async_get_prompt_text)
+
+    async def correct_many():
+        return await asyncio.gather(
+            *(
+                async_llm_functions.correct_mail_language_mistakes(
+                    "Wrld", "Hello", "openai"
+                )
+                for _ in range(20)
+            )
+        )
+
+    loop = asyncio.new_event_loop()
+    try:
+        start = loop.time()
+        results = loop.run_until_complete(correct_many())
+        assert loop.time() - start < 1
+    finally:
+        loop.close()
+
+    assert len(prompts) == 20
+    assert "Wrld" in prompts[0]
+    assert results[0]["correctedBody"] == "World"
+    assert results[0]["numCorrections"] == 1
+    assert results[0]["tokens_input"] == 10
+
+
+def test_async_clients_are_shared_per_event_loop():
+    created = []
+
+    async def get():
+        return get_async_client(
+            "fake", None, lambda: created.append(object()) or created[-1]
+        )
+
+    async def get_twice():
+        return await get(), await get()
+
+    first, second = asyncio.run(get_twice())
+    assert first is second
+    assert asyncio.run(get()) is not first
+    assert len(created) == 2
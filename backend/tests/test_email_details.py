@@ -0,0 +1,107 @@
+import json
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from aomail.constants import IMPORTANT, START_PLAN
+from aomail.controllers.emails import get_simple_email_data
+from aomail.controllers.search_emails import get_emails_data
+from aomail.models import (
+    Attachment,
+    BCC_sender,
+    CC_sender,
+    Category,
+    Email,
+    Sender,
+    Subscription,
+)
+from aomail.utils import serializers
+from aomail.utils.security import encrypt_text
+
+
+KEY = "XP6XNlULLDpZnZvskYE_dvJ3PPpXsmtFAv37Dlt3ak4="
+
+
+@pytest.fixture
+def email_ids(monkeypatch, user, social_api) -> list[int]:
+    monkeypatch.setattr(serializers, "EMAIL_SHORT_SUMMARY_KEY", KEY)
+    monkeypatch.setattr(serializers, "EMAIL_ONE_LINE_SUMMARY_KEY", KEY)
+    Subscription.objects.create(user=user, plan=START_PLAN, is_trial=False)
+    category = Category.objects.create(name="Others", user=user)
+
+    ids = []
+    for i in range(10):
+        email = Email.objects.create(
+            user=user,
+            social_api=social_api,
+            provider_id=str(i),
+            email_provider="google",
+            short_summary=encrypt_text(KEY, f"short {i}"),
+            one_line_summary=encrypt_text(KEY, f"one line {i}"),
+            subject=f"Subject {i}",
+            sender=Sender.objects.create(
+                email=f"sender{i}@example.com", name=f"Sender {i}"
+            ),
+            priority=IMPORTANT,
+            date=timezone.now(),
+            category=category,
+        )
+        CC_sender.objects.bulk_create(
+            [
+                CC_sender(
+                    email_object=email, email=f"cc{j}@example.com", name=f"CC {j}"
+                )
+                for j in range(2)
+            ]
+        )
+        BCC_sender.objects.create(
+            email_object=email, email="bcc@example.com", name="BCC"
+        )
+        Attachment.objects.create(
+            email=email, name="file.pdf", id_api=f"attachment_{i}"
+        )
+        ids.append(email.id)
+
+    return ids
+
+
+def post(view, user, ids: list[int]):
+    request = APIRequestFactory().post(
+        "/", json.dumps({"ids": ids}), content_type="application/json"
+    )
+    force_authenticate(request, user=user)
+    with CaptureQueriesContext(connection) as queries:
+        response = view(request)
+    return response, len(queries)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("view", [get_emails_data, get_simple_email_data])
+def test_email_details_run_a_constant_number_of_queries(user, email_ids, view):
+    _, nb_queries_one_email = post(view, user, email_ids[:1])
+    response, nb_queries_page = post(view, user, email_ids)
+
+    # subscription, emails with their sender and category, CC senders, BCC senders, attachments
+    assert nb_queries_page == nb_queries_one_email == 5
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_email_details_are_the_same_for_both_endpoints(user, email_ids):
+    simple_data = post(get_simple_email_data, user, email_ids)[0].data["emailsData"]
+    data = post(get_emails_data, user, email_ids)[0].data["data"]["Others"][IMPORTANT]
+
+    email = next(email for email in simple_data if email["id"] == email_ids[3])
+    assert (
+        email["shortSummary"] == "short 3" and email["oneLineSummary"] == "one line 3"
+    )
+    assert email["sender"] == {"email": "sender3@example.com", "name": "Sender 3"}
+    assert [cc["name"] for cc in email["cc"]] == ["CC 0", "CC 1"]
+    assert email["bcc"] == [{"email": "bcc@example.com", "name": "BCC"}]
+    assert email["attachments"] == [
+        {"attachmentName": "file.pdf", "attachmentId": "attachment_3"}
+    ]
+    assert sorted(data, key=lambda email: email["id"]) == sorted(
+        simple_data, key=lambda email: email["id"]
+    )
@@ -6,6 +6,11 @@ from aomail.utils.email_processing import (
     snake_to_camel,
     contains_html,
     concat_text,
+    strip_boilerplate,
+    strip_quoted_replies,
+    split_thread,
+    truncate_thread_to_budget,
+    truncate_to_budget,
 )
 
 
@@ -74,3 +79,107 @@ def test_concat_text():
     assert concat_text("existing", "append") == "existingappend"
     assert concat_text(None, b"bytes text") == "bytes text"
     assert concat_text("existing", b"bytes append") == "existingbytes append"
+
+
+def test_strip_quoted_replies():
+    gmail = "Works for me.\nSee you there.\n\nOn Mon, Jan 1, 2024 at 10:00 AM John <john@acme.com>\nwrote:\n> Can we meet?\n> Thanks"
+    assert strip_quoted_replies(gmail) == "Works for me.\nSee you there."
+
+    outlook = "Approved.\nGo ahead.\n\nFrom: John\nSent: Monday\nTo: Jane\nSubject: Budget\n\nPlease approve."
+    assert strip_quoted_replies(outlook) == "Approved.\nGo ahead."
+
+    inline = "See below.\n> quoted line\nMy answer."
+    assert strip_quoted_replies(inline) == "See below.\nMy answer."
+
+    only_quote = "> forwarded content"
+    assert strip_quoted_replies(only_quote) == only_quote
+
+    one_line_note = "Thanks!\n\nOn Mon, Jane wrote:\n> Here is the report."
+    assert strip_quoted_replies(one_line_note) == one_line_note
+
+
+def test_strip_quoted_replies_keeps_forwarded_emails():
+    forwarded = (
+        "FYI see below\n\n---------- Forwarded message ---------\n"
+        "From: Alice <alice@acme.com>\nDate: Mon, Jan 1, 2024 at 10:00 AM\n"
+        "Subject: Contract\nTo: Bob <bob@acme.com>\n\n"
+        "Hi Bob, the contract renewal is due next week."
+    )
+    assert strip_quoted_replies(forwarded) == forwarded
+
+    reply_to_forward = (
+        "Thanks, I will review it.\nTalk soon.\n\n"
+        "On Mon, Jan 1, 2024 at 11:00 AM Bob <bob@acme.com>\nwrote:\n"
+        "> ---------- Forwarded message ---------\n> From: Alice\n> Date: Mon"
+    )
+    assert (
+        strip_quoted_replies(reply_to_forward)
+        == "Thanks, I will review it.\nTalk soon."
+    )
+
+
+def test_strip_boilerplate():
+    email = (
+        "Meeting moved to 3pm.\n\nSent from my iPhone\n\n"
+        "This email is confidential and intended solely for the addressee. "
+        "If you received this email in error, please notify the sender."
+    )
+    assert strip_boilerplate(email) == "Meeting moved to 3pm."
+
+    signed = "Invoice attached.\n--\nJane Doe\nAcme"
+    assert strip_boilerplate(signed) == "Invoice attached."
+
+    mentions_confidential = "The report is confidential, please do not share it."
+    assert strip_boilerplate(mentions_confidential) == mentions_confidential
+
+    french = (
+        "Colis livré.\n\nCe message et ses pièces jointes sont confidentiels et établis à "
+        "l'intention exclusive de ses destinataires. Si vous avez reçu ce message par erreur, "
+        "merci d'en avertir immédiatement l'expéditeur."
+    )
+    assert strip_boilerplate(french) == "Colis livré."
+
+    mentions_recipient = "Le dossier est strictement confidentiel : vérifiez le destinataire avant l'envoi."
+    assert strip_boilerplate(mentions_recipient) == mentions_recipient
+
+
+def test_truncate_to_budget_keeps_head_and_tail():
+    body = "HEAD " + "x" * 4000 + " TAIL"
+    truncated = truncate_to_budget(body, 100)
+
+    assert truncated.startswith("HEAD")
+    assert truncated.endswith("TAIL")
+    assert "[...]" in truncated
+    assert len(truncated) <= 100 * 4 + 10
+    assert truncate_to_budget("short", 100) == "short"
+
+
+THREAD = (
+    "Latest answer.\n\n"
+    "On Tue, Jan 2, 2024, Jane <jane@acme.com> wrote:\n"
+    "> Second email " + "a" * 200 + "\n>\n"
+    "> On Mon, Jan 1, 2024, John <john@acme.com> wrote:\n"
+    ">> First email " + "b" * 200
+)
+
+
+def test_split_thread_splits_the_quoted_replies_too():
+    emails = split_thread(THREAD)
+
+    assert len(emails) == 3
+    assert emails[0] == "Latest answer."
+    assert "Second email" in emails[1] and "First email" not in emails[1]
+    assert emails[2].startswith("> On Mon")
+
+
+def test_truncate_thread_to_budget_drops_the_oldest_emails():
+    truncated = truncate_thread_to_budget(THREAD, 80)
+
+    assert truncated.startswith("Latest answer.")
+    assert "Second email " + "a" * 200 in truncated
+    assert "First email" not in truncated
+    assert truncated.endswith("[...]")
+    assert truncate_thread_to_budget(THREAD, 1000) == THREAD
+    assert truncate_thread_to_budget("x" * 4000, 100) == truncate_to_budget(
+        "x" * 4000, 100
+    )
@@ -1,20 +1,36 @@
 import pytest
 from django.contrib.auth.models import User
-from aomail.models import Category, Email, Rule, Sender, SocialAPI, Statistics
+from aomail.models import (
+    Category,
+    Email,
+    Preference,
+    Rule,
+    Sender,
+    SocialAPI,
+    Statistics,
+    Subscription,
+)
 from aomail.constants import (
     ANSWER_REQUIRED,
     DEFAULT_CATEGORY,
     HIGHLY_RELEVANT,
     IMPORTANT,
     NOT_RELEVANT,
+    START_PLAN,
     USELESS,
 )
+from aomail.email_providers import utils
 from aomail.email_providers.utils import (
     apply_rules,
     delete_email_rule,
+    emails_to_db,
+    process_email,
+    process_emails_batch,
     save_email_to_db,
+    save_emails_to_db,
     verify_condition,
 )
+from aomail.ingestion.enrichment_cache import clear_enrichment_cache
 from aomail.utils.security import encrypt_text
 
 
@@ -270,3 +286,375 @@ def test_save_email_to_db(processed_email: dict, social_api: SocialAPI, sender:
     assert email_entry.bcc_senders.count() == 0
     assert email_entry.pictures.count() == 0
     assert email_entry.attachments.count() == 0
+
+
+def build_processed_email(email_id: str, nb_children: int) -> dict:
+    return {
+        "email_data": {
+            "is_reply": False,
+            "email_id": email_id,
+            "from_info": ("sender", "sender@example.com"),
+            "safe_html": "safe_html",
+            "subject": "subject",
+            "sent_date": "2024-01-01 00:00:00",
+            "has_attachments": True,
+            "cc_info": [(f"cc{i}@example.com", "cc") for i in range(nb_children)],
+            "bcc_info": [(f"bcc{i}@example.com", "bcc") for i in range(nb_children)],
+            "attachments": [
+                {"attachmentId": f"id_{i}", "attachmentName": f"file_{i}"}
+                for i in range(nb_children)
+            ],
+            "image_files": [f"image_{i}.png" for i in range(nb_children)],
+        },
+        "email_processed": {
+            "topic": DEFAULT_CATEGORY,
+            "importance": IMPORTANT,
+            "response": ANSWER_REQUIRED,
+            "relevance": HIGHLY_RELEVANT,
+            "flags": {
+                "spam": False,
+                "scam": False,
+                "newsletter": False,
+                "notification": True,
+                "meeting": True,
+            },
+            "summary": {"one_line": "one line summary", "short": "short summary"},
+        },
+        "summary": {
+            "keypoints": [f"keypoint {i}" for i in range(nb_children)],
+            "category": DEFAULT_CATEGORY,
+            "organization": "organization",
+            "topic": "topic",
+        },
+    }
+
+
+@pytest.fixture
+def encryption_keys(monkeypatch):
+    key = "XP6XNlULLDpZnZvskYE_dvJ3PPpXsmtFAv37Dlt3ak4="
+    for name in (
+        "EMAIL_SHORT_SUMMARY_KEY",
+        "EMAIL_ONE_LINE_SUMMARY_KEY",
+        "EMAIL_HTML_CONTENT_KEY",
+    ):
+        monkeypatch.setattr(utils, name, key)
+
+
+@pytest.mark.django_db
+def test_save_email_to_db_uses_bulk_inserts(
+    encryption_keys,
+    social_api: SocialAPI,
+    statistics: Statistics,
+    django_assert_max_num_queries,
+):
+    # one insert per child table, whatever the number of child rows
+    # (category, sender and contact are created here, savepoints included)
+    with django_assert_max_num_queries(24):
+        email_entry = save_email_to_db(
+            build_processed_email("email_id", 10), social_api.user, social_api
+        )
+
+    assert email_entry.cc_senders.count() == 10
+    assert email_entry.bcc_senders.count() == 10
+    assert email_entry.attachments.count() == 10
+    assert email_entry.picture_mail.count() == 10
+    assert email_entry.keypoint_set.count() == 10
+
+    statistics.refresh_from_db()
+    assert statistics.nb_emails_received == 1
+    assert statistics.nb_emails_important == 1
+    assert statistics.nb_meeting == 1
+    assert statistics.nb_spam == 0
+
+    # saving the same email again is a no-op
+    assert (
+        save_email_to_db(
+            build_processed_email("email_id", 10), social_api.user, social_api
+        )
+        is None
+    )
+
+
+@pytest.mark.django_db
+def test_save_emails_to_db_batch(
+    encryption_keys,
+    social_api: SocialAPI,
+    statistics: Statistics,
+    django_assert_max_num_queries,
+):
+    save_email_to_db(build_processed_email("email_0", 1), social_api.user, social_api)
+    processed_emails = [build_processed_email(f"email_{i}", 3) for i in range(20)]
+
+    with django_assert_max_num_queries(20):
+        email_entries = save_emails_to_db(processed_emails, social_api.user, social_api)
+
+    assert len(email_entries) == 19
+    assert Email.objects.filter(user=social_api.user).count() == 20
+    statistics.refresh_from_db()
+    assert statistics.nb_emails_received == 20
+
+
+@pytest.mark.django_db
+def test_save_emails_to_db_skips_emails_stored_concurrently(
+    monkeypatch,
+    encryption_keys,
+    social_api: SocialAPI,
+    statistics: Statistics,
+):
+    process_email_entities = utils.process_email_entities
+
+    def store_concurrently(topic, from_info, user):
+        # another process stores "email_1" after the stored emails were looked up
+        monkeypatch.setattr(utils, "process_email_entities", process_email_entities)
+        save_email_to_db(build_processed_email("email_1", 1), user, social_api)
+        return process_email_entities(topic, from_info, user)
+
+    monkeypatch.setattr(utils, "process_email_entities", store_concurrently)
+    processed_emails = [build_processed_email(f"email_{i}", 3) for i in range(5)]
+
+    email_entries = save_emails_to_db(processed_emails, social_api.user, social_api)
+
+    assert sorted(email_entry.provider_id for email_entry in email_entries) == [
+        "email_0",
+        "email_2",
+        "email_3",
+        "email_4",
+    ]
+    assert Email.objects.filter(user=social_api.user).count() == 5
+    statistics.refresh_from_db()
+    assert statistics.nb_emails_received == 5
+
+
+class FakeSearch:
+    def __init__(self, user_id: int):
+        self.categories = {}
+
+    def summarize_email(self, subject: str, *args) -> dict:
+        return {"keypoints": [subject], "tokens_input": 1, "tokens_output": 1}
+
+
+def build_email_data(email_id: str) -> dict:
+    return {
+        "email_id": email_id,
+        "subject": f"subject {email_id}",
+        "from_info": ("sender", "sender@example.com"),
+        "preprocessed_data": f"body {email_id}",
+        "is_reply": False,
+    }
+
+
+@pytest.fixture
+def batch_llm(monkeypatch, user: User, statistics: Statistics) -> dict:
+    """Fake LLM of `process_emails_batch`: returns the entries of `batch_llm["emails"]`."""
+    Preference.objects.create(user=user)
+    monkeypatch.setattr(utils, "Search", FakeSearch)
+    monkeypatch.setattr("aomail.ingestion.enrichment_cache.ENRICHMENT_CACHE_SIZE", 0)
+
+    llm = {"emails": [], "error": None, "fallback_ids": []}
+
+    def categorize_and_summarize_emails(emails: list[dict], *args, **kwargs) -> dict:
+        if llm["error"]:
+            raise llm["error"]
+        return {"emails": llm["emails"], "tokens_input": 8, "tokens_output": 4}
+
+    def process_email(email_data: dict, user: User, social_api: SocialAPI) -> dict:
+        llm["fallback_ids"].append(email_data["email_id"])
+        return {
+            "email_data": email_data,
+            "email_processed": {"topic": DEFAULT_CATEGORY, "source": "fallback"},
+            "summary": {"keypoints": []},
+        }
+
+    monkeypatch.setattr(
+        utils.llm_functions,
+        "categorize_and_summarize_emails",
+        categorize_and_summarize_emails,
+    )
+    monkeypatch.setattr(utils, "process_email", process_email)
+    return llm
+
+
+@pytest.mark.django_db
+def test_process_emails_batch_maps_the_results_by_index(
+    batch_llm: dict, social_api: SocialAPI, statistics: Statistics
+):
+    emails_data = [build_email_data(f"email_{i}") for i in range(4)]
+    # misordered, email_1 and email_3 missing, one entry out of range
+    batch_llm["emails"] = [
+        {"index": "2", "topic": DEFAULT_CATEGORY, "source": "batch 2"},
+        {"index": 0, "topic": "Unknown category", "source": "batch 0"},
+        {"index": 7, "topic": DEFAULT_CATEGORY, "source": "batch 7"},
+    ]
+
+    processed_emails = process_emails_batch(emails_data, social_api.user, social_api)
+
+    assert [email["email_data"]["email_id"] for email in processed_emails] == [
+        "email_0",
+        "email_1",
+        "email_2",
+        "email_3",
+    ]
+    assert [email["email_processed"]["source"] for email in processed_emails] == [
+        "batch 0",
+        "fallback",
+        "batch 2",
+        "fallback",
+    ]
+    assert processed_emails[0]["email_processed"]["topic"] == DEFAULT_CATEGORY
+    assert processed_emails[2]["summary"] == {"keypoints": ["subject email_2"]}
+    assert batch_llm["fallback_ids"] == ["email_1", "email_3"]
+
+    statistics.refresh_from_db()
+    # the batch request and the four summaries
+    assert statistics.nb_tokens_input == 8 + 4
+    assert statistics.nb_tokens_output == 4 + 4
+
+
+@pytest.mark.django_db
+def test_process_emails_batch_falls_back_to_one_email_at_a_time(
+    batch_llm: dict, social_api: SocialAPI
+):
+    emails_data = [build_email_data(f"email_{i}") for i in range(3)]
+    batch_llm["error"] = ValueError("invalid JSON")
+
+    processed_emails = process_emails_batch(emails_data, social_api.user, social_api)
+
+    assert batch_llm["fallback_ids"] == ["email_0", "email_1", "email_2"]
+    assert [email["email_processed"]["source"] for email in processed_emails] == [
+        "fallback"
+    ] * 3
+
+
+@pytest.fixture
+def combined_llm(monkeypatch, user: User, statistics: Statistics) -> dict:
+    """Fake LLM of `process_email` with the combined enrichment: returns `combined_llm["result"]`."""
+    Preference.objects.create(user=user)
+    monkeypatch.setattr(utils, "Search", FakeSearch)
+    monkeypatch.setattr(utils, "LLM_COMBINED_ENRICHMENT", True)
+    clear_enrichment_cache()
+
+    llm = {"result": {}, "calls": []}
+
+    def enrich_email(subject: str, *args, **kwargs) -> dict:
+        llm["calls"].append("enrich_email")
+        return {**llm["result"], "tokens_input": 10, "tokens_output": 5}
+
+    def categorize_and_summarize_email(*args, **kwargs) -> dict:
+        llm["calls"].append("categorize_and_summarize_email")
+        return {
+            "topic": DEFAULT_CATEGORY,
+            "source": "two requests",
+            "tokens_input": 3,
+            "tokens_output": 2,
+        }
+
+    monkeypatch.setattr(utils.llm_functions, "enrich_email", enrich_email)
+    monkeypatch.setattr(
+        utils.llm_functions,
+        "categorize_and_summarize_email",
+        categorize_and_summarize_email,
+    )
+    yield llm
+    clear_enrichment_cache()
+
+
+@pytest.mark.django_db
+def test_process_email_enriches_in_a_single_request(
+    combined_llm: dict, social_api: SocialAPI, statistics: Statistics
+):
+    combined_llm["result"] = {
+        "topic": DEFAULT_CATEGORY,
+        "response": ANSWER_REQUIRED,
+        "relevance": HIGHLY_RELEVANT,
+        "importance": {},
+        "flags": {},
+        "summary": {"one_line": "One line", "short": "Short"},
+        "knowledge": {"organization": "Acme", "keypoints": ["keypoint"]},
+    }
+
+    processed_email = process_email(
+        build_email_data("email_0"), social_api.user, social_api
+    )
+
+    assert combined_llm["calls"] == ["enrich_email"]
+    assert processed_email["email_processed"]["summary"]["short"] == "Short"
+    assert processed_email["summary"] == {
+        "category": "Unknown",
+        "organization": "Acme",
+        "topic": "Unknown",
+        "keypoints": ["keypoint"],
+    }
+    statistics.refresh_from_db()
+    assert (statistics.nb_tokens_input, statistics.nb_tokens_output) == (10, 5)
+
+
+@pytest.mark.django_db
+def test_process_email_falls_back_to_two_requests_on_an_unparsable_enrichment(
+    combined_llm: dict, social_api: SocialAPI, statistics: Statistics
+):
+    combined_llm["result"] = {"topic": DEFAULT_CATEGORY}
+
+    for _ in range(2):
+        processed_email = process_email(
+            build_email_data("email_0"), social_api.user, social_api
+        )
+        assert processed_email["email_processed"]["source"] == "two requests"
+        assert processed_email["summary"] == {"keypoints": ["subject email_0"]}
+
+    # the unparsable enrichment is not cached, unlike the categorization
+    assert combined_llm["calls"] == [
+        "enrich_email",
+        "categorize_and_summarize_email",
+        "enrich_email",
+    ]
+    statistics.refresh_from_db()
+    # both failed combined requests are counted, with the categorization and the summaries
+    assert statistics.nb_tokens_input == 2 * 10 + 3 + 2 * 1
+    assert statistics.nb_tokens_output == 2 * 5 + 2 + 2 * 1
+
+
+@pytest.mark.django_db
+def test_emails_to_db_persists_one_batch_at_a_time(
+    monkeypatch,
+    encryption_keys,
+    social_api: SocialAPI,
+    statistics: Statistics,
+):
+    Subscription.objects.create(user=social_api.user, plan=START_PLAN, is_trial=False)
+    save_email_to_db(build_processed_email("email_0", 1), social_api.user, social_api)
+
+    batches = []
+
+    def save_batch(processed_emails: list[dict], user: User, social_api: SocialAPI):
+        batches.append([email["email_data"]["email_id"] for email in processed_emails])
+        if "email_3" in batches[-1]:
+            raise ValueError("database error")
+        return save_emails_to_db(processed_emails, user, social_api)
+
+    monkeypatch.setattr(
+        utils,
+        "get_email_data",
+        lambda social_api, email_id: (
+            None if email_id == "missing" else build_email_data(email_id)
+        ),
+    )
+    monkeypatch.setattr(
+        utils,
+        "process_emails_batch",
+        lambda emails_data, user, social_api: [
+            build_processed_email(email_data["email_id"], 1)
+            for email_data in emails_data
+        ],
+    )
+    monkeypatch.setattr(utils, "save_emails_to_db", save_batch)
+    monkeypatch.setattr(utils, "post_process_email", lambda *args: None)
+
+    email_ids = ["email_0", "email_1", "email_1", "missing", "email_2", "email_3"]
+    nb_saved_emails = emails_to_db(social_api, email_ids, batch_size=2)
+
+    # the stored and duplicate IDs are skipped, the failing batch does not stop the next ones
+    assert batches == [["email_1"], ["email_2", "email_3"]]
+    assert nb_saved_emails == 1
+    assert set(
+        Email.objects.filter(user=social_api.user).values_list("provider_id", flat=True)
+    ) == {"email_0", "email_1"}
@@ -0,0 +1,163 @@
+"""
+Query-plan regression suite of the Email table: runs the real list, count, suggestion and statistics
+queries on a seeded dataset of many users, then fails if Postgres plans a sequential scan of the emails.
+"""
+
+import json
+from datetime import timedelta
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from aomail.analytics.dashboard import dashboard_data
+from aomail.analytics.statistics import get_period_stats_values
+from aomail.constants import START_PLAN
+from aomail.controllers.emails import get_answer_email_suggestion_ids
+from aomail.controllers.search_emails import (
+    construct_filters,
+    count_emails,
+    format_email_data,
+    get_email_ids_page,
+    get_search_query,
+    get_sorted_queryset,
+)
+from aomail.models import Category, Email, Subscription
+
+
+NB_USERS = 50
+NB_EMAILS_PER_USER = 500
+
+
+def seed_emails(users: list[User]):
+    """Inserts NB_EMAILS_PER_USER random emails per user, in 3 categories, with SQL."""
+    categories = [
+        Category.objects.create(name=name, user=user)
+        for user in users
+        for name in ("Others", "Work", "Bills")
+    ]
+    user_ids = "ARRAY[" + ", ".join(str(user.id) for user in users) + "]"
+    category_ids = (
+        "ARRAY[" + ", ".join(str(category.id) for category in categories) + "]"
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO aomail_sender (email, name)
+            SELECT 'plan_sender_' || i || '@example.com', 'Sender ' || i FROM generate_series(1, 500) AS i
+            RETURNING id
+            """
+        )
+        sender_ids = (
+            "ARRAY[" + ", ".join(str(row[0]) for row in cursor.fetchall()) + "]"
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO aomail_email (
+                user_id, category_id, sender_id, provider_id, email_provider, short_summary,
+                one_line_summary, html_content, subject, priority, read, archive, answer_later,
+                date, has_attachments, answer, relevance, spam, scam, newsletter, notification, meeting
+            )
+            SELECT
+                ({user_ids})[1 + mod(i, {len(users)})],
+                ({category_ids})[1 + 3 * mod(i, {len(users)}) + mod(i / {len(users)}, 3)],
+                ({sender_ids})[1 + mod(i, 500)], 'plan_email_' || i, 'google', '', '', '',
+                (ARRAY['Invoice', 'Meeting', 'Weekly report', 'Offer'])[1 + mod(i, 4)] || ' ' || i,
+                (ARRAY['important', 'informative', 'useless'])[1 + mod(i, 3)], mod(i, 10) < 8,
+                mod(i, 20) = 0, false, now() - i * interval '10 minutes', false,
+                (ARRAY['Answer Required', 'Might Require Answer', 'No Answer Required'])[1 + mod(i, 3)],
+                'Highly Relevant', false, false, false, false, false
+            FROM generate_series(1, %s) AS i
+            """,
+            [len(users) * NB_EMAILS_PER_USER],
+        )
+        cursor.execute("ANALYZE aomail_email, aomail_sender, aomail_category")
+
+
+@pytest.fixture(scope="module")
+def large_mailboxes(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock(), transaction.atomic():
+        users = User.objects.bulk_create(
+            [
+                User(
+                    username=f"plan_user_{i}",
+                    date_joined=timezone.now() - timedelta(days=30),
+                )
+                for i in range(NB_USERS)
+            ]
+        )
+        Subscription.objects.create(user=users[0], plan=START_PLAN, is_trial=False)
+        seed_emails(users)
+        yield users[0]
+        transaction.set_rollback(True)
+
+
+def call_view(view, user: User, method: str = "get", body: dict = None):
+    factory = APIRequestFactory()
+    if method == "post":
+        request = factory.post(
+            "/", json.dumps(body or {}), content_type="application/json"
+        )
+    else:
+        request = factory.get("/")
+    force_authenticate(request, user=user)
+    response = view(request)
+    assert response.status_code == 200
+
+
+def search_list(user: User, parameters: dict):
+    and_filters, or_filters, or_filters_search = construct_filters(user, parameters)
+    queryset = get_sorted_queryset(
+        and_filters, or_filters, or_filters_search, "asc", user
+    )
+    return format_email_data(queryset, get_search_query(parameters.get("search", "")))
+
+
+QUERY_SHAPES = {
+    "email list": lambda user: search_list(user, {}),
+    "email list page": lambda user: get_email_ids_page(
+        Email.objects.filter(user=user), None, None, 100
+    ),
+    "email list search": lambda user: search_list(user, {"search": "invoice"}),
+    "archived emails": lambda user: search_list(
+        user, {"advanced": True, "archive": True}
+    ),
+    "unread important emails": lambda user: search_list(
+        user, {"advanced": True, "read": False, "priority": ["important"]}
+    ),
+    "sidebar counts": lambda user: count_emails(Email.objects.filter(user=user)),
+    "sidebar counts only": lambda user: count_emails(
+        Email.objects.filter(user=user), with_ids=False
+    ),
+    "answer suggestions": lambda user: call_view(get_answer_email_suggestion_ids, user),
+    "category distribution": lambda user: call_view(dashboard_data, user),
+    "period statistics": lambda user: get_period_stats_values(
+        ["min", "max", "avg"], user, 7, "nbImportant", timezone.now()
+    ),
+}
+
+
+def explain_email_queries(run) -> list[str]:
+    """Runs the function and returns the plan of each query it made on the email table."""
+    with CaptureQueriesContext(connection) as queries:
+        run()
+
+    plans = []
+    with connection.cursor() as cursor:
+        for query in queries:
+            if query["sql"].startswith("SELECT") and '"aomail_email"' in query["sql"]:
+                cursor.execute(f"EXPLAIN {query['sql']}")
+                plans.append("\n".join(row[0] for row in cursor.fetchall()))
+    return plans
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("shape", QUERY_SHAPES)
+def test_email_queries_do_not_scan_the_whole_table(large_mailboxes, shape):
+    plans = explain_email_queries(lambda: QUERY_SHAPES[shape](large_mailboxes))
+
+    assert plans
+    for plan in plans:
+        assert "Seq Scan on aomail_email" not in plan, plan
@@ -0,0 +1,232 @@
+import base64
+import json
+from datetime import timedelta
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from aomail.constants import IMPORTANT, INFORMATIVE, START_PLAN, USELESS
+from aomail.controllers.search_emails import (
+    construct_filters,
+    count_emails,
+    format_email_data,
+    get_email_ids_page,
+    get_search_query,
+    get_sorted_queryset,
+    get_user_emails_ids,
+)
+from aomail.models import CC_sender, Category, Email, Sender, Subscription
+
+
+def create_email(
+    user,
+    social_api,
+    provider_id: str,
+    subject: str,
+    sender: Sender,
+    priority: str = IMPORTANT,
+    read: bool = False,
+    date=None,
+) -> Email:
+    return Email.objects.create(
+        user=user,
+        social_api=social_api,
+        provider_id=provider_id,
+        email_provider="google",
+        subject=subject,
+        sender=sender,
+        priority=priority,
+        read=read,
+        date=date,
+        category=Category.objects.get_or_create(name="Others", user=user)[0],
+    )
+
+
+@pytest.fixture
+def mailbox(user, social_api) -> list[int]:
+    """Emails of the user in the order of the list."""
+    sender = Sender.objects.create(email="jane@acme.com", name="Jane")
+    now = timezone.now()
+    emails = [
+        (IMPORTANT, False, now),
+        (IMPORTANT, False, now - timedelta(days=1)),
+        (INFORMATIVE, False, None),
+        (INFORMATIVE, False, now),
+        (USELESS, False, now),
+        (IMPORTANT, True, now),
+        (INFORMATIVE, True, now),
+        (INFORMATIVE, True, now),
+        (USELESS, True, now - timedelta(days=2)),
+    ]
+    created = [
+        create_email(
+            user, social_api, str(i), f"Report {i}", sender, priority, read, date
+        )
+        for i, (priority, read, date) in reversed(list(enumerate(emails)))
+    ]
+    return [email.id for email in reversed(created)]
+
+
+def search(user, text: str, advanced: bool = False) -> list[int]:
+    parameters = {"search": text, "advanced": advanced}
+    and_filters, or_filters, or_filters_search = construct_filters(user, parameters)
+    queryset = get_sorted_queryset(
+        and_filters, or_filters, or_filters_search, "asc", user
+    )
+    return format_email_data(queryset, get_search_query(text))[1]
+
+
+@pytest.mark.django_db
+def test_search_vector_follows_the_subject_the_sender_and_the_cc_senders(
+    user, social_api
+):
+    jane = Sender.objects.create(email="jane.doe@acme.com", name="Jane")
+    email = create_email(user, social_api, "1", "Quarterly invoice", jane)
+    create_email(
+        user,
+        social_api,
+        "2",
+        "Lunch",
+        Sender.objects.create(email="bob@corp.com", name="Bob"),
+    )
+
+    assert search(user, "invo") == [email.id]
+    assert search(user, "acme") == [email.id]
+    assert search(user, "marc") == []
+    assert search(user, "jane.doe@acme") == [email.id]
+
+    CC_sender.objects.bulk_create(
+        [
+            CC_sender(email_object=email, email="marc@partner.io", name="Marc"),
+            CC_sender(email_object=email, email="lea@partner.io", name="Lea"),
+        ]
+    )
+    assert search(user, "partner", advanced=True) == [email.id]
+
+    jane.name = "Janet Smith"
+    jane.save()
+    email.subject = "Budget"
+    email.save()
+    assert search(user, "smith budg") == [email.id]
+    assert search(user, "invoice") == []
+
+    CC_sender.objects.filter(email_object=email).delete()
+    assert search(user, "marc") == []
+
+
+@pytest.mark.django_db
+def test_search_ranks_subject_matches_first(user, social_api):
+    sender = Sender.objects.create(email="report@stats.com", name="Stats")
+    from_sender = create_email(user, social_api, "1", "Weekly figures", sender)
+    in_subject = create_email(
+        user,
+        social_api,
+        "2",
+        "Report",
+        Sender.objects.create(email="ann@corp.com", name="Ann"),
+    )
+
+    assert search(user, "report") == [in_subject.id, from_sender.id]
+    assert len(search(user, "")) == 2
+
+
+@pytest.mark.django_db
+def test_email_list_is_sorted_in_a_single_query(
+    user, mailbox, django_assert_num_queries
+):
+    queryset = Email.objects.filter(user=user)
+
+    with django_assert_num_queries(1):
+        assert format_email_data(queryset) == (len(mailbox), mailbox)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("search", ["", "report"])
+def test_pages_follow_the_order_of_the_full_list(user, mailbox, search):
+    queryset = Email.objects.filter(user=user)
+    search_query = get_search_query(search)
+    pages, cursor = [], None
+
+    for _ in range(len(mailbox)):
+        ids, cursor = get_email_ids_page(queryset, search_query, cursor, 2)
+        pages.append(ids)
+        if not cursor:
+            break
+
+    assert [len(ids) for ids in pages] == [2, 2, 2, 2, 1]
+    assert sum(pages, []) == format_email_data(queryset, search_query)[1]
+    with pytest.raises(ValueError):
+        get_email_ids_page(queryset, search_query, "not a cursor", 2)
+
+
+@pytest.mark.django_db
+def test_get_user_emails_ids_returns_a_page_with_limit(user, mailbox):
+    Subscription.objects.create(user=user, plan=START_PLAN, is_trial=False)
+
+    def post(body: dict):
+        request = APIRequestFactory().post(
+            "/aomail/user/emails_ids/",
+            json.dumps(body),
+            content_type="application/json",
+        )
+        force_authenticate(request, user=user)
+        return get_user_emails_ids(request)
+
+    first = post({"limit": 5})
+    second = post({"limit": 5, "after": first.data["next"]})
+
+    assert first.data["count"] == second.data["count"] == len(mailbox)
+    assert first.data["ids"] + second.data["ids"] == mailbox
+    assert second.data["next"] is None
+    assert post({}).data == {"count": len(mailbox), "ids": mailbox}
+    assert post({"limit": 0}).status_code == 400
+    assert post({"limit": 5, "after": "x"}).status_code == 400
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        [0, 1700000000, 1],  # date not a string
+        [0, "yesterday", 1],
+        [0, None, "1"],
+        [True, None, 1],
+        [0, None],
+        {"id": 1},
+    ],
+)
+def test_malformed_cursors_are_rejected(user, mailbox, cursor):
+    Subscription.objects.create(user=user, plan=START_PLAN, is_trial=False)
+    after = base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+    request = APIRequestFactory().post(
+        "/aomail/user/emails_ids/",
+        json.dumps({"limit": 5, "after": after}),
+        content_type="application/json",
+    )
+    force_authenticate(request, user=user)
+
+    assert get_user_emails_ids(request).status_code == 400
+
+
+@pytest.mark.django_db
+def test_email_counts_are_aggregated_in_a_single_query(
+    user, mailbox, django_assert_num_queries
+):
+    Email.objects.filter(id=mailbox[-1]).update(archive=True)
+    queryset = Email.objects.filter(user=user)
+
+    with django_assert_num_queries(1):
+        counts = count_emails(queryset)
+    with django_assert_num_queries(1):
+        counts_only = count_emails(queryset, with_ids=False)
+
+    assert counts_only == {
+        "useless_count": 1,
+        "important_count": 2,
+        "informative_count": 2,
+        "read_count": 3,
+    }
+    assert sorted(counts["important_ids"]) == sorted(mailbox[:2])
+    assert sorted(counts["read_ids"]) == sorted(mailbox[5:8])
+    assert {
+        key: value for key, value in counts.items() if key.endswith("_count")
+    } == counts_only
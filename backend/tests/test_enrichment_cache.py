@@ -0,0 +1,71 @@
+import threading
+import time
+from aomail.ingestion.enrichment_cache import (
+    clear_enrichment_cache,
+    get_cached,
+    get_enrichment_cache_stats,
+    get_enrichment_key,
+    get_or_compute,
+    set_cached,
+)
+
+
+def test_key_ignores_whitespace_but_not_user_inputs():
+    key = get_enrichment_key("categorize", "Hello  \n world", categories={"Work": ""})
+    assert key == get_enrichment_key(
+        "categorize", "Hello world", categories={"Work": ""}
+    )
+    assert key != get_enrichment_key(
+        "categorize", "Hello world", categories={"Work": "", "Home": ""}
+    )
+    assert key != get_enrichment_key(
+        "summarize_email", "Hello world", categories={"Work": ""}
+    )
+
+
+def test_hits_are_free_and_counted_per_provider():
+    clear_enrichment_cache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"topic": "Work", "tokens_input": 100, "tokens_output": 20}
+
+    first = get_or_compute("key", "openai", compute)
+    first.pop("tokens_input")
+    second = get_or_compute("key", "openai", compute)
+
+    assert len(calls) == 1
+    assert second == {"topic": "Work", "tokens_input": 0, "tokens_output": 0}
+    assert get_enrichment_cache_stats() == {
+        "openai": {"hits": 1, "misses": 1, "hit_rate": 0.5, "tokens_saved": 120}
+    }
+
+    assert get_cached("other", "google") is None
+    set_cached("other", {"topic": "Home", "tokens_input": 10, "tokens_output": 5})
+    assert get_cached("other", "google")["topic"] == "Home"
+
+
+def test_concurrent_requests_share_one_computation():
+    clear_enrichment_cache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"topic": "Work", "tokens_input": 1, "tokens_output": 1}
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(get_or_compute("shared", "openai", compute))
+        )
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert [result["topic"] for result in results] == ["Work"] * 5
@@ -0,0 +1,136 @@
+import pytest
+from googleapiclient.errors import HttpError
+from httplib2 import Response
+from aomail.email_providers.google import email_operations
+from aomail.models import GoogleListener, SocialAPI
+
+
+class FakeRequest:
+    def __init__(self, response: dict):
+        self.response = response
+
+    def execute(self) -> dict:
+        return self.response
+
+
+class FakeError:
+    def execute(self):
+        raise HttpError(Response({"status": 404}), b"History expired")
+
+
+class FakeMessages:
+    def __init__(self, pages: dict):
+        self.pages = pages
+        self.label_ids = []
+
+    def list(self, userId: str, labelIds: list, q: str, pageToken: str = None):
+        self.label_ids.append(labelIds)
+        return FakeRequest(self.pages[pageToken])
+
+
+class FakeGmail:
+    """Minimal Gmail service returning paginated history records and messages."""
+
+    def __init__(self, pages: dict, message_pages: dict = None, history_id="100"):
+        self.pages = pages
+        self.start_history_ids = []
+        self.history_id = history_id
+        self.message_list = FakeMessages(message_pages or {})
+
+    def users(self):
+        return self
+
+    def history(self):
+        return self
+
+    def messages(self):
+        return self.message_list
+
+    def getProfile(self, userId: str):
+        return FakeRequest({"historyId": self.history_id})
+
+    def list(self, userId: str, startHistoryId: str, pageToken: str = None, **kwargs):
+        self.start_history_ids.append(startHistoryId)
+        if self.pages is None:
+            return FakeError()
+        return FakeRequest(self.pages[pageToken])
+
+
+def added(email_id: str) -> dict:
+    return {"messagesAdded": [{"message": {"id": email_id, "labelIds": ["INBOX"]}}]}
+
+
+@pytest.mark.django_db
+def test_get_new_email_ids_uses_history(monkeypatch, social_api: SocialAPI):
+    gmail = FakeGmail(
+        {
+            None: {
+                "history": [added("id1"), added("id2")],
+                "nextPageToken": "page2",
+                "historyId": "120",
+            },
+            "page2": {"history": [added("id2"), added("id3")], "historyId": "120"},
+        }
+    )
+    monkeypatch.setattr(
+        email_operations, "authenticate_service", lambda *args: {"gmail": gmail}
+    )
+    listener = GoogleListener.objects.create(social_api=social_api)
+
+    # first notification only stores the starting point
+    assert email_operations.get_new_email_ids(social_api) is None
+    listener.refresh_from_db()
+    assert listener.history_id == "100"
+
+    sync_state = email_operations.get_new_email_ids(social_api)
+    assert sync_state["email_ids"] == ["id1", "id2", "id3"]
+    assert gmail.start_history_ids == ["100", "100"]
+    listener.refresh_from_db()
+    assert listener.history_id == "100"
+
+    # the historyId only moves forward once the emails are stored
+    assert email_operations.save_history_id(sync_state)
+    listener.refresh_from_db()
+    assert listener.history_id == "120"
+    assert not email_operations.save_history_id(sync_state)
+
+
+@pytest.mark.django_db
+def test_get_new_email_ids_lists_the_inbox_when_the_history_expired(
+    monkeypatch, social_api: SocialAPI
+):
+    gmail = FakeGmail(
+        None,
+        {
+            None: {"messages": [{"id": "id1"}], "nextPageToken": "page2"},
+            "page2": {"messages": [{"id": "id2"}]},
+        },
+        history_id="300",
+    )
+    monkeypatch.setattr(
+        email_operations, "authenticate_service", lambda *args: {"gmail": gmail}
+    )
+    GoogleListener.objects.create(social_api=social_api, history_id="100")
+
+    sync_state = email_operations.get_new_email_ids(social_api)
+
+    assert sync_state["email_ids"] == ["id1", "id2"]
+    assert sync_state["history_id"] == "300"
+    assert gmail.message_list.label_ids == [["INBOX"], ["INBOX"]]
+    assert GoogleListener.objects.get(social_api=social_api).history_id == "100"
+
+
+@pytest.mark.django_db
+def test_get_new_email_ids_raises_when_the_resync_fails(
+    monkeypatch, social_api: SocialAPI
+):
+    gmail = FakeGmail(None, {None: None})
+    gmail.message_list.list = lambda **kwargs: FakeError()
+    monkeypatch.setattr(
+        email_operations, "authenticate_service", lambda *args: {"gmail": gmail}
+    )
+    GoogleListener.objects.create(social_api=social_api, history_id="100")
+
+    with pytest.raises(HttpError):
+        email_operations.get_new_email_ids(social_api)
+    assert GoogleListener.objects.get(social_api=social_api).history_id == "100"
@@ -0,0 +1,32 @@
+from aomail.ingestion import budget
+from aomail.ingestion.budget import (
+    get_budget_stats,
+    prepare_email_body,
+    reset_budget_stats,
+)
+
+
+def test_prepare_email_body_reports_saved_tokens(monkeypatch):
+    monkeypatch.setattr(
+        budget,
+        "LLM_TOKEN_BUDGETS",
+        {"categorize_and_summarize_email": 50, "summarize_conversation": 0},
+    )
+    reset_budget_stats()
+    thread = (
+        "Sounds good.\nSee you then.\n\nOn Mon, Jane wrote:\n>"
+        + " previous message" * 100
+    )
+
+    assert (
+        prepare_email_body(thread, "categorize_and_summarize_email")
+        == "Sounds good.\nSee you then."
+    )
+    assert (
+        prepare_email_body(thread, "summarize_conversation", keep_thread=True) == thread
+    )
+
+    stats = get_budget_stats()
+    assert stats["categorize_and_summarize_email"]["emails"] == 1
+    assert stats["categorize_and_summarize_email"]["tokens_saved"] > 400
+    assert stats["summarize_conversation"]["tokens_saved"] == 0
@@ -0,0 +1,78 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from aomail.ingestion.executor import CallLimit, IngestionExecutor
+
+
+def test_per_user_and_provider_caps():
+    executor = IngestionExecutor(max_workers=4, max_per_user=1, max_per_provider=2)
+    release = threading.Event()
+    try:
+        futures = [
+            executor.submit(user_id, "google", release.wait) for user_id in (1, 1, 2, 3)
+        ]
+        metrics = executor.get_metrics()
+        assert metrics["running"] == 2
+        assert metrics["running_per_user"] == {1: 1, 2: 1}
+        assert metrics["running_per_provider"] == {"google": 2}
+        assert metrics["pending_per_user"] == {1: 1, 3: 1}
+        assert executor.get_saturated_users() == {1, 2, 3}
+    finally:
+        release.set()
+        executor.shutdown(wait=True)
+
+    assert all(future.result() for future in futures)
+    assert executor.get_metrics()["running"] == 0
+
+
+def test_users_are_served_round_robin():
+    executor = IngestionExecutor(max_workers=1, max_per_user=1, max_per_provider=1)
+    release = threading.Event()
+    order = []
+    try:
+        executor.submit(0, "google", release.wait)
+        for user_id, index in ((1, 0), (1, 1), (1, 2), (2, 0), (2, 1)):
+            executor.submit(user_id, "google", order.append, (user_id, index))
+    finally:
+        release.set()
+        executor.shutdown(wait=True)
+
+    assert order == [(1, 0), (2, 0), (1, 1), (2, 1), (1, 2)]
+
+
+def test_exceptions_are_set_on_the_future():
+    executor = IngestionExecutor(max_workers=1, max_per_user=1, max_per_provider=1)
+    future = executor.submit(1, "google", int, "not a number")
+    executor.shutdown(wait=True)
+
+    assert isinstance(future.exception(), ValueError)
+
+
+def test_call_limit_caps_the_calls_of_all_pools():
+    limit = CallLimit(limit=2)
+    release = threading.Event()
+    pools = [ThreadPoolExecutor(max_workers=2) for _ in range(2)]
+    executor = IngestionExecutor(max_workers=2, max_per_user=2, max_per_provider=2)
+    try:
+        futures = [pool.submit(limit.run, release.wait) for pool in pools for _ in "ab"]
+        futures += [
+            executor.submit(user_id, "google", limit.run, release.wait)
+            for user_id in (1, 2)
+        ]
+        while limit.get_metrics()["waiting"] < 4:
+            release.wait(0.01)
+
+        assert limit.get_metrics() == {
+            "limit": 2,
+            "running": 2,
+            "waiting": 4,
+            "max_waiting": 4,
+        }
+    finally:
+        release.set()
+        executor.shutdown(wait=True)
+        for pool in pools:
+            pool.shutdown(wait=True)
+
+    assert all(future.result() for future in futures)
+    metrics = limit.get_metrics()
+    assert metrics["running"] == metrics["waiting"] == 0
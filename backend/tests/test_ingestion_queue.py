@@ -0,0 +1,150 @@
+import pytest
+import threading
+from datetime import timedelta
+from django.db import connection
+from django.utils import timezone
+from aomail.constants import (
+    INGESTION_JOB_DONE,
+    INGESTION_JOB_FAILED,
+    INGESTION_JOB_PENDING,
+    INGESTION_JOB_RUNNING,
+)
+from aomail.ingestion.queue import (
+    claim_jobs,
+    complete_job,
+    enqueue_email,
+    enqueue_emails,
+    fail_job,
+    get_coalescing_stats,
+    release_expired_jobs,
+)
+from aomail.models import Category, Email, IngestionJob, Sender, SocialAPI
+
+
+@pytest.mark.django_db
+def test_claim_and_complete_job(social_api: SocialAPI):
+    job = enqueue_email(social_api, "email_id")
+    assert job.status == INGESTION_JOB_PENDING
+
+    claimed = claim_jobs("worker-1", 10)
+    assert [claimed_job.id for claimed_job in claimed] == [job.id]
+    assert claimed[0].status == INGESTION_JOB_RUNNING
+    assert claimed[0].attempts == 1
+
+    # already claimed jobs are not handed to another worker
+    assert claim_jobs("worker-2", 10) == []
+
+    complete_job(claimed[0])
+    job.refresh_from_db()
+    assert job.status == INGESTION_JOB_DONE
+
+
+@pytest.mark.django_db
+def test_fail_job_retries_with_backoff(social_api: SocialAPI):
+    enqueue_email(social_api, "email_id")
+    job = claim_jobs("worker-1", 1)[0]
+
+    fail_job(job, "provider unavailable")
+    job.refresh_from_db()
+    assert job.status == INGESTION_JOB_PENDING
+    assert job.run_after > timezone.now()
+    assert job.last_error == "provider unavailable"
+    assert claim_jobs("worker-1", 1) == []
+
+    job.attempts = job.max_attempts
+    job.locked_by = "worker-1"
+    job.save()
+    fail_job(job, "provider unavailable")
+    job.refresh_from_db()
+    assert job.status == INGESTION_JOB_FAILED
+
+
+@pytest.mark.django_db
+def test_expired_jobs_are_reclaimed(social_api: SocialAPI):
+    enqueue_email(social_api, "email_id")
+    job = claim_jobs("worker-1", 1)[0]
+    IngestionJob.objects.filter(id=job.id).update(
+        locked_until=timezone.now() - timedelta(seconds=1)
+    )
+
+    reclaimed = claim_jobs("worker-2", 1)
+    assert [reclaimed_job.id for reclaimed_job in reclaimed] == [job.id]
+    assert reclaimed[0].attempts == 2
+
+    # the first worker lost the lock and can no longer complete the job
+    complete_job(job)
+    job.refresh_from_db()
+    assert job.status == INGESTION_JOB_RUNNING
+
+    IngestionJob.objects.filter(id=job.id).update(
+        attempts=job.max_attempts,
+        locked_until=timezone.now() - timedelta(seconds=1),
+    )
+    assert release_expired_jobs() == 1
+    job.refresh_from_db()
+    assert job.status == INGESTION_JOB_FAILED
+
+
+@pytest.mark.django_db
+def test_enqueue_emails_skips_known_emails(social_api: SocialAPI):
+    enqueue_email(social_api, "queued_id")
+    Email.objects.create(
+        social_api=social_api,
+        user=social_api.user,
+        provider_id="stored_id",
+        sender=Sender.objects.create(name="sender", email="sender@example.com"),
+        category=Category.objects.create(name="category", user=social_api.user),
+    )
+
+    jobs = enqueue_emails(social_api, ["stored_id", "queued_id", "new_id", "new_id"])
+    assert [job.email_id for job in jobs] == ["new_id"]
+
+
+@pytest.mark.django_db
+def test_notifications_are_coalesced(social_api: SocialAPI):
+    job = enqueue_email(social_api)
+    assert job.run_after > timezone.now()
+    assert enqueue_email(social_api).id == job.id
+    assert enqueue_email(social_api).id == job.id
+
+    job.refresh_from_db()
+    assert job.coalesced_count == 2
+    assert get_coalescing_stats() == {"notifications": 3, "folded": 2, "sync_jobs": 1}
+
+    # once claimed, a new notification creates a new job
+    IngestionJob.objects.filter(id=job.id).update(run_after=timezone.now())
+    assert [claimed.id for claimed in claim_jobs("worker-1", 10)] == [job.id]
+    assert enqueue_email(social_api).id != job.id
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_notifications_are_coalesced(social_api: SocialAPI):
+    barrier = threading.Barrier(4)
+    job_ids = []
+
+    def notify():
+        try:
+            barrier.wait()
+            job_ids.append(enqueue_email(social_api).id)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=notify) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(job_ids)) == 1
+    job = IngestionJob.objects.get(social_api=social_api)
+    assert job.coalesced_count == 3
+
+
+@pytest.mark.django_db
+def test_claim_jobs_caps_jobs_per_user(social_api: SocialAPI):
+    enqueue_emails(social_api, ["id_1", "id_2", "id_3"])
+
+    claimed = claim_jobs("worker-1", 10, max_per_user=2)
+    assert len(claimed) == 2
+    assert claim_jobs("worker-2", 10, exclude_user_ids={social_api.user_id}) == []
+    assert len(claim_jobs("worker-2", 10)) == 1
@@ -0,0 +1,69 @@
+import json
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from aomail.ingestion.timing import (
+    get_stage_histograms,
+    read_stage_durations,
+    reset_stage_histograms,
+    stage_context,
+    stage_timer,
+)
+from aomail.utils.metrics import percentile
+
+
+def test_stage_timer_records_histograms(caplog):
+    reset_stage_histograms()
+    with stage_context(email_provider="google"):
+        with stage_timer("fetch"):
+            pass
+        with pytest.raises(ValueError):
+            with stage_timer("llm_categorize", llm_model="model"):
+                raise ValueError
+
+    histograms = get_stage_histograms()
+    assert histograms[("fetch", "google", None)]["count"] == 1
+    assert histograms[("llm_categorize", "google", "model")]["errors"] == 1
+
+    records = [record for record in caplog.records if hasattr(record, "stage")]
+    assert [(record.stage, record.status) for record in records] == [
+        ("fetch", "ok"),
+        ("llm_categorize", "error"),
+    ]
+    assert records[1].email_provider == "google"
+
+
+def test_percentile():
+    values = [float(value) for value in range(1, 101)]
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([], 50) == 0.0
+
+
+def test_ingest_profile_command(tmp_path):
+    log_file = tmp_path / "backend.log"
+    lines = [
+        {
+            "asctime": "2025-01-01 10:00:00",
+            "message": "Ingestion stage fetch took 10.0 ms",
+            "stage": "fetch",
+            "duration_ms": duration_ms,
+            "email_provider": "google",
+            "llm_model": None,
+        }
+        for duration_ms in range(1, 101)
+    ]
+    log_file.write_text(
+        "\n".join([json.dumps(line) for line in lines] + ['{"message": "other"}'])
+    )
+
+    durations = read_stage_durations(str(log_file))
+    assert len(durations[("fetch", "google", None)]) == 100
+
+    out = StringIO()
+    call_command(
+        "ingest_profile", "--minutes", "0", "--log-file", str(log_file), stdout=out
+    )
+    assert "fetch" in out.getvalue()
+    assert "95.0" in out.getvalue()
@@ -0,0 +1,39 @@
+import threading
+from aomail.ai_providers.clients import close_clients, get_client
+
+
+class FakeClient:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_clients_are_created_once_per_provider_and_model():
+    close_clients()
+    created = []
+
+    def factory():
+        created.append(FakeClient())
+        return created[-1]
+
+    clients = []
+    threads = [
+        threading.Thread(
+            target=lambda: clients.append(get_client("fake", None, factory))
+        )
+        for _ in range(10)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1
+    assert all(client is created[0] for client in clients)
+    assert get_client("fake", "model", factory) is not created[0]
+
+    close_clients()
+    assert all(client.closed for client in created)
+    assert get_client("fake", None, factory) is created[-1]
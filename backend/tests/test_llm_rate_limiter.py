@@ -0,0 +1,126 @@
+import asyncio
+import pytest
+from aomail.ai_providers import rate_limiter
+from aomail.ai_providers.rate_limiter import (
+    RateLimitedError,
+    RateLimiter,
+    async_call,
+    call,
+    get_rate_limiter_stats,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeResponse:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class FakeStatusError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = FakeResponse(headers or {})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    monkeypatch.setattr(rate_limiter, "_limiters", {})
+    return clock
+
+
+def test_requests_wait_for_the_request_bucket(clock):
+    rate_limiter._limiters[("fake", "model")] = RateLimiter(rpm=60, tpm=1_000_000)
+
+    for _ in range(61):
+        call("fake", "model", 10, lambda: "ok", lambda response: 10)
+
+    # 60 requests fit in the bucket, the 61st waits for one second of refill
+    assert sum(clock.sleeps) == pytest.approx(1.0)
+    stats = get_rate_limiter_stats()["fake/model"]
+    assert stats["requests"] == 61
+    assert stats["wait_max"] == pytest.approx(1.0)
+
+
+def test_token_bucket_is_corrected_with_the_real_usage(clock):
+    rate_limiter._limiters[("fake", "model")] = RateLimiter(rpm=1000, tpm=600)
+
+    call("fake", "model", 100, lambda: "ok", lambda response: 600)
+    call("fake", "model", 60, lambda: "ok", lambda response: 60)
+
+    # the first request used the whole bucket: 60 tokens take 6 seconds to refill
+    assert sum(clock.sleeps) == pytest.approx(6.0)
+
+
+def test_throttled_request_honours_retry_after_and_slows_down(clock):
+    attempts = []
+
+    def request():
+        attempts.append(clock.now)
+        if len(attempts) == 1:
+            raise FakeStatusError(429, {"retry-after": "7"})
+        return "ok"
+
+    assert call("fake", "model", 10, request, lambda response: 10) == "ok"
+
+    assert attempts[1] - attempts[0] == pytest.approx(7.0)
+    stats = get_rate_limiter_stats()["fake/model"]
+    assert stats["throttled"] == 1
+    assert stats["requests"] == 1
+    assert stats["rpm"] < rate_limiter.LLM_DEFAULT_RPM
+
+
+def test_server_errors_are_retried_then_raised(clock):
+    def request():
+        raise FakeStatusError(503)
+
+    with pytest.raises(RateLimitedError):
+        call("fake", "model", 10, request, lambda response: 10)
+
+    stats = get_rate_limiter_stats()["fake/model"]
+    assert stats["server_errors"] == rate_limiter.LLM_RATE_LIMIT_MAX_RETRIES + 1
+
+
+def test_other_errors_are_not_retried(clock):
+    attempts = []
+
+    def request():
+        attempts.append(1)
+        raise FakeStatusError(400)
+
+    with pytest.raises(FakeStatusError):
+        call("fake", "model", 10, request, lambda response: 10)
+    assert len(attempts) == 1
+
+
+def test_async_call_retries_throttled_requests(clock, monkeypatch):
+    async def fake_sleep(seconds):
+        clock.sleep(seconds)
+
+    monkeypatch.setattr(rate_limiter.asyncio, "sleep", fake_sleep)
+    attempts = []
+
+    async def request():
+        attempts.append(clock.now)
+        if len(attempts) == 1:
+            raise FakeStatusError(429, {"retry-after": "2"})
+        return "ok"
+
+    result = asyncio.run(async_call("fake", "model", 10, request, lambda response: 10))
+
+    assert result == "ok"
+    assert attempts[1] - attempts[0] == pytest.approx(2.0)
@@ -0,0 +1,57 @@
+import pytest
+from aomail.ai_providers import response_cache
+from aomail.ai_providers.response_cache import (
+    cached_llm_call,
+    clear_llm_cache,
+    delete_expired_entries,
+    get_llm_cache_stats,
+)
+from aomail.models import LLMCacheEntry
+
+
+calls = []
+
+
+@cached_llm_call()
+def review(description: str, llm_provider: str = "google", llm_model: str = None):
+    calls.append(description)
+    return {"valid": True, "tokens_input": 50, "tokens_output": 5}
+
+
+def test_repeated_calls_are_free():
+    clear_llm_cache()
+    calls.clear()
+
+    first = review("I am a developer")
+    first.pop("tokens_input")
+    assert review("I am a developer", llm_provider="google") == {
+        "valid": True,
+        "tokens_input": 0,
+        "tokens_output": 0,
+    }
+    review("I am a developer", "openai")
+
+    assert calls == ["I am a developer", "I am a developer"]
+    assert get_llm_cache_stats() == {
+        "review": {"memory_hits": 1, "db_hits": 0, "misses": 2}
+    }
+
+
+@pytest.mark.django_db
+def test_responses_are_shared_through_the_database(monkeypatch):
+    monkeypatch.setattr(response_cache, "LLM_CACHE_DB", True)
+    clear_llm_cache()
+    calls.clear()
+
+    review("I am a designer")
+    assert LLMCacheEntry.objects.get().function == "review"
+
+    # another process only sees the database
+    clear_llm_cache()
+    assert review("I am a designer")["tokens_input"] == 0
+    assert calls == ["I am a designer"]
+    assert get_llm_cache_stats()["review"]["db_hits"] == 1
+
+    assert delete_expired_entries() == 0
+    LLMCacheEntry.objects.update(expires_at="2000-01-01T00:00:00Z")
+    assert delete_expired_entries() == 1
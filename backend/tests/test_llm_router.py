@@ -0,0 +1,141 @@
+import asyncio
+import httpx
+import pytest
+from aomail.ai_providers import router
+from aomail.ai_providers.router import (
+    get_router_stats,
+    is_available,
+    is_provider_error,
+    record_request,
+    reset_router,
+    routed_llm_call,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(router, "time", clock)
+    monkeypatch.setattr(router, "LLM_FALLBACK_PROVIDER", "openai")
+    monkeypatch.setattr(router, "LLM_FALLBACK_MODEL", "gpt-4o-mini")
+    monkeypatch.setattr(router, "LLM_ROUTER_MIN_REQUESTS", 4)
+    monkeypatch.setattr(router, "LLM_ROUTER_COOLDOWN", 60)
+    reset_router()
+    yield clock
+    reset_router()
+
+
+def open_circuit(provider: str):
+    for _ in range(4):
+        record_request(provider, 1.0, True)
+
+
+@routed_llm_call
+def summarize(text: str, llm_provider: str = "google", llm_model: str = None) -> dict:
+    if llm_provider == "google":
+        raise ConnectionError("google is down")
+    return {"provider": llm_provider, "model": llm_model}
+
+
+def test_errors_open_the_circuit_then_a_probe_closes_it(clock):
+    record_request("google", 1.0, False)
+    assert is_available("google")
+
+    open_circuit("google")
+    assert not is_available("google")
+    assert get_router_stats()["google"]["state"] == "open"
+
+    clock.now += 61
+    assert is_available("google")  # probe
+    assert not is_available("google")  # a single probe at a time
+    record_request("google", 1.0, False)
+    assert is_available("google")
+    assert get_router_stats()["google"]["trips"] == 1
+
+
+def test_slow_provider_opens_the_circuit(clock):
+    for _ in range(4):
+        record_request("google", router.LLM_ROUTER_MAX_P95_LATENCY + 1, False)
+    assert not is_available("google")
+
+
+def test_failed_call_falls_back_only_when_allowed(clock):
+    with pytest.raises(ConnectionError):
+        summarize("text", "google")
+
+    assert summarize("text", "google", allow_fallback=True) == {
+        "provider": "openai",
+        "model": "gpt-4o-mini",
+    }
+    assert get_router_stats()["google"]["fallbacks"] == 1
+
+
+class StatusError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+def test_only_provider_errors_are_provider_errors():
+    assert is_provider_error(StatusError(429))
+    assert is_provider_error(StatusError(503))
+    assert is_provider_error(httpx.ConnectTimeout("timeout"))
+    assert not is_provider_error(StatusError(400))
+    assert not is_provider_error(ValueError("invalid JSON"))
+
+    try:
+        try:
+            raise httpx.ReadTimeout("timeout")
+        except httpx.ReadTimeout as e:
+            raise RuntimeError("request failed") from e
+    except RuntimeError as e:
+        assert is_provider_error(e)
+
+
+def test_rejected_call_does_not_fall_back(clock):
+    calls = []
+
+    @routed_llm_call
+    def categorize(llm_provider: str, llm_model: str = None) -> dict:
+        calls.append(llm_provider)
+        raise StatusError(400)
+
+    with pytest.raises(StatusError):
+        categorize("google", allow_fallback=True)
+
+    assert calls == ["google"]
+    assert get_router_stats()["google"]["fallbacks"] == 0
+
+
+def test_open_circuit_sends_calls_to_the_fallback(clock):
+    calls = []
+
+    @routed_llm_call
+    def categorize(llm_provider: str, llm_model: str = None) -> dict:
+        calls.append(llm_provider)
+        return {}
+
+    open_circuit("google")
+    categorize("google", allow_fallback=True)
+    categorize("google")
+
+    assert calls == ["openai", "google"]
+
+
+def test_async_functions_are_routed(clock):
+    @routed_llm_call
+    async def categorize(llm_provider: str, llm_model: str = None) -> dict:
+        if llm_provider == "google":
+            raise ConnectionError("google is down")
+        return {"provider": llm_provider}
+
+    result = asyncio.run(categorize("google", allow_fallback=True))
+    assert result == {"provider": "openai"}
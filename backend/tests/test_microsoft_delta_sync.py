@@ -0,0 +1,119 @@
+from datetime import datetime, timezone
+import pytest
+from aomail.email_providers.microsoft import email_operations
+from aomail.models import SocialAPI
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, data: dict = None):
+        self.status_code = status_code
+        self.data = data or {}
+        self.text = ""
+
+    def json(self) -> dict:
+        return self.data
+
+
+class FakeGraph:
+    """Minimal Graph API returning the responses of the delta query by URL."""
+
+    def __init__(self, responses: dict):
+        self.responses = responses
+        self.urls = []
+
+    def get(self, url: str, headers: dict):
+        self.urls.append(url)
+        return self.responses.get(url) or self.responses["initial"]
+
+
+START_DATE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def graph(monkeypatch) -> FakeGraph:
+    graph = FakeGraph({})
+    monkeypatch.setattr(email_operations.requests, "get", graph.get)
+    monkeypatch.setattr(
+        email_operations, "refresh_access_token", lambda social_api: "access_token"
+    )
+    return graph
+
+
+@pytest.mark.django_db
+def test_get_new_email_ids_follows_the_pages_of_the_delta(
+    graph: FakeGraph, social_api: SocialAPI
+):
+    graph.responses.update(
+        {
+            "initial": FakeResponse(
+                200,
+                {
+                    "value": [{"id": "id1"}, {"id": "id2"}],
+                    "@odata.nextLink": "page2",
+                },
+            ),
+            "page2": FakeResponse(
+                200,
+                {
+                    "value": [{"id": "id2"}, {"id": "id3", "@removed": {}}],
+                    "@odata.deltaLink": "delta1",
+                },
+            ),
+        }
+    )
+
+    sync_state = email_operations.get_new_email_ids(social_api, START_DATE)
+
+    assert sync_state["email_ids"] == ["id1", "id2"]
+    assert sync_state["delta_link"] == "delta1"
+    assert graph.urls[1] == "page2"
+    social_api.refresh_from_db()
+    assert social_api.delta_link is None
+
+    # the delta link only moves forward once the emails are stored
+    assert email_operations.save_delta_link(social_api, sync_state)
+    assert social_api.delta_link == "delta1"
+    assert SocialAPI.objects.get(id=social_api.id).delta_link == "delta1"
+    assert not email_operations.save_delta_link(social_api, sync_state)
+
+
+@pytest.mark.django_db
+def test_get_new_email_ids_uses_the_stored_delta_link(
+    graph: FakeGraph, social_api: SocialAPI
+):
+    SocialAPI.objects.filter(id=social_api.id).update(delta_link="delta1")
+    graph.responses["delta1"] = FakeResponse(
+        200, {"value": [{"id": "id4"}], "@odata.deltaLink": "delta2"}
+    )
+
+    sync_state = email_operations.get_new_email_ids(social_api, START_DATE)
+
+    assert graph.urls == ["delta1"]
+    assert sync_state == {
+        "email_ids": ["id4"],
+        "start_delta_link": "delta1",
+        "delta_link": "delta2",
+    }
+
+
+@pytest.mark.django_db
+def test_get_new_email_ids_restarts_when_the_delta_link_expired(
+    graph: FakeGraph, social_api: SocialAPI
+):
+    SocialAPI.objects.filter(id=social_api.id).update(delta_link="expired")
+    graph.responses.update(
+        {
+            "expired": FakeResponse(410),
+            "initial": FakeResponse(
+                200, {"value": [{"id": "id1"}], "@odata.deltaLink": "delta1"}
+            ),
+        }
+    )
+
+    sync_state = email_operations.get_new_email_ids(social_api, START_DATE)
+
+    assert graph.urls[0] == "expired"
+    assert "receivedDateTime ge 2024-01-01T00:00:00Z" in graph.urls[1]
+    assert sync_state["email_ids"] == ["id1"]
+    assert email_operations.save_delta_link(social_api, sync_state)
+    assert SocialAPI.objects.get(id=social_api.id).delta_link == "delta1"
@@ -0,0 +1,153 @@
+import asyncio
+import json
+import pytest
+from aomail.ai_providers import async_llm_functions, llm_functions, rate_limiter, router
+from aomail.ai_providers.mock import client as mock_client
+from aomail.ai_providers.prompts import (
+    CATEGORIZE_AND_SUMMARIZE_EMAIL_PROMPT,
+    RELEVANCE_LIST,
+    RESPONSE_LIST,
+)
+from aomail.ai_providers.rate_limiter import RateLimitedError
+
+
+CATEGORIZATION_ARGS = {
+    "category_dict": {"Others": "Other emails"},
+    "user_description": "Developer",
+    "important_guidelines": "",
+    "informative_guidelines": "",
+    "useless_guidelines": "",
+}
+
+
+@pytest.fixture(autouse=True)
+def mock_provider(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(mock_client.time, "sleep", sleeps.append)
+    monkeypatch.setattr(rate_limiter, "_limiters", {})
+    monkeypatch.setattr(router, "LLM_FALLBACK_PROVIDER", "")
+    router.reset_router()
+    mock_client.reset_mock()
+    yield sleeps
+    router.reset_router()
+
+
+def set_error_rates(monkeypatch, rate_limit=0.0, malformed_json=0.0):
+    monkeypatch.setattr(mock_client, "LLM_MOCK_RATE_LIMIT_ERROR_RATE", rate_limit)
+    monkeypatch.setattr(mock_client, "LLM_MOCK_MALFORMED_JSON_RATE", malformed_json)
+
+
+def assert_categorization(result: dict):
+    assert result["topic"] == "Others"
+    assert result["response"] in RESPONSE_LIST
+    assert result["relevance"] in RELEVANCE_LIST
+    assert result["importance"] in ("important", "informative", "useless")
+    assert set(result["flags"]) == {
+        "spam",
+        "scam",
+        "newsletter",
+        "notification",
+        "meeting",
+    }
+    assert result["summary"]["one_line"] and result["summary"]["short"]
+
+
+def test_categorize_returns_a_valid_response_after_the_simulated_latency(mock_provider):
+    result = llm_functions.categorize_and_summarize_email(
+        CATEGORIZE_AND_SUMMARIZE_EMAIL_PROMPT,
+        "Budget review",
+        "Can we meet tomorrow?",
+        sender="jane@example.com",
+        llm_provider="mock",
+        **CATEGORIZATION_ARGS,
+    )
+
+    assert_categorization(result)
+    assert result["tokens_input"] > 0 and result["tokens_output"] > 0
+    assert sum(mock_provider) > 0
+
+
+def test_batch_and_enrichment_match_the_requested_emails():
+    emails = [
+        {"subject": f"Subject {i}", "sender": "a@example.com", "decoded_data": "Hello"}
+        for i in range(3)
+    ]
+    batch = llm_functions.categorize_and_summarize_emails(
+        emails, llm_provider="mock", **CATEGORIZATION_ARGS
+    )
+    enrichment = llm_functions.enrich_email(
+        "Re: Budget",
+        "Sounds good",
+        "a@example.com",
+        categories={"Others": "Other emails"},
+        language="english",
+        is_reply=True,
+        llm_provider="mock",
+        **CATEGORIZATION_ARGS,
+    )
+
+    assert [email["index"] for email in batch["emails"]] == [0, 1, 2]
+    for email in batch["emails"]:
+        assert_categorization(email)
+    assert_categorization(enrichment)
+    assert isinstance(enrichment["knowledge"]["keypoints"], dict)
+
+
+def test_responses_are_reproducible_with_the_same_seed():
+    first = llm_functions.summarize_email(
+        "Budget", "Body", "Developer", {}, "english", llm_provider="mock"
+    )
+    mock_client.reset_mock()
+    second = llm_functions.summarize_email(
+        "Budget", "Body", "Developer", {}, "english", llm_provider="mock"
+    )
+
+    assert first == second
+
+
+def test_injected_rate_limits_go_through_the_rate_limiter(monkeypatch):
+    set_error_rates(monkeypatch, rate_limit=1.0)
+
+    with pytest.raises(RateLimitedError):
+        llm_functions.get_answer({}, "When?", "english", llm_provider="mock")
+
+    stats = rate_limiter.get_rate_limiter_stats()["mock/mock-1"]
+    assert stats["throttled"] == rate_limiter.LLM_RATE_LIMIT_MAX_RETRIES + 1
+
+
+def test_injected_malformed_json_fails_the_parsing(monkeypatch):
+    set_error_rates(monkeypatch, malformed_json=1.0)
+
+    with pytest.raises(json.JSONDecodeError):
+        llm_functions.get_answer({}, "When?", "english", llm_provider="mock")
+
+
+def test_async_functions_and_streaming_recognize_the_prompt(monkeypatch):
+    async def no_sleep(seconds):
+        pass
+
+    monkeypatch.setattr(mock_client.asyncio, "sleep", no_sleep)
+
+    async def run():
+        email = await async_llm_functions.generate_email(
+            "{agent_settings}{length}{formality}{language}{input_data}{signature_instruction}",
+            "Invite the team",
+            "short",
+            "formal",
+            "english",
+            {},
+            llm_provider="mock",
+        )
+        chunks = [
+            chunk
+            async for chunk in mock_client.async_stream_prompt_text(
+                CATEGORIZE_AND_SUMMARIZE_EMAIL_PROMPT
+            )
+        ]
+        return email, chunks
+
+    email, chunks = asyncio.run(run())
+
+    assert email["subject"] and email["body"].startswith("<p>")
+    assert_categorization(json.loads("".join(chunk["text"] for chunk in chunks)))
+    assert chunks[-1]["tokens_output"] > 0
@@ -0,0 +1,41 @@
+import json
+import pytest
+from rest_framework.test import APIRequestFactory, force_authenticate
+from aomail.constants import START_PLAN
+from aomail.controllers import preferences
+from aomail.controllers.preferences import user_llm_settings
+from aomail.models import Preference, Subscription
+
+
+@pytest.fixture
+def preference(user) -> Preference:
+    Subscription.objects.create(user=user, plan=START_PLAN, is_trial=False)
+    return Preference.objects.create(user=user)
+
+
+def put_llm_settings(user, body: dict):
+    request = APIRequestFactory().put(
+        "/", json.dumps(body), content_type="application/json"
+    )
+    force_authenticate(request, user=user)
+    return user_llm_settings(request)
+
+
+@pytest.mark.django_db
+def test_llm_provider_must_be_registered(user, preference: Preference):
+    assert put_llm_settings(user, {"llmProvider": "openai"}).status_code == 200
+    assert put_llm_settings(user, {"llmProvider": "unknown"}).status_code == 400
+
+    preference.refresh_from_db()
+    assert preference.llm_provider == "openai"
+
+
+@pytest.mark.django_db
+def test_mock_llm_provider_requires_the_flag(monkeypatch, user, preference: Preference):
+    monkeypatch.setattr(preferences, "LLM_MOCK_ENABLED", False)
+    assert put_llm_settings(user, {"llmProvider": "mock"}).status_code == 400
+
+    monkeypatch.setattr(preferences, "LLM_MOCK_ENABLED", True)
+    assert put_llm_settings(user, {"llmProvider": "mock"}).status_code == 200
+    preference.refresh_from_db()
+    assert preference.llm_provider == "mock"
@@ -0,0 +1,159 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+import pytest
+from aomail.ai_providers import async_llm_functions, rate_limiter
+from aomail.ai_providers.anthropic import client as claude
+from aomail.ai_providers.google import client as gemini
+from aomail.ai_providers.openai import client as openai_client
+from aomail.ai_providers.prompts import CATEGORIZE_AND_SUMMARIZE_EMAIL_PROMPT
+from aomail.ai_providers.utils import update_tokens_stats
+from aomail.models import Statistics
+
+
+CATEGORIZATION = '{"topic": "Others", "importance": "useless"}'
+USER_CONTEXT = {
+    "category_dict": {"Others": "Other emails"},
+    "user_description": "Developer at Aomail",
+    "important_guidelines": "Emails from clients",
+    "informative_guidelines": "Newsletters",
+    "useless_guidelines": "Ads",
+}
+
+
+class FakeMessages:
+    def __init__(self):
+        self.requests = []
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        return SimpleNamespace(
+            content=[SimpleNamespace(text=CATEGORIZATION)],
+            usage=SimpleNamespace(
+                input_tokens=40,
+                output_tokens=20,
+                cache_read_input_tokens=900,
+                cache_creation_input_tokens=0,
+            ),
+        )
+
+
+@pytest.fixture(autouse=True)
+def limiters(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "_limiters", {})
+
+
+def categorize(subject: str, body: str, llm_model: str = None) -> dict:
+    return claude.categorize_and_summarize_email(
+        CATEGORIZE_AND_SUMMARIZE_EMAIL_PROMPT,
+        subject,
+        body,
+        sender="jane@example.com",
+        llm_model=llm_model,
+        **USER_CONTEXT,
+    )
+
+
+def test_anthropic_caches_the_prefix_shared_by_the_emails_of_a_user(monkeypatch):
+    messages = FakeMessages()
+    monkeypatch.setattr(
+        claude, "get_anthropic_client", lambda: SimpleNamespace(messages=messages)
+    )
+
+    result = categorize("Invoice", "Please find the invoice attached")
+    categorize("Meeting", "Can we meet on Monday?")
+
+    first, second = (request["messages"][0]["content"] for request in messages.requests)
+    assert first[0]["cache_control"] == {"type": "ephemeral"}
+    assert first[0]["text"] == second[0]["text"]
+    assert "Developer at Aomail" in first[0]["text"]
+    assert "Invoice" not in first[0]["text"] and "Invoice" in first[1]["text"]
+    assert result["tokens_input"] == 940
+    assert result["tokens_cache_read"] == 900
+
+
+def test_async_functions_pass_the_prefix_to_caching_providers(monkeypatch):
+    prompts = []
+
+    async def async_get_prompt_text(formatted_prompt, model=None, cached_prefix=""):
+        prompts.append((formatted_prompt, cached_prefix))
+        return {
+            "text": CATEGORIZATION,
+            "tokens_input": 1000,
+            "tokens_output": 20,
+            "tokens_cache_read": 800,
+        }
+
+    monkeypatch.setattr(openai_client, "async_get_prompt_text", async_get_prompt_text)
+
+    result = asyncio.run(
+        async_llm_functions.categorize_and_summarize_email(
+            CATEGORIZE_AND_SUMMARIZE_EMAIL_PROMPT,
+            "Invoice",
+            "Please find the invoice attached",
+            sender="jane@example.com",
+            llm_provider="openai",
+            **USER_CONTEXT,
+        )
+    )
+
+    formatted_prompt, cached_prefix = prompts[0]
+    assert cached_prefix and formatted_prompt.startswith(cached_prefix)
+    assert "Please find the invoice attached" not in cached_prefix
+    assert result["tokens_cache_read"] == 800
+
+
+def test_gemini_context_cache_is_created_once_per_prefix(monkeypatch):
+    created = []
+
+    def create(model: str, contents: list, ttl):
+        created.append(contents[0])
+        time.sleep(0.05)
+        return SimpleNamespace(model=model)
+
+    monkeypatch.setattr(gemini, "GEMINI_CONTEXT_CACHE_MIN_TOKENS", 1)
+    monkeypatch.setattr(gemini, "_context_caches", {})
+    monkeypatch.setattr(gemini, "_context_cache_creation_locks", {})
+    monkeypatch.setattr(gemini.genai, "configure", lambda api_key: None)
+    monkeypatch.setattr(
+        gemini.genai.caching.CachedContent, "create", staticmethod(create)
+    )
+    monkeypatch.setattr(
+        gemini.genai.GenerativeModel,
+        "from_cached_content",
+        staticmethod(lambda cached_content: cached_content),
+    )
+
+    prefixes = ["shared prefix"] * 8 + ["other prefix"] * 8
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        models = list(
+            executor.map(
+                lambda prefix: gemini.get_context_cache_model("gemini", prefix),
+                prefixes,
+            )
+        )
+
+    assert sorted(created) == ["other prefix", "shared prefix"]
+    assert len({id(model) for model in models}) == 2
+
+
+@pytest.mark.django_db
+def test_cache_read_tokens_are_counted_separately(user):
+    Statistics.objects.get_or_create(user=user)
+
+    result = update_tokens_stats(
+        user,
+        {
+            "topic": "Others",
+            "tokens_input": 1000,
+            "tokens_output": 20,
+            "tokens_cache_read": 800,
+        },
+    )
+    update_tokens_stats(user, {"tokens_input": 100, "tokens_output": 10})
+
+    statistics = Statistics.objects.get(user=user)
+    assert result == {"topic": "Others"}
+    assert statistics.nb_tokens_input == 1100
+    assert statistics.nb_tokens_cache_read == 800
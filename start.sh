@@ -13,11 +13,14 @@ export API_BASE_URL="http://localhost:8010/aomail/";
 
 if [ $NODE_ENV = "development" ]; then
     echo "Starting in development mode"
-    docker compose -p ${ENV}_project up --build -d frontend_dev backend_dev
+    docker compose -p ${ENV}_project up --build -d frontend_dev backend_dev ingest_worker_dev
     container_name="${ENV}_project-backend_dev-1"
 elif [ $NODE_ENV = "production" ]; then
     echo "Starting in production mode"
-    docker compose -p ${ENV}_prod up --build -d frontend_prod backend_prod
+    # the log file is bind mounted: Docker would create a directory if it does not exist
+    mkdir -p /home/prod/prod/backend
+    touch /home/prod/prod/backend/backend.log
+    docker compose -p ${ENV}_prod up --build -d frontend_prod backend_prod ingest_worker_prod
     container_name="${ENV}_prod-backend_prod-1"
 fi
 